@@ -0,0 +1,79 @@
+# Arquivo: agendador.py
+# Data: 19/10/2026
+# Descrição: Agendador simples de tarefas periódicas em threads daemon (uma thread por tarefa, uma vez por processo)
+
+import logging
+import threading
+import time
+from datetime import datetime
+
+logger = logging.getLogger(__name__)
+
+_tarefas = {}
+_lock = threading.Lock()
+
+def _executar_periodicamente(tarefa):
+    """Laço da thread: espera o atraso inicial e executa a função a cada intervalo"""
+    if tarefa['parar'].wait(tarefa['atraso_inicial']):
+        return
+    while True:
+        inicio = time.monotonic()
+        try:
+            tarefa['funcao']()
+            tarefa['erro'] = None
+        except Exception as e:
+            tarefa['erro'] = str(e)
+            logger.exception("Erro na tarefa agendada %s", tarefa['nome'])
+        tarefa['ultima_execucao'] = datetime.now()
+        tarefa['execucoes'] += 1
+        tarefa['duracao'] = time.monotonic() - inicio
+        if tarefa['parar'].wait(tarefa['intervalo']):
+            return
+
+def agendar(nome, intervalo, funcao, atraso_inicial=0):
+    """
+    Agenda `funcao` para rodar a cada `intervalo` segundos em uma thread daemon.
+    Chamadas repetidas com o mesmo nome são ignoradas (o Streamlit reexecuta os scripts a cada interação).
+    """
+    with _lock:
+        if nome in _tarefas:
+            return False
+        tarefa = {
+            'nome': nome,
+            'intervalo': intervalo,
+            'atraso_inicial': atraso_inicial,
+            'funcao': funcao,
+            'parar': threading.Event(),
+            'ultima_execucao': None,
+            'execucoes': 0,
+            'duracao': None,
+            'erro': None,
+        }
+        tarefa['thread'] = threading.Thread(
+            target=_executar_periodicamente, args=(tarefa,), name=f"agendador-{nome}", daemon=True
+        )
+        _tarefas[nome] = tarefa
+        tarefa['thread'].start()
+        return True
+
+def cancelar(nome):
+    """Interrompe uma tarefa agendada"""
+    with _lock:
+        tarefa = _tarefas.pop(nome, None)
+    if tarefa:
+        tarefa['parar'].set()
+
+def listar_tarefas():
+    """Situação das tarefas agendadas (para exibição no diagnóstico)"""
+    with _lock:
+        return [
+            {
+                'tarefa': t['nome'],
+                'intervalo_s': t['intervalo'],
+                'execucoes': t['execucoes'],
+                'ultima_execucao': t['ultima_execucao'].strftime('%d/%m/%Y %H:%M:%S') if t['ultima_execucao'] else None,
+                'duracao_s': round(t['duracao'], 2) if t['duracao'] is not None else None,
+                'erro': t['erro'],
+            }
+            for t in _tarefas.values()
+        ]
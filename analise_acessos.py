@@ -0,0 +1,174 @@
+# Arquivo: analise_acessos.py
+# Data: 19/10/2026
+# Descrição: Motor de análise do log de acessos (janelas dia/semana/mês, mapa de calor por horário,
+# distribuição por programa/ação e coortes de retenção) sobre um extrato colunar tipado em memória
+
+from datetime import timedelta
+
+import numpy as np
+import pandas as pd
+
+from config import DB_PATH, FUSO_HORARIO, agora_local
+from cache_dados import cache_consulta
+import rastreamento
+
+# O pandas localiza por nome de fuso de forma vetorizada (com o objeto ZoneInfo é linha a linha)
+FUSO_PANDAS = FUSO_HORARIO.key
+
+DIAS_EXTRATO = 366  # Janela carregada em memória; os filtros da tela recortam este extrato
+
+# Frequências aceitas nas séries e coortes -> período do pandas (semanas começam na segunda-feira)
+FREQUENCIAS = {'D': 'D', 'W': 'W-SUN', 'M': 'M'}
+
+DIAS_SEMANA = ['Seg', 'Ter', 'Qua', 'Qui', 'Sex', 'Sáb', 'Dom']
+
+def extrato_vazio():
+    """DataFrame vazio com o mesmo esquema do extrato"""
+    return pd.DataFrame({
+        'timestamp': pd.Series(dtype=f'datetime64[ns, {FUSO_PANDAS}]'),
+        'user_id': pd.Series(dtype='Int32'),
+        'nome': pd.Series(dtype='category'),
+        'empresa': pd.Series(dtype='category'),
+        'programa': pd.Series(dtype='category'),
+        'acao': pd.Series(dtype='category'),
+    })
+
+@cache_consulta('log_acessos', ttl=600, por_usuario=False, max_entries=4)
+def carregar_extrato_acessos(dias=DIAS_EXTRATO):
+    """
+    Carrega os acessos dos últimos `dias` como extrato colunar:
+    timestamp tz-aware (America/Sao_Paulo), user_id Int32 e textos como category.
+    """
+    inicio = (agora_local() - timedelta(days=dias)).strftime('%Y-%m-%d')
+    conn = rastreamento.conectar(DB_PATH)
+    try:
+        df = pd.read_sql_query("""
+            SELECT
+                la.user_id,
+                la.data_acesso,
+                COALESCE(la.hora_acesso, '00:00:00') as hora_acesso,
+                la.programa,
+                la.acao,
+                u.nome,
+                u.empresa
+            FROM log_acessos la
+            LEFT JOIN (
+                SELECT user_id, MAX(nome) as nome, MAX(empresa) as empresa
+                FROM usuarios_tab
+                GROUP BY user_id
+            ) u ON la.user_id = u.user_id
+            WHERE la.data_acesso >= ?
+        """, conn, params=(inicio,))
+    finally:
+        conn.close()
+
+    if df.empty:
+        return extrato_vazio()
+
+    # Data e hora são gravadas no horário local de São Paulo
+    timestamp = pd.to_datetime(
+        df['data_acesso'].str.slice(0, 10) + ' ' + df['hora_acesso'],
+        format='%Y-%m-%d %H:%M:%S', errors='coerce'
+    ).dt.tz_localize(FUSO_PANDAS, ambiguous='NaT', nonexistent='shift_forward')
+
+    extrato = pd.DataFrame({
+        'timestamp': timestamp,
+        'user_id': df['user_id'].astype('Int32'),
+        'nome': df['nome'].astype('category'),
+        'empresa': df['empresa'].astype('category'),
+        'programa': df['programa'].astype('category'),
+        'acao': df['acao'].astype('category'),
+    })
+    return extrato.dropna(subset=['timestamp']).sort_values('timestamp', ignore_index=True)
+
+def filtrar_extrato(df, inicio=None, fim=None, empresas=None, programas=None, acoes=None):
+    """Recorta o extrato por intervalo de datas (inclusivo) e listas de valores"""
+    mascara = np.ones(len(df), dtype=bool)
+    datas = df['timestamp'].dt.tz_localize(None)
+    if inicio is not None:
+        mascara &= (datas >= pd.Timestamp(inicio)).to_numpy()
+    if fim is not None:
+        mascara &= (datas < pd.Timestamp(fim) + pd.Timedelta(days=1)).to_numpy()
+    for coluna, valores in (('empresa', empresas), ('programa', programas), ('acao', acoes)):
+        if valores:
+            mascara &= df[coluna].isin(valores).to_numpy()
+    return df[mascara]
+
+def inicio_periodo(df, frequencia):
+    """Início do período (dia, semana ou mês) de cada acesso, em horário local sem fuso"""
+    return df['timestamp'].dt.tz_localize(None).dt.to_period(FREQUENCIAS[frequencia]).dt.start_time
+
+def serie_temporal(df, frequencia='D', inicio=None, fim=None):
+    """
+    Acessos e usuários únicos por período.
+    Períodos sem acesso dentro de [inicio, fim] aparecem com zero.
+    """
+    periodos = inicio_periodo(df, frequencia)
+    serie = (
+        pd.DataFrame({'periodo': periodos, 'user_id': df['user_id']})
+        .groupby('periodo')
+        .agg(acessos=('user_id', 'size'), usuarios_unicos=('user_id', 'nunique'))
+    )
+
+    if inicio is None and not serie.empty:
+        inicio = serie.index.min()
+    if fim is None and not serie.empty:
+        fim = serie.index.max()
+    if inicio is not None and fim is not None:
+        eixo = pd.period_range(pd.Timestamp(inicio), pd.Timestamp(fim), freq=FREQUENCIAS[frequencia]).start_time
+        serie = serie.reindex(eixo, fill_value=0)
+
+    serie.index.name = 'periodo'
+    return serie.reset_index()
+
+def mapa_calor_horario(df):
+    """Matriz dia da semana x hora do dia com a contagem de acessos"""
+    dia_semana = df['timestamp'].dt.weekday.to_numpy()
+    hora = df['timestamp'].dt.hour.to_numpy()
+    contagem = np.bincount(dia_semana * 24 + hora, minlength=7 * 24).reshape(7, 24)
+    return pd.DataFrame(contagem, index=DIAS_SEMANA, columns=range(24))
+
+def distribuicao(df, coluna, limite=None):
+    """Acessos e usuários únicos agrupados por uma coluna categórica (programa, acao, empresa, nome)"""
+    resultado = (
+        df.groupby(coluna, observed=True)
+        .agg(acessos=('user_id', 'size'), usuarios_unicos=('user_id', 'nunique'))
+        .sort_values('acessos', ascending=False)
+        .reset_index()
+    )
+    resultado[coluna] = resultado[coluna].astype(str)
+    return resultado.head(limite) if limite else resultado
+
+def coortes_retencao(df, frequencia='M'):
+    """
+    Coortes de retenção: usuários agrupados pelo período do primeiro acesso (linhas)
+    e percentual que voltou a acessar N períodos depois (colunas).
+    """
+    if df.empty:
+        return pd.DataFrame()
+
+    inicio = inicio_periodo(df, frequencia)
+    if frequencia == 'M':
+        numero = inicio.dt.year * 12 + inicio.dt.month
+    else:
+        numero = (inicio - pd.Timestamp('1970-01-05')).dt.days // {'W': 7, 'D': 1}[frequencia]
+
+    atividade = pd.DataFrame({
+        'user_id': df['user_id'].to_numpy(),
+        'inicio': inicio.to_numpy(),
+        'numero': numero.to_numpy()
+    }).dropna(subset=['user_id']).drop_duplicates(['user_id', 'numero'])
+
+    primeiro = atividade.groupby('user_id')['numero'].transform('min')
+    atividade['coorte'] = atividade['inicio'].where(atividade['numero'] == primeiro)
+    atividade['coorte'] = atividade.groupby('user_id')['coorte'].transform('first')
+    atividade['periodo'] = (atividade['numero'] - primeiro).astype(int)
+
+    tabela = atividade.pivot_table(index='coorte', columns='periodo', values='user_id', aggfunc='count', fill_value=0)
+    tamanho = tabela[0]
+    retencao = tabela.div(tamanho, axis=0).mul(100).round(1)
+    retencao.insert(0, 'usuarios', tamanho)
+    formato = {'M': '%Y-%m', 'W': '%d/%m/%Y', 'D': '%d/%m/%Y'}[frequencia]
+    retencao.index = retencao.index.strftime(formato)
+    retencao.columns = [str(c) for c in retencao.columns]
+    return retencao
@@ -0,0 +1,53 @@
+# Arquivo: comum.py
+# Data: 19/10/2026
+# Descrição: Funções compartilhadas pelos benchmarks: identificação da execução, gravação do resultado em JSON
+# e variação percentual para as comparações entre execuções
+
+import json
+import platform
+import subprocess
+import sys
+from datetime import datetime
+from pathlib import Path
+
+RAIZ = Path(__file__).resolve().parent.parent
+DIRETORIO_RESULTADOS = Path(__file__).resolve().parent / 'resultados'
+
+if str(RAIZ) not in sys.path:
+    sys.path.insert(0, str(RAIZ))
+
+def versao_codigo():
+    """Commit atual (com '+' se houver alterações locais), ou None fora de um repositório git"""
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=RAIZ,
+                                capture_output=True, text=True, check=True).stdout.strip()
+        alterado = subprocess.run(['git', 'status', '--porcelain', '--untracked-files=no'], cwd=RAIZ,
+                                  capture_output=True, text=True).stdout.strip()
+        return commit + ('+' if alterado else '')
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def identificacao():
+    """Quando, commit, versão do Python e plataforma da execução"""
+    return {
+        'quando': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+        'commit': versao_codigo(),
+        'python': platform.python_version(),
+        'plataforma': platform.platform(),
+    }
+
+def gravar_resultado(resultado, prefixo, saida=None):
+    """Grava o resultado em `saida` ou em benchmarks/resultados/<prefixo>_<data>.json. Retorna o caminho"""
+    caminho = Path(saida) if saida else DIRETORIO_RESULTADOS / f"{prefixo}_{datetime.now():%Y%m%d_%H%M%S}.json"
+    caminho.parent.mkdir(parents=True, exist_ok=True)
+    caminho.write_text(json.dumps(resultado, indent=2, ensure_ascii=False), encoding='utf-8')
+    return caminho
+
+def carregar_resultado(caminho):
+    return json.loads(Path(caminho).read_text(encoding='utf-8'))
+
+def variacao(atual, base):
+    """Variação percentual de `base` para `atual` (None se não houver base)"""
+    if atual is None or not base:
+        return None
+    return (atual - base) / base * 100
@@ -0,0 +1,27 @@
+#!/usr/bin/env python3
+# Arquivo: ffmpeg_falso.py
+# Data: 19/10/2026
+# Descrição: Substituto do FFmpeg para os benchmarks quando não há um binário disponível
+# (nem FFMPEG_PATH, nem ffmpeg no PATH, nem imageio-ffmpeg): aceita a linha de comando de
+# extract_audio_ffmpeg e grava um MP3 de tamanho proporcional ao vídeo de entrada
+
+import os
+import sys
+
+def main(argumentos):
+    if '-i' not in argumentos or len(argumentos) < 3:
+        print("uso: ffmpeg_falso.py -i entrada [opções] saida", file=sys.stderr)
+        return 1
+    entrada = argumentos[argumentos.index('-i') + 1]
+    saida = argumentos[-1]
+    if not os.path.isfile(entrada):
+        print(f"{entrada}: No such file or directory", file=sys.stderr)
+        return 1
+    tamanho = max(1024, os.path.getsize(entrada) // 10)
+    with open(saida, 'wb') as f:
+        f.write(b'ID3\x03\x00\x00\x00\x00\x00\x00')
+        f.write(os.urandom(tamanho))
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
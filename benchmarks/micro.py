@@ -0,0 +1,217 @@
+# Arquivo: micro.py
+# Data: 19/10/2026
+# Descrição: Micro-benchmarks das funções puras executadas por palavra, linha ou arquivo, com entradas sintéticas
+# grandes (transcrição de 30 mil palavras, arquivo de formulários de 100 mil linhas, 10 mil nomes de arquivo).
+# Usa timeit (autorange + repetições) e grava o resultado em JSON para comparar com execuções anteriores.
+#
+# Uso (a partir da raiz do projeto):
+#   python benchmarks/micro.py                      # todos os casos
+#   python benchmarks/micro.py --filtro chat        # só os casos com "chat" no nome
+#   python benchmarks/micro.py --listar
+#   python benchmarks/micro.py --comparar benchmarks/resultados/micro_20261019_120000.json
+
+import argparse
+import atexit
+import contextlib
+import io
+import random
+import shutil
+import statistics
+import string
+import sys
+import tempfile
+import timeit
+
+from comum import carregar_resultado, gravar_resultado, identificacao, variacao
+from servidores_mock import gerar_palavras
+
+PALAVRAS_TRANSCRICAO = 30000
+LINHAS_FORMULARIO = 100000
+NOMES_ARQUIVO = 10000
+
+CASOS = {}  # nome -> função de preparo que devolve a chamada medida (sem argumentos)
+
+def caso(nome):
+    """Registra a função de preparo de um caso; o preparo não entra na medição"""
+    def registrar(preparo):
+        CASOS[nome] = preparo
+        return preparo
+    return registrar
+
+def transcricao_sintetica():
+    """Resultado da AssemblyAI com PALAVRAS_TRANSCRICAO palavras (o mesmo do servidor mock)"""
+    palavras = gerar_palavras(PALAVRAS_TRANSCRICAO)
+    return {'text': " ".join(p['text'] for p in palavras), 'words': palavras}
+
+def vtt_sintetico():
+    """Conteúdo VTT gerado pela própria save_transcription a partir da transcrição sintética"""
+    from paginas import transcribe_audio
+    with tempfile.TemporaryDirectory() as diretorio:
+        original, transcribe_audio.OUTPUT_DIR = transcribe_audio.OUTPUT_DIR, diretorio
+        try:
+            _, vtt_path = transcribe_audio.save_transcription(transcricao_sintetica(), 'micro')
+            with open(vtt_path, 'r', encoding='utf-8') as f:
+                return f.read()
+        finally:
+            transcribe_audio.OUTPUT_DIR = original
+
+def nomes_sinteticos(quantidade=NOMES_ARQUIVO, semente=7):
+    """Títulos de vídeo com caracteres proibidos em nomes de arquivo, acentos e emojis"""
+    aleatorio = random.Random(semente)
+    alfabeto = string.ascii_letters + string.digits + ' ' * 8 + '<>:"/\\|?*' + 'áéíóúçãõ' + '😀🚀📈'
+    return ["".join(aleatorio.choice(alfabeto) for _ in range(aleatorio.randint(20, 90))) for _ in range(quantidade)]
+
+def formulario_sintetico(linhas=LINHAS_FORMULARIO, semente=11):
+    """DataFrame como lido de um TXT de elementos (tudo texto, decimais no padrão brasileiro)"""
+    import pandas as pd
+    aleatorio = random.Random(semente)
+    tipos = ['number_input', 'selectbox', 'formula', 'text_input', 'call_dados']
+    registros = []
+    for i in range(linhas):
+        tipo = tipos[i % len(tipos)]
+        registros.append({
+            'name_element': f"elemento_{i}",
+            'type_element': tipo,
+            'math_element': '0,0' if tipo == 'selectbox' else f"elemento_{max(0, i - 1)} * 1,5",
+            'msg_element': f"Mensagem {i}",
+            'value_element': f"{aleatorio.randint(0, 9999)}.{aleatorio.randint(100, 999)},{aleatorio.randint(0, 99):02d}",
+            'select_element': ' "Opção A" | Opção B |Opção C ' if tipo == 'selectbox' else '',
+            'str_element': '"Opção A"' if tipo == 'selectbox' else '',
+            'e_col': str(i % 6 + 1),
+            'e_row': str(i // 6 + 1),
+            'user_id': '' if i % 3 else str(i % 50),
+            'section': f"secao_{i % 20}",
+        })
+    return pd.DataFrame(registros)
+
+def resposta_sintetica(pontos=300):
+    """Resposta do LLM com lista numerada, um timestamp por item e URLs soltas"""
+    linhas = ["Principais pontos:"]
+    for i in range(1, pontos + 1):
+        segundos = i * 17
+        linhas.append(f"{i}. Item {i} - descrição do ponto {i} [{segundos // 3600:02d}:{segundos % 3600 // 60:02d}:{segundos % 60:02d}]"
+                      + (" Veja https://exemplo.com/ref" if i % 10 == 0 else ""))
+    return "\n".join(linhas)
+
+@caso('transcribe_audio.save_transcription')
+def preparar_save_transcription():
+    from paginas import transcribe_audio
+    resultado = transcricao_sintetica()
+    diretorio = tempfile.mkdtemp(prefix='micro_')
+    atexit.register(shutil.rmtree, diretorio, True)
+    transcribe_audio.OUTPUT_DIR = diretorio
+    return lambda: transcribe_audio.save_transcription(resultado, 'micro')
+
+@caso('transcribe_audio.format_timestamp')
+def preparar_format_timestamp():
+    from paginas.transcribe_audio import format_timestamp
+    instantes = [p['start'] for p in gerar_palavras(PALAVRAS_TRANSCRICAO)]
+    return lambda: [format_timestamp(ms) for ms in instantes]
+
+@caso('chat.parse_vtt_content')
+def preparar_parse_vtt():
+    from paginas.chat import parse_vtt_content
+    conteudo = vtt_sintetico()
+    return lambda: parse_vtt_content(conteudo)
+
+@caso('chat.formatar_resposta')
+def preparar_formatar_resposta():
+    from paginas.chat import formatar_resposta
+    resposta = resposta_sintetica()
+    return lambda: formatar_resposta(resposta, "https://www.youtube.com/watch?v=abcdefghijk")
+
+@caso('importador.preparar_elementos')
+def preparar_elementos():
+    import importador
+    df = formulario_sintetico()
+    return lambda: importador.preparar_elementos(df)
+
+@caso('importador.validar_elementos')
+def preparar_validar_elementos():
+    import importador
+    df = formulario_sintetico()
+    return lambda: importador.validar_elementos(df)
+
+@caso('url_metadados.filtrar_caracteres_proibidos')
+def preparar_filtrar_caracteres():
+    from paginas.url_metadados import YouTubeMetadados
+    nomes = nomes_sinteticos()
+    return lambda: [YouTubeMetadados.filtrar_caracteres_proibidos(n) for n in nomes]
+
+@caso('video_capture.sanitize_filename')
+def preparar_sanitize_filename():
+    from paginas.video_capture import sanitize_filename
+    nomes = nomes_sinteticos()
+    return lambda: [sanitize_filename(n) for n in nomes]
+
+def medir(chamada, repeticoes, tempo_minimo):
+    """Chamadas por rodada via autorange (>= tempo_minimo s) e `repeticoes` rodadas. Tempos em ms por chamada"""
+    temporizador = timeit.Timer(chamada)
+    numero = 1
+    while temporizador.timeit(numero) < tempo_minimo and numero < 1_000_000:
+        numero *= 2
+    tempos = [t / numero * 1000 for t in temporizador.repeat(repeat=repeticoes, number=numero)]
+    return {
+        'chamadas_por_rodada': numero,
+        'rodadas': repeticoes,
+        'min_ms': round(min(tempos), 3),
+        'mediana_ms': round(statistics.median(tempos), 3),
+        'desvio_ms': round(statistics.stdev(tempos), 3) if len(tempos) > 1 else 0.0,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Micro-benchmarks das funções puras mais executadas")
+    parser.add_argument("--filtro", default=None, help="Só os casos que contêm este texto no nome")
+    parser.add_argument("--listar", action='store_true', help="Lista os casos e sai")
+    parser.add_argument("--repeticoes", type=int, default=5, help="Rodadas por caso (padrão: 5)")
+    parser.add_argument("--tempo-minimo", type=float, default=0.2, help="Duração mínima de cada rodada em segundos")
+    parser.add_argument("--saida", default=None, help="Arquivo JSON do resultado (padrão: benchmarks/resultados/)")
+    parser.add_argument("--comparar", default=None, help="Resultado anterior (JSON) para comparação")
+    parser.add_argument("--tolerancia", type=float, default=10, help="Piora da mediana em %% considerada regressão")
+    args = parser.parse_args()
+
+    casos = [nome for nome in CASOS if not args.filtro or args.filtro in nome]
+    if args.listar:
+        print("\n".join(casos))
+        return
+
+    resultados = {}
+    print(f"{'caso':<46}{'mediana ms':>12}{'min ms':>10}{'desvio':>9}")
+    for nome in casos:
+        # As funções medidas imprimem mensagens de depuração; a saída é descartada para não pesar na medição
+        with contextlib.redirect_stdout(io.StringIO()):
+            estat = medir(CASOS[nome](), args.repeticoes, args.tempo_minimo)
+        resultados[nome] = estat
+        print(f"{nome:<46}{estat['mediana_ms']:>12}{estat['min_ms']:>10}{estat['desvio_ms']:>9}")
+
+    resultado = {
+        **identificacao(),
+        'parametros': {'repeticoes': args.repeticoes, 'tempo_minimo_s': args.tempo_minimo,
+                       'palavras_transcricao': PALAVRAS_TRANSCRICAO, 'linhas_formulario': LINHAS_FORMULARIO,
+                       'nomes_arquivo': NOMES_ARQUIVO},
+        'casos': resultados,
+    }
+    print(f"Resultado gravado em {gravar_resultado(resultado, 'micro', args.saida)}")
+
+    if args.comparar:
+        base = carregar_resultado(args.comparar)
+        print(f"\nBase: {base.get('quando')} ({base.get('commit')})")
+        print(f"{'caso':<46}{'base ms':>12}{'atual ms':>12}{'var.':>9}")
+        regressoes = 0
+        for nome, estat in resultados.items():
+            anterior = base.get('casos', {}).get(nome)
+            if not anterior:
+                print(f"{nome:<46}(sem base)")
+                continue
+            v = variacao(estat['mediana_ms'], anterior['mediana_ms'])
+            piorou = v is not None and v > args.tolerancia
+            regressoes += piorou
+            texto_v = f"{v:+.1f}%" if v is not None else "-"
+            print(f"{nome:<46}{anterior['mediana_ms']:>12}{estat['mediana_ms']:>12}{texto_v:>9}"
+                  f"{'  <- regressão' if piorou else ''}")
+        if regressoes:
+            print(f"{regressoes} regressão(ões) acima de {args.tolerancia}%")
+            sys.exit(1)
+
+if __name__ == "__main__":
+    main()
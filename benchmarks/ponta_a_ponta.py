@@ -0,0 +1,269 @@
+# Arquivo: ponta_a_ponta.py
+# Data: 19/10/2026
+# Descrição: Benchmark ponta a ponta das etapas do pipeline contra servidores locais (servidores_mock.py):
+# mede latência e vazão de video_capture.process_video, transcribe_audio.process_audio_transcription,
+# analyzer.process_video e chat.get_chat_response e grava o resultado em JSON para comparar execuções.
+# Roda em um diretório temporário com cópia do banco; não toca em data/you_ana.db nem em Z:\youtube.
+#
+# Uso (a partir da raiz do projeto):
+#   python benchmarks/ponta_a_ponta.py --repeticoes 5 --concorrencia 2
+#   python benchmarks/ponta_a_ponta.py --comparar benchmarks/resultados/ponta_a_ponta_20261019_120000.json
+
+import argparse
+import contextlib
+import io
+import logging
+import os
+import shutil
+import sqlite3
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from comum import RAIZ, carregar_resultado, gravar_resultado, identificacao, variacao
+from servidores_mock import ATRASOS_PADRAO, ServidorMock, gerar_video
+
+CENARIOS = ('captura', 'transcricao', 'analise', 'chat')
+NOMES_CENARIOS = {
+    'captura': 'video_capture.process_video',
+    'transcricao': 'transcribe_audio.process_audio_transcription',
+    'analise': 'analyzer.process_video',
+    'chat': 'chat.get_chat_response',
+}
+PERGUNTA_CHAT = "Quais são os principais pontos do vídeo?"
+
+def localizar_ffmpeg(diretorio_temporario):
+    """FFMPEG_PATH > ffmpeg no PATH > imageio-ffmpeg > ffmpeg_falso.py. Retorna (caminho, origem)"""
+    if os.getenv('FFMPEG_PATH'):
+        return os.environ['FFMPEG_PATH'], 'FFMPEG_PATH'
+    if shutil.which('ffmpeg'):
+        return shutil.which('ffmpeg'), 'PATH'
+    try:
+        import imageio_ffmpeg
+        return imageio_ffmpeg.get_ffmpeg_exe(), 'imageio-ffmpeg'
+    except (ImportError, RuntimeError):
+        pass
+    # Sem FFmpeg: script que só grava o MP3 (a extração de áudio deixa de ser medida de verdade)
+    falso = os.path.join(diretorio_temporario, 'ffmpeg_falso.py')
+    shutil.copy(Path(__file__).resolve().parent / 'ffmpeg_falso.py', falso)
+    os.chmod(falso, 0o755)
+    return falso, 'simulado'
+
+def preparar_ambiente(args, diretorio):
+    """Configura variáveis de ambiente e banco temporário ANTES de importar os módulos da aplicação"""
+    youtube_dir = os.path.join(diretorio, 'youtube')
+    os.makedirs(os.path.join(diretorio, 'data'))
+    os.makedirs(youtube_dir)
+    db_path = os.path.join(diretorio, 'data', 'you_ana.db')
+    shutil.copy(RAIZ / 'data' / 'you_ana.db', db_path)
+
+    ffmpeg, origem_ffmpeg = localizar_ffmpeg(diretorio)
+    os.environ.update({
+        'YOUTUBE_DIR': youtube_dir,
+        'FFMPEG_PATH': ffmpeg,
+        'ASSEMBLYAI_BASE_URL': f"{args.url_mock}/v2",
+        'ASSEMBLYAI_API_KEY': 'benchmark',
+        'OPENAI_BASE_URL': f"{args.url_mock}/v1",
+        'OPENAI_API_KEY': 'benchmark',
+        'PERFIL_IMPORTACAO': '0',
+    })
+    # Limites do gateway folgados: o benchmark mede a aplicação, não o rate limit
+    os.environ.setdefault('LLM_RPM', '100000')
+    os.environ.setdefault('LLM_TPM', '100000000')
+
+    import config
+    config.DB_PATH = Path(db_path)
+    # analyzer e chat abrem 'data/you_ana.db' relativo ao diretório de trabalho
+    os.chdir(diretorio)
+    return db_path, youtube_dir, origem_ffmpeg
+
+def cadastrar_videos(db_path, quantidade, url):
+    """Cadastra os vídeos do benchmark para um usuário novo. Retorna (user_id, [(you_id, titulo, url)])"""
+    conn = sqlite3.connect(db_path)
+    with conn:
+        user_id = conn.execute("SELECT COALESCE(MAX(user_id), 0) + 1000 FROM youtube_tab").fetchone()[0]
+        videos = []
+        for i in range(quantidade):
+            titulo = f"Benchmark {i + 1:03d}"
+            you_id = conn.execute(
+                "INSERT INTO youtube_tab (titulo, url, autor, user_id) VALUES (?, ?, 'benchmark', ?)",
+                (titulo, url, user_id)
+            ).lastrowid
+            videos.append((you_id, titulo, url))
+    conn.close()
+    return user_id, videos
+
+def medir(funcao, itens, concorrencia):
+    """Executa `funcao` para cada item com `concorrencia` threads. Retorna estatísticas de latência e vazão"""
+    from llm_gateway import percentil
+
+    def cronometrar(item):
+        inicio = time.perf_counter()
+        try:
+            ok = bool(funcao(item))
+        except Exception as e:
+            logging.getLogger(__name__).warning("Falha no benchmark: %s", e)
+            ok = False
+        return ok, (time.perf_counter() - inicio) * 1000
+
+    inicio = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concorrencia) as executor:
+        resultados = list(executor.map(cronometrar, itens))
+    total = time.perf_counter() - inicio
+    latencias = [ms for _, ms in resultados]
+    sucessos = sum(1 for ok, _ in resultados if ok)
+    return {
+        'chamadas': len(resultados),
+        'sucesso': sucessos,
+        'falhas': len(resultados) - sucessos,
+        'total_s': round(total, 3),
+        'vazao_por_s': round(sucessos / total, 3) if total else None,
+        'latencia_ms': {
+            'media': round(sum(latencias) / len(latencias), 1) if latencias else None,
+            'p50': percentil(latencias, 50),
+            'p95': percentil(latencias, 95),
+            'max': round(max(latencias), 1) if latencias else None,
+        },
+    }
+
+def executar_benchmark(args):
+    diretorio = tempfile.mkdtemp(prefix='bench_pipeline_')
+    diretorio_original = os.getcwd()
+    midia = os.path.join(diretorio, 'midia')
+    os.makedirs(midia)
+    gerar_video(os.path.join(midia, 'fixture.mp4'), duracao=args.duracao_video)
+
+    atrasos = {'download': args.atraso_download, 'upload': args.atraso_upload,
+               'transcricao': args.atraso_transcricao, 'llm': args.atraso_llm}
+    mock = ServidorMock(midia, atrasos, palavras=args.palavras)
+    args.url_mock = mock.iniciar()
+    try:
+        db_path, youtube_dir, origem_ffmpeg = preparar_ambiente(args, diretorio)
+        aquecimento = 0 if args.sem_aquecimento else 1
+        user_id, videos = cadastrar_videos(db_path, args.repeticoes + aquecimento, mock.url_midia('fixture.mp4'))
+
+        from paginas import analyzer, chat, transcribe_audio, video_capture
+        # As páginas rodam sem servidor Streamlit ("bare mode"): descarta o aviso repetido a cada elemento
+        logging.getLogger('streamlit.runtime.scriptrunner_utils.script_run_context').addFilter(
+            lambda registro: 'missing ScriptRunContext' not in registro.getMessage())
+        transcribe_audio.INTERVALO_CONSULTA = args.intervalo_consulta
+
+        def ler(caminho):
+            with open(caminho, 'r', encoding='utf-8') as f:
+                return f.read()
+
+        transcricoes = os.path.join(youtube_dir, 'transcricoes')
+        funcoes = {
+            'captura': lambda v: video_capture.process_video(v[0], v[1], v[2]),
+            'transcricao': lambda v: transcribe_audio.process_audio_transcription(v[0], v[1]),
+            'analise': lambda v: analyzer.process_video(
+                user_id, v[1], ler(os.path.join(transcricoes, f"{v[1]}.txt")))[0],
+            'chat': lambda v: chat.get_chat_response(
+                PERGUNTA_CHAT, chat.parse_vtt_content(ler(os.path.join(transcricoes, f"{v[1]}.vtt"))),
+                v[2], mode="qa", user_id=user_id, you_id=v[0]),
+        }
+
+        resultados = {}
+        saida = contextlib.nullcontext() if args.verboso else contextlib.redirect_stdout(io.StringIO())
+        for cenario in CENARIOS:
+            # Cenários fora da seleção rodam sem medição quando um cenário seguinte depende dos arquivos deles
+            if cenario not in args.cenarios and CENARIOS.index(cenario) > max(CENARIOS.index(c) for c in args.cenarios):
+                continue
+            print(f"{NOMES_CENARIOS[cenario]}...", file=sys.stderr)
+            with saida:
+                if aquecimento:
+                    funcoes[cenario](videos[0])
+                estatisticas = medir(funcoes[cenario], videos[aquecimento:], args.concorrencia)
+            if cenario in args.cenarios:
+                resultados[NOMES_CENARIOS[cenario]] = estatisticas
+    finally:
+        mock.parar()
+        os.chdir(diretorio_original)
+        if args.manter:
+            print(f"Arquivos mantidos em {diretorio}", file=sys.stderr)
+        else:
+            shutil.rmtree(diretorio, ignore_errors=True)
+
+    return {
+        **identificacao(),
+        'parametros': {
+            'repeticoes': args.repeticoes, 'concorrencia': args.concorrencia, 'aquecimento': not args.sem_aquecimento,
+            'duracao_video_s': args.duracao_video, 'palavras': args.palavras,
+            'intervalo_consulta_s': args.intervalo_consulta, 'atrasos_s': atrasos, 'ffmpeg': origem_ffmpeg,
+        },
+        'requisicoes_mock': dict(mock.requisicoes),
+        'cenarios': resultados,
+    }
+
+def comparar(atual, base, tolerancia):
+    """Compara dois resultados cenário a cenário. Retorna (linhas de texto, regressões)"""
+    linhas, regressoes = [], []
+    linhas.append(f"Base: {base.get('quando')} ({base.get('commit')})  Atual: {atual.get('quando')} ({atual.get('commit')})")
+    if base.get('parametros') != atual.get('parametros'):
+        linhas.append("Atenção: parâmetros diferentes entre as execuções; a comparação pode não ser válida.")
+    linhas.append(f"{'cenário':<48}{'métrica':<14}{'base':>10}{'atual':>10}{'var.':>9}")
+    for nome, estat in atual['cenarios'].items():
+        anterior = base.get('cenarios', {}).get(nome)
+        if not anterior:
+            linhas.append(f"{nome:<48}(sem base)")
+            continue
+        metricas = [
+            ('p50_ms', estat['latencia_ms']['p50'], anterior['latencia_ms']['p50'], 1),
+            ('p95_ms', estat['latencia_ms']['p95'], anterior['latencia_ms']['p95'], 1),
+            ('vazao_por_s', estat['vazao_por_s'], anterior['vazao_por_s'], -1),
+        ]
+        for metrica, valor, valor_base, sentido in metricas:
+            v = variacao(valor, valor_base)
+            piorou = v is not None and v * sentido > tolerancia
+            if piorou:
+                regressoes.append((nome, metrica, v))
+            texto_v = f"{v:+.1f}%" if v is not None else "-"
+            linhas.append(f"{nome:<48}{metrica:<14}{valor_base!s:>10}{valor!s:>10}{texto_v:>9}{'  <- regressão' if piorou else ''}")
+        if estat['falhas'] > anterior['falhas']:
+            regressoes.append((nome, 'falhas', estat['falhas']))
+            linhas.append(f"{nome:<48}{'falhas':<14}{anterior['falhas']:>10}{estat['falhas']:>10}  <- regressão")
+    return linhas, regressoes
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark ponta a ponta do pipeline com servidores locais")
+    parser.add_argument("--repeticoes", type=int, default=5, help="Vídeos medidos por cenário (padrão: 5)")
+    parser.add_argument("--concorrencia", type=int, default=1, help="Chamadas simultâneas por cenário (padrão: 1)")
+    parser.add_argument("--cenarios", nargs='+', choices=CENARIOS, default=list(CENARIOS),
+                        help="Cenários medidos (os anteriores rodam sem medição quando necessários)")
+    parser.add_argument("--sem-aquecimento", action='store_true', help="Não descarta a primeira chamada de cada cenário")
+    parser.add_argument("--duracao-video", type=float, default=60, help="Duração do vídeo de teste em segundos")
+    parser.add_argument("--palavras", type=int, default=2000, help="Palavras da transcrição simulada")
+    parser.add_argument("--intervalo-consulta", type=float, default=0.2,
+                        help="Segundos entre consultas à transcrição (a aplicação usa 5)")
+    for atraso, padrao in ATRASOS_PADRAO.items():
+        parser.add_argument(f"--atraso-{atraso}", type=float, default=padrao,
+                            help=f"Atraso simulado de {atraso} em segundos (padrão: {padrao})")
+    parser.add_argument("--saida", default=None, help="Arquivo JSON do resultado (padrão: benchmarks/resultados/)")
+    parser.add_argument("--comparar", default=None, help="Resultado anterior (JSON) para comparação")
+    parser.add_argument("--tolerancia", type=float, default=10, help="Piora em %% considerada regressão (padrão: 10)")
+    parser.add_argument("--manter", action='store_true', help="Mantém o diretório temporário ao final")
+    parser.add_argument("--verboso", action='store_true', help="Mostra a saída das funções medidas")
+    args = parser.parse_args()
+
+    resultado = executar_benchmark(args)
+
+    saida = gravar_resultado(resultado, 'ponta_a_ponta', args.saida)
+
+    print(f"{'cenário':<48}{'ok':>6}{'p50 ms':>10}{'p95 ms':>10}{'vazão/s':>10}")
+    for nome, estat in resultado['cenarios'].items():
+        print(f"{nome:<48}{estat['sucesso']:>3}/{estat['chamadas']:<2}{estat['latencia_ms']['p50']!s:>10}"
+              f"{estat['latencia_ms']['p95']!s:>10}{estat['vazao_por_s']!s:>10}")
+    print(f"FFmpeg: {resultado['parametros']['ffmpeg']}  Resultado gravado em {saida}")
+
+    if args.comparar:
+        base = carregar_resultado(args.comparar)
+        linhas, regressoes = comparar(resultado, base, args.tolerancia)
+        print("\n".join(linhas))
+        if regressoes:
+            print(f"{len(regressoes)} regressão(ões) acima de {args.tolerancia}%")
+            sys.exit(1)
+
+if __name__ == "__main__":
+    main()
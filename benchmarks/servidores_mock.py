@@ -0,0 +1,187 @@
+# Arquivo: servidores_mock.py
+# Data: 19/10/2026
+# Descrição: Servidor HTTP local que imita os serviços externos nos benchmarks: mídia baixada pelo yt-dlp,
+# API da AssemblyAI (upload, pedido e consulta da transcrição) e chat completions da OpenAI, com atrasos configuráveis
+
+import json
+import os
+import random
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Atrasos em segundos: antes de servir a mídia, por upload, até a transcrição ficar pronta e por resposta do LLM
+ATRASOS_PADRAO = {'download': 0.0, 'upload': 0.2, 'transcricao': 1.0, 'llm': 0.3}
+
+VOCABULARIO = (
+    "gestão pessoas equipe liderança resultado processo cliente projeto empresa mercado estratégia "
+    "cultura desempenho feedback metas valor inovação dados decisão tempo custo qualidade aprendizado"
+).split()
+
+def gerar_video(caminho, duracao=60, fps=10, largura=160, altura=120):
+    """Gera um MP4 sintético (quadros de cor variável) para o download simulado. Retorna o caminho"""
+    import cv2
+    import numpy as np
+    escritor = cv2.VideoWriter(caminho, cv2.VideoWriter_fourcc(*'mp4v'), fps, (largura, altura))
+    try:
+        for i in range(int(duracao * fps)):
+            escritor.write(np.full((altura, largura, 3), (i * 3) % 256, dtype=np.uint8))
+    finally:
+        escritor.release()
+    return caminho
+
+def gerar_palavras(quantidade, semente=42):
+    """Palavras no formato da AssemblyAI (text/start/end em ms, falante), com pontuação a cada frase"""
+    aleatorio = random.Random(semente)
+    palavras, inicio = [], 0
+    for i in range(quantidade):
+        texto = aleatorio.choice(VOCABULARIO)
+        if i % 14 == 13:
+            texto += '.'
+        elif i % 7 == 6:
+            texto += ','
+        duracao = aleatorio.randint(180, 520)
+        palavras.append({
+            'text': texto, 'start': inicio, 'end': inicio + duracao,
+            'confidence': 0.95, 'speaker': 'A' if (i // 60) % 2 == 0 else 'B',
+        })
+        inicio += duracao + aleatorio.randint(20, 120)
+    return palavras
+
+def resposta_llm_padrao(mensagens):
+    """Resposta em markdown com lista numerada e timestamps, como o chat e o analisador recebem da OpenAI"""
+    return (
+        "Principais pontos do vídeo:\n"
+        "1. Liderança - a equipe precisa de metas claras [00:00:12]\n"
+        "2. Feedback - conversas frequentes melhoram o desempenho [00:01:05]\n"
+        "3. Dados - decisões baseadas em indicadores [00:02:40]. Veja https://exemplo.com/material\n"
+        "Conclusão: cultura e processo caminham juntos [00:03:15]."
+    )
+
+class _Manipulador(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, *args):
+        pass
+
+    def _json(self, corpo, codigo=200):
+        dados = corpo if isinstance(corpo, bytes) else json.dumps(corpo).encode()
+        self.send_response(codigo)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(dados)))
+        self.end_headers()
+        self.wfile.write(dados)
+
+    def _ler_corpo(self):
+        tamanho = int(self.headers.get('Content-Length') or 0)
+        return self.rfile.read(tamanho) if tamanho else b''
+
+    def do_GET(self):
+        mock = self.server.mock
+        if self.path.startswith('/midia/'):
+            mock.contar('midia')
+            caminho = os.path.join(mock.diretorio_midia, os.path.basename(self.path))
+            if not os.path.isfile(caminho):
+                return self._json({'error': 'not found'}, 404)
+            time.sleep(mock.atrasos['download'])
+            with open(caminho, 'rb') as f:
+                dados = f.read()
+            self.send_response(200)
+            self.send_header('Content-Type', 'video/mp4')
+            self.send_header('Content-Length', str(len(dados)))
+            self.end_headers()
+            self.wfile.write(dados)
+        elif self.path.startswith('/v2/transcript/'):
+            mock.contar('assemblyai_consulta')
+            pedido = mock.transcricoes.get(self.path.rsplit('/', 1)[-1])
+            if pedido is None:
+                return self._json({'error': 'transcript not found'}, 404)
+            if time.monotonic() - pedido < mock.atrasos['transcricao']:
+                return self._json({'id': self.path.rsplit('/', 1)[-1], 'status': 'processing'})
+            self._json(mock.transcricao_pronta)
+        else:
+            self._json({'error': 'not found'}, 404)
+
+    def do_POST(self):
+        mock = self.server.mock
+        corpo = self._ler_corpo()
+        if self.path == '/v2/upload':
+            mock.contar('assemblyai_upload')
+            time.sleep(mock.atrasos['upload'])
+            self._json({'upload_url': f"{mock.url}/v2/audio/{uuid.uuid4().hex}"})
+        elif self.path == '/v2/transcript':
+            mock.contar('assemblyai_pedido')
+            identificador = uuid.uuid4().hex
+            mock.transcricoes[identificador] = time.monotonic()
+            self._json({'id': identificador, 'status': 'queued'})
+        elif self.path.endswith('/chat/completions'):
+            mock.contar('openai')
+            pedido = json.loads(corpo or b'{}')
+            time.sleep(mock.atrasos['llm'])
+            conteudo = mock.resposta_llm(pedido.get('messages', []))
+            tokens_prompt = sum(len(m.get('content', '')) for m in pedido.get('messages', [])) // 4
+            tokens_resposta = len(conteudo) // 4
+            self._json({
+                'id': f"chatcmpl-{uuid.uuid4().hex[:12]}", 'object': 'chat.completion', 'created': int(time.time()),
+                'model': pedido.get('model', 'mock'),
+                'choices': [{'index': 0, 'message': {'role': 'assistant', 'content': conteudo}, 'finish_reason': 'stop'}],
+                'usage': {'prompt_tokens': tokens_prompt, 'completion_tokens': tokens_resposta,
+                          'total_tokens': tokens_prompt + tokens_resposta},
+            })
+        else:
+            self._json({'error': 'not found'}, 404)
+
+class _Servidor(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def handle_error(self, request, client_address):
+        # Clientes (yt-dlp, requests) fecham conexões keep-alive sem aviso: não é erro do benchmark
+        if not isinstance(sys.exc_info()[1], (ConnectionResetError, BrokenPipeError)):
+            super().handle_error(request, client_address)
+
+class ServidorMock:
+    """
+    Um único servidor local com as rotas dos três serviços:
+    /midia/<arquivo> (yt-dlp), /v2/... (ASSEMBLYAI_BASE_URL) e /v1/chat/completions (OPENAI_BASE_URL).
+    """
+    def __init__(self, diretorio_midia, atrasos=None, palavras=2000, resposta_llm=resposta_llm_padrao):
+        self.diretorio_midia = diretorio_midia
+        self.atrasos = {**ATRASOS_PADRAO, **(atrasos or {})}
+        self.resposta_llm = resposta_llm
+        self.transcricoes = {}
+        self.requisicoes = Counter()
+        self._lock = threading.Lock()
+        lista = gerar_palavras(palavras)
+        self.transcricao_pronta = json.dumps({
+            'status': 'completed',
+            'text': " ".join(p['text'] for p in lista),
+            'words': lista,
+            'audio_duration': lista[-1]['end'] // 1000 if lista else 0,
+        }).encode()
+        self._servidor = None
+
+    def contar(self, rota):
+        with self._lock:
+            self.requisicoes[rota] += 1
+
+    def iniciar(self):
+        """Sobe o servidor em uma porta livre (thread daemon). Retorna a URL base"""
+        self._servidor = _Servidor(('127.0.0.1', 0), _Manipulador)
+        self._servidor.mock = self
+        threading.Thread(target=self._servidor.serve_forever, name="servidor-mock", daemon=True).start()
+        return self.url
+
+    def parar(self):
+        if self._servidor:
+            self._servidor.shutdown()
+            self._servidor.server_close()
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self._servidor.server_port}"
+
+    def url_midia(self, arquivo):
+        return f"{self.url}/midia/{arquivo}"
@@ -0,0 +1,86 @@
+# Arquivo: cache_dados.py
+# Data: 19/10/2026
+# Descrição: Camada de cache das consultas de leitura das páginas (st.cache_data)
+# Chaves por usuário, invalidação explícita pelas rotinas de escrita e contadores de acerto/falha
+
+import threading
+from collections import defaultdict
+from functools import wraps
+
+import streamlit as st
+
+import rastreamento
+
+TTL_PADRAO = 300  # Segundos
+
+# Gerações de cache: (tabela, user_id) -> contador. user_id None representa a tabela inteira.
+# Invalidar = incrementar a geração; as entradas antigas deixam de ser encontradas e expiram pelo TTL.
+_geracoes = defaultdict(int)
+_contadores = defaultdict(lambda: {'hits': 0, 'misses': 0})
+_lock = threading.Lock()
+_execucao = threading.local()
+
+def geracao(tabela, user_id=None):
+    """Retorna a geração atual do cache da tabela (para o usuário ou para a tabela inteira)"""
+    with _lock:
+        return _geracoes[(tabela, user_id)]
+
+def invalidar(tabela, user_id=None):
+    """Invalida o cache da tabela para um usuário, ou para todos se user_id for None"""
+    with _lock:
+        _geracoes[(tabela, user_id)] += 1
+
+def invalidar_video(conn, you_id):
+    """Invalida o cache da youtube_tab do dono do vídeo"""
+    row = conn.execute("SELECT user_id FROM youtube_tab WHERE you_id = ?", (you_id,)).fetchone()
+    invalidar('youtube_tab', row[0] if row else None)
+
+def cache_consulta(tabela, ttl=TTL_PADRAO, por_usuario=True, max_entries=1000):
+    """
+    Decorador de cache para funções de leitura.
+    Com por_usuario=True o primeiro argumento da função deve ser o user_id.
+    """
+    def decorador(func):
+        nome = f"{func.__module__}.{func.__qualname__}"
+
+        def executar(geracao_tabela, geracao_usuario, *args, **kwargs):
+            _execucao.miss = True
+            return func(*args, **kwargs)
+
+        # Nome próprio para que cada função decorada tenha seu próprio espaço no st.cache_data
+        executar.__module__ = func.__module__
+        executar.__qualname__ = f"{func.__qualname__}__cache"
+        executar_cache = st.cache_data(ttl=ttl, max_entries=max_entries, show_spinner=False)(executar)
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            user_id = (args[0] if args else kwargs.get('user_id')) if por_usuario else None
+            _execucao.miss = False
+            with rastreamento.span(nome, 'cache') as s:
+                resultado = executar_cache(
+                    geracao(tabela),
+                    geracao(tabela, user_id) if por_usuario else 0,
+                    *args, **kwargs
+                )
+                s.atributos['cache'] = 'miss' if _execucao.miss else 'hit'
+            with _lock:
+                _contadores[nome]['misses' if _execucao.miss else 'hits'] += 1
+            return resultado
+
+        wrapper.limpar = executar_cache.clear
+        return wrapper
+    return decorador
+
+def estatisticas_cache():
+    """Retorna os contadores de acerto/falha de cada função em cache"""
+    with _lock:
+        estatisticas = []
+        for nome, contador in sorted(_contadores.items()):
+            total = contador['hits'] + contador['misses']
+            estatisticas.append({
+                'funcao': nome,
+                'hits': contador['hits'],
+                'misses': contador['misses'],
+                'taxa_acerto': round(contador['hits'] / total * 100, 1) if total else 0.0
+            })
+        return estatisticas
@@ -4,7 +4,10 @@
 
 
 import os
+from datetime import datetime
+from functools import lru_cache
 from pathlib import Path
+from zoneinfo import ZoneInfo
 
 # Verifica se está em ambiente de produção (Render.com)
 IS_PRODUCTION = os.getenv('RENDER') == 'true'
@@ -26,3 +29,22 @@ DATA_DIR.mkdir(parents=True, exist_ok=True)
 
 # Definir o caminho do banco de dados
 DB_PATH = DATA_DIR / 'you_ana.db'
+
+# Arquivos de mídia (mp4, mp3, frames e transcrições), FFmpeg e API da AssemblyAI.
+# Variáveis de ambiente do processo sobrescrevem os padrões (usado pelos benchmarks com servidores locais).
+YOUTUBE_DIR = os.getenv('YOUTUBE_DIR', r"Z:\youtube")
+FFMPEG_PATH = os.getenv('FFMPEG_PATH', r"C:\ffmpeg\bin\ffmpeg.exe")
+ASSEMBLYAI_BASE_URL = os.getenv('ASSEMBLYAI_BASE_URL', "https://api.assemblyai.com/v2").rstrip('/')
+
+# Fuso de referência do app (logs, relatórios e limites diários), independente do fuso do servidor
+FUSO_HORARIO = ZoneInfo('America/Sao_Paulo')
+
+def agora_local():
+    """Data e hora atuais no fuso de São Paulo"""
+    return datetime.now(FUSO_HORARIO)
+
+@lru_cache(maxsize=None)
+def carregar_ambiente():
+    """Carrega o arquivo .env uma única vez por processo (chamado pelos inicializadores sob demanda)"""
+    from dotenv import load_dotenv
+    load_dotenv()
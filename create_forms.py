@@ -4,134 +4,18 @@
 # Tabelas: forms_tab, forms_insumos, forms_resultados, forms_result_sea, forms_setorial, forms_setorial_sea, forms_energetica
 # Adaptação para o uso de Discos SSD e a pasta Data para o banco de dados
 # Programa roda direto no Python - não usar o streamlit
+# Sem interface gráfica (servidores/rotinas): python importador.py --table <tabela> --mode replace|append|upsert
 # Nova coluna - col_len
 
 
-import sqlite3
 import os
-import pandas as pd
 from tkinter import filedialog, messagebox
 import tkinter as tk
 import sys
 
 
-from pathlib import Path
 from config import DB_PATH, DATA_DIR  # Adicione esta importação
-
-def clean_string(value):
-    """Limpa strings de aspas e apóstrofos extras."""
-    if isinstance(value, str):
-        return value.replace("'", "").replace('"', "").strip()
-    return value
-
-def clean_csv_data(txt_file):
-    """Limpa e prepara os dados do TXT tabulado em ANSI."""
-    try:
-        # Lê o arquivo tabulado em ANSI (cp1252)
-        df = pd.read_csv(
-            txt_file, 
-            index_col=0,
-            encoding='cp1252',  # Codificação ANSI/Windows-1252
-            sep='\t',          # Separador de tabulação
-            quoting=3,         # QUOTE_NONE
-            na_filter=False,   # Não converte strings vazias para NaN
-            decimal=','        # Define vírgula como separador decimal
-        )
-        print("Arquivo lido com sucesso usando ANSI e tabulação")
-        
-        # Remove aspas extras e espaços
-        for column in df.columns:
-            if df[column].dtype == 'object':
-                df[column] = df[column].apply(lambda x: str(x).strip('"\'').strip() if pd.notna(x) else '')
-        
-        # Debug: mostra as primeiras linhas após limpeza
-        print("\nPrimeiras linhas após limpeza:")
-        print(df.head())
-        
-        return df
-        
-    except Exception as e:
-        print(f"Erro ao limpar dados: {str(e)}")
-        print(f"Tipo do erro: {type(e)}")
-        return None
-
-def format_float_value(value):
-    """Converte valor para float, usando padrão brasileiro (vírgula como decimal e ponto como milhar)."""
-    try:
-        # Se valor for vazio ou None
-        if not value and value != 0:
-            return 0.0
-            
-        # Se já for float, retorna diretamente
-        if isinstance(value, float):
-            return value
-            
-        # Converte para string e remove espaços
-        str_value = str(value).strip()
-        
-        # Remove pontos de milhar e substitui vírgula por ponto decimal para cálculo
-        str_value = str_value.replace('.', '').replace(',', '.')
-        
-        # Se após limpeza ficar vazio
-        if not str_value:
-            return 0.0
-            
-        # Converte para float
-        float_value = float(str_value)
-        
-        return float_value
-        
-    except Exception as e:
-        print(f"Erro ao formatar valor numérico: {value}. Erro: {str(e)}")
-        return 0.0
-
-def format_br_number(value):
-    """Formata um número float para o padrão brasileiro (vírgula como decimal)."""
-    try:
-        return f"{float(value)}".replace('.', ',')
-    except:
-        return '0,0'
-
-def validate_selectbox_data(row):
-    """Valida e corrige dados do selectbox."""
-    try:
-        if row['type_element'] == 'selectbox':
-            # Força math_element para '0,0' em selectbox
-            row['math_element'] = '0,0'
-            
-            # Limpa select_element
-            if pd.notna(row['select_element']):
-                options = row['select_element'].replace('"', '').replace("'", '').strip()
-                options_list = [opt.strip() for opt in options.split('|')]
-                row['select_element'] = '|'.join(options_list)
-            else:
-                row['select_element'] = ''
-            
-            # Limpa str_element
-            if pd.notna(row['str_element']):
-                str_value = row['str_element'].replace('"', '').replace("'", '').strip()
-                row['str_element'] = str_value
-            else:
-                row['str_element'] = ''
-            
-            # Força value_element para 0.0
-            row['value_element'] = 0.0
-            print(f"Valor do selectbox definido como: {format_br_number(row['value_element'])}")
-        else:
-            # Trata value_element e registra valores problemáticos
-            original_value = row['value_element']
-            row['value_element'] = format_float_value(original_value)
-            
-            # Registra conversões para zero que não eram zero originalmente
-            if row['value_element'] == 0.0 and str(original_value).strip() not in ['0', '0,0', '']:
-                print(f"Aviso: Valor original '{original_value}' foi convertido para '{format_br_number(0.0)}'")
-            else:
-                print(f"Valor convertido: {format_br_number(row['value_element'])}")
-            
-        return True, row
-    except Exception as e:
-        print(f"Erro ao validar selectbox: {str(e)}")
-        return False, row
+from importador import importar_arquivo
 
 def select_table():
     """Permite ao usuário selecionar a tabela para importação."""
@@ -373,903 +257,93 @@ def check_database():
         )
         sys.exit(1)
 
-def create_database():
-    """Cria o banco de dados e a tabela forms_resultados."""
-    check_database()  # Verifica pasta data e banco
-    
-    table_name = "forms_resultados"
-    conn = None
-    try:
-        # Garante que o diretório de dados existe
-        DATA_DIR.mkdir(parents=True, exist_ok=True)
-        
-        # Verifica banco existente
-        if DB_PATH.exists():
-            root = tk.Tk()
-            root.withdraw()
-            if messagebox.askyesno("Confirmação", 
-                f"A tabela {table_name} já existe. Deseja apagá-la e criar uma nova?"):
-                conn = sqlite3.connect(DB_PATH)
-                cursor = conn.cursor()
-                cursor.execute(f"DROP TABLE IF EXISTS {table_name}")
-                conn.commit()
-                print(f"Tabela {table_name} removida para recriação.")
-            else:
-                print("Operação cancelada pelo usuário.")
-                return
-        else:
-            conn = sqlite3.connect(DB_PATH)
-            cursor = conn.cursor()
-
-        if not conn:
-            conn = sqlite3.connect(DB_PATH)
-            cursor = conn.cursor()
-
-        # Cria tabela
-        cursor.execute(f"""
-            CREATE TABLE IF NOT EXISTS {table_name} (
-                ID_element INTEGER PRIMARY KEY AUTOINCREMENT,
-                name_element TEXT NOT NULL,
-                type_element TEXT NOT NULL,
-                math_element TEXT,
-                msg_element TEXT,
-                value_element REAL,
-                select_element TEXT,
-                str_element TEXT,
-                e_col INTEGER,
-                e_row INTEGER,
-                user_id INTEGER,
-                section TEXT
-            );
-        """)
-
-        # Usa a nova função de seleção de arquivo
-        txt_file = select_import_file(table_name)
-        if not txt_file:
-            return
-
-        # Resto do processo de importação
-        df = clean_csv_data(txt_file)
-        if df is None:
-            messagebox.showerror("Erro", "Não foi possível ler o arquivo selecionado.")
-            return
-
-        # Confirmação final antes de iniciar a importação
-        if messagebox.askyesno("Confirmação Final",
-            f"Foram encontradas {len(df)} linhas para importar.\n"
-            "Deseja iniciar a importação?"):
-            
-            # Processa cada linha
-            for _, row in df.iterrows():
-                row_dict = row.to_dict()
-                
-                # Valida dados do selectbox
-                is_valid, row_dict = validate_selectbox_data(row_dict)
-                if not is_valid:
-                    continue
-                
-                try:
-                    cursor.execute(f"""
-                        INSERT INTO {table_name} (
-                            name_element, type_element, math_element, 
-                            msg_element, value_element, select_element,
-                            str_element, e_col, e_row, user_id, section
-                        )
-                        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                    """, (
-                        str(row_dict['name_element']),
-                        str(row_dict['type_element']),
-                        str(row_dict['math_element']),
-                        str(row_dict['msg_element']),
-                        row_dict['value_element'],
-                        str(row_dict['select_element']),
-                        str(row_dict['str_element']),
-                        int(float(format_float_value(row_dict['e_col']))),
-                        int(float(format_float_value(row_dict['e_row']))),
-                        int(row_dict['user_id']) if pd.notna(row_dict.get('user_id')) else None,
-                        str(row_dict['section']) if pd.notna(row_dict.get('section')) else None
-                    ))
-                    print(f"Inserido value_element: {format_br_number(row_dict['value_element'])}")
-                except Exception as e:
-                    print(f"Erro ao inserir linha na tabela {table_name}: {str(e)}")
-                    continue
-
-            conn.commit()
-            messagebox.showinfo("Sucesso", 
-                f"Dados importados com sucesso para a tabela '{table_name}'\n"
-                f"Total de registros processados: {len(df)}")
-        else:
-            print("Importação cancelada pelo usuário.")
+def importar_tabela(table_name, manter_dados_se_recusar=False):
+    """
+    Fluxo interativo (tkinter) comum a todas as tabelas. A leitura, validação e gravação
+    ficam no importador, o mesmo usado pela CLI (python importador.py --help).
+    """
+    check_database()
 
-    except Exception as e:
-        messagebox.showerror("Erro", f"Ocorreu um erro durante a importação:\n{str(e)}")
-    finally:
-        if conn:
-            conn.close()
+    root = tk.Tk()
+    root.withdraw()
+    if manter_dados_se_recusar:
+        pergunta = f"A tabela {table_name} já existe. Deseja limpar os dados existentes?"
+    else:
+        pergunta = f"A tabela {table_name} já existe. Deseja apagá-la e criar uma nova?"
+    if messagebox.askyesno("Confirmação", pergunta):
+        modo = 'replace'
+    elif manter_dados_se_recusar:
+        modo = 'append'
+        print("Importação será realizada mantendo dados existentes.")
+    else:
+        print("Operação cancelada pelo usuário.")
+        return
+
+    # Usa a nova função de seleção de arquivo
+    txt_file = select_import_file(table_name)
+    if not txt_file:
+        return
 
-def create_database_insumos():
-    """Cria o banco de dados e a tabela forms_insumos."""
-    check_database()  # Verifica pasta data e banco
-    
-    table_name = "forms_insumos"
-    conn = None
+    # Primeira passada só valida (em lotes) para mostrar o que será importado
     try:
-        # Garante que o diretório de dados existe
-        DATA_DIR.mkdir(parents=True, exist_ok=True)
-        
-        # Verifica banco existente
-        if DB_PATH.exists():
-            root = tk.Tk()
-            root.withdraw()
-            if messagebox.askyesno("Confirmação", 
-                f"A tabela {table_name} já existe. Deseja apagá-la e criar uma nova?"):
-                conn = sqlite3.connect(DB_PATH)
-                cursor = conn.cursor()
-                cursor.execute(f"DROP TABLE IF EXISTS {table_name}")
-                conn.commit()
-                print(f"Tabela {table_name} removida para recriação.")
-            else:
-                print("Operação cancelada pelo usuário.")
-                return
-        else:
-            conn = sqlite3.connect(DB_PATH)
-            cursor = conn.cursor()
-
-        if not conn:
-            conn = sqlite3.connect(DB_PATH)
-            cursor = conn.cursor()
-
-        # Cria tabela
-        cursor.execute(f"""
-            CREATE TABLE IF NOT EXISTS {table_name} (
-                ID_element INTEGER PRIMARY KEY AUTOINCREMENT,
-                name_element TEXT NOT NULL,
-                type_element TEXT NOT NULL,
-                math_element TEXT,
-                msg_element TEXT,
-                value_element REAL,
-                select_element TEXT,
-                str_element TEXT,
-                e_col INTEGER,
-                e_row INTEGER,
-                user_id INTEGER,
-                section TEXT
-            );
-        """)
-
-        # Usa a nova função de seleção de arquivo
-        txt_file = select_import_file(table_name)
-        if not txt_file:
-            return
-
-        # Resto do processo de importação
-        df = clean_csv_data(txt_file)
-        if df is None:
-            messagebox.showerror("Erro", "Não foi possível ler o arquivo selecionado.")
-            return
-
-        # Confirmação final antes de iniciar a importação
-        if messagebox.askyesno("Confirmação Final",
-            f"Foram encontradas {len(df)} linhas para importar.\n"
-            "Deseja iniciar a importação?"):
-            
-            # Processa cada linha
-            for _, row in df.iterrows():
-                row_dict = row.to_dict()
-                
-                # Valida dados do selectbox
-                is_valid, row_dict = validate_selectbox_data(row_dict)
-                if not is_valid:
-                    continue
-                
-                try:
-                    cursor.execute(f"""
-                        INSERT INTO {table_name} (
-                            name_element, type_element, math_element, 
-                            msg_element, value_element, select_element,
-                            str_element, e_col, e_row, user_id, section
-                        )
-                        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                    """, (
-                        str(row_dict['name_element']),
-                        str(row_dict['type_element']),
-                        str(row_dict['math_element']),
-                        str(row_dict['msg_element']),
-                        row_dict['value_element'],
-                        str(row_dict['select_element']),
-                        str(row_dict['str_element']),
-                        int(float(format_float_value(row_dict['e_col']))),
-                        int(float(format_float_value(row_dict['e_row']))),
-                        int(row_dict['user_id']) if pd.notna(row_dict.get('user_id')) else None,
-                        str(row_dict['section']) if pd.notna(row_dict.get('section')) else None
-                    ))
-                    print(f"Inserido value_element: {format_br_number(row_dict['value_element'])}")
-                except Exception as e:
-                    print(f"Erro ao inserir linha na tabela {table_name}: {str(e)}")
-                    continue
-
-            conn.commit()
-            messagebox.showinfo("Sucesso", 
-                f"Dados importados com sucesso para a tabela '{table_name}'\n"
-                f"Total de registros processados: {len(df)}")
-        else:
-            print("Importação cancelada pelo usuário.")
-
+        previa = importar_arquivo(table_name, txt_file, modo, dry_run=True)
     except Exception as e:
-        messagebox.showerror("Erro", f"Ocorreu um erro durante a importação:\n{str(e)}")
-    finally:
-        if conn:
-            conn.close()
-
-def create_database_forms():
-    """Cria o banco de dados e a tabela forms_tab."""
-    check_database()
-    table_name = "forms_tab"
-    
-    conn = None
-    try:
-        # Verifica banco existente
-        if DB_PATH.exists():
-            root = tk.Tk()
-            root.withdraw()
-            if messagebox.askyesno("Confirmação", 
-                f"A tabela {table_name} já existe. Deseja apagá-la e criar uma nova?"):
-                conn = sqlite3.connect(DB_PATH)
-                cursor = conn.cursor()
-                cursor.execute(f"DROP TABLE IF EXISTS {table_name}")
-                conn.commit()
-                print(f"Tabela {table_name} removida para recriação.")
-            else:
-                print("Operação cancelada pelo usuário.")
-                return
-        
-        if not conn:
-            conn = sqlite3.connect(DB_PATH)
-            cursor = conn.cursor()
-
-        # Cria tabela com a coluna col_len
-        cursor.execute(f"""
-            CREATE TABLE IF NOT EXISTS {table_name} (
-                ID_element INTEGER PRIMARY KEY AUTOINCREMENT,
-                name_element TEXT NOT NULL,
-                type_element TEXT NOT NULL,
-                math_element TEXT,
-                msg_element TEXT,
-                value_element REAL,
-                select_element TEXT,
-                str_element TEXT,
-                e_col INTEGER,
-                e_row INTEGER,
-                user_id INTEGER,
-                section TEXT,
-                col_len TEXT
-            );
-        """)
-
-        # Usa a nova função de seleção de arquivo
-        txt_file = select_import_file(table_name)
-        if not txt_file:
-            return
+        messagebox.showerror("Erro", f"Não foi possível ler o arquivo selecionado:\n{str(e)}")
+        return
+
+    aviso_erros = ""
+    if previa['relatorio_erros']:
+        aviso_erros = (
+            f"{previa['descartadas']} linha(s) com erro serão ignoradas.\n"
+            f"Detalhes por linha em: {previa['relatorio_erros']}\n"
+        )
 
-        # Lê o arquivo com configurações específicas para incluir col_len
+    # Confirmação final antes de iniciar a importação
+    if messagebox.askyesno("Confirmação Final",
+        f"Foram encontradas {previa['lidas']} linhas para importar.\n"
+        f"{aviso_erros}"
+        "Deseja iniciar a importação?"):
         try:
-            df = pd.read_csv(
-                txt_file,
-                encoding='cp1252',
-                sep='\t',
-                quoting=3,
-                na_filter=False,
-                decimal=','
-            )
-            print("\nColunas encontradas no arquivo:")
-            print(df.columns.tolist())
-            
-            print("\nPrimeiras 10 linhas do arquivo com todas as colunas:")
-            pd.set_option('display.max_columns', None)  # Mostra todas as colunas
-            pd.set_option('display.width', None)        # Não limita a largura da exibição
-            pd.set_option('display.max_colwidth', None) # Mostra conteúdo completo das células
-            print(df.head(10))
-            
-            # Verifica se a coluna col_len existe
-            if 'col_len' not in df.columns:
-                print("\nAviso: Coluna 'col_len' não encontrada no arquivo.")
-                df['col_len'] = ''  # Adiciona coluna vazia se não existir
+            resumo = importar_arquivo(table_name, txt_file, modo)
+            messagebox.showinfo("Sucesso",
+                f"Dados importados com sucesso para a tabela '{table_name}'\n"
+                f"Total de registros processados: {resumo['validas']}")
         except Exception as e:
-            messagebox.showerror("Erro", f"Erro ao ler arquivo:\n{str(e)}")
-            return
+            messagebox.showerror("Erro", f"Ocorreu um erro durante a importação:\n{str(e)}")
+    else:
+        print("Importação cancelada pelo usuário.")
 
-        # Confirmação final antes de iniciar a importação
-        if messagebox.askyesno("Confirmação Final",
-            f"Foram encontradas {len(df)} linhas para importar.\n"
-            "Deseja iniciar a importação?"):
-            
-            # Processa cada linha
-            for _, row in df.iterrows():
-                row_dict = row.to_dict()
-                
-                # Valida dados do selectbox
-                is_valid, row_dict = validate_selectbox_data(row_dict)
-                if not is_valid:
-                    continue
-                
-                try:
-                    cursor.execute(f"""
-                        INSERT INTO {table_name} (
-                            name_element, type_element, math_element, 
-                            msg_element, value_element, select_element,
-                            str_element, e_col, e_row, user_id, section,
-                            col_len
-                        )
-                        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                    """, (
-                        str(row_dict['name_element']),
-                        str(row_dict['type_element']),
-                        str(row_dict['math_element']),
-                        str(row_dict['msg_element']),
-                        row_dict['value_element'],
-                        str(row_dict['select_element']),
-                        str(row_dict['str_element']),
-                        int(float(format_float_value(row_dict['e_col']))),
-                        int(float(format_float_value(row_dict['e_row']))),
-                        int(row_dict['user_id']) if pd.notna(row_dict.get('user_id')) else None,
-                        str(row_dict['section']) if pd.notna(row_dict.get('section')) else None,
-                        str(row_dict.get('col_len', ''))  # Inclui col_len, vazio se não existir
-                    ))
-                    print(f"Inserido registro com name_element: {row_dict['name_element']}")
-                except Exception as e:
-                    print(f"Erro ao inserir linha na tabela {table_name}: {str(e)}")
-                    continue
+def create_database():
+    """Importa a tabela forms_resultados."""
+    importar_tabela("forms_resultados")
 
-            conn.commit()
-            messagebox.showinfo("Sucesso", 
-                f"Dados importados com sucesso para a tabela '{table_name}'\n"
-                f"Total de registros processados: {len(df)}")
-        else:
-            print("Importação cancelada pelo usuário.")
+def create_database_insumos():
+    """Importa a tabela forms_insumos."""
+    importar_tabela("forms_insumos")
 
-    except Exception as e:
-        messagebox.showerror("Erro", f"Ocorreu um erro durante a importação:\n{str(e)}")
-    finally:
-        if conn:
-            conn.close()
+def create_database_forms():
+    """Importa a tabela forms_tab."""
+    importar_tabela("forms_tab")
 
 def create_database_usuarios():
-    """Cria o banco de dados e a tabela usuarios."""
-    check_database()
-    table_name = "usuarios"
-    conn = None
-    try:
-        if DB_PATH.exists():
-            root = tk.Tk()
-            root.withdraw()
-            if messagebox.askyesno("Confirmação", 
-                f"A tabela {table_name} já existe. Deseja apagá-la e criar uma nova?"):
-                conn = sqlite3.connect(DB_PATH)
-                cursor = conn.cursor()
-                cursor.execute(f"DROP TABLE IF EXISTS {table_name}")
-                conn.commit()
-                print(f"Tabela {table_name} removida para recriação.")
-            else:
-                print("Operação cancelada pelo usuário.")
-                return
-        else:
-            conn = sqlite3.connect(DB_PATH)
-            cursor = conn.cursor()
-
-        if not conn:
-            conn = sqlite3.connect(DB_PATH)
-            cursor = conn.cursor()
-
-        # Cria tabela usuarios com estrutura atualizada incluindo user_id
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS usuarios (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                user_id INTEGER UNIQUE NOT NULL,
-                nome TEXT NOT NULL,
-                email TEXT UNIQUE NOT NULL,
-                senha TEXT NOT NULL,
-                perfil TEXT NOT NULL,
-                empresa TEXT
-            );
-        """)
-
-        # Usa a nova função de seleção de arquivo
-        txt_file = select_import_file(table_name)
-        if not txt_file:
-            return
-
-        # Lê o arquivo com configurações específicas para usuários
-        try:
-            df = pd.read_csv(
-                txt_file,
-                encoding='cp1252',
-                sep='\t',
-                quoting=3,
-                na_filter=False
-            )
-        except Exception as e:
-            messagebox.showerror("Erro", f"Erro ao ler arquivo de usuários:\n{str(e)}")
-            return
-
-        # Confirmação final antes de iniciar a importação
-        if messagebox.askyesno("Confirmação Final",
-            f"Foram encontradas {len(df)} linhas para importar.\n"
-            "Deseja iniciar a importação?"):
-            
-            for _, row in df.iterrows():
-                try:
-                    cursor.execute("""
-                        INSERT INTO usuarios (user_id, nome, email, senha, perfil, empresa)
-                        VALUES (?, ?, ?, ?, ?, ?)
-                    """, (
-                        int(row['user_id']),
-                        str(row['nome']).strip(),
-                        str(row['email']).strip(),
-                        str(row['senha']).strip(),
-                        str(row['perfil']).strip(),
-                        str(row['empresa']).strip() if 'empresa' in row else None
-                    ))
-                    print(f"Usuário inserido: {row['nome']}")
-                except Exception as e:
-                    print(f"Erro ao inserir usuário: {str(e)}")
-                    continue
-
-            conn.commit()
-            messagebox.showinfo("Sucesso", 
-                f"Dados importados com sucesso para a tabela '{table_name}'\n"
-                f"Total de usuários processados: {len(df)}")
-        else:
-            print("Importação cancelada pelo usuário.")
-
-    except Exception as e:
-        messagebox.showerror("Erro", f"Ocorreu um erro durante a importação:\n{str(e)}")
-    finally:
-        if conn:
-            conn.close()
+    """Importa a tabela usuarios."""
+    importar_tabela("usuarios")
 
 def create_database_result_sea():
     """Importa dados para a tabela forms_result_sea."""
-    check_database()
-    table_name = "forms_result_sea"
-    
-    conn = None
-    try:
-        # Verifica banco existente
-        if DB_PATH.exists():
-            root = tk.Tk()
-            root.withdraw()
-            if messagebox.askyesno("Confirmação", 
-                f"A tabela {table_name} já existe. Deseja limpar os dados existentes?"):
-                conn = sqlite3.connect(DB_PATH)
-                cursor = conn.cursor()
-                cursor.execute(f"DELETE FROM {table_name}")
-                conn.commit()
-                print(f"Dados da tabela {table_name} removidos.")
-            else:
-                print("Importação será realizada mantendo dados existentes.")
-        
-        if not conn:
-            conn = sqlite3.connect(DB_PATH)
-            cursor = conn.cursor()
-
-        # Usa a nova função de seleção de arquivo
-        txt_file = select_import_file(table_name)
-        if not txt_file:
-            return
-
-        # Resto do processo de importação
-        df = clean_csv_data(txt_file)
-        if df is None:
-            messagebox.showerror("Erro", "Não foi possível ler o arquivo selecionado.")
-            return
-
-        # Confirmação final antes de iniciar a importação
-        if messagebox.askyesno("Confirmação Final",
-            f"Foram encontradas {len(df)} linhas para importar.\n"
-            "Deseja iniciar a importação?"):
-            
-            # Processa cada linha
-            for _, row in df.iterrows():
-                row_dict = row.to_dict()
-                
-                # Valida dados do selectbox
-                is_valid, row_dict = validate_selectbox_data(row_dict)
-                if not is_valid:
-                    continue
-                
-                try:
-                    cursor.execute(f"""
-                        INSERT INTO {table_name} (
-                            name_element, type_element, math_element, 
-                            msg_element, value_element, select_element,
-                            str_element, e_col, e_row, user_id, section
-                        )
-                        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                    """, (
-                        str(row_dict['name_element']),
-                        str(row_dict['type_element']),
-                        str(row_dict['math_element']),
-                        str(row_dict['msg_element']),
-                        row_dict['value_element'],
-                        str(row_dict['select_element']),
-                        str(row_dict['str_element']),
-                        int(float(format_float_value(row_dict['e_col']))),
-                        int(float(format_float_value(row_dict['e_row']))),
-                        int(row_dict['user_id']) if pd.notna(row_dict.get('user_id')) else None,
-                        str(row_dict['section']) if pd.notna(row_dict.get('section')) else None
-                    ))
-                    print(f"Inserido value_element: {format_br_number(row_dict['value_element'])}")
-                except Exception as e:
-                    print(f"Erro ao inserir linha na tabela {table_name}: {str(e)}")
-                    continue
-
-            conn.commit()
-            messagebox.showinfo("Sucesso", 
-                f"Dados importados com sucesso para a tabela '{table_name}'\n"
-                f"Total de registros processados: {len(df)}")
-        else:
-            print("Importação cancelada pelo usuário.")
-
-    except Exception as e:
-        messagebox.showerror("Erro", f"Ocorreu um erro durante a importação:\n{str(e)}")
-    finally:
-        if conn:
-            conn.close()
+    importar_tabela("forms_result_sea", manter_dados_se_recusar=True)
 
 def create_database_setorial():
-    """Cria o banco de dados e a tabela forms_setorial."""
-    check_database()
-    table_name = "forms_setorial"
-    
-    conn = None
-    try:
-        # Verifica banco existente
-        if DB_PATH.exists():
-            root = tk.Tk()
-            root.withdraw()
-            if messagebox.askyesno("Confirmação", 
-                f"A tabela {table_name} já existe. Deseja apagá-la e criar uma nova?"):
-                conn = sqlite3.connect(DB_PATH)
-                cursor = conn.cursor()
-                cursor.execute(f"DROP TABLE IF EXISTS {table_name}")
-                conn.commit()
-                print(f"Tabela {table_name} removida para recriação.")
-            else:
-                print("Operação cancelada pelo usuário.")
-                return
-        else:
-            conn = sqlite3.connect(DB_PATH)
-            cursor = conn.cursor()
-
-        if not conn:
-            conn = sqlite3.connect(DB_PATH)
-            cursor = conn.cursor()
-
-        # Cria tabela
-        cursor.execute(f"""
-            CREATE TABLE IF NOT EXISTS {table_name} (
-                ID_element INTEGER PRIMARY KEY AUTOINCREMENT,
-                name_element TEXT NOT NULL,
-                type_element TEXT NOT NULL,
-                math_element TEXT,
-                msg_element TEXT,
-                value_element REAL,
-                select_element TEXT,
-                str_element TEXT,
-                e_col INTEGER,
-                e_row INTEGER,
-                user_id INTEGER,
-                section TEXT
-            );
-        """)
-
-        # Usa a nova função de seleção de arquivo
-        txt_file = select_import_file(table_name)
-        if not txt_file:
-            return
-
-        # Resto do processo de importação
-        df = clean_csv_data(txt_file)
-        if df is None:
-            messagebox.showerror("Erro", "Não foi possível ler o arquivo selecionado.")
-            return
-
-        # Confirmação final antes de iniciar a importação
-        if messagebox.askyesno("Confirmação Final",
-            f"Foram encontradas {len(df)} linhas para importar.\n"
-            "Deseja iniciar a importação?"):
-            
-            # Processa cada linha
-            for _, row in df.iterrows():
-                row_dict = row.to_dict()
-                
-                # Valida dados do selectbox
-                is_valid, row_dict = validate_selectbox_data(row_dict)
-                if not is_valid:
-                    continue
-                
-                try:
-                    cursor.execute(f"""
-                        INSERT INTO {table_name} (
-                            name_element, type_element, math_element, 
-                            msg_element, value_element, select_element,
-                            str_element, e_col, e_row, user_id, section
-                        )
-                        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                    """, (
-                        str(row_dict['name_element']),
-                        str(row_dict['type_element']),
-                        str(row_dict['math_element']),
-                        str(row_dict['msg_element']),
-                        row_dict['value_element'],
-                        str(row_dict['select_element']),
-                        str(row_dict['str_element']),
-                        int(float(format_float_value(row_dict['e_col']))),
-                        int(float(format_float_value(row_dict['e_row']))),
-                        int(row_dict['user_id']) if pd.notna(row_dict.get('user_id')) else None,
-                        str(row_dict['section']) if pd.notna(row_dict.get('section')) else None
-                    ))
-                    print(f"Inserido value_element: {format_br_number(row_dict['value_element'])}")
-                except Exception as e:
-                    print(f"Erro ao inserir linha na tabela {table_name}: {str(e)}")
-                    continue
-
-            conn.commit()
-            messagebox.showinfo("Sucesso", 
-                f"Dados importados com sucesso para a tabela '{table_name}'\n"
-                f"Total de registros processados: {len(df)}")
-        else:
-            print("Importação cancelada pelo usuário.")
-
-    except Exception as e:
-        messagebox.showerror("Erro", f"Ocorreu um erro durante a importação:\n{str(e)}")
-    finally:
-        if conn:
-            conn.close()
+    """Importa a tabela forms_setorial."""
+    importar_tabela("forms_setorial")
 
 def create_database_setorial_sea():
-    """Cria o banco de dados e a tabela forms_setorial_sea."""
-    check_database()
-    table_name = "forms_setorial_sea"
-    
-    print(f"\nIniciando importação para tabela: {table_name}")  # Debug
-    
-    conn = None
-    try:
-        # Verifica banco existente
-        if DB_PATH.exists():
-            root = tk.Tk()
-            root.withdraw()
-            if messagebox.askyesno("Confirmação", 
-                f"A tabela {table_name} já existe. Deseja apagá-la e criar uma nova?"):
-                conn = sqlite3.connect(DB_PATH)
-                cursor = conn.cursor()
-                cursor.execute(f"DROP TABLE IF EXISTS {table_name}")
-                conn.commit()
-                print(f"Tabela {table_name} removida para recriação.")
-            else:
-                print("Operação cancelada pelo usuário.")
-                return
-        else:
-            conn = sqlite3.connect(DB_PATH)
-            cursor = conn.cursor()
-
-        if not conn:
-            conn = sqlite3.connect(DB_PATH)
-            cursor = conn.cursor()
-
-        # Cria tabela
-        cursor.execute(f"""
-            CREATE TABLE IF NOT EXISTS {table_name} (
-                ID_element INTEGER PRIMARY KEY AUTOINCREMENT,
-                name_element TEXT NOT NULL,
-                type_element TEXT NOT NULL,
-                math_element TEXT,
-                msg_element TEXT,
-                value_element REAL,
-                select_element TEXT,
-                str_element TEXT,
-                e_col INTEGER,
-                e_row INTEGER,
-                user_id INTEGER,
-                section TEXT
-            );
-        """)
-
-        # Usa a nova função de seleção de arquivo
-        txt_file = select_import_file(table_name)
-        if not txt_file:
-            return
-
-        # Resto do processo de importação
-        df = clean_csv_data(txt_file)
-        if df is None:
-            messagebox.showerror("Erro", "Não foi possível ler o arquivo selecionado.")
-            return
-
-        print("\nPrimeiras 5 linhas do arquivo:")  # Debug
-        print(df.head())
-        print("\nColunas do arquivo:")  # Debug
-        print(df.columns.tolist())
-        
-        # Confirmação final antes de iniciar a importação
-        if messagebox.askyesno("Confirmação Final",
-            f"Foram encontradas {len(df)} linhas para importar.\n"
-            "Deseja iniciar a importação?"):
-            
-            # Processa cada linha
-            for index, row in df.iterrows():
-                row_dict = row.to_dict()
-                print(f"\nProcessando linha {index}:")  # Debug
-                print(f"name_element: {row_dict.get('name_element')}")
-                print(f"type_element: {row_dict.get('type_element')}")
-                print(f"value_element: {row_dict.get('value_element')}")
-                
-                # Valida dados do selectbox
-                is_valid, row_dict = validate_selectbox_data(row_dict)
-                if not is_valid:
-                    continue
-                
-                try:
-                    cursor.execute(f"""
-                        INSERT INTO {table_name} (
-                            name_element, type_element, math_element, 
-                            msg_element, value_element, select_element,
-                            str_element, e_col, e_row, user_id, section
-                        )
-                        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                    """, (
-                        str(row_dict['name_element']),
-                        str(row_dict['type_element']),
-                        str(row_dict['math_element']),
-                        str(row_dict['msg_element']),
-                        row_dict['value_element'],
-                        str(row_dict['select_element']),
-                        str(row_dict['str_element']),
-                        int(float(format_float_value(row_dict['e_col']))),
-                        int(float(format_float_value(row_dict['e_row']))),
-                        int(row_dict['user_id']) if pd.notna(row_dict.get('user_id')) else None,
-                        str(row_dict['section']) if pd.notna(row_dict.get('section')) else None
-                    ))
-                    print(f"Inserido value_element: {format_br_number(row_dict['value_element'])}")
-                except Exception as e:
-                    print(f"Erro ao inserir linha na tabela {table_name}: {str(e)}")
-                    continue
-
-            conn.commit()
-            messagebox.showinfo("Sucesso", 
-                f"Dados importados com sucesso para a tabela '{table_name}'\n"
-                f"Total de registros processados: {len(df)}")
-        else:
-            print("Importação cancelada pelo usuário.")
-
-    except Exception as e:
-        messagebox.showerror("Erro", f"Ocorreu um erro durante a importação:\n{str(e)}")
-    finally:
-        if conn:
-            conn.close()
+    """Importa a tabela forms_setorial_sea."""
+    importar_tabela("forms_setorial_sea")
 
 def create_database_energetica():
-    """Cria o banco de dados e a tabela forms_energetica."""
-    check_database()
-    table_name = "forms_energetica"
-    
-    print(f"\nIniciando importação para tabela: {table_name}")  # Debug
-    
-    conn = None
-    try:
-        # Verifica banco existente
-        if DB_PATH.exists():
-            root = tk.Tk()
-            root.withdraw()
-            if messagebox.askyesno("Confirmação", 
-                f"A tabela {table_name} já existe. Deseja apagá-la e criar uma nova?"):
-                conn = sqlite3.connect(DB_PATH)
-                cursor = conn.cursor()
-                cursor.execute(f"DROP TABLE IF EXISTS {table_name}")
-                conn.commit()
-                print(f"Tabela {table_name} removida para recriação.")
-            else:
-                print("Operação cancelada pelo usuário.")
-                return
-        else:
-            conn = sqlite3.connect(DB_PATH)
-            cursor = conn.cursor()
-
-        if not conn:
-            conn = sqlite3.connect(DB_PATH)
-            cursor = conn.cursor()
-
-        # Cria tabela
-        cursor.execute(f"""
-            CREATE TABLE IF NOT EXISTS {table_name} (
-                ID_element INTEGER PRIMARY KEY AUTOINCREMENT,
-                name_element TEXT NOT NULL,
-                type_element TEXT NOT NULL,
-                math_element TEXT,
-                msg_element TEXT,
-                value_element REAL,
-                select_element TEXT,
-                str_element TEXT,
-                e_col INTEGER,
-                e_row INTEGER,
-                user_id INTEGER,
-                section TEXT
-            );
-        """)
-
-        # Usa a nova função de seleção de arquivo
-        txt_file = select_import_file(table_name)
-        if not txt_file:
-            return
-
-        # Resto do processo de importação
-        df = clean_csv_data(txt_file)
-        if df is None:
-            messagebox.showerror("Erro", "Não foi possível ler o arquivo selecionado.")
-            return
-
-        print("\nPrimeiras 5 linhas do arquivo:")  # Debug
-        print(df.head())
-        print("\nColunas do arquivo:")  # Debug
-        print(df.columns.tolist())
-        
-        # Confirmação final antes de iniciar a importação
-        if messagebox.askyesno("Confirmação Final",
-            f"Foram encontradas {len(df)} linhas para importar.\n"
-            "Deseja iniciar a importação?"):
-            
-            # Processa cada linha
-            for index, row in df.iterrows():
-                row_dict = row.to_dict()
-                print(f"\nProcessando linha {index}:")  # Debug
-                print(f"name_element: {row_dict.get('name_element')}")
-                print(f"type_element: {row_dict.get('type_element')}")
-                print(f"value_element: {row_dict.get('value_element')}")
-                
-                # Valida dados do selectbox
-                is_valid, row_dict = validate_selectbox_data(row_dict)
-                if not is_valid:
-                    continue
-                
-                try:
-                    cursor.execute(f"""
-                        INSERT INTO {table_name} (
-                            name_element, type_element, math_element, 
-                            msg_element, value_element, select_element,
-                            str_element, e_col, e_row, user_id, section
-                        )
-                        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                    """, (
-                        str(row_dict['name_element']),
-                        str(row_dict['type_element']),
-                        str(row_dict['math_element']),
-                        str(row_dict['msg_element']),
-                        row_dict['value_element'],
-                        str(row_dict['select_element']),
-                        str(row_dict['str_element']),
-                        int(float(format_float_value(row_dict['e_col']))),
-                        int(float(format_float_value(row_dict['e_row']))),
-                        int(row_dict['user_id']) if pd.notna(row_dict.get('user_id')) else None,
-                        str(row_dict['section']) if pd.notna(row_dict.get('section')) else None
-                    ))
-                    print(f"Inserido value_element: {format_br_number(row_dict['value_element'])}")
-                except Exception as e:
-                    print(f"Erro ao inserir linha na tabela {table_name}: {str(e)}")
-                    continue
-
-            conn.commit()
-            messagebox.showinfo("Sucesso", 
-                f"Dados importados com sucesso para a tabela '{table_name}'\n"
-                f"Total de registros processados: {len(df)}")
-        else:
-            print("Importação cancelada pelo usuário.")
-
-    except Exception as e:
-        messagebox.showerror("Erro", f"Ocorreu um erro durante a importação:\n{str(e)}")
-    finally:
-        if conn:
-            conn.close()
+    """Importa a tabela forms_energetica."""
+    importar_tabela("forms_energetica")
 
 if __name__ == "__main__":
     # Verifica pasta data e banco antes de mostrar o menu
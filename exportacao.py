@@ -0,0 +1,203 @@
+# Arquivo: exportacao.py
+# Data: 19/10/2026
+# Descrição: Exportação em lote de tabelas/consultas do SQLite (TXT padrão BR, CSV, Parquet e JSONL)
+# Lê em lotes e grava direto em um arquivo temporário (memória constante), em uma thread de fundo
+
+import io
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+import streamlit as st
+
+from config import DB_PATH
+import rastreamento
+
+TAMANHO_LOTE = 5000                     # Linhas lidas do SQLite por vez
+LIMITE_MEMORIA = 8 * 1024 * 1024        # Acima disso o arquivo temporário passa para o disco
+
+FORMATOS = {
+    'tsv_br': {'rotulo': "TXT ANSI (tabulação, vírgula decimal - padrão create_forms)", 'extensao': 'txt', 'mime': 'text/plain'},
+    'csv': {'rotulo': "CSV (UTF-8)", 'extensao': 'csv', 'mime': 'text/csv'},
+    'parquet': {'rotulo': "Parquet", 'extensao': 'parquet', 'mime': 'application/vnd.apache.parquet'},
+    'jsonl': {'rotulo': "JSON Lines", 'extensao': 'jsonl', 'mime': 'application/x-ndjson'},
+}
+
+_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix='exportacao')
+
+def tipar_lote(df, tipos):
+    """Aplica os tipos declarados ao lote: inteiros com NULL viram Int64 (sem '1.0' no arquivo)"""
+    for coluna, tipo in tipos.items():
+        if coluna not in df.columns:
+            continue
+        try:
+            if 'INT' in tipo:
+                df[coluna] = pd.to_numeric(df[coluna]).astype('Int64')
+            elif any(t in tipo for t in ('REAL', 'FLOA', 'DOUB', 'NUM')):
+                df[coluna] = pd.to_numeric(df[coluna]).astype('float64')
+            else:
+                df[coluna] = df[coluna].astype('string')
+        except (TypeError, ValueError):
+            # Valor fora do tipo declarado (SQLite é dinâmico): mantém a coluna como texto
+            df[coluna] = df[coluna].astype('string')
+    return df
+
+def citar(coluna):
+    return '"' + coluna.replace('"', '""') + '"'
+
+def esquema_parquet(conn, query, params, tipos):
+    """
+    Um tipo Arrow por coluna, definido antes do primeiro lote e aplicado a todos eles.
+    INTEGER/REAL declarados viram int64/float64 se todos os valores da consulta couberem no tipo
+    (uma passada de typeof() no SQLite); sem tipo declarado (expressões) ou com valores mistos, texto.
+    """
+    import pyarrow as pa
+    cursor = conn.execute(query, params)
+    colunas = [d[0] for d in cursor.description]
+    cursor.close()
+
+    numericos = {}
+    for coluna in colunas:
+        tipo = tipos.get(coluna) or ''
+        if 'INT' in tipo:
+            numericos[coluna] = (pa.int64(), "'integer', 'null'")
+        elif any(t in tipo for t in ('REAL', 'FLOA', 'DOUB', 'NUM')):
+            numericos[coluna] = (pa.float64(), "'integer', 'real', 'null'")
+    if numericos:
+        fora_do_tipo = conn.execute(
+            "SELECT " + ", ".join(f"MAX(typeof({citar(c)}) NOT IN ({aceitos}))" for c, (_, aceitos) in numericos.items())
+            + f" FROM ({query})", params
+        ).fetchone()
+        numericos = {c: tipo for (c, (tipo, _)), misto in zip(numericos.items(), fora_do_tipo) if not misto}
+    return pa.schema([(coluna, numericos.get(coluna, pa.string())) for coluna in colunas])
+
+def lote_arrow(lote, esquema):
+    """Lote tipado convertido para o esquema fixo (colunas de texto recebem o texto dos valores)"""
+    import pyarrow as pa
+    for campo in esquema:
+        if pa.types.is_string(campo.type) and lote[campo.name].dtype != 'string':
+            lote[campo.name] = lote[campo.name].astype('string')
+    return pa.Table.from_pandas(lote, schema=esquema, preserve_index=False)
+
+def formatar_decimais_br(df):
+    """Troca ponto por vírgula nas colunas decimais (vetorizado; NULL vira vazio)"""
+    for coluna in df.select_dtypes(include='float').columns:
+        df[coluna] = df[coluna].astype('string').str.replace('.', ',', regex=False)
+    return df
+
+def ler_lotes(conn, query, params, tamanho_lote=TAMANHO_LOTE):
+    """Gera DataFrames de até tamanho_lote linhas a partir da consulta"""
+    yield from pd.read_sql_query(query, conn, params=params, chunksize=tamanho_lote)
+
+def exportar_consulta(query, params, tipos, formato, db_path=None, tamanho_lote=TAMANHO_LOTE):
+    """
+    Executa a consulta e grava o resultado no formato escolhido em um SpooledTemporaryFile.
+    `tipos` mapeia coluna -> tipo declarado no SQLite. Retorna (arquivo posicionado no início, linhas).
+    """
+    arquivo = tempfile.SpooledTemporaryFile(max_size=LIMITE_MEMORIA, mode='w+b')
+    linhas = 0
+    conn = rastreamento.conectar(db_path or DB_PATH)
+    try:
+        lotes = (tipar_lote(lote, tipos) for lote in ler_lotes(conn, query, params, tamanho_lote))
+
+        if formato == 'parquet':
+            import pyarrow.parquet as pq
+            esquema = esquema_parquet(conn, query, params, tipos)
+            with pq.ParquetWriter(arquivo, esquema, compression='zstd') as escritor:
+                for lote in lotes:
+                    escritor.write_table(lote_arrow(lote, esquema))
+                    linhas += len(lote)
+        else:
+            codificacao = 'cp1252' if formato == 'tsv_br' else 'utf-8'
+            texto = io.TextIOWrapper(arquivo, encoding=codificacao, errors='strict', newline='')
+            for lote in lotes:
+                if formato == 'tsv_br':
+                    try:
+                        formatar_decimais_br(lote).to_csv(texto, sep='\t', index=False, header=linhas == 0)
+                    except UnicodeEncodeError as e:
+                        # Sem substituir por '?': o TXT ANSI não tem como guardar o caractere
+                        raise ValueError(
+                            f"O caractere {e.object[e.start:e.end]!r} não existe no TXT ANSI (cp1252) do create_forms. "
+                            "Exporte em CSV (UTF-8) para manter esses caracteres."
+                        ) from None
+                elif formato == 'csv':
+                    lote.to_csv(texto, index=False, header=linhas == 0)
+                elif not lote.empty:
+                    # Com lines=True o pandas já termina cada registro (inclusive o último) com '\n',
+                    # mas para um lote vazio escreve só o '\n'
+                    lote.to_json(texto, orient='records', lines=True, force_ascii=False)
+                linhas += len(lote)
+            texto.flush()
+            texto.detach()
+    except Exception:
+        arquivo.close()
+        raise
+    finally:
+        conn.close()
+
+    arquivo.seek(0)
+    return arquivo, linhas
+
+def iniciar_exportacao(query, params, tipos, formato):
+    """Agenda a exportação em uma thread de fundo e retorna o Future"""
+    return _executor.submit(exportar_consulta, query, list(params), dict(tipos), formato)
+
+@st.fragment(run_every=1)
+def acompanhar_exportacao(chave):
+    """Consulta a exportação em andamento e recarrega a página quando terminar"""
+    tarefa = st.session_state.get(f"{chave}_tarefa")
+    if tarefa and not tarefa['futuro'].done():
+        st.info("Preparando o arquivo em segundo plano...")
+    else:
+        st.rerun()
+
+def painel_exportacao(chave, nome_base, query, params, tipos):
+    """
+    Widgets de exportação: escolha do formato, preparo em segundo plano e download.
+    `chave` separa o estado de cada painel; mudar a consulta descarta o arquivo preparado.
+    """
+    chave_tarefa = f"{chave}_tarefa"
+    assinatura = (query, tuple(params))
+
+    col1, col2 = st.columns([3, 1])
+    with col1:
+        formato = st.selectbox(
+            "Formato de exportação", list(FORMATOS),
+            format_func=lambda f: FORMATOS[f]['rotulo'], key=f"{chave}_formato"
+        )
+    with col2:
+        st.write("")
+        if st.button("Preparar Exportação", key=f"{chave}_preparar"):
+            anterior = st.session_state.get(chave_tarefa)
+            if anterior and anterior['futuro'].done() and not anterior['futuro'].exception():
+                anterior['futuro'].result()[0].close()
+            st.session_state[chave_tarefa] = {
+                'assinatura': assinatura,
+                'formato': formato,
+                'futuro': iniciar_exportacao(query, params, tipos, formato),
+            }
+
+    tarefa = st.session_state.get(chave_tarefa)
+    if not tarefa or tarefa['assinatura'] != assinatura or tarefa['formato'] != formato:
+        return
+    if not tarefa['futuro'].done():
+        acompanhar_exportacao(chave)
+        return
+    if tarefa['futuro'].exception():
+        st.error(f"Erro na exportação: {tarefa['futuro'].exception()}")
+        return
+
+    arquivo, linhas = tarefa['futuro'].result()
+    info = FORMATOS[formato]
+    # O st.download_button copia os bytes para a memória do servidor em toda execução em que aparece:
+    # o arquivo só é lido no clique e o botão de download sai da tela no rerun seguinte
+    if st.button(f"Baixar {info['extensao'].upper()} ({linhas} registro(s))", key=f"{chave}_baixar"):
+        arquivo.seek(0)
+        st.download_button(
+            f"Salvar {nome_base}.{info['extensao']}",
+            data=arquivo.read(),
+            file_name=f"{nome_base}.{info['extensao']}",
+            mime=info['mime'],
+            type="primary",
+            key=f"{chave}_download"
+        )
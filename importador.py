@@ -0,0 +1,616 @@
+# Arquivo: importador.py
+# Data: 19/10/2026
+# Descrição: Motor de importação em lote das tabelas de formulários e usuários
+# Especificação declarativa por tabela, leitura em lotes (pyarrow), limpeza vetorizada com pandas
+# e gravação lote a lote em um spool temporário, copiado para o banco em uma única transação
+# Uso sem interface (servidores/rotinas noturnas):
+#   python importador.py --table forms_tab --file forms_tab.txt --mode replace
+#   python importador.py --table todas --dir /caminho/arquivos --mode replace --jobs 4
+#   python importador.py --table usuarios --mode upsert --dry-run
+
+import argparse
+import math
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from config import DATA_DIR, DB_PATH
+
+MODOS = ('replace', 'append', 'upsert')
+LINHAS_POR_LOTE = 25000          # Lote do leitor pandas (sem pyarrow)
+BLOCO_LEITURA = 2 * 1024 * 1024  # Bytes por lote do leitor pyarrow (~25 mil linhas dos arquivos de elementos)
+SPOOL_TABELA = 'importacao'      # Tabela com as linhas preparadas no banco temporário (gravar_spool)
+
+# Ajustes da conexão durante a carga; o valor de synchronous é restaurado no final
+PRAGMAS_CARGA = {
+    'synchronous': 'OFF',
+    'temp_store': 'MEMORY',
+    'cache_size': '-65536',  # 64 MB
+}
+
+# Leitura padrão dos arquivos exportados da planilha: TXT tabulado em ANSI, sem aspas
+LEITURA_PADRAO = {'encoding': 'cp1252', 'sep': '\t', 'quoting': 3, 'na_filter': False}
+
+COLUNAS_RELATORIO = ['linha', 'coluna', 'valor', 'erro', 'descartada']
+
+# Texto em memória: com pyarrow as operações de string (.str) são vetorizadas em C, sem laço Python por célula
+try:
+    import pyarrow  # noqa: F401
+    TIPO_TEXTO = pd.StringDtype('pyarrow')
+except ImportError:
+    TIPO_TEXTO = str
+
+# Colunas das tabelas de elementos -> declaração SQL (forms_tab acrescenta col_len)
+COLUNAS_ELEMENTOS = {
+    'name_element': 'TEXT NOT NULL',
+    'type_element': 'TEXT NOT NULL',
+    'math_element': 'TEXT',
+    'msg_element': 'TEXT',
+    'value_element': 'REAL',
+    'select_element': 'TEXT',
+    'str_element': 'TEXT',
+    'e_col': 'INTEGER',
+    'e_row': 'INTEGER',
+    'user_id': 'INTEGER',
+    'section': 'TEXT',
+}
+COLUNAS_USUARIOS = {
+    'user_id': 'INTEGER UNIQUE NOT NULL',
+    'nome': 'TEXT NOT NULL',
+    'email': 'TEXT UNIQUE NOT NULL',
+    'senha': 'TEXT NOT NULL',
+    'perfil': 'TEXT NOT NULL',
+    'empresa': 'TEXT',
+}
+
+def limpar_textos(df):
+    """Remove aspas/apóstrofos das pontas e espaços de todas as colunas de texto"""
+    for coluna in df.columns:
+        if pd.api.types.is_string_dtype(df[coluna]):
+            df[coluna] = df[coluna].astype(TIPO_TEXTO).str.strip('"\'').str.strip()
+    return df
+
+def texto_decimal_br(serie):
+    """Texto no padrão brasileiro reescrito com ponto decimal e sem separador de milhar"""
+    return serie.astype(TIPO_TEXTO).str.strip().str.replace('.', '', regex=False).str.replace(',', '.', regex=False)
+
+def converter_decimal_br(serie):
+    """
+    Converte a coluna para float no padrão brasileiro (ponto de milhar, vírgula decimal).
+    Vazios e valores inválidos viram 0.0.
+    """
+    if pd.api.types.is_numeric_dtype(serie):
+        return serie.astype('float64').fillna(0.0)
+    return pd.to_numeric(texto_decimal_br(serie), errors='coerce').fillna(0.0)
+
+def remover_aspas(serie):
+    """Remove todas as aspas e apóstrofos e os espaços das pontas"""
+    return serie.astype(TIPO_TEXTO).str.replace(r'["\']', '', regex=True).str.strip()
+
+def preparar_elementos(df, colunas_extras=()):
+    """
+    Aplica as regras dos elementos a todas as linhas de uma vez (selectbox com math '0,0',
+    valor 0.0 e opções limpas; demais com value_element convertido) e devolve apenas as
+    colunas gravadas, já com os tipos finais.
+    """
+    df = df.copy()
+    for coluna in list(COLUNAS_ELEMENTOS) + list(colunas_extras):
+        if coluna not in df.columns:
+            df[coluna] = ''
+
+    selectbox = df['type_element'].astype(TIPO_TEXTO) == 'selectbox'
+
+    # Selectbox: math '0,0', valor 0.0, opções separadas por '|' sem espaços em volta
+    opcoes = remover_aspas(df['select_element'].where(df['select_element'].notna(), ''))
+    opcoes = opcoes.str.replace(r'\s*\|\s*', '|', regex=True)
+    df['select_element'] = df['select_element'].astype(TIPO_TEXTO).where(~selectbox, opcoes)
+    df['str_element'] = df['str_element'].astype(TIPO_TEXTO).where(
+        ~selectbox, remover_aspas(df['str_element'].where(df['str_element'].notna(), ''))
+    )
+    df['math_element'] = df['math_element'].astype(TIPO_TEXTO).where(~selectbox, '0,0')
+    df['value_element'] = converter_decimal_br(df['value_element']).where(~selectbox, 0.0)
+
+    df['e_col'] = converter_decimal_br(df['e_col']).astype('int64')
+    df['e_row'] = converter_decimal_br(df['e_row']).astype('int64')
+    # user_id vazio é gravado como NULL
+    df['user_id'] = pd.to_numeric(df['user_id'], errors='coerce').astype('Int64')
+
+    for coluna in ['name_element', 'type_element', 'msg_element'] + list(colunas_extras):
+        df[coluna] = df[coluna].where(df[coluna].notna(), '').astype(TIPO_TEXTO)
+    df['section'] = df['section'].astype(TIPO_TEXTO).where(df['section'].notna(), None)
+
+    return df[list(COLUNAS_ELEMENTOS) + list(colunas_extras)]
+
+def preparar_usuarios(df):
+    """Limpa o arquivo de usuários (espaços nas pontas) e converte o user_id"""
+    df = df.copy()
+    if 'empresa' not in df.columns:
+        df['empresa'] = None
+    for coluna in ['nome', 'email', 'senha', 'perfil', 'empresa']:
+        df[coluna] = df[coluna].where(df[coluna].isna(), df[coluna].astype(TIPO_TEXTO).str.strip())
+    df['user_id'] = pd.to_numeric(df['user_id'], errors='raise').astype('int64')
+    return df[list(COLUNAS_USUARIOS)]
+
+def texto_vazio(serie):
+    """Máscara das células vazias (NULL ou só espaços)"""
+    return serie.isna() | (serie.astype(TIPO_TEXTO).str.strip() == '')
+
+def coluna_ausente(df):
+    """Máscara que marca todas as linhas (coluna obrigatória ausente no arquivo)"""
+    return np.ones(len(df), dtype=bool)
+
+def validar_elementos(df):
+    """Problemas por linha de um arquivo de elementos: [(máscara, coluna, erro, descarta_linha)]"""
+    problemas = [
+        (texto_vazio(df[c]) if c in df else coluna_ausente(df), c, "campo obrigatório vazio", True)
+        for c in ('name_element', 'type_element')
+    ]
+    if 'user_id' in df:
+        problemas.append((
+            ~texto_vazio(df['user_id']) & pd.to_numeric(df['user_id'], errors='coerce').isna(),
+            'user_id', "user_id não numérico", True
+        ))
+    selectbox = df['type_element'].astype(TIPO_TEXTO) == 'selectbox' if 'type_element' in df else False
+    for coluna in ('value_element', 'e_col', 'e_row'):
+        if coluna not in df or pd.api.types.is_numeric_dtype(df[coluna]):
+            continue
+        mascara = pd.to_numeric(texto_decimal_br(df[coluna]), errors='coerce').isna() & ~texto_vazio(df[coluna])
+        if coluna == 'value_element':
+            mascara &= ~selectbox
+        problemas.append((mascara, coluna, "valor numérico inválido (gravado como 0)", False))
+    return problemas
+
+def validar_usuarios(df):
+    """Problemas por linha de um arquivo de usuários: [(máscara, coluna, erro, descarta_linha)]"""
+    problemas = [
+        (texto_vazio(df[c]) if c in df else coluna_ausente(df), c, "campo obrigatório vazio", True)
+        for c in ('user_id', 'nome', 'email', 'senha', 'perfil')
+    ]
+    if 'user_id' in df:
+        user_id = pd.to_numeric(df['user_id'], errors='coerce')
+        problemas.append((user_id.isna() & ~texto_vazio(df['user_id']), 'user_id', "user_id não numérico", True))
+        problemas.append((user_id.notna() & user_id.duplicated(keep='last'), 'user_id', "user_id repetido no arquivo (vale a última linha)", True))
+    if 'email' in df:
+        email = df['email'].astype(TIPO_TEXTO).str.strip()
+        problemas.append((~texto_vazio(df['email']) & email.duplicated(keep='last'), 'email', "email repetido no arquivo (vale a última linha)", True))
+    return problemas
+
+def especificacao_elementos(arquivo, colunas_extras=(), limpar_aspas=True, indice_no_arquivo=True):
+    """Especificação de uma tabela de elementos (todas compartilham a mesma estrutura)"""
+    return {
+        'arquivo': arquivo,
+        'colunas': {**COLUNAS_ELEMENTOS, **{c: 'TEXT' for c in colunas_extras}},
+        'chave_primaria': 'ID_element',
+        # Elemento identificado pelo nome dentro do usuário (user_id NULL = elemento padrão)
+        'chave': ('name_element', 'user_id'),
+        'indice_no_arquivo': indice_no_arquivo,  # Primeira coluna do arquivo é o ID da planilha (ignorada)
+        'limpar_aspas': limpar_aspas,
+        'em_lotes': True,
+        'preparar': lambda df: preparar_elementos(df, colunas_extras),
+        'validar': validar_elementos,
+    }
+
+# Registro das tabelas importáveis: colunas e tipos, chave do upsert, leitura e regras de limpeza
+ESPECIFICACOES_TABELAS = {
+    'forms_tab': especificacao_elementos('forms_tab.txt', colunas_extras=('col_len',), limpar_aspas=False, indice_no_arquivo=False),
+    'forms_insumos': especificacao_elementos('forms_insumos.txt'),
+    'forms_resultados': especificacao_elementos('forms_resultados.txt'),
+    'forms_result_sea': especificacao_elementos('forms_result_sea.txt'),
+    'forms_setorial': especificacao_elementos('forms_setorial.txt'),
+    'forms_setorial_sea': especificacao_elementos('forms_setorial_sea.txt'),
+    'forms_energetica': especificacao_elementos('forms_energetica.txt'),
+    'usuarios': {
+        'arquivo': 'usuarios.txt',
+        'colunas': COLUNAS_USUARIOS,
+        'chave_primaria': 'id',
+        'chave': ('user_id',),
+        'indice_no_arquivo': False,
+        'limpar_aspas': False,
+        # Repetições de user_id/email são conferidas no arquivo inteiro (arquivo pequeno, lido de uma vez)
+        'em_lotes': False,
+        'preparar': preparar_usuarios,
+        'validar': validar_usuarios,
+    },
+}
+
+def obter_especificacao(tabela):
+    """Especificação registrada da tabela"""
+    if tabela not in ESPECIFICACOES_TABELAS:
+        raise ValueError(f"Tabela '{tabela}' não está registrada para importação")
+    return ESPECIFICACOES_TABELAS[tabela]
+
+def sql_criar_tabela(tabela, espec):
+    """CREATE TABLE a partir da especificação"""
+    colunas = [f"{espec['chave_primaria']} INTEGER PRIMARY KEY AUTOINCREMENT"]
+    colunas += [f"{nome} {tipo}" for nome, tipo in espec['colunas'].items()]
+    return f"CREATE TABLE IF NOT EXISTS {tabela} (\n    " + ",\n    ".join(colunas) + "\n)"
+
+def ler_cabecalho(arquivo):
+    """Nomes das colunas (primeira linha do arquivo)"""
+    with open(arquivo, encoding=LEITURA_PADRAO['encoding'], newline='') as f:
+        return f.readline().rstrip('\r\n').split(LEITURA_PADRAO['sep'])
+
+def ler_lotes_brutos(arquivo, em_lotes=True):
+    """
+    Gera DataFrames com todas as colunas como texto (vazio = '').
+    Usa o leitor em streaming do pyarrow; sem pyarrow, o read_csv do pandas com chunksize.
+    """
+    if not em_lotes:
+        yield pd.read_csv(arquivo, dtype=str, **LEITURA_PADRAO)
+        return
+    try:
+        import pyarrow as pa
+        import pyarrow.csv as pv
+    except ImportError:
+        yield from pd.read_csv(arquivo, dtype=str, chunksize=LINHAS_POR_LOTE, **LEITURA_PADRAO)
+        return
+
+    nomes = ler_cabecalho(arquivo)
+    # Arquivo aberto pelo Python: com o caminho, o pyarrow mapeia o arquivo e o RSS cresce com o tamanho dele
+    with open(arquivo, 'rb') as entrada:
+        leitor = pv.open_csv(
+            entrada,
+            read_options=pv.ReadOptions(encoding=LEITURA_PADRAO['encoding'], block_size=BLOCO_LEITURA),
+            parse_options=pv.ParseOptions(delimiter=LEITURA_PADRAO['sep'], quote_char=False),
+            convert_options=pv.ConvertOptions(column_types={n: pa.string() for n in nomes}, strings_can_be_null=False),
+        )
+        for lote in leitor:
+            yield lote.to_pandas(types_mapper={pa.string(): TIPO_TEXTO}.get)
+
+def ler_lotes(tabela, arquivo):
+    """Lotes do arquivo conforme a especificação da tabela: (DataFrame, linha do arquivo da primeira linha)"""
+    espec = obter_especificacao(tabela)
+    primeira_linha = 2  # Linha 1 é o cabeçalho
+    for df in ler_lotes_brutos(arquivo, espec['em_lotes']):
+        if espec['indice_no_arquivo']:
+            df = df.iloc[:, 1:]
+        if espec['limpar_aspas']:
+            limpar_textos(df)
+        yield df.reset_index(drop=True), primeira_linha
+        primeira_linha += len(df)
+
+def relatorio_erros(df, problemas, primeira_linha=2):
+    """
+    Consolida os problemas em um DataFrame (linha do arquivo, coluna, valor, erro, descartada)
+    e a máscara das linhas que não serão gravadas.
+    """
+    linhas_arquivo = np.arange(len(df)) + primeira_linha
+    problemas = [(np.asarray(mascara, dtype=bool), coluna, erro, descarta) for mascara, coluna, erro, descarta in problemas]
+    descartar = np.zeros(len(df), dtype=bool)
+    for mascara, _, _, descarta in problemas:
+        if descarta:
+            descartar |= mascara
+    partes = []
+    for mascara, coluna, erro, descarta in problemas:
+        if not descarta:
+            # Avisos só das linhas gravadas: numa linha descartada nada foi "gravado como 0"
+            mascara = mascara & ~descartar
+        if not mascara.any():
+            continue
+        partes.append(pd.DataFrame({
+            'linha': linhas_arquivo[mascara],
+            'coluna': coluna,
+            'valor': df[coluna][mascara].astype(str).to_numpy() if coluna in df else '',
+            'erro': erro,
+            'descartada': descarta,
+        }))
+    if not partes:
+        return pd.DataFrame(columns=COLUNAS_RELATORIO), descartar
+    return pd.concat(partes, ignore_index=True).sort_values(['linha', 'coluna']), descartar
+
+def preparar_lotes(tabela, arquivo, situacao):
+    """
+    Lê, valida e limpa o arquivo lote a lote, gerando DataFrames prontos para gravar.
+    Linhas com erro que impede a gravação ficam de fora; `situacao` acumula as linhas lidas
+    e os problemas encontrados ({'lidas', 'erros'}).
+    """
+    espec = obter_especificacao(tabela)
+    for bruto, primeira_linha in ler_lotes(tabela, arquivo):
+        erros, descartar = relatorio_erros(bruto, espec['validar'](bruto), primeira_linha)
+        situacao['lidas'] += len(bruto)
+        if not erros.empty:
+            situacao['erros'].append(erros)
+        yield espec['preparar'](bruto[~descartar])
+
+def salvar_relatorio_erros(erros, arquivo):
+    """Grava o relatório de erros ao lado do arquivo importado. Retorna o caminho (ou None se não há erros)"""
+    if not erros:
+        return None
+    destino = Path(arquivo).with_suffix('.erros.csv')
+    pd.concat(erros, ignore_index=True).to_csv(destino, index=False, encoding='utf-8')
+    return str(destino)
+
+def linhas_para_gravar(df):
+    """Tuplas com tipos nativos do Python (NA/NaN viram None), prontas para o executemany"""
+    return list(df.astype(object).where(df.notna(), None).itertuples(index=False, name=None))
+
+def soma_conferencia(valores):
+    """Soma usada na conferência: valores numéricos somados, textos pelo total de caracteres"""
+    valores = valores.dropna()
+    if pd.api.types.is_numeric_dtype(valores):
+        return float(valores.astype('float64').sum())
+    return float(valores.astype(TIPO_TEXTO).str.len().sum())
+
+def inserir_lotes(conn, tabela, lotes, progresso=print, rotulo=None):
+    """
+    executemany de cada lote na tabela, informando o andamento.
+    Retorna as estatísticas de conferência acumuladas: {'linhas', 'colunas': {coluna: [não nulos, soma]}}.
+    """
+    estatisticas = {'linhas': 0, 'colunas': {}}
+    inicio = time.perf_counter()
+    for df in lotes:
+        if df.empty:
+            continue
+        sql = f"INSERT INTO {tabela} ({', '.join(df.columns)}) VALUES ({', '.join('?' for _ in df.columns)})"
+        conn.executemany(sql, linhas_para_gravar(df))
+        estatisticas['linhas'] += len(df)
+        for coluna in df.columns:
+            acumulado = estatisticas['colunas'].setdefault(coluna, [0, 0.0])
+            acumulado[0] += int(df[coluna].notna().sum())
+            acumulado[1] += soma_conferencia(df[coluna])
+        progresso(f"{rotulo or tabela}: {estatisticas['linhas']} linha(s) gravada(s) ({time.perf_counter() - inicio:.1f}s)")
+    return estatisticas
+
+def gravar_spool(tabela, espec, lotes, progresso=print):
+    """
+    Grava os lotes preparados em um banco temporário próprio, fora do banco principal: leitura,
+    validação e limpeza do arquivo acontecem sem segurar a trava de escrita do banco.
+    Retorna (caminho do spool, estatísticas de conferência). A tabela no spool se chama SPOOL_TABELA.
+    """
+    descritor, caminho = tempfile.mkstemp(prefix=f"importacao_{tabela}_", suffix='.db')
+    os.close(descritor)
+    spool = sqlite3.connect(caminho)
+    try:
+        spool.execute("PRAGMA journal_mode = OFF")
+        spool.execute("PRAGMA synchronous = OFF")
+        # Só o tipo de cada coluna (afinidade igual à do destino), sem NOT NULL/UNIQUE
+        colunas = ', '.join(f"{nome} {tipo.split()[0]}" for nome, tipo in espec['colunas'].items())
+        spool.execute(f"CREATE TABLE {SPOOL_TABELA} ({colunas})")
+        estatisticas = inserir_lotes(spool, SPOOL_TABELA, lotes, progresso, rotulo=f"{tabela} (preparação)")
+        spool.execute(f"CREATE INDEX idx_{SPOOL_TABELA}_chave ON {SPOOL_TABELA} ({', '.join(espec['chave'])})")
+        spool.commit()
+    except Exception:
+        spool.close()
+        os.unlink(caminho)
+        raise
+    spool.close()
+    return caminho, estatisticas
+
+def copiar_spool(conn, tabela, espec):
+    """INSERT ... SELECT das linhas do spool (anexado como 'spool') para a tabela. Retorna as linhas incluídas"""
+    colunas = ', '.join(espec['colunas'])
+    return conn.execute(f"INSERT INTO {tabela} ({colunas}) SELECT {colunas} FROM spool.{SPOOL_TABELA}").rowcount
+
+def mesclar_upsert(conn, tabela, espec):
+    """
+    Upsert pela chave da especificação a partir do spool: UPDATE ... FROM (existentes)
+    e INSERT ... SELECT (novas). Retorna (atualizadas, incluidas).
+    """
+    colunas = list(espec['colunas'])
+    chave = espec['chave']
+    # Sem índice na chave da tabela de destino o NOT EXISTS abaixo varre a tabela a cada linha
+    conn.execute(f"CREATE INDEX IF NOT EXISTS idx_{tabela}_chave ON {tabela} ({', '.join(chave)})")
+
+    condicao = ' AND '.join(f"{tabela}.{c} IS s.{c}" for c in chave)
+    atribuicoes = ', '.join(f"{c} = s.{c}" for c in colunas if c not in chave)
+    atualizadas = conn.execute(
+        f"UPDATE {tabela} SET {atribuicoes} FROM spool.{SPOOL_TABELA} s WHERE {condicao}"
+    ).rowcount
+    incluidas = conn.execute(f"""
+        INSERT INTO {tabela} ({', '.join(colunas)})
+        SELECT {', '.join('s.' + c for c in colunas)} FROM spool.{SPOOL_TABELA} s
+        WHERE NOT EXISTS (SELECT 1 FROM {tabela} WHERE {condicao})
+    """).rowcount
+    return atualizadas, incluidas
+
+def conferir_tabela(conn, tabela, estatisticas):
+    """
+    Confere a tabela carregada com as estatísticas acumuladas na gravação: quantidade de linhas e,
+    por coluna, não nulos e soma de conferência. Levanta RuntimeError com as divergências.
+    """
+    tipos = {c[1]: (c[2] or '').upper() for c in conn.execute(f"PRAGMA table_info({tabela})")}
+    colunas = list(estatisticas['colunas'])
+    expressoes = ['COUNT(*)']
+    for coluna in colunas:
+        numerica = any(t in tipos.get(coluna, '') for t in ('INT', 'REAL', 'FLOA', 'DOUB', 'NUM'))
+        expressoes += [f"COUNT({coluna})", f"TOTAL({coluna})" if numerica else f"TOTAL(LENGTH({coluna}))"]
+    resultado = conn.execute(f"SELECT {', '.join(expressoes)} FROM {tabela}").fetchone()
+
+    if resultado[0] != estatisticas['linhas']:
+        raise RuntimeError(f"Conferência de {tabela} falhou: linhas esperadas {estatisticas['linhas']}, gravadas {resultado[0]}")
+    divergencias = []
+    for posicao, coluna in enumerate(colunas):
+        nao_nulos, soma = resultado[1 + 2 * posicao], resultado[2 + 2 * posicao]
+        esperado_nao_nulos, esperado_soma = estatisticas['colunas'][coluna]
+        if nao_nulos != esperado_nao_nulos:
+            divergencias.append(f"{coluna}: não nulos esperado {esperado_nao_nulos}, gravado {nao_nulos}")
+        elif not math.isclose(soma, esperado_soma, rel_tol=1e-9, abs_tol=1e-6):
+            divergencias.append(f"{coluna}: soma de conferência esperada {esperado_soma}, gravada {soma}")
+    if divergencias:
+        raise RuntimeError(f"Conferência de {tabela} falhou: " + "; ".join(divergencias))
+
+def recarregar_por_sombra(conn, tabela, espec, estatisticas, progresso=print):
+    """
+    Recarga completa sem deixar a tabela vazia para quem está lendo:
+    1. copia o spool para a tabela sombra (<tabela>__sombra) e confere linhas/somas com o que foi preparado;
+    2. em uma transação curta, remove a tabela antiga, renomeia a sombra e recria os
+       índices e triggers da antiga (o SQLite não renomeia índices).
+    Até o passo 2 as páginas continuam lendo os dados antigos; se algo falhar a tabela atual não é tocada.
+    """
+    sombra = f"{tabela}__sombra"
+    objetos = [sql for (sql,) in conn.execute(
+        "SELECT sql FROM sqlite_master WHERE type IN ('index', 'trigger') AND tbl_name = ? AND sql IS NOT NULL ORDER BY type",
+        (tabela,)
+    )]
+
+    try:
+        conn.execute("BEGIN IMMEDIATE")
+        conn.execute(f"DROP TABLE IF EXISTS {sombra}")  # Sobra de uma importação interrompida
+        conn.execute(sql_criar_tabela(sombra, espec))
+        copiar_spool(conn, sombra, espec)
+        conn.commit()
+        conferir_tabela(conn, sombra, estatisticas)
+        progresso(f"{tabela}: sombra conferida ({estatisticas['linhas']} linha(s)), trocando tabelas")
+
+        # Sem o modo legado, o RENAME reescreveria views que citam a tabela para o nome antigo
+        conn.execute("PRAGMA legacy_alter_table = ON")
+        conn.execute("BEGIN IMMEDIATE")
+        conn.execute(f"DROP TABLE IF EXISTS {tabela}")
+        conn.execute(f"ALTER TABLE {sombra} RENAME TO {tabela}")
+        for sql in objetos:
+            conn.execute(sql)
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        conn.execute(f"DROP TABLE IF EXISTS {sombra}")
+        conn.commit()
+        raise
+    finally:
+        conn.execute("PRAGMA legacy_alter_table = OFF")
+    return {'atualizadas': 0, 'incluidas': estatisticas['linhas']}
+
+def gravar_importacao(conn, tabela, lotes, modo='replace', progresso=print):
+    """
+    Grava os lotes preparados (um DataFrame ou um iterável de DataFrames, consumido uma única vez);
+    em caso de erro a tabela atual fica como estava.
+    Os lotes vão primeiro para um spool temporário (gravar_spool); a trava de escrita do banco só é
+    pedida depois, para as cópias INSERT ... SELECT:
+    replace: copia para uma tabela sombra e troca pela atual (recarregar_por_sombra);
+    append/upsert: acrescenta ou atualiza pela chave em uma única transação.
+    Retorna {'atualizadas', 'incluidas'}.
+    """
+    if modo not in MODOS:
+        raise ValueError(f"Modo inválido: {modo}. Use {', '.join(MODOS)}")
+    espec = obter_especificacao(tabela)
+    if isinstance(lotes, pd.DataFrame):
+        lotes = [lotes]
+    spool, estatisticas = gravar_spool(tabela, espec, lotes, progresso)
+
+    conn.commit()  # PRAGMA synchronous e ATTACH não podem ser executados dentro de uma transação
+    sincronizacao = conn.execute("PRAGMA synchronous").fetchone()[0]
+    for pragma, valor in PRAGMAS_CARGA.items():
+        conn.execute(f"PRAGMA {pragma} = {valor}")
+    conn.execute("ATTACH DATABASE ? AS spool", (spool,))
+
+    try:
+        if modo == 'replace':
+            return recarregar_por_sombra(conn, tabela, espec, estatisticas, progresso)
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            conn.execute(sql_criar_tabela(tabela, espec))
+            if modo == 'upsert':
+                atualizadas, incluidas = mesclar_upsert(conn, tabela, espec)
+            else:
+                atualizadas, incluidas = 0, copiar_spool(conn, tabela, espec)
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        progresso(f"{tabela}: {incluidas} linha(s) incluída(s), {atualizadas} atualizada(s)")
+        return {'atualizadas': atualizadas, 'incluidas': incluidas}
+    finally:
+        conn.execute("DETACH DATABASE spool")
+        conn.execute(f"PRAGMA synchronous = {sincronizacao}")
+        os.unlink(spool)
+
+def importar_arquivo(tabela, arquivo, modo='replace', dry_run=False, db_path=None, progresso=print):
+    """
+    Importação completa de um arquivo, sem interação: lê, valida, limpa e grava lote a lote
+    (memória proporcional ao lote, não ao arquivo) e salva o relatório de erros.
+    No dry-run os lotes são apenas validados. Retorna o resumo da importação.
+    """
+    inicio = time.perf_counter()
+    progresso(f"{tabela}: lendo {arquivo}")
+    situacao = {'lidas': 0, 'erros': []}
+    lotes = preparar_lotes(tabela, arquivo, situacao)
+    resumo = {'tabela': tabela, 'arquivo': str(arquivo), 'modo': modo, 'dry_run': dry_run,
+              'atualizadas': 0, 'incluidas': 0}
+    if dry_run:
+        validas = sum(len(df) for df in lotes)
+    else:
+        conn = sqlite3.connect(db_path or DB_PATH, timeout=600)
+        try:
+            resumo.update(gravar_importacao(conn, tabela, lotes, modo, progresso))
+        finally:
+            conn.close()
+        validas = resumo['incluidas'] + resumo['atualizadas']
+
+    erros = pd.concat(situacao['erros'], ignore_index=True) if situacao['erros'] else pd.DataFrame(columns=COLUNAS_RELATORIO)
+    resumo.update({
+        'lidas': situacao['lidas'],
+        'validas': validas,
+        'descartadas': int(erros.loc[erros['descartada'].astype(bool), 'linha'].nunique()),
+        'avisos': int((~erros['descartada'].astype(bool)).sum()),
+        'relatorio_erros': salvar_relatorio_erros(situacao['erros'], arquivo),
+        'segundos': round(time.perf_counter() - inicio, 2),
+    })
+    return resumo
+
+def _importar_tarefa(tabela, arquivo, modo, dry_run, db_path):
+    """Uma tabela da CLI: erros voltam no resumo em vez de interromper as demais"""
+    try:
+        return importar_arquivo(tabela, arquivo, modo, dry_run, db_path,
+                                progresso=lambda msg: print(msg, flush=True))
+    except Exception as e:
+        return {'tabela': tabela, 'arquivo': str(arquivo), 'erro': str(e)}
+
+def formatar_resumo(resumo):
+    """Linha de resumo para o terminal"""
+    if 'erro' in resumo:
+        return f"[FALHA] {resumo['tabela']}: {resumo['erro']}"
+    texto = (
+        f"[OK] {resumo['tabela']} ({resumo['modo']}{', dry-run' if resumo['dry_run'] else ''}): "
+        f"{resumo['lidas']} lida(s), {resumo['descartadas']} descartada(s), {resumo['avisos']} aviso(s), "
+        f"{resumo['incluidas']} incluída(s), {resumo['atualizadas']} atualizada(s) em {resumo['segundos']}s"
+    )
+    if resumo['relatorio_erros']:
+        texto += f"\n     erros por linha: {resumo['relatorio_erros']}"
+    return texto
+
+def main(argv=None):
+    """CLI não interativa"""
+    parser = argparse.ArgumentParser(description="Importação em lote das tabelas de formulários e usuários")
+    parser.add_argument('--table', required=True, action='append',
+                        help=f"Tabela a importar (repetível) ou 'todas'. Registradas: {', '.join(ESPECIFICACOES_TABELAS)}")
+    parser.add_argument('--file', help="Arquivo a importar (apenas com uma tabela)")
+    parser.add_argument('--dir', default=str(DATA_DIR), help="Pasta com os arquivos padrão de cada tabela (ex.: forms_tab.txt)")
+    parser.add_argument('--mode', choices=MODOS, default='replace')
+    parser.add_argument('--dry-run', action='store_true', help="Apenas lê e valida, sem gravar no banco")
+    parser.add_argument('--jobs', type=int, default=1, help="Tabelas importadas em paralelo")
+    parser.add_argument('--db', default=str(DB_PATH))
+    args = parser.parse_args(argv)
+
+    tabelas = list(ESPECIFICACOES_TABELAS) if 'todas' in args.table else args.table
+    for tabela in tabelas:
+        if tabela not in ESPECIFICACOES_TABELAS:
+            parser.error(f"tabela não registrada: {tabela}")
+    if args.file and len(tabelas) != 1:
+        parser.error("--file só pode ser usado com uma tabela")
+    tarefas = [
+        (tabela, args.file or str(Path(args.dir) / ESPECIFICACOES_TABELAS[tabela]['arquivo']),
+         args.mode, args.dry_run, args.db)
+        for tabela in tabelas
+    ]
+
+    if args.jobs > 1 and len(tarefas) > 1:
+        # Leitura, validação e limpeza em paralelo (cada processo no seu spool); só as cópias
+        # INSERT ... SELECT para o banco são serializadas pelo BEGIN IMMEDIATE
+        with ProcessPoolExecutor(max_workers=args.jobs) as executor:
+            futuros = [executor.submit(_importar_tarefa, *tarefa) for tarefa in tarefas]
+            resumos = [futuro.result() for futuro in as_completed(futuros)]
+    else:
+        resumos = [_importar_tarefa(*tarefa) for tarefa in tarefas]
+
+    for resumo in resumos:
+        print(formatar_resumo(resumo))
+    return 1 if any('erro' in r for r in resumos) else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,322 @@
+# Arquivo: llm_gateway.py
+# Data: 19/10/2026
+# Descrição: Gateway único para a API da OpenAI: cliente HTTP com pool de conexões compartilhado pelo processo,
+# limite de requisições e tokens por minuto (token bucket) entre todas as sessões, retentativas com espera
+# exponencial e jitter em 429/5xx/timeouts, e métricas de latência e tokens por chamada
+# (em memória e na tabela llm_usage, com custo estimado por modelo)
+
+import logging
+import os
+import random
+import sqlite3
+import threading
+import time
+from collections import deque
+
+from config import DB_PATH, agora_local, carregar_ambiente
+import rastreamento
+
+logger = logging.getLogger(__name__)
+
+MAX_CONEXOES = 20                 # Conexões simultâneas no pool HTTP
+TIMEOUT_CONEXAO = 10              # Segundos para abrir a conexão
+ESPERA_BASE = 1.0                 # Segundos da primeira retentativa (dobra a cada tentativa)
+ESPERA_MAXIMA = 30.0              # Teto da espera entre tentativas
+LIMITE_ESPERA_VAGA = 300          # Segundos aguardando vaga nos limites antes de desistir
+TOKENS_RESPOSTA_PADRAO = 1000     # Reserva para a resposta quando max_tokens não é informado
+HISTORICO_CHAMADAS = 500          # Chamadas mantidas em memória para as métricas
+STATUS_REPETIVEIS = {408, 409, 429, 500, 502, 503, 504}
+
+# Preço em USD por 1 milhão de tokens (prompt, resposta); o modelo usa o prefixo mais longo que casar
+PRECOS_MODELOS = {
+    'gpt-4o-mini': (0.15, 0.60),
+    'gpt-4o': (2.50, 10.00),
+    'gpt-4-turbo': (10.00, 30.00),
+    'gpt-4-32k': (60.00, 120.00),
+    'gpt-4': (30.00, 60.00),
+    'gpt-3.5-turbo': (0.50, 1.50),
+}
+
+_estado = None
+_lock = threading.Lock()
+_chamadas = deque(maxlen=HISTORICO_CHAMADAS)
+_tabela_criada = False
+
+class BaldeTokens:
+    """Token bucket com reposição contínua: `capacidade` unidades por minuto"""
+
+    def __init__(self, capacidade):
+        self.capacidade = float(capacidade)
+        self.taxa = self.capacidade / 60
+        self.disponivel = self.capacidade
+        self.atualizado = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _repor(self):
+        agora = time.monotonic()
+        self.disponivel = min(self.capacidade, self.disponivel + (agora - self.atualizado) * self.taxa)
+        self.atualizado = agora
+
+    def tentar_reservar(self, quantidade):
+        """Reserva se houver saldo; senão retorna os segundos até haver (sem reservar)"""
+        quantidade = min(quantidade, self.capacidade)
+        with self._lock:
+            self._repor()
+            if self.disponivel >= quantidade:
+                self.disponivel -= quantidade
+                return 0.0
+            return (quantidade - self.disponivel) / self.taxa
+
+    def reservar(self, quantidade, limite=LIMITE_ESPERA_VAGA):
+        """Aguarda saldo e reserva. TimeoutError se passar de `limite` segundos"""
+        prazo = time.monotonic() + limite
+        while True:
+            espera = self.tentar_reservar(quantidade)
+            if not espera:
+                return
+            if time.monotonic() + espera > prazo:
+                raise TimeoutError("Limite de uso da API de LLM: tempo de espera esgotado")
+            time.sleep(espera)
+
+    def ajustar(self, diferenca):
+        """Corrige a reserva com o consumo real (diferença positiva debita, negativa devolve)"""
+        with self._lock:
+            self._repor()
+            self.disponivel = min(self.capacidade, self.disponivel - diferenca)
+
+    def saldo(self):
+        with self._lock:
+            self._repor()
+            return self.disponivel
+
+def _inicializar():
+    """Cria o cliente e os limites na primeira chamada (lê o .env); um por processo"""
+    global _estado
+    with _lock:
+        if _estado is None:
+            import httpx
+            from openai import OpenAI
+
+            carregar_ambiente()
+            timeout = httpx.Timeout(float(os.getenv('LLM_TIMEOUT', '120')), connect=TIMEOUT_CONEXAO)
+            http = httpx.Client(
+                limits=httpx.Limits(max_connections=MAX_CONEXOES, max_keepalive_connections=MAX_CONEXOES),
+                timeout=timeout,
+            )
+            _estado = {
+                # As retentativas ficam com o gateway (max_retries=0) para respeitar os limites compartilhados
+                'cliente': OpenAI(api_key=os.getenv('OPENAI_API_KEY'), http_client=http,
+                                  timeout=timeout, max_retries=0),
+                'requisicoes': BaldeTokens(int(os.getenv('LLM_RPM', '500'))),
+                'tokens': BaldeTokens(int(os.getenv('LLM_TPM', '200000'))),
+                'max_tentativas': int(os.getenv('LLM_MAX_TENTATIVAS', '5')),
+                'pausa_ate': 0.0,
+            }
+        return _estado
+
+def estimar_tokens(mensagens, max_tokens=None):
+    """Estimativa conservadora (4 caracteres por token) do prompt mais a resposta"""
+    caracteres = sum(len(m.get('content') or '') for m in mensagens)
+    return caracteres // 4 + len(mensagens) * 4 + (max_tokens or TOKENS_RESPOSTA_PADRAO)
+
+def espera_retentativa(erro, tentativa, max_tentativas):
+    """Segundos até a próxima tentativa, ou None se o erro não deve ser repetido"""
+    import openai
+
+    if tentativa >= max_tentativas:
+        return None
+    if isinstance(erro, openai.APIStatusError):
+        if erro.status_code not in STATUS_REPETIVEIS:
+            return None
+    elif not isinstance(erro, (openai.APIConnectionError, TimeoutError)):
+        return None
+    # Full jitter: espalha as retentativas de sessões que falharam juntas
+    espera = random.uniform(0, min(ESPERA_MAXIMA, ESPERA_BASE * 2 ** (tentativa - 1)))
+    resposta = getattr(erro, 'response', None)
+    try:
+        retry_after = float(resposta.headers.get('retry-after')) if resposta is not None else None
+    except (TypeError, ValueError):
+        retry_after = None
+    if retry_after is not None:
+        espera = min(ESPERA_MAXIMA, retry_after) + random.uniform(0, ESPERA_BASE)
+    return espera
+
+def _aguardar_pausa(estado):
+    """Após um 429, todas as chamadas do processo esperam o fim da pausa antes de tentar"""
+    espera = estado['pausa_ate'] - time.monotonic()
+    if espera > 0:
+        time.sleep(espera)
+
+def custo_estimado(modelo, tokens_prompt, tokens_resposta):
+    """Custo em USD pela tabela PRECOS_MODELOS (None para modelo sem preço cadastrado)"""
+    prefixos = [p for p in PRECOS_MODELOS if (modelo or '').startswith(p)]
+    if not prefixos:
+        return None
+    preco_prompt, preco_resposta = PRECOS_MODELOS[max(prefixos, key=len)]
+    return round(((tokens_prompt or 0) * preco_prompt + (tokens_resposta or 0) * preco_resposta) / 1_000_000, 6)
+
+def criar_tabela_uso(conn):
+    """Tabela llm_usage: uma linha por chamada ao LLM (inclusive as que falharam)"""
+    conn.execute("""
+    CREATE TABLE IF NOT EXISTS llm_usage (
+        id INTEGER PRIMARY KEY,
+        ts INTEGER NOT NULL,
+        data_hora TEXT NOT NULL,
+        funcionalidade TEXT,
+        modelo TEXT,
+        user_id INTEGER,
+        you_id INTEGER,
+        tokens_prompt INTEGER,
+        tokens_resposta INTEGER,
+        tokens_cache INTEGER,
+        cache_hit INTEGER NOT NULL DEFAULT 0,
+        latencia_ms REAL,
+        tentativas INTEGER,
+        status TEXT,
+        custo_usd REAL
+    )
+    """)
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_llm_usage_ts ON llm_usage (ts)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_llm_usage_funcionalidade ON llm_usage (funcionalidade, ts)")
+
+def gravar_uso(registro, db_path=None):
+    """Grava a chamada em llm_usage. Falha na contabilidade nunca derruba a chamada ao LLM"""
+    global _tabela_criada
+    try:
+        conn = rastreamento.conectar(db_path or DB_PATH, timeout=30)
+        try:
+            with conn:
+                if not _tabela_criada:
+                    criar_tabela_uso(conn)
+                    _tabela_criada = True
+                conn.execute("""
+                INSERT INTO llm_usage (ts, data_hora, funcionalidade, modelo, user_id, you_id, tokens_prompt,
+                    tokens_resposta, tokens_cache, cache_hit, latencia_ms, tentativas, status, custo_usd)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                """, (
+                    int(registro['quando'].timestamp()), registro['quando'].strftime('%Y-%m-%d %H:%M:%S'),
+                    registro['origem'], registro['modelo'], registro['user_id'], registro['you_id'],
+                    registro['tokens_prompt'], registro['tokens_resposta'], registro['tokens_cache'],
+                    int(bool(registro['tokens_cache'])), registro['latencia_ms'], registro['tentativas'],
+                    registro['status'], registro['custo_usd'],
+                ))
+        finally:
+            conn.close()
+    except sqlite3.Error as e:
+        logger.warning("Não foi possível gravar o uso do LLM: %s", e)
+        return
+    from cache_dados import invalidar
+    invalidar('llm_usage')
+
+def _registrar(registro):
+    with _lock:
+        _chamadas.append(registro)
+    gravar_uso(registro)
+
+@rastreamento.rastrear('llm.completar', 'llm')
+def completar(mensagens, modelo, origem=None, user_id=None, you_id=None, **parametros):
+    """
+    chat.completions.create pelo gateway: aguarda vaga nos limites de requisições e tokens por minuto,
+    repete em 429/5xx/timeouts e registra latência, tokens e custo em llm_usage.
+    `origem` identifica a funcionalidade (ex.: 'analyzer.resumo'). Retorna a resposta da API.
+    """
+    estado = _inicializar()
+    estimativa = estimar_tokens(mensagens, parametros.get('max_tokens'))
+    reservado = 0
+    inicio = time.monotonic()
+    tentativa = 0
+    registro = {
+        'quando': agora_local(),
+        'origem': origem,
+        'modelo': modelo,
+        'user_id': user_id,
+        'you_id': you_id,
+        'tokens_prompt': None,
+        'tokens_resposta': None,
+        'tokens_cache': None,
+        'custo_usd': None,
+        'status': 'ok',
+    }
+    try:
+        # Dentro do try: a chamada recusada pelo limite de tokens (TimeoutError) também vai para llm_usage
+        estado['tokens'].reservar(estimativa)
+        reservado = estimativa
+        while True:
+            tentativa += 1
+            _aguardar_pausa(estado)
+            estado['requisicoes'].reservar(1)
+            try:
+                with rastreamento.span('llm.requisicao', 'llm', origem=origem, modelo=modelo, tentativa=tentativa):
+                    resposta = estado['cliente'].chat.completions.create(
+                        model=modelo, messages=mensagens, **parametros
+                    )
+                break
+            except Exception as e:
+                espera = espera_retentativa(e, tentativa, estado['max_tentativas'])
+                if espera is None:
+                    raise
+                if getattr(e, 'status_code', None) == 429:
+                    estado['pausa_ate'] = max(estado['pausa_ate'], time.monotonic() + espera)
+                logger.warning("LLM %s: tentativa %d falhou (%s); nova tentativa em %.1fs",
+                               origem, tentativa, e, espera)
+                time.sleep(espera)
+    except Exception as e:
+        if reservado:
+            estado['tokens'].ajustar(-reservado)
+        registro['status'] = type(e).__name__
+        raise
+    else:
+        uso = getattr(resposta, 'usage', None)
+        if uso is not None:
+            registro['tokens_prompt'] = uso.prompt_tokens
+            registro['tokens_resposta'] = uso.completion_tokens
+            # Tokens do prompt servidos pelo cache de prompts da OpenAI
+            detalhes = getattr(uso, 'prompt_tokens_details', None)
+            registro['tokens_cache'] = getattr(detalhes, 'cached_tokens', None)
+            # Preço pelo modelo efetivamente usado (ex.: gpt-4o-2024-08-06), senão pelo solicitado
+            registro['custo_usd'] = custo_estimado(getattr(resposta, 'model', None), uso.prompt_tokens,
+                                                   uso.completion_tokens)
+            if registro['custo_usd'] is None:
+                registro['custo_usd'] = custo_estimado(modelo, uso.prompt_tokens, uso.completion_tokens)
+            estado['tokens'].ajustar(uso.total_tokens - estimativa)
+        return resposta
+    finally:
+        registro['tentativas'] = tentativa
+        registro['latencia_ms'] = round((time.monotonic() - inicio) * 1000, 1)
+        _registrar(registro)
+
+def ultimas_chamadas(limite=50):
+    """Chamadas mais recentes (mais nova primeiro), com data formatada para exibição"""
+    with _lock:
+        chamadas = list(_chamadas)[-limite:]
+    return [
+        {**c, 'quando': c['quando'].strftime('%d/%m/%Y %H:%M:%S')}
+        for c in reversed(chamadas)
+    ]
+
+def percentil(valores, p):
+    """Percentil p (0-100) por interpolação linear"""
+    if not valores:
+        return None
+    valores = sorted(valores)
+    posicao = (len(valores) - 1) * p / 100
+    inferior = int(posicao)
+    superior = min(inferior + 1, len(valores) - 1)
+    return round(valores[inferior] + (valores[superior] - valores[inferior]) * (posicao - inferior), 1)
+
+def estatisticas_llm():
+    """Resumo das chamadas em memória e saldo atual dos limites"""
+    with _lock:
+        chamadas = list(_chamadas)
+    latencias = [c['latencia_ms'] for c in chamadas if c['status'] == 'ok']
+    return {
+        'chamadas': len(chamadas),
+        'erros': sum(c['status'] != 'ok' for c in chamadas),
+        'retentativas': sum(c['tentativas'] - 1 for c in chamadas),
+        'latencia_p50_ms': percentil(latencias, 50),
+        'latencia_p95_ms': percentil(latencias, 95),
+        'tokens_prompt': sum(c['tokens_prompt'] or 0 for c in chamadas),
+        'tokens_resposta': sum(c['tokens_resposta'] or 0 for c in chamadas),
+        'saldo_requisicoes': round(_estado['requisicoes'].saldo(), 1) if _estado else None,
+        'saldo_tokens': round(_estado['tokens'].saldo()) if _estado else None,
+    }
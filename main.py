@@ -3,21 +3,40 @@
 # comando: streamlit run main.py
 # 06/03/2025 - 16:00 - versão 1.1
 
+import perfil_importacao  # Antes das demais: mede o tempo de importação de cada módulo
+perfil_importacao.instalar()
+
 import streamlit as st
-import sqlite3
 from datetime import datetime, timedelta
 import time
 import sys
 import os
 from pathlib import Path
 import streamlit.components.v1 as components
-from paginas.monitor import registrar_acesso  # Importação para registro de atividades
+from registro_acessos import registrar_acesso  # Módulo leve: o dashboard (plotly/pandas) só carrega na página
+from relatorio_uso import agendar_relatorios  # Geração periódica dos relatórios de uso
+from retencao_logs import agendar_retencao  # Arquivamento e manutenção diária do log_acessos
+from metricas import agendar_metricas  # Amostras de recursos e vazão (Diagnóstico e /metrics)
+import rastreamento  # Spans do rerun, da página e dos caminhos quentes (ver Diagnóstico)
 
 # Definição de caminhos
 BASE_DIR = Path(__file__).parent  # Obtém o diretório onde está o main.py
 DATA_DIR = BASE_DIR / "data"
 DB_PATH = DATA_DIR / "you_ana.db"
 
+# Registro de páginas: rótulo do menu -> (módulo, função). O módulo só é importado quando a página é aberta
+PAGINAS = {
+    "Entrada de Dados - URL e Metadados": ("paginas.url_metadados", "show_url_metadados"),
+    "Captura de Vídeo": ("paginas.video_capture", "show_video_capture"),
+    "Transcrição de Áudio": ("paginas.transcribe_audio", "show_transcribe_audio"),
+    "Analisador de Conteúdo": ("paginas.analyzer", "show_analyzer"),
+    "Chat Assistente": ("paginas.chat", "main"),
+    "Pipeline de Processamento": ("paginas.pipeline", "show_pipeline"),
+    "Info Tabelas (CRUD)": ("paginas.crude", "show_crud"),
+    "Monitor de Uso": ("paginas.monitor", "main"),
+    "Diagnóstico": ("paginas.diagnostico", "show_diagnostics"),
+}
+
 # Configuração da página - deve ser a primeira chamada do Streamlit
 st.set_page_config(
     page_title="Youtube Analyzer - Estude e Analise Vídeos",
@@ -72,7 +91,7 @@ def authenticate_user():
         st.error(f"Banco de dados não encontrado em {DB_PATH}")
         return False, None
         
-    conn = sqlite3.connect(DB_PATH)
+    conn = rastreamento.conectar(DB_PATH)
     cursor = conn.cursor()
 
     if "user_profile" not in st.session_state:
@@ -152,7 +171,7 @@ def show_welcome():
     """, unsafe_allow_html=True)
     
     # Buscar dados do usuário
-    conn = sqlite3.connect(DB_PATH)
+    conn = rastreamento.conectar(DB_PATH)
     cursor = conn.cursor()
     cursor.execute("""
         SELECT email, empresa 
@@ -225,8 +244,14 @@ def main():
     if not DB_PATH.exists():
         st.error(f"Banco de dados '{DB_PATH}' não encontrado. O programa não pode continuar.")
         st.stop()
+    
+    # Tarefas em segundo plano (uma vez por processo)
+    agendar_relatorios()
+    agendar_retencao()
+    agendar_metricas()
         
-    logged_in, user_profile = authenticate_user()
+    with rastreamento.span('autenticacao'):
+        logged_in, user_profile = authenticate_user()
     
     if not logged_in:
         st.stop()
@@ -273,7 +298,8 @@ def main():
             "Captura de Vídeo",
             "Transcrição de Áudio",
             "Analisador de Conteúdo",
-            "Chat Assistente"
+            "Chat Assistente",
+            "Pipeline de Processamento"
         ],
         "Administração": []  # Iniciando vazio para adicionar itens na ordem correta
     }
@@ -309,32 +335,14 @@ def main():
         st.session_state["previous_page"] = section
 
     # Processa a seção selecionada
+    rastreamento.anotar(pagina=section)
     if section == "Bem-vindo":
         show_welcome()
-    elif section == "Entrada de Dados - URL e Metadados":
-        from paginas.url_metadados import show_url_metadados
-        show_url_metadados()
-    elif section == "Captura de Vídeo":
-        from paginas.video_capture import show_video_capture
-        show_video_capture()
-    elif section == "Transcrição de Áudio":
-        from paginas.transcribe_audio import show_transcribe_audio
-        show_transcribe_audio()
-    elif section == "Analisador de Conteúdo":
-        from paginas.analyzer import show_analyzer
-        show_analyzer()
-    elif section == "Chat Assistente":
-        from paginas.chat import main as show_chat
-        show_chat()
-    elif section == "Info Tabelas (CRUD)":
-        from paginas.crude import show_crud
-        show_crud()
-    elif section == "Monitor de Uso":
-        from paginas.monitor import main as show_monitor
-        show_monitor()
-    elif section == "Diagnóstico":
-        from paginas.diagnostico import show_diagnostics
-        show_diagnostics()
+    else:
+        modulo, funcao = PAGINAS[section]
+        with rastreamento.span(f"pagina.{modulo.rsplit('.', 1)[-1]}", pagina=section):
+            getattr(perfil_importacao.importar_pagina(section, modulo), funcao)()
 
 if __name__ == "__main__":
-    main()
+    with rastreamento.span('rerun'):
+        main()
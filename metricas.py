@@ -0,0 +1,203 @@
+# Arquivo: metricas.py
+# Data: 19/10/2026
+# Descrição: Coletor de métricas de recursos e vazão do processo: CPU, memória, descritores, threads, tamanho do
+# banco/WAL, ocupação dos volumes de dados e de mídia, filas e concluídos por etapa do pipeline.
+# Amostras a cada METRICAS_INTERVALO segundos (tarefa do agendador) em buffer circular, exibidas em
+# paginas/diagnostico; com METRICAS_PORTA definida também são servidas em formato Prometheus em /metrics.
+
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import deque
+from datetime import timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import psutil
+
+import config
+from pipeline_estado import ETAPAS, STATUS
+
+logger = logging.getLogger(__name__)
+
+INTERVALO = int(os.getenv('METRICAS_INTERVALO', '5'))      # Segundos entre amostras
+CAPACIDADE = int(os.getenv('METRICAS_CAPACIDADE', '720'))  # Amostras mantidas (1 hora no intervalo padrão)
+PORTA = os.getenv('METRICAS_PORTA')                        # Porta do endpoint Prometheus (desativado se vazio)
+JANELA_VAZAO = 60                                          # Segundos considerados na vazão por etapa
+PREFIXO = 'you_ana'
+
+# Métricas escalares da amostra: chave -> (nome Prometheus, descrição)
+METRICAS = {
+    'cpu_processo_pct': ('processo_cpu_percent', "CPU do processo (% de um núcleo)"),
+    'cpu_sistema_pct': ('sistema_cpu_percent', "CPU do sistema (%)"),
+    'rss_mb': ('processo_rss_megabytes', "Memória residente do processo (MB)"),
+    'descritores': ('processo_descritores', "Arquivos/sockets abertos (handles no Windows)"),
+    'threads': ('processo_threads', "Threads do processo"),
+    'banco_mb': ('banco_megabytes', "Tamanho do arquivo do banco (MB)"),
+    'wal_mb': ('banco_wal_megabytes', "Tamanho do arquivo WAL do banco (MB)"),
+    'disco_dados_pct': ('disco_dados_percent', "Ocupação do volume de dados (%)"),
+    'disco_midia_pct': ('disco_midia_percent', "Ocupação do volume de mídia (%)"),
+    'disco_midia_livre_gb': ('disco_midia_livre_gigabytes', "Espaço livre no volume de mídia (GB)"),
+}
+
+_amostras = deque(maxlen=CAPACIDADE)
+_lock = threading.Lock()
+_processo = psutil.Process()
+_servidor = {'http': None}
+
+# A primeira leitura de cpu_percent(None) sempre retorna 0.0: a medição começa aqui
+_processo.cpu_percent(None)
+psutil.cpu_percent(None)
+
+def _tamanho_mb(caminho):
+    try:
+        return round(os.path.getsize(caminho) / 1024 / 1024, 2)
+    except OSError:
+        return 0.0
+
+def _uso_disco(caminho):
+    """Ocupação (%) e espaço livre (GB) do volume que contém `caminho`, ou (None, None) se inacessível"""
+    try:
+        uso = psutil.disk_usage(str(caminho))
+        return uso.percent, round(uso.free / 1024 ** 3, 1)
+    except OSError:
+        return None, None
+
+def _pipeline(db_path):
+    """
+    Filas ({etapa: {status: n}}) e concluídos na janela de vazão ({etapa: n}).
+    Conexão própria somente leitura: a coleta não sincroniza pipeline_state nem gera spans de rastreamento.
+    """
+    filas = {etapa: {status: 0 for status in STATUS} for etapa in ETAPAS}
+    desde = (config.agora_local() - timedelta(seconds=JANELA_VAZAO)).strftime('%Y-%m-%d %H:%M:%S')
+    try:
+        conn = sqlite3.connect(f"{Path(db_path).resolve().as_uri()}?mode=ro", uri=True, timeout=5)
+        try:
+            for etapa, status, quantidade in conn.execute(
+                "SELECT etapa, status, COUNT(*) FROM pipeline_state GROUP BY etapa, status"
+            ):
+                filas.setdefault(etapa, {})[status] = quantidade
+            concluidos = dict(conn.execute("""
+            SELECT etapa, COUNT(*) FROM pipeline_state
+            WHERE status = 'concluido' AND finalizado_em >= ?
+            GROUP BY etapa
+            """, (desde,)).fetchall())
+        finally:
+            conn.close()
+    except sqlite3.Error as e:
+        logger.debug("Métricas do pipeline indisponíveis: %s", e)
+        return None, None
+    return filas, {etapa: concluidos.get(etapa, 0) for etapa in ETAPAS}
+
+def coletar(db_path=None):
+    """Lê uma amostra de todas as métricas (sem guardar)"""
+    db_path = str(db_path or config.DB_PATH)
+    with _processo.oneshot():
+        amostra = {
+            'quando': time.time(),
+            'cpu_processo_pct': _processo.cpu_percent(None),
+            'cpu_sistema_pct': psutil.cpu_percent(None),
+            'rss_mb': round(_processo.memory_info().rss / 1024 / 1024, 1),
+            'descritores': _processo.num_fds() if hasattr(_processo, 'num_fds') else _processo.num_handles(),
+            'threads': _processo.num_threads(),
+        }
+    amostra['banco_mb'] = _tamanho_mb(db_path)
+    amostra['wal_mb'] = _tamanho_mb(db_path + '-wal')
+    amostra['disco_dados_pct'], _ = _uso_disco(os.path.dirname(db_path))
+    amostra['disco_midia_pct'], amostra['disco_midia_livre_gb'] = _uso_disco(config.YOUTUBE_DIR)
+    amostra['filas'], amostra['vazao'] = _pipeline(db_path)
+    return amostra
+
+def registrar_amostra():
+    """Tarefa do agendador: coleta e guarda no buffer circular"""
+    amostra = coletar()
+    with _lock:
+        _amostras.append(amostra)
+
+def amostras(limite=None):
+    """Amostras guardadas, da mais antiga para a mais nova"""
+    with _lock:
+        lista = list(_amostras)
+    return lista[-limite:] if limite else lista
+
+def ultima_amostra():
+    with _lock:
+        return _amostras[-1] if _amostras else None
+
+def serie(chave, lista=None):
+    """Valores de uma métrica ao longo das amostras. Chaves 'fila_<etapa>_<status>' e 'vazao_<etapa>' também valem"""
+    valores = []
+    for amostra in lista if lista is not None else amostras():
+        if chave.startswith('fila_'):
+            etapa, status = chave[len('fila_'):].split('_', 1)
+            valor = (amostra['filas'] or {}).get(etapa, {}).get(status)
+        elif chave.startswith('vazao_'):
+            valor = (amostra['vazao'] or {}).get(chave[len('vazao_'):])
+        else:
+            valor = amostra.get(chave)
+        valores.append(valor)
+    return valores
+
+def texto_prometheus(amostra=None):
+    """Amostra mais recente no formato de exposição de texto do Prometheus"""
+    amostra = amostra or ultima_amostra() or coletar()
+    linhas = []
+
+    def metrica(nome, descricao, valores):
+        linhas.append(f"# HELP {PREFIXO}_{nome} {descricao}")
+        linhas.append(f"# TYPE {PREFIXO}_{nome} gauge")
+        for rotulos, valor in valores:
+            if valor is not None:
+                linhas.append(f"{PREFIXO}_{nome}{rotulos} {valor}")
+
+    for chave, (nome, descricao) in METRICAS.items():
+        metrica(nome, descricao, [('', amostra.get(chave))])
+    if amostra['filas'] is not None:
+        metrica('pipeline_videos', "Vídeos por etapa e status em pipeline_state", [
+            (f'{{etapa="{etapa}",status="{status}"}}', quantidade)
+            for etapa, por_status in amostra['filas'].items() for status, quantidade in por_status.items()
+        ])
+        metrica('pipeline_concluidos_janela', f"Etapas concluídas nos últimos {JANELA_VAZAO}s", [
+            (f'{{etapa="{etapa}"}}', quantidade) for etapa, quantidade in amostra['vazao'].items()
+        ])
+    metrica('amostra_timestamp_segundos', "Instante da amostra (epoch)", [('', round(amostra['quando'], 3))])
+    return "\n".join(linhas) + "\n"
+
+class _Manipulador(BaseHTTPRequestHandler):
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        if self.path.split('?')[0] != '/metrics':
+            self.send_error(404)
+            return
+        corpo = texto_prometheus().encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+        self.send_header('Content-Length', str(len(corpo)))
+        self.end_headers()
+        self.wfile.write(corpo)
+
+def iniciar_servidor(porta):
+    """Sobe o endpoint /metrics em uma thread daemon (uma vez por processo)"""
+    with _lock:
+        if _servidor['http'] is not None:
+            return False
+        try:
+            _servidor['http'] = ThreadingHTTPServer(('0.0.0.0', int(porta)), _Manipulador)
+        except OSError as e:
+            # Outro processo (ex.: segunda instância do Streamlit) já usa a porta
+            logger.warning("Endpoint de métricas não iniciado na porta %s: %s", porta, e)
+            return False
+        _servidor['http'].daemon_threads = True
+    threading.Thread(target=_servidor['http'].serve_forever, name="metricas-http", daemon=True).start()
+    return True
+
+def agendar_metricas():
+    """Registra a coleta periódica no agendador e, se METRICAS_PORTA estiver definida, o endpoint (idempotente)"""
+    from agendador import agendar
+    agendar('metricas', INTERVALO, registrar_amostra)
+    if PORTA:
+        iniciar_servidor(PORTA)
@@ -0,0 +1,264 @@
+# Arquivo: orquestrador.py
+# Data: 19/10/2026
+# Descrição: Orquestrador do pipeline de vídeos (captura -> transcrição -> análise): cada etapa tem seu próprio
+# pool de threads com limite de concorrência e um vídeo avança para a etapa seguinte assim que a anterior termina,
+# sem esperar o lote inteiro. As reivindicações usam pipeline_state, então convive com as páginas e outros processos.
+# Uso em linha de comando: python orquestrador.py --user-id 3 --captura 2 --transcricao 4 --analise 2
+
+import argparse
+import logging
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+import pipeline_estado
+import rastreamento
+
+logger = logging.getLogger(__name__)
+
+# Concorrência padrão por etapa: download/ffmpeg pesam em disco e CPU, a transcrição é espera de rede
+# (AssemblyAI) e a análise é limitada pelo gateway do LLM. Sobrescreva com ORQ_LIMITE_<ETAPA>.
+LIMITES_PADRAO = {'captura': 2, 'transcricao': 4, 'analise': 2}
+TRABALHADOR = 'orquestrador'
+INTERVALO_FILA = 5          # Segundos entre consultas à fila quando nenhuma tarefa terminou
+MAX_HISTORICO = 100         # Tarefas finalizadas mantidas para o painel
+
+_lock = threading.Lock()
+_execucao = None            # Execução corrente (ou a última) neste processo
+
+def limites_configurados(**sobrescritas):
+    """Limites por etapa: argumentos > variáveis ORQ_LIMITE_<ETAPA> > LIMITES_PADRAO"""
+    limites = {}
+    for etapa, padrao in LIMITES_PADRAO.items():
+        valor = sobrescritas.get(etapa) or os.getenv(f"ORQ_LIMITE_{etapa.upper()}") or padrao
+        limites[etapa] = max(1, int(valor))
+    return limites
+
+class ProgressoTarefa:
+    """
+    Substitui os placeholders do Streamlit nos núcleos das etapas (text/error/progress),
+    gravando a situação da tarefa no registro lido pelo painel.
+    """
+    def __init__(self, tarefa):
+        self.tarefa = tarefa
+
+    def text(self, mensagem):
+        self.tarefa['mensagem'] = str(mensagem)
+
+    def error(self, mensagem):
+        self.tarefa['mensagem'] = str(mensagem)
+        self.tarefa['erro'] = str(mensagem)
+
+    def progress(self, valor):
+        self.tarefa['progresso'] = min(1.0, max(0.0, float(valor)))
+
+# Execução de cada etapa: recebem os detalhes do vídeo e o progresso; retornam None ou a mensagem de falha.
+# As páginas são importadas aqui dentro para o módulo continuar leve (mesmo padrão do registro de páginas).
+
+def _etapa_captura(video, progresso):
+    from paginas.video_capture import executar_captura
+    try:
+        return executar_captura(video['you_id'], video['titulo'], video['url'], progresso, progresso)
+    except Exception as e:
+        pipeline_estado.falhar(video['you_id'], 'captura', e)
+        return str(e)
+
+def _etapa_transcricao(video, progresso):
+    from paginas.transcribe_audio import executar_transcricao
+    mp3_path = video['artefatos'].get('captura', {}).get('mp3')
+    try:
+        saida = executar_transcricao(video['you_id'], video['titulo'], progresso, progresso, mp3_path=mp3_path)
+    except Exception as e:
+        pipeline_estado.falhar(video['you_id'], 'transcricao', e)
+        return str(e)
+    return saida[1] if saida[0] is None else None
+
+def _etapa_analise(video, progresso):
+    from paginas import analyzer, transcribe_audio
+    txt_path = (video['artefatos'].get('transcricao', {}).get('txt')
+                or os.path.join(transcribe_audio.OUTPUT_DIR, f"{video['titulo']}.txt"))
+    try:
+        with open(txt_path, 'r', encoding='utf-8') as f:
+            conteudo = f.read()
+    except OSError as e:
+        mensagem = f"Arquivo de transcrição não encontrado: {e}"
+        pipeline_estado.falhar(video['you_id'], 'analise', mensagem)
+        return mensagem
+    progresso.text("Analisando transcrição...")
+    progresso.progress(0.1)
+    # executar_analise já registra a falha no pipeline antes de propagar exceções
+    sucesso, _, erro = analyzer.executar_analise(video['user_id'], video['you_id'], video['titulo'], conteudo)
+    progresso.progress(1.0)
+    return None if sucesso else erro
+
+EXECUTORES = {'captura': _etapa_captura, 'transcricao': _etapa_transcricao, 'analise': _etapa_analise}
+
+def _executar_tarefa(execucao, tarefa):
+    """Corpo da tarefa no pool da etapa"""
+    tarefa['iniciado'] = time.monotonic()
+    with rastreamento.span(f"tarefa.{tarefa['etapa']}", 'tarefa', you_id=tarefa['you_id']):
+        video = pipeline_estado.detalhes_video(tarefa['you_id'], db_path=execucao['db_path'])
+        if video is None:
+            return "Vídeo não encontrado em youtube_tab"
+        tarefa['titulo'] = video['titulo']
+        return execucao['executores'][tarefa['etapa']](video, ProgressoTarefa(tarefa))
+
+def _finalizar_tarefa(execucao, tarefa, futuro):
+    """Callback do pool: tira a tarefa das ativas, atualiza os contadores e acorda o coordenador"""
+    try:
+        erro = futuro.result()
+    except Exception as e:
+        logger.exception("Erro inesperado na etapa %s do vídeo %s", tarefa['etapa'], tarefa['you_id'])
+        erro = str(e)
+    tarefa['duracao_s'] = round(time.monotonic() - tarefa.get('iniciado', time.monotonic()), 1)
+    tarefa['resultado'] = 'erro' if erro else 'concluido'
+    tarefa['erro'] = erro
+    tarefa['finalizado_em'] = datetime.now().strftime('%d/%m/%Y %H:%M:%S')
+    with _lock:
+        execucao['ativas'][tarefa['etapa']].pop(tarefa['you_id'], None)
+        execucao['contagem'][tarefa['etapa']][tarefa['resultado']] += 1
+        execucao['historico'].appendleft(tarefa)
+        # Dentro do lock: quem vê as ativas zeradas também vê o aviso (a próxima etapa pode ter sido liberada)
+        execucao['acordar'].set()
+    if execucao['ao_finalizar']:
+        execucao['ao_finalizar'](tarefa)
+
+def _coordenar(execucao):
+    """
+    Laço do coordenador: a cada volta preenche as vagas livres de cada etapa, da última para a primeira
+    (vídeos adiantados terminam antes de novos entrarem), e dorme até alguma tarefa terminar.
+    Encerra quando não há tarefas ativas nem nada a reivindicar, ou quando parar() é chamado.
+    """
+    pools = {
+        etapa: ThreadPoolExecutor(max_workers=limite, thread_name_prefix=f"orquestrador-{etapa}")
+        for etapa, limite in execucao['limites'].items()
+    }
+    try:
+        while not execucao['parar'].is_set():
+            execucao['acordar'].clear()
+            reivindicou = False
+            for etapa in reversed(pipeline_estado.ETAPAS):
+                with _lock:
+                    livres = execucao['limites'][etapa] - len(execucao['ativas'][etapa])
+                if livres <= 0:
+                    continue
+                ids = pipeline_estado.reivindicar(etapa, livres, execucao['user_id'],
+                                                  trabalhador=TRABALHADOR, db_path=execucao['db_path'])
+                reivindicou = reivindicou or bool(ids)
+                for you_id in ids:
+                    tarefa = {'you_id': you_id, 'etapa': etapa, 'titulo': None, 'mensagem': "Na fila",
+                              'progresso': 0.0, 'erro': None}
+                    with _lock:
+                        execucao['ativas'][etapa][you_id] = tarefa
+                    futuro = pools[etapa].submit(_executar_tarefa, execucao, tarefa)
+                    futuro.add_done_callback(lambda f, t=tarefa: _finalizar_tarefa(execucao, t, f))
+            with _lock:
+                ocioso = not any(execucao['ativas'].values()) and not execucao['acordar'].is_set()
+            if ocioso and not reivindicou:
+                break
+            execucao['acordar'].wait(INTERVALO_FILA)
+    except Exception as e:
+        execucao['erro'] = str(e)
+        logger.exception("Erro no coordenador do orquestrador")
+    finally:
+        # Tarefas em andamento terminam normalmente (downloads e chamadas externas não são interrompidos)
+        for pool in pools.values():
+            pool.shutdown(wait=True)
+        execucao['finalizado_em'] = datetime.now()
+
+def _nova_execucao(user_id, limites, db_path, executores, ao_finalizar):
+    return {
+        'user_id': user_id,
+        'limites': limites,
+        'db_path': db_path,
+        'executores': executores or EXECUTORES,
+        'ao_finalizar': ao_finalizar,
+        'ativas': {etapa: {} for etapa in pipeline_estado.ETAPAS},
+        'contagem': {etapa: {'concluido': 0, 'erro': 0} for etapa in pipeline_estado.ETAPAS},
+        'historico': deque(maxlen=MAX_HISTORICO),
+        'parar': threading.Event(),
+        'acordar': threading.Event(),
+        'iniciado_em': datetime.now(),
+        'finalizado_em': None,
+        'erro': None,
+    }
+
+def executar(user_id=None, limites=None, db_path=None, executores=None, ao_finalizar=None):
+    """Processa as filas até esvaziarem, bloqueando o chamador (linha de comando). Retorna a contagem por etapa"""
+    execucao = _nova_execucao(user_id, limites or limites_configurados(), db_path, executores, ao_finalizar)
+    _coordenar(execucao)
+    return execucao['contagem']
+
+def iniciar(user_id=None, limites=None, db_path=None, executores=None):
+    """
+    Inicia o orquestrador em uma thread daemon (uma execução por processo; o painel do pipeline usa esta função).
+    Retorna False se já houver uma execução em andamento.
+    """
+    global _execucao
+    with _lock:
+        if _execucao and _execucao['thread'].is_alive():
+            return False
+        _execucao = _nova_execucao(user_id, limites or limites_configurados(), db_path, executores, None)
+        _execucao['thread'] = threading.Thread(
+            target=_coordenar, args=(_execucao,), name="orquestrador", daemon=True
+        )
+        _execucao['thread'].start()
+        return True
+
+def parar():
+    """Pede o encerramento: nenhuma tarefa nova é reivindicada e as em andamento terminam"""
+    with _lock:
+        execucao = _execucao
+    if execucao:
+        execucao['parar'].set()
+        execucao['acordar'].set()
+
+def situacao():
+    """Estado da execução corrente ou da última (None se nunca rodou neste processo), para o painel"""
+    with _lock:
+        if _execucao is None:
+            return None
+        execucao = _execucao
+        ativas = [dict(t) for etapa in pipeline_estado.ETAPAS for t in execucao['ativas'][etapa].values()]
+        historico = [dict(t) for t in execucao['historico']]
+        contagem = {etapa: dict(c) for etapa, c in execucao['contagem'].items()}
+    agora = time.monotonic()
+    for tarefa in ativas:
+        tarefa['duracao_s'] = round(agora - tarefa['iniciado'], 1) if 'iniciado' in tarefa else None
+    return {
+        'rodando': execucao['thread'].is_alive(),
+        'parando': execucao['parar'].is_set(),
+        'user_id': execucao['user_id'],
+        'limites': dict(execucao['limites']),
+        'iniciado_em': execucao['iniciado_em'].strftime('%d/%m/%Y %H:%M:%S'),
+        'finalizado_em': execucao['finalizado_em'].strftime('%d/%m/%Y %H:%M:%S') if execucao['finalizado_em'] else None,
+        'erro': execucao['erro'],
+        'contagem': contagem,
+        'ativas': ativas,
+        'historico': historico,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Processa as filas do pipeline de vídeos (captura, transcrição e análise)")
+    parser.add_argument("--user-id", type=int, help="Processa só os vídeos deste usuário (padrão: todos)")
+    for etapa, padrao in LIMITES_PADRAO.items():
+        parser.add_argument(f"--{etapa}", type=int, help=f"Execuções simultâneas da etapa {etapa} (padrão: {padrao})")
+    args = parser.parse_args()
+
+    limites = limites_configurados(**{etapa: getattr(args, etapa) for etapa in LIMITES_PADRAO})
+    print(f"Orquestrador iniciado - limites: {limites}")
+    inicio = time.monotonic()
+    contagem = executar(
+        args.user_id, limites,
+        ao_finalizar=lambda t: print(f"[{t['etapa']}] {t['titulo'] or t['you_id']}: {t['resultado']}"
+                                     f" em {t['duracao_s']}s" + (f" - {t['erro']}" if t['erro'] else ""))
+    )
+    print(f"Concluído em {time.monotonic() - inicio:.1f}s")
+    for etapa, c in contagem.items():
+        print(f"  {etapa}: {c['concluido']} concluído(s), {c['erro']} com erro")
+
+if __name__ == "__main__":
+    main()
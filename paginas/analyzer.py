@@ -2,14 +2,16 @@
 # 03/03/2025 - 16:00 - versão 1.3
 
 
-from dotenv import load_dotenv
 import os
-import openai
-from openai import OpenAI
 import streamlit as st
 import sqlite3
 import json
 from datetime import datetime
+from cache_dados import cache_consulta, invalidar
+from config import YOUTUBE_DIR
+from llm_gateway import completar
+import pipeline_estado
+import rastreamento
 
 # Configurações globais
 # Opções de modelos OpenAI:
@@ -26,11 +28,7 @@ from datetime import datetime
 #   - gpt-4-32k-0613
 LLM_MODEL = os.getenv('LLM_MODEL', 'gpt-3.5-turbo')  # Permite override via variável de ambiente
 
-# Carregar variáveis de ambiente
-load_dotenv()
-
-# Configurar cliente OpenAI
-client = OpenAI(api_key=os.getenv('OPENAI_API_KEY'))
+# O .env é carregado sob demanda junto com o cliente (llm_gateway)
 
 # Prompts específicos para cada tipo de análise
 PROMPTS = {
@@ -73,12 +71,13 @@ PROMPTS = {
 def test_openai_connection():
     """Função para testar a conexão com a OpenAI"""
     try:
-        response = client.chat.completions.create(
-            model=LLM_MODEL,  # Usando a constante
-            messages=[
+        response = completar(
+            [
                 {"role": "system", "content": "Você é um assistente útil."},
                 {"role": "user", "content": "Diga 'Conexão estabelecida com sucesso!' em português"}
-            ]
+            ],
+            LLM_MODEL,  # Usando a constante
+            origem="analyzer.teste"
         )
         return True, response.choices[0].message.content
     except Exception as e:
@@ -87,7 +86,7 @@ def test_openai_connection():
 # Função para conectar ao banco de dados
 def get_db_connection():
     """Estabelece conexão com o banco de dados SQLite"""
-    conn = sqlite3.connect('data/you_ana.db')
+    conn = rastreamento.conectar('data/you_ana.db')
     conn.row_factory = sqlite3.Row
     return conn
 
@@ -114,27 +113,19 @@ def save_analysis_to_db(user_id, video_title, analysis_type, content):
     
     conn.commit()
     conn.close()
+    invalidar('youtube_tab', user_id)
     return True
 
 # Função para obter vídeos sem análise
+@cache_consulta('youtube_tab')
 def get_videos_without_analysis(user_id):
-    """Retorna vídeos que não possuem resumo"""
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    
-    cursor.execute(
-        "SELECT titulo FROM youtube_tab WHERE user_id = ? AND (resumo IS NULL OR resumo = '')",
-        (user_id,)
-    )
-    
-    videos = [row['titulo'] for row in cursor.fetchall()]
-    conn.close()
-    return videos
+    """Retorna os títulos dos vídeos com a análise pendente no pipeline (transcrição concluída)"""
+    return [titulo for _, titulo, _, _, _ in pipeline_estado.videos_na_etapa('analise', user_id)]
 
 # Função para exportar análise para arquivo de texto
 def export_analysis_to_txt(video_title, analyses):
     """Exporta as análises para um arquivo de texto"""
-    output_dir = "Z:/youtube/analises"
+    output_dir = os.path.join(YOUTUBE_DIR, "analises")
     os.makedirs(output_dir, exist_ok=True)
     
     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
@@ -151,7 +142,16 @@ def export_analysis_to_txt(video_title, analyses):
     
     return filename
 
-def analyze_text(text, analysis_type):
+def buscar_you_id(user_id, video_title):
+    """you_id do vídeo do usuário pelo título (para a contabilidade de uso do LLM)"""
+    conn = get_db_connection()
+    row = conn.execute(
+        "SELECT you_id FROM youtube_tab WHERE user_id = ? AND titulo = ?", (user_id, video_title)
+    ).fetchone()
+    conn.close()
+    return row['you_id'] if row else None
+
+def analyze_text(text, analysis_type, user_id=None, you_id=None):
     """Realiza a análise do texto usando a OpenAI"""
     try:
         # Dividir o texto em chunks de aproximadamente 12000 tokens
@@ -165,12 +165,15 @@ def analyze_text(text, analysis_type):
             if len(chunks) > 1:
                 chunk_prompt += f"\n\nEsta é a parte {i} de {len(chunks)} do texto completo."
             
-            response = client.chat.completions.create(
-                model=LLM_MODEL,  # Usando a constante
-                messages=[
+            response = completar(
+                [
                     {"role": "system", "content": "Você é um assistente especializado em análise de conteúdo."},
                     {"role": "user", "content": chunk_prompt + "\n\nTEXTO PARA ANÁLISE:\n" + chunk}
                 ],
+                LLM_MODEL,  # Usando a constante
+                origem=f"analyzer.{analysis_type}",
+                user_id=user_id,
+                you_id=you_id,
                 temperature=0.7
             )
             all_responses.append(response.choices[0].message.content)
@@ -185,34 +188,58 @@ def analyze_text(text, analysis_type):
     except Exception as e:
         return False, str(e)
 
-def process_video(user_id, video_title, content):
-    """Processa um vídeo e salva os resultados no banco de dados"""
+# Mapeamento dos tipos de análise para as colunas corretas do banco de dados
+COLUMN_MAPPING = {
+    "resumo": "resumo",
+    "insights": "insights",
+    "ferramentas": "tools",  # Alterado para corresponder ao nome da coluna no banco
+    "contraintuitivo": "contraintuitivo"
+}
+
+def executar_analise(user_id, you_id, video_title, content):
+    """
+    Núcleo da análise, sem interface (usado pela página e pelo orquestrador): roda as quatro
+    análises, grava cada uma no banco e conclui ou falha a etapa 'analise' do pipeline.
+    A etapa já deve estar reivindicada. Retorna (sucesso, resultados, mensagem de erro)
+    """
     results = {}
     success = True
     error_msg = ""
     
-    # Mapeamento dos tipos de análise para as colunas corretas do banco de dados
-    column_mapping = {
-        "resumo": "resumo",
-        "insights": "insights",
-        "ferramentas": "tools",  # Alterado para corresponder ao nome da coluna no banco
-        "contraintuitivo": "contraintuitivo"
-    }
+    try:
+        for analysis_type in COLUMN_MAPPING:
+            success, result = analyze_text(content, analysis_type, user_id, you_id)
+            if success:
+                results[analysis_type] = result
+                # Usar o nome correto da coluna ao salvar no banco
+                save_analysis_to_db(user_id, video_title, COLUMN_MAPPING[analysis_type], result)
+            else:
+                success = False
+                error_msg = result
+                break
+    except Exception as e:
+        if you_id:
+            pipeline_estado.falhar(you_id, 'analise', e)
+        raise
     
-    for analysis_type in ["resumo", "insights", "ferramentas", "contraintuitivo"]:
-        success, result = analyze_text(content, analysis_type)
+    if you_id:
         if success:
-            results[analysis_type] = result
-            # Usar o nome correto da coluna ao salvar no banco
-            db_column = column_mapping[analysis_type]
-            save_analysis_to_db(user_id, video_title, db_column, result)
+            pipeline_estado.concluir(you_id, 'analise', {'colunas': [COLUMN_MAPPING[t] for t in results]})
         else:
-            success = False
-            error_msg = result
-            break
+            pipeline_estado.falhar(you_id, 'analise', error_msg)
     
     return success, results, error_msg
 
+def process_video(user_id, video_title, content, automatico=False):
+    """Processa um vídeo e salva os resultados no banco de dados"""
+    you_id = buscar_you_id(user_id, video_title)
+    # Reivindica a etapa no pipeline: evita que duas sessões analisem o mesmo vídeo ao mesmo tempo
+    if you_id and not pipeline_estado.reivindicar_video(
+            you_id, 'analise', trabalhador=f"usuario:{user_id}", somente_pendente=automatico):
+        return False, {}, "O vídeo já está sendo analisado ou não está mais pendente."
+    
+    return executar_analise(user_id, you_id, video_title, content)
+
 def show_analyzer():
     st.title("Analisador de Conteúdo")
     
@@ -224,7 +251,7 @@ def show_analyzer():
     user_id = st.session_state["user_id"]
     
     # Diretório das transcrições
-    TRANS_DIR = "z:/youtube/transcricoes"
+    TRANS_DIR = os.path.join(YOUTUBE_DIR, "transcricoes")
     if not os.path.exists(TRANS_DIR):
         st.error(f"Diretório {TRANS_DIR} não encontrado!")
         return
@@ -245,6 +272,7 @@ def show_analyzer():
         if selected_file:
             # Extrair o título do vídeo (nome do arquivo sem extensão)
             video_title = os.path.splitext(selected_file)[0]
+            you_id = buscar_you_id(user_id, video_title)
             
             # Ler o conteúdo do arquivo
             with open(os.path.join(TRANS_DIR, selected_file), 'r', encoding='utf-8') as file:
@@ -278,7 +306,7 @@ def show_analyzer():
             with tab1:
                 if st.button("Gerar Resumo", key="btn_resumo"):
                     with st.spinner("Gerando resumo..."):
-                        success, result = analyze_text(content, "resumo")
+                        success, result = analyze_text(content, "resumo", user_id, you_id)
                         if success:
                             st.write(result)
                             results_dict["resumo"] = result
@@ -293,7 +321,7 @@ def show_analyzer():
             with tab2:
                 if st.button("Identificar Insights", key="btn_insights"):
                     with st.spinner("Identificando insights..."):
-                        success, result = analyze_text(content, "insights")
+                        success, result = analyze_text(content, "insights", user_id, you_id)
                         if success:
                             st.write(result)
                             results_dict["insights"] = result
@@ -308,7 +336,7 @@ def show_analyzer():
             with tab3:
                 if st.button("Listar Ferramentas", key="btn_ferramentas"):
                     with st.spinner("Listando ferramentas..."):
-                        success, result = analyze_text(content, "ferramentas")
+                        success, result = analyze_text(content, "ferramentas", user_id, you_id)
                         if success:
                             st.write(result)
                             results_dict["ferramentas"] = result
@@ -323,7 +351,7 @@ def show_analyzer():
             with tab4:
                 if st.button("Pontos Contraintuitivos", key="btn_contraintuitivo"):
                     with st.spinner("Identificando pontos contraintuitivos..."):
-                        success, result = analyze_text(content, "contraintuitivo")
+                        success, result = analyze_text(content, "contraintuitivo", user_id, you_id)
                         if success:
                             st.write(result)
                             results_dict["contraintuitivo"] = result
@@ -377,7 +405,7 @@ def show_analyzer():
                         continue
                     
                     # Processar o vídeo
-                    success, results, error_msg = process_video(user_id, video_title, content)
+                    success, results, error_msg = process_video(user_id, video_title, content, automatico=True)
                     
                     with results_container:
                         if success:
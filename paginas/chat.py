@@ -3,15 +3,16 @@
 # links dos trechos relativvos a resposta/conteudo do video
 
 
-from dotenv import load_dotenv
 import os
-import openai
-from openai import OpenAI
 import streamlit as st
 import sqlite3
 import json
 from datetime import datetime
 import re
+from cache_dados import cache_consulta
+from config import YOUTUBE_DIR
+from llm_gateway import completar
+import rastreamento
 
 # Configurações globais
 # Opções de modelos OpenAI:
@@ -32,18 +33,14 @@ import re
 # LLM_MODEL = os.getenv('LLM_MODEL', 'gpt-4o-mini')  # Permite override via variável de ambiente
 LLM_MODEL = os.getenv('LLM_MODEL', 'gpt-4o')  # Permite override via variável de ambiente
 
-# Carregar variáveis de ambiente
-load_dotenv()
+# O .env é carregado sob demanda junto com o cliente (llm_gateway)
 
-# Configurar cliente OpenAI
-client = OpenAI(api_key=os.getenv('OPENAI_API_KEY'))
-
-def get_user_videos(user_id):
-    """Recupera os vídeos disponíveis para o usuário."""
+@cache_consulta('youtube_tab')
+def carregar_videos_usuario(user_id):
+    """Consulta os vídeos do usuário (resultado em cache até a próxima escrita na youtube_tab)."""
+    conn = rastreamento.conectar('data/you_ana.db')
     try:
-        conn = sqlite3.connect('data/you_ana.db')
         cursor = conn.cursor()
-        
         query = """
             SELECT you_id, titulo, url, autor, duration 
             FROM youtube_tab 
@@ -51,9 +48,14 @@ def get_user_videos(user_id):
             ORDER BY titulo
         """
         cursor.execute(query, (user_id,))
-        videos = cursor.fetchall()
+        return cursor.fetchall()
+    finally:
         conn.close()
-        return videos
+
+def get_user_videos(user_id):
+    """Recupera os vídeos disponíveis para o usuário."""
+    try:
+        return carregar_videos_usuario(user_id)
     except sqlite3.Error as e:
         st.error(f"Erro ao acessar banco de dados: {e}")
         return []
@@ -65,8 +67,7 @@ def load_transcription(video_title):
         print(f"# Debug - Procurando transcrição para: {video_title}")
         
         # Corrigindo o path com separador correto
-        base_path = 'Z:\\youtube\\transcricoes'  # Usando double backslash
-        # Alternativa: base_path = r'Z:\youtube\transcricoes'  # Usando raw string
+        base_path = os.path.join(YOUTUBE_DIR, 'transcricoes')
         
         # Debug
         print(f"# Debug - Tentando acessar pasta: {base_path}")
@@ -106,7 +107,7 @@ def load_transcription(video_title):
 def load_transcription_with_timecodes(video_title):
     """Carrega a transcrição do vídeo com timecodes no formato VTT."""
     try:
-        base_path = 'Z:\\youtube\\transcricoes'
+        base_path = os.path.join(YOUTUBE_DIR, 'transcricoes')
         available_files = os.listdir(base_path)
         
         for file in available_files:
@@ -151,7 +152,7 @@ def parse_vtt_content(vtt_content):
     
     return segments
 
-def get_chat_response(prompt, transcription, video_url, mode="qa", temperature=0.7):
+def get_chat_response(prompt, transcription, video_url, mode="qa", temperature=0.7, user_id=None, you_id=None):
     """Versão atualizada que inclui referências temporais precisas nas respostas."""
     try:
         segments = transcription if isinstance(transcription, list) else []
@@ -184,47 +185,47 @@ def get_chat_response(prompt, transcription, video_url, mode="qa", temperature=0
             {"role": "user", "content": f"Contexto com timestamps:\n{context}\n\nPergunta: {prompt}"}
         ]
 
-        response = client.chat.completions.create(
-            model=LLM_MODEL,
-            messages=messages,
-            temperature=temperature
+        response = completar(
+            messages, LLM_MODEL, origem=f"chat.{mode}", user_id=user_id, you_id=you_id, temperature=temperature
         )
 
-        content = response.choices[0].message.content
-
-        # Processar timestamps para links
-        timestamp_pattern = r'\[(\d{2}:\d{2}:\d{2})\]'
-        matches = re.finditer(timestamp_pattern, content)
-        replacements = []
-        
-        for match in matches:
-            timestamp = match.group(1)
-            youtube_time = convert_to_youtube_time(timestamp)
-            youtube_link = f"{video_url}&t={youtube_time}"
-            old_text = match.group(0)
-            new_text = f"[{timestamp}]({youtube_link})"
-            replacements.append((old_text, new_text))
-        
-        # Aplicar substituições do maior para o menor texto
-        replacements.sort(key=lambda x: len(x[0]), reverse=True)
-        for old_text, new_text in replacements:
-            content = content.replace(old_text, new_text)
-
-        # Remover apenas URLs soltas (não dentro de links markdown)
-        content = re.sub(r'(?<!\]\()https?://\S+', '', content)
-        
-        # Ajustar formatação final
-        content = re.sub(r'\n\s*(\d+\.)\s*', r'\n\1 ', content)
-        content = re.sub(r'(\d+\.)\s*\n\s*', r'\1 ', content)
-        content = re.sub(r'(\.\s*)(\d+\.)', r'\1\n\2', content)
-        
-        return content.strip()
+        return formatar_resposta(response.choices[0].message.content, video_url)
 
     except Exception as e:
         print(f"# Debug - ERRO: {str(e)}")
         st.error(f"Erro ao obter resposta: {e}")
         return None
 
+def formatar_resposta(content, video_url):
+    """Transforma os timestamps da resposta em links para o vídeo e ajusta a formatação (sem Streamlit nem rede)."""
+    # Processar timestamps para links
+    timestamp_pattern = r'\[(\d{2}:\d{2}:\d{2})\]'
+    matches = re.finditer(timestamp_pattern, content)
+    replacements = []
+    
+    for match in matches:
+        timestamp = match.group(1)
+        youtube_time = convert_to_youtube_time(timestamp)
+        youtube_link = f"{video_url}&t={youtube_time}"
+        old_text = match.group(0)
+        new_text = f"[{timestamp}]({youtube_link})"
+        replacements.append((old_text, new_text))
+    
+    # Aplicar substituições do maior para o menor texto
+    replacements.sort(key=lambda x: len(x[0]), reverse=True)
+    for old_text, new_text in replacements:
+        content = content.replace(old_text, new_text)
+
+    # Remover apenas URLs soltas (não dentro de links markdown)
+    content = re.sub(r'(?<!\]\()https?://\S+', '', content)
+    
+    # Ajustar formatação final
+    content = re.sub(r'\n\s*(\d+\.)\s*', r'\n\1 ', content)
+    content = re.sub(r'(\d+\.)\s*\n\s*', r'\1 ', content)
+    content = re.sub(r'(\.\s*)(\d+\.)', r'\1\n\2', content)
+    
+    return content.strip()
+
 def convert_to_youtube_time(timestamp):
     """Converte timestamp VTT (HH:MM:SS) para segundos do YouTube, retrocedendo 5 segundos."""
     try:
@@ -246,7 +247,7 @@ def convert_to_youtube_time(timestamp):
 def save_chat_history(user_id, you_id, chat_history):
     """Salva o histórico do chat no banco de dados."""
     try:
-        conn = sqlite3.connect('data/you_ana.db')
+        conn = rastreamento.conectar('data/you_ana.db')
         cursor = conn.cursor()
         
         # Convertendo o histórico para JSON
@@ -384,7 +385,9 @@ def main():
                             user_input,
                             st.session_state.current_transcription,
                             st.session_state.current_video_url,
-                            mode=mode_map[chat_mode]
+                            mode=mode_map[chat_mode],
+                            user_id=st.session_state.get('user_id'),
+                            you_id=st.session_state.get('current_video_id')
                         )
                         
                         if response:
@@ -4,9 +4,14 @@
 
 import streamlit as st
 import pandas as pd
-import sqlite3
+
+from datetime import datetime
 
 from config import DB_PATH  # Adicione esta importação
+from cache_dados import geracao, invalidar
+from retencao_logs import SQL_TS_ACESSO
+from exportacao import painel_exportacao
+import rastreamento
 
 def format_br_number(value):
     """Formata um número para o padrão brasileiro."""
@@ -17,36 +22,337 @@ def format_br_number(value):
     except:
         return ''
 
-def get_table_analysis(cursor, table_name):
-    """Analisa a estrutura e dados da tabela."""
-    # Análise da estrutura
-    cursor.execute(f"PRAGMA table_info({table_name})")
-    columns_info = cursor.fetchall()
-    
-    # Contagem de registros
-    cursor.execute(f"SELECT COUNT(*) FROM {table_name}")
-    record_count = cursor.fetchone()[0]
-    
-    # Data da última atualização (assumindo que existe uma coluna 'data' ou similar)
+TAMANHOS_PAGINA = [50, 100, 250, 500]
+
+# Ordenação padrão por tabela (coluna, direção); as demais usam a ordem de inserção (rowid) ou a chave primária (WITHOUT ROWID)
+ORDENACAO_PADRAO = {
+    'log_acessos': ('ts_acesso', 'DESC'),
+}
+
+def quote_ident(nome):
+    """Protege um nome de tabela/coluna para uso no SQL"""
+    return '"' + str(nome).replace('"', '""') + '"'
+
+@st.cache_data(ttl=600, show_spinner=False)
+def listar_tabelas():
+    """Tabelas do banco (consulta ao sqlite_master em cache)"""
+    conn = rastreamento.conectar(DB_PATH)
     try:
-        cursor.execute(f"SELECT MAX(data) FROM {table_name}")
-        last_update = cursor.fetchone()[0]
-    except:
-        last_update = "N/A"
-    
-    # Maior user_id
+        return [row[0] for row in conn.execute(
+            "SELECT name FROM sqlite_master WHERE type='table' AND name NOT LIKE 'sqlite_%' ORDER BY name"
+        )]
+    finally:
+        conn.close()
+
+@st.cache_data(ttl=600, show_spinner=False)
+def obter_esquema(table_name):
+    """Colunas da tabela: lista de (nome, tipo, notnull, pk) do PRAGMA table_info, em cache"""
+    conn = rastreamento.conectar(DB_PATH)
     try:
-        cursor.execute(f"SELECT MAX(user_id) FROM {table_name}")
-        max_user_id = cursor.fetchone()[0]
-    except:
-        max_user_id = "N/A"
-    
-    return {
-        "columns": columns_info,
-        "record_count": record_count,
-        "last_update": last_update,
-        "max_user_id": max_user_id
+        return [(c[1], (c[2] or '').upper(), bool(c[3]), bool(c[5]))
+                for c in conn.execute(f"PRAGMA table_info({quote_ident(table_name)})")]
+    finally:
+        conn.close()
+
+@st.cache_data(ttl=600, show_spinner=False)
+def chave_tabela(table_name):
+    """
+    Chave usada para localizar as linhas: None para tabelas com rowid, ou as colunas da chave primária
+    (na ordem da chave) para tabelas WITHOUT ROWID, como log_acessos_diario e pipeline_state.
+    Nessas tabelas o índice da chave primária não tem a coluna auxiliar rowid (cid -1) no index_xinfo.
+    """
+    conn = rastreamento.conectar(DB_PATH)
+    try:
+        sem_rowid = conn.execute("""
+            SELECT 1 FROM pragma_index_list(?) i
+            WHERE i.origin = 'pk'
+            AND NOT EXISTS (SELECT 1 FROM pragma_index_xinfo(i.name) x WHERE x.cid = -1)
+        """, (table_name,)).fetchone()
+        if not sem_rowid:
+            return None
+        colunas_pk = [(c[5], c[1]) for c in conn.execute(f"PRAGMA table_info({quote_ident(table_name)})") if c[5]]
+        return tuple(nome for _, nome in sorted(colunas_pk))
+    finally:
+        conn.close()
+
+def valor_sql(valor):
+    """Converte o valor do DataFrame para um tipo aceito pelo sqlite3 (NaN -> NULL, numpy -> Python)"""
+    if valor is None or (not isinstance(valor, str) and pd.isna(valor)):
+        return None
+    return valor.item() if hasattr(valor, 'item') else valor
+
+def coluna_numerica(tipo):
+    """Indica se o tipo declarado no SQLite é numérico"""
+    return any(t in tipo for t in ('INT', 'REAL', 'NUM', 'FLOA', 'DOUB'))
+
+@st.cache_data(ttl=300, show_spinner=False)
+def carregar_estatisticas(table_name, geracao_tabela):
+    """
+    Estatísticas do painel da tabela (em cache até a próxima escrita na tabela).
+    Só consulta colunas que existem no esquema.
+    """
+    colunas = [c[0] for c in obter_esquema(table_name)]
+    tabela = quote_ident(table_name)
+    conn = rastreamento.conectar(DB_PATH)
+    try:
+        estatisticas = {"Total de Registros": conn.execute(f"SELECT COUNT(*) FROM {tabela}").fetchone()[0]}
+        if table_name == "log_acessos":
+            estatisticas["Usuários Únicos"] = conn.execute(
+                "SELECT COUNT(DISTINCT user_id) FROM log_acessos").fetchone()[0]
+            estatisticas["Dias com Registros"] = conn.execute(
+                "SELECT COUNT(DISTINCT date(data_acesso)) FROM log_acessos").fetchone()[0]
+        else:
+            coluna_data = next((c for c in ('data', 'data_acesso', 'fetched_at') if c in colunas), None)
+            estatisticas["Última Atualização"] = (
+                conn.execute(f"SELECT MAX({quote_ident(coluna_data)}) FROM {tabela}").fetchone()[0]
+                if coluna_data else "N/A"
+            )
+            estatisticas["Maior User ID"] = (
+                conn.execute(f"SELECT MAX(user_id) FROM {tabela}").fetchone()[0]
+                if 'user_id' in colunas else "N/A"
+            )
+        return estatisticas
+    finally:
+        conn.close()
+
+def montar_filtro(esquema, coluna, valor):
+    """Cláusula WHERE e parâmetros do filtro: igualdade em colunas numéricas, 'contém' nas demais"""
+    if not coluna or valor in (None, ''):
+        return "", []
+    tipo = next(t for nome, t, _, _ in esquema if nome == coluna)
+    if coluna_numerica(tipo):
+        try:
+            numero = float(str(valor).replace(',', '.'))
+        except ValueError:
+            return "WHERE 0", []
+        return f"WHERE {quote_ident(coluna)} = ?", [numero]
+    termo = str(valor).replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+    return f"WHERE {quote_ident(coluna)} LIKE ? ESCAPE '\\'", [f"%{termo}%"]
+
+@st.cache_data(ttl=300, show_spinner=False)
+def contar_registros(table_name, coluna_filtro, valor_filtro, geracao_tabela):
+    """Quantidade de registros que atendem ao filtro (em cache até a próxima escrita na tabela)"""
+    where, params = montar_filtro(obter_esquema(table_name), coluna_filtro, valor_filtro)
+    conn = rastreamento.conectar(DB_PATH)
+    try:
+        return conn.execute(f"SELECT COUNT(*) FROM {quote_ident(table_name)} {where}", params).fetchone()[0]
+    finally:
+        conn.close()
+
+def montar_consulta(table_name, esquema, coluna_filtro, valor_filtro, ordenacao, com_rowid=True, chave=None):
+    """
+    SELECT da tabela com filtro e ordenação (usado pela página do editor e pela exportação).
+    `chave` (ver chave_tabela) desempata a ordenação; None usa o rowid.
+    """
+    colunas = [c[0] for c in esquema]
+    where, params = montar_filtro(esquema, coluna_filtro, valor_filtro)
+    coluna_ordem, direcao = ordenacao
+    desempate = [f"{quote_ident(c)} {direcao}" for c in chave] if chave else [f"rowid {direcao}"]
+    ordem = ", ".join(([f"{quote_ident(coluna_ordem)} {direcao}"] if coluna_ordem else []) + desempate)
+    com_rowid = com_rowid and not chave
+    query = f"""
+        SELECT {'rowid AS rowid_chave, ' if com_rowid else ''}{', '.join(quote_ident(c) for c in colunas)}
+        FROM {quote_ident(table_name)}
+        {where}
+        ORDER BY {ordem}
+    """
+    return query, params
+
+def carregar_pagina(conn, table_name, esquema, coluna_filtro, valor_filtro, ordenacao, pagina, tamanho, chave=None):
+    """
+    Uma página da tabela com filtro e ordenação feitos no SQLite (LIMIT/OFFSET).
+    O índice do DataFrame é o rowid, usado como chave nas gravações; em tabelas WITHOUT ROWID (`chave`)
+    o índice é só a posição e as gravações usam as colunas da chave primária.
+    """
+    query, params = montar_consulta(table_name, esquema, coluna_filtro, valor_filtro, ordenacao, chave=chave)
+    query += " LIMIT ? OFFSET ?"
+    if chave:
+        return pd.read_sql_query(query, conn, params=params + [tamanho, (pagina - 1) * tamanho])
+    # Alias explícito: com INTEGER PRIMARY KEY o SQLite nomeia o rowid como a coluna da chave
+    df = pd.read_sql_query(query, conn, params=params + [tamanho, (pagina - 1) * tamanho], index_col='rowid_chave')
+    df.index.name = 'rowid'
+    return df
+
+def converter_valor_coluna(coluna, tipo, valor):
+    """
+    Valida e converte um valor do editor conforme o tipo declarado da coluna.
+    Lança ValueError com a coluna e o valor quando o tipo não confere.
+    """
+    valor = valor_sql(valor)
+    if valor is None or (isinstance(valor, str) and not valor.strip() and coluna_numerica(tipo)):
+        return None
+    try:
+        if 'DATE' in tipo and 'TIME' not in tipo:
+            return datetime.strptime(str(valor).strip()[:10], '%Y-%m-%d').strftime('%Y-%m-%d')
+        if tipo == 'TIME':
+            return datetime.strptime(str(valor).strip(), '%H:%M:%S').strftime('%H:%M:%S')
+        if 'INT' in tipo:
+            numero = float(str(valor).replace(',', '.')) if isinstance(valor, str) else valor
+            if isinstance(numero, bool) or float(numero) != int(numero):
+                raise ValueError
+            return int(numero)
+        if coluna_numerica(tipo):
+            return float(str(valor).replace(',', '.')) if isinstance(valor, str) else float(valor)
+    except (TypeError, ValueError):
+        raise ValueError(f"Coluna '{coluna}': valor '{valor}' não é compatível com o tipo {tipo}.")
+    return valor if isinstance(valor, str) else str(valor)
+
+def ajustar_ts_log_acessos(conn, rowids):
+    """Recalcula ts_acesso das linhas tocadas (e das gravadas sem ela) a partir de data/hora"""
+    conn.execute(
+        f"UPDATE log_acessos SET ts_acesso = {SQL_TS_ACESSO} "
+        f"WHERE ts_acesso IS NULL OR rowid IN ({', '.join('?' * len(rowids))})",
+        list(rowids)
+    )
+
+# Ajustes executados dentro da mesma transação, após aplicar as alterações da tabela
+AJUSTES_POS_GRAVACAO = {
+    'log_acessos': ajustar_ts_log_acessos,
+}
+
+def aplicar_alteracoes(conn, table_name, esquema, df_original, alteracoes, chave=None):
+    """
+    Aplica as alterações do data_editor (edited_rows, added_rows, deleted_rows) em um único savepoint.
+    Cada grupo de linhas com o mesmo conjunto de colunas vira um executemany.
+    Conflito: se alguma linha editada/excluída mudou no banco desde a leitura da página, nada é gravado.
+    As linhas são localizadas pelo rowid (índice do DataFrame) ou, com `chave`, pelos valores originais
+    das colunas da chave primária (tabelas WITHOUT ROWID).
+    """
+    tipos = {nome: tipo for nome, tipo, _, _ in esquema}
+    obrigatorias = {nome for nome, tipo, notnull, pk in esquema if notnull and not (pk and 'INT' in tipo and not chave)}
+    tabela = quote_ident(table_name)
+    condicao_chave = ' AND '.join(f"{quote_ident(c)} = ?" for c in chave) if chave else "rowid = ?"
+
+    def condicao_original(colunas):
+        return ' AND '.join(f"{quote_ident(c)} IS ?" for c in colunas)
+
+    def valores_originais(rowid, colunas):
+        return [valor_sql(df_original.at[rowid, c]) for c in colunas]
+
+    def valores_chave(rowid):
+        return valores_originais(rowid, chave) if chave else [int(rowid)]
+
+    # Edições: apenas as colunas alteradas, agrupadas pelo conjunto de colunas
+    updates = {}
+    rowids_editados = []
+    for posicao, mudancas in alteracoes.get('edited_rows', {}).items():
+        colunas = tuple(sorted(c for c in mudancas if c in tipos))
+        if not colunas:
+            continue
+        rowid = df_original.index[int(posicao)]
+        novos = [converter_valor_coluna(c, tipos[c], mudancas[c]) for c in colunas]
+        for c, valor in zip(colunas, novos):
+            if valor is None and c in obrigatorias:
+                raise ValueError(f"Coluna '{c}' é obrigatória (linha {valores_chave(rowid)}).")
+        updates.setdefault(colunas, []).append((*novos, *valores_chave(rowid), *valores_originais(rowid, colunas)))
+        if not chave:
+            rowids_editados.append(int(rowid))
+
+    # Exclusões: a linha inteira precisa estar como foi lida
+    colunas_tabela = tuple(tipos)
+    exclusoes = []
+    for posicao in alteracoes.get('deleted_rows', []):
+        rowid = df_original.index[int(posicao)]
+        exclusoes.append((*valores_chave(rowid), *valores_originais(rowid, colunas_tabela)))
+
+    # Inclusões: colunas informadas, agrupadas; chave INTEGER PRIMARY KEY vazia fica a cargo do SQLite
+    inclusoes = {}
+    for numero, linha in enumerate(alteracoes.get('added_rows', []), start=1):
+        valores = {c: converter_valor_coluna(c, tipos[c], v) for c, v in linha.items() if c in tipos}
+        valores = {c: v for c, v in valores.items() if v is not None}
+        faltando = obrigatorias - set(valores)
+        if faltando:
+            raise ValueError(f"Linha incluída {numero}: preencha {', '.join(sorted(faltando))}.")
+        colunas = tuple(sorted(valores))
+        inclusoes.setdefault(colunas, []).append(tuple(valores[c] for c in colunas))
+
+    total_updates = sum(len(p) for p in updates.values())
+    total_inclusoes = sum(len(p) for p in inclusoes.values())
+    if not (updates or exclusoes or inclusoes):
+        return {'atualizados': 0, 'incluidos': 0, 'excluidos': 0}
+
+    conn.execute("SAVEPOINT crud_alteracoes")
+    try:
+        if exclusoes:
+            cursor = conn.executemany(
+                f"DELETE FROM {tabela} WHERE {condicao_chave} AND {condicao_original(colunas_tabela)}", exclusoes
+            )
+            if cursor.rowcount != len(exclusoes):
+                raise ValueError("Conflito: registros excluídos foram alterados por outro usuário. Atualize a página.")
+
+        for colunas, parametros in updates.items():
+            cursor = conn.executemany(
+                f"UPDATE {tabela} SET {', '.join(f'{quote_ident(c)} = ?' for c in colunas)} "
+                f"WHERE {condicao_chave} AND {condicao_original(colunas)}",
+                parametros
+            )
+            if cursor.rowcount != len(parametros):
+                raise ValueError("Conflito: registros editados foram alterados por outro usuário. Atualize a página.")
+
+        for colunas, parametros in inclusoes.items():
+            if colunas:
+                conn.executemany(
+                    f"INSERT INTO {tabela} ({', '.join(quote_ident(c) for c in colunas)}) "
+                    f"VALUES ({', '.join('?' * len(colunas))})",
+                    parametros
+                )
+            else:
+                conn.executemany(f"INSERT INTO {tabela} DEFAULT VALUES", parametros)
+
+        ajuste = AJUSTES_POS_GRAVACAO.get(table_name)
+        if ajuste:
+            ajuste(conn, rowids_editados)
+
+        conn.execute("RELEASE crud_alteracoes")
+    except Exception:
+        conn.execute("ROLLBACK TO crud_alteracoes")
+        conn.execute("RELEASE crud_alteracoes")
+        raise
+    conn.commit()
+
+    return {'atualizados': total_updates, 'incluidos': total_inclusoes, 'excluidos': len(exclusoes)}
+
+def montar_column_config(table_name, esquema, column_widths):
+    """Configuração das colunas do editor conforme o tipo declarado no SQLite"""
+    ajuda = {
+        ('log_acessos', 'data_acesso'): "Formato: YYYY-MM-DD",
+        ('log_acessos', 'hora_acesso'): "Formato: HH:MM:SS",
+        ('log_acessos', 'ts_acesso'): "Epoch (segundos); recalculado a partir de data e hora",
     }
+    column_config = {}
+    for col_name, col_type, notnull, pk in esquema:
+        column_width = column_widths.get(table_name, {}).get(col_name, 'medium')
+        obrigatoria = notnull or pk
+        if table_name == "usuarios_tab" and col_name == "perfil":
+            column_config[col_name] = st.column_config.SelectboxColumn(
+                "perfil",
+                width=column_width,
+                required=True,
+                options=["adm", "usuario", "Gestor", "master"]
+            )
+        elif 'INT' in col_type:
+            column_config[col_name] = st.column_config.NumberColumn(
+                col_name,
+                width=column_width,
+                required=obrigatoria,
+                step=1,
+                format="%d",
+                help=ajuda.get((table_name, col_name))
+            )
+        elif coluna_numerica(col_type):
+            column_config[col_name] = st.column_config.NumberColumn(
+                col_name,
+                width=column_width,
+                required=obrigatoria,
+            )
+        else:
+            column_config[col_name] = st.column_config.TextColumn(
+                col_name,
+                width=column_width,
+                required=obrigatoria,
+                help=ajuda.get((table_name, col_name))
+            )
+    return column_config
 
 def show_crud():
     """Exibe registros administrativos em formato de tabela."""
@@ -94,14 +400,13 @@ def show_crud():
         st.session_state.show_debug = not st.session_state.show_debug
     
     if st.button("Atualizar Dados"):
+        listar_tabelas.clear()
+        obter_esquema.clear()
+        chave_tabela.clear()
         st.rerun()
     
     # Busca as tabelas do banco de dados
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
-    cursor.execute("SELECT name FROM sqlite_master WHERE type='table'")
-    db_tables = [table[0] for table in cursor.fetchall()]
-    conn.close()
+    db_tables = listar_tabelas()
     
     # Adiciona uma opção vazia no início
     tables = [""] + db_tables
@@ -109,9 +414,9 @@ def show_crud():
     # Mostra debug info apenas se o botão estiver ativado
     if st.session_state.show_debug:
         with st.expander("Debug Information", expanded=True):
+            st.write(f"Banco de dados: {DB_PATH}")
             st.write("Tabelas disponíveis:", db_tables)
             st.write("Estado atual do debug:", st.session_state.show_debug)
-            st.write("Tabelas na lista de seleção:", tables)
 
     # Cria três colunas, com a do meio tendo 30% da largura
     col1, col2, col3 = st.columns([3.5, 3, 3.5])
@@ -121,319 +426,140 @@ def show_crud():
         selected_table = st.selectbox("Selecione a tabela", tables, key="table_selector")
     
     if selected_table:
-        # Add debug information
-        st.write(f"Conectando ao banco de dados: {DB_PATH}")
+        if selected_table not in db_tables:
+            st.error(f"Tabela '{selected_table}' não encontrada no banco de dados!")
+            return
         
-        conn = sqlite3.connect(DB_PATH)
+        esquema = obter_esquema(selected_table)
+        columns = [c[0] for c in esquema]
+        chave = chave_tabela(selected_table)
+        
+        conn = rastreamento.conectar(DB_PATH)
         cursor = conn.cursor()
         
         try:
-            # Add debug query to check table existence
-            cursor.execute("SELECT name FROM sqlite_master WHERE type='table' AND name=?", (selected_table,))
-            if not cursor.fetchone():
-                st.error(f"Tabela '{selected_table}' não encontrada no banco de dados!")
-                return
-
-            # Test query to verify data
-            cursor.execute(f"SELECT COUNT(*) FROM {selected_table}")
-            count = cursor.fetchone()[0]
-            st.write(f"Número de registros encontrados: {count}")
-            
-            # For usuarios_tab specifically, let's verify the data directly
-            if selected_table == "usuarios_tab":
-                cursor.execute("SELECT * FROM usuarios_tab LIMIT 1")
-                sample = cursor.fetchone()
-                if sample:
-                    st.write("Exemplo de registro encontrado:", sample)
-                
-            # Análise da tabela
-            analysis = get_table_analysis(cursor, selected_table)
-            
-            # Obtém informações das colunas aqui, antes de usar
-            cursor.execute(f"PRAGMA table_info({selected_table})")
-            columns_info = cursor.fetchall()  # Define columns_info aqui
-            
-            # Exibe informações da tabela em um expander
+            # Exibe informações da tabela em um expander (estatísticas em cache)
             with st.expander("Informações da Tabela", expanded=True):
-                col1, col2, col3 = st.columns(3)
-                with col1:
-                    st.metric("Total de Registros", analysis["record_count"])
-                with col2:
-                    if selected_table == "log_acessos":
-                        cursor.execute("SELECT COUNT(DISTINCT user_id) FROM log_acessos")
-                        unique_users = cursor.fetchone()[0]
-                        st.metric("Usuários Únicos", unique_users)
-                    else:
-                        st.metric("Última Atualização", analysis["last_update"])
-                with col3:
-                    if selected_table == "log_acessos":
-                        cursor.execute("SELECT COUNT(DISTINCT data_acesso) FROM log_acessos")
-                        unique_dates = cursor.fetchone()[0]
-                        st.metric("Dias com Registros", unique_dates)
-                    else:
-                        st.metric("Maior User ID", analysis["max_user_id"])
+                estatisticas = carregar_estatisticas(selected_table, geracao(selected_table))
+                for coluna_metrica, (rotulo, valor) in zip(st.columns(len(estatisticas)), estatisticas.items()):
+                    coluna_metrica.metric(rotulo, valor if valor is not None else "N/A")
                 
                 # Exibe estrutura da tabela
                 st.write("### Estrutura da Tabela")
-                structure_df = pd.DataFrame(
-                    analysis["columns"],
-                    columns=["cid", "name", "type", "notnull", "dflt_value", "pk"]
-                )
-                st.dataframe(
-                    structure_df[["name", "type", "notnull", "pk"]],
-                    hide_index=True,
-                    use_container_width=True
-                )
+                structure_df = pd.DataFrame(esquema, columns=["name", "type", "notnull", "pk"])
+                st.dataframe(structure_df, hide_index=True, use_container_width=True)
             
-            # Busca dados
-            if selected_table == "log_acessos":
-                # Ordenação específica para log_acessos
-                cursor.execute("""
-                    SELECT 
-                        id as 'id',
-                        user_id as 'user_id',
-                        data_acesso as 'data_acesso',
-                        programa as 'programa',
-                        acao as 'acao',
-                        time(hora_acesso) as 'hora_acesso'
-                    FROM log_acessos 
-                    ORDER BY data_acesso DESC, hora_acesso DESC, id DESC
-                """)
-            elif selected_table == "usuarios_tab":
-                # Adiciona filtro por user_id para usuarios_tab
-                user_id_filter = st.number_input("Filtrar por User ID (0 para mostrar todos)", min_value=0, value=0)
-                
-                # Adiciona seleção de ordenação com as colunas corretas
+            # Filtro e ordenação executados no banco
+            ordem_padrao = ORDENACAO_PADRAO.get(selected_table, (None, 'ASC'))
+            col1, col2, col3, col4, col5 = st.columns([2, 2, 2, 1, 1])
+            with col1:
+                coluna_filtro = st.selectbox(
+                    "Filtrar por coluna", [""] + columns, key=f"crud_filtro_coluna_{selected_table}"
+                )
+            with col2:
+                valor_filtro = st.text_input(
+                    "Valor do filtro", key=f"crud_filtro_valor_{selected_table}",
+                    help="Colunas numéricas: valor exato. Texto: contém o valor.",
+                    disabled=not coluna_filtro
+                ).strip()
+            with col3:
+                opcoes_ordem = ["(chave primária)" if chave else "(ordem de inserção)"] + columns
                 sort_column = st.selectbox(
-                    "Ordenar por coluna",
-                    ["id", "user_id", "nome", "email", "senha", "perfil", "empresa"],
-                    index=0
+                    "Ordenar por coluna", opcoes_ordem,
+                    index=opcoes_ordem.index(ordem_padrao[0]) if ordem_padrao[0] in columns else 0,
+                    key=f"crud_ordem_coluna_{selected_table}"
                 )
-                sort_order = st.selectbox("Ordem", ["ASC", "DESC"], index=0)
-                
-                # Query com filtro e ordenação
-                query = f"""
-                    SELECT * FROM usuarios_tab
-                    {f"WHERE user_id = {user_id_filter}" if user_id_filter > 0 else ""}
-                    ORDER BY {sort_column} {sort_order}
-                """
-                cursor.execute(query)
-            else:
-                cursor.execute(f"SELECT * FROM {selected_table}")
+            with col4:
+                sort_order = st.selectbox(
+                    "Ordem", ["ASC", "DESC"], index=["ASC", "DESC"].index(ordem_padrao[1]),
+                    key=f"crud_ordem_direcao_{selected_table}"
+                )
+            with col5:
+                tamanho = st.selectbox("Por página", TAMANHOS_PAGINA, key=f"crud_tamanho_{selected_table}")
             
-            data = cursor.fetchall()
+            if not coluna_filtro:
+                valor_filtro = ""
+            ordenacao = (None if sort_column == opcoes_ordem[0] else sort_column, sort_order)
             
-            # Busca nomes das colunas
-            cursor.execute(f"PRAGMA table_info({selected_table})")
-            columns = [col[1] for col in cursor.fetchall()]
+            total = contar_registros(selected_table, coluna_filtro, valor_filtro, geracao(selected_table))
+            total_paginas = max(1, -(-total // tamanho))
             
-            # Cria DataFrame
-            df = pd.DataFrame(data, columns=columns)
+            # Volta para a primeira página quando filtro, ordem ou tamanho mudam
+            assinatura = (selected_table, coluna_filtro, valor_filtro, ordenacao, tamanho)
+            if st.session_state.get("crud_assinatura") != assinatura:
+                st.session_state.crud_assinatura = assinatura
+                st.session_state.crud_pagina = 1
+            st.session_state.crud_pagina = min(st.session_state.crud_pagina, total_paginas)
             
-            # Configuração específica para log_acessos
-            if selected_table == "log_acessos":
-                column_config = {
-                    "id": st.column_config.NumberColumn(
-                        "id",
-                        width="small",
-                        required=True,
-                    ),
-                    "user_id": st.column_config.NumberColumn(
-                        "user_id",
-                        width="small",
-                        required=True,
-                    ),
-                    "data_acesso": st.column_config.TextColumn(
-                        "data_acesso",
-                        width="medium",
-                        required=True,
-                        help="Formato: YYYY-MM-DD"
-                    ),
-                    "programa": st.column_config.TextColumn(
-                        "programa",
-                        width="medium",
-                        required=True,
-                    ),
-                    "acao": st.column_config.TextColumn(
-                        "acao",
-                        width="medium",
-                        required=True,
-                    ),
-                    "hora_acesso": st.column_config.TextColumn(
-                        "hora_acesso",
-                        width="small",
-                        required=False,
-                        help="Formato: HH:MM:SS"
-                    )
-                }
-                
-                # Busca dados com ordenação por data e hora
-                cursor.execute("""
-                    SELECT 
-                        id as 'id',
-                        user_id as 'user_id',
-                        data_acesso as 'data_acesso',
-                        programa as 'programa',
-                        acao as 'acao',
-                        time(hora_acesso) as 'hora_acesso'
-                    FROM log_acessos 
-                    ORDER BY data_acesso DESC, hora_acesso DESC, id DESC
-                """)
-                
-                # Define explicitamente os nomes das colunas
-                columns = ['id', 'user_id', 'data_acesso', 'programa', 'acao', 'hora_acesso']
-                
-                data = cursor.fetchall()
-                df = pd.DataFrame(data, columns=columns)
-                
-                # Converte apenas a data_acesso para string se necessário
-                if 'data_acesso' in df.columns:
-                    df['data_acesso'] = df['data_acesso'].astype(str)
-            else:
-                # Configura o tipo de cada coluna baseado no tipo do SQLite
-                column_config = {}
-                for col_info in columns_info:
-                    col_name = col_info[1]
-                    col_type = col_info[2].upper()
-                    
-                    # Define a largura da coluna baseada no dicionário COLUMN_WIDTHS
-                    column_width = COLUMN_WIDTHS.get(selected_table, {}).get(col_name, 'medium')
-                    
-                    # Configuração especial para a tabela de usuários
-                    if selected_table == "usuarios_tab":
-                        if col_name in ["id", "user_id"]:  # Tratamento para colunas numéricas
-                            column_config[col_name] = st.column_config.NumberColumn(
-                                col_name,
-                                width=column_width,
-                                required=True,
-                                step=1,  # Força números inteiros
-                                format="%d"  # Formato de número inteiro
-                            )
-                        elif col_name == "perfil":
-                            column_config[col_name] = st.column_config.SelectboxColumn(
-                                "perfil",
-                                width=column_width,
-                                required=True,
-                                options=["adm", "usuario", "Gestor", "master"]
-                            )
-                        elif col_name == "email":
-                            column_config[col_name] = st.column_config.TextColumn(
-                                "email",
-                                width=column_width,
-                                required=True
-                            )
-                        else:
-                            if 'INTEGER' in col_type:
-                                column_config[col_name] = st.column_config.NumberColumn(
-                                    col_name,
-                                    width=column_width,
-                                    required=True,
-                                )
-                            else:
-                                column_config[col_name] = st.column_config.TextColumn(
-                                    col_name,
-                                    width=column_width,
-                                    required=True
-                                )
-                    else:
-                        # Configuração padrão para outras tabelas
-                        if 'INTEGER' in col_type:
-                            column_config[col_name] = st.column_config.NumberColumn(
-                                col_name,
-                                width=column_width,
-                                required=True,
-                            )
-                        elif 'REAL' in col_type:
-                            column_config[col_name] = st.column_config.NumberColumn(
-                                col_name,
-                                width=column_width,
-                                required=True,
-                            )
-                        else:
-                            column_config[col_name] = st.column_config.TextColumn(
-                                col_name,
-                                width=column_width,
-                                required=True
-                            )
+            col1, col2, col3 = st.columns([1, 1, 6])
+            with col1:
+                if st.button("◀ Anterior", disabled=st.session_state.crud_pagina <= 1):
+                    st.session_state.crud_pagina -= 1
+                    st.rerun()
+            with col2:
+                if st.button("Próxima ▶", disabled=st.session_state.crud_pagina >= total_paginas):
+                    st.session_state.crud_pagina += 1
+                    st.rerun()
+            with col3:
+                st.caption(
+                    f"Página {st.session_state.crud_pagina} de {total_paginas} "
+                    f"({total} registro(s) no filtro)"
+                )
             
-            # Converte para formato editável
+            df = carregar_pagina(
+                conn, selected_table, esquema, coluna_filtro, valor_filtro,
+                ordenacao, st.session_state.crud_pagina, tamanho, chave=chave
+            )
+            
+            column_config = montar_column_config(selected_table, esquema, COLUMN_WIDTHS)
+            
+            # Converte para formato editável (apenas a página atual; índice = rowid, oculto em tabelas WITHOUT ROWID)
+            editor_key = f"editor_{selected_table}_{hash(assinatura)}_{st.session_state.crud_pagina}"
             edited_df = st.data_editor(
                 df,
                 num_rows="dynamic",
                 use_container_width=True,
                 column_config=column_config,
-                hide_index=False,
-                key=f"editor_{selected_table}"
+                hide_index=bool(chave),
+                key=editor_key
             )
             
-            # Botão para salvar alterações
+            # Botão para salvar alterações (somente o que mudou no editor)
             if st.button("Salvar Alterações"):
                 try:
-                    # Detecta registros novos comparando o tamanho dos DataFrames
-                    if len(edited_df) > len(df):
-                        # Processa novos registros
-                        new_records = edited_df.iloc[len(df):]
-                        for _, row in new_records.iterrows():
-                            # Remove o índice da linha que é automaticamente adicionado
-                            row_values = [row[col] for col in columns]
-                            insert_query = f"""
-                            INSERT INTO {selected_table} ({', '.join(columns)})
-                            VALUES ({', '.join(['?' for _ in columns])})
-                            """
-                            cursor.execute(insert_query, tuple(row_values))
-
-                    # Atualiza registros existentes
-                    for index, row in edited_df.iloc[:len(df)].iterrows():
-                        # Obtém o valor da coluna de ID primária (geralmente 'id' ou a primeira coluna)
-                        id_column = columns[0]  # Assume que a primeira coluna é o ID
-                        if 'id' in columns:
-                            id_column = 'id'
-                        elif 'you_id' in columns and selected_table == 'youtube_tab':
-                            id_column = 'you_id'
-                            
-                        id_value = row[id_column]
-                        
-                        # Constrói a query de atualização usando o ID em vez do rowid
-                        update_query = f"""
-                        UPDATE {selected_table}
-                        SET {', '.join(f'{col} = ?' for col in columns if col != id_column)}
-                        WHERE {id_column} = ?
-                        """
-                        
-                        # Prepara os valores para a atualização (todos exceto o ID, e depois o ID para o WHERE)
-                        update_values = [row[col] for col in columns if col != id_column]
-                        update_values.append(id_value)
-                        
-                        cursor.execute(update_query, tuple(update_values))
-                    
-                    conn.commit()
-                    st.success("Alterações salvas com sucesso!")
-                    st.rerun()
+                    resultado = aplicar_alteracoes(
+                        conn, selected_table, esquema, df, st.session_state[editor_key], chave=chave
+                    )
+                    if not any(resultado.values()):
+                        st.info("Nenhuma alteração para salvar.")
+                    else:
+                        invalidar(selected_table)
+                        if selected_table == "log_acessos":
+                            # Edições diretas no log invalidam os agregados diários do dashboard
+                            from registro_acessos import reconstruir_rollups
+                            reconstruir_rollups(conn)
+                        st.success(
+                            f"Alterações salvas com sucesso! "
+                            f"{resultado['atualizados']} atualizado(s), "
+                            f"{resultado['incluidos']} incluído(s), "
+                            f"{resultado['excluidos']} excluído(s)."
+                        )
+                        st.rerun()
                 
                 except Exception as e:
                     st.error(f"Erro ao salvar alterações: {str(e)}")
-                    # Adiciona mais detalhes para debug
-                    import traceback
-                    st.error(f"Detalhes do erro: {traceback.format_exc()}")
             
-            # Botão de download - convertendo ponto para vírgula na coluna value
-            if not df.empty:
-                export_df = edited_df.copy()
-                
-                # Procura pela coluna que contém 'value' no nome
-                value_columns = [col for col in export_df.columns if 'value' in col.lower()]
-                
-                # Converte os números para string e substitui ponto por vírgula
-                for value_col in value_columns:
-                    export_df[value_col] = export_df[value_col].apply(lambda x: str(x).replace('.', ',') if pd.notnull(x) else '')
-                
-                # Alterado para usar UTF-8 em vez de cp1252 para suportar caracteres Unicode
-                txt_data = export_df.to_csv(sep='\t', index=False, encoding='utf-8', float_format=None)
-                st.download_button(
-                    label="Download TXT",
-                    data=txt_data.encode('utf-8'),
-                    file_name=f"{selected_table}.txt",
-                    mime="text/plain"
+            # Exportação da tabela inteira com o filtro e a ordenação atuais (em segundo plano)
+            with st.expander("Exportar Dados"):
+                query_exportacao, params_exportacao = montar_consulta(
+                    selected_table, esquema, coluna_filtro, valor_filtro, ordenacao, com_rowid=False, chave=chave
+                )
+                painel_exportacao(
+                    f"crud_exportacao_{selected_table}",
+                    selected_table,
+                    query_exportacao,
+                    params_exportacao,
+                    {nome: tipo for nome, tipo, _, _ in esquema}
                 )
         
         except Exception as e:
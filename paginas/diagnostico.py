@@ -10,7 +10,63 @@ import warnings
 import logging
 import platform
 from datetime import datetime
-import psutil
+import pandas as pd
+from cache_dados import estatisticas_cache
+from agendador import listar_tarefas
+import retencao_logs
+import perfil_importacao
+import llm_gateway
+import rastreamento
+import metricas
+
+def acompanhar_metricas():
+    """Indicadores atuais e sparklines das amostras guardadas (atualizado pelo fragmento)"""
+    lista = metricas.amostras()
+    if not lista:
+        st.info(f"Coleta iniciada; a primeira amostra sai em até {metricas.INTERVALO} s")
+        return
+    ultima = lista[-1]
+    col1, col2, col3, col4, col5, col6 = st.columns(6)
+    col1.metric("CPU processo", f"{ultima['cpu_processo_pct']}%")
+    col2.metric("Memória (MB)", ultima['rss_mb'])
+    col3.metric("Threads", ultima['threads'])
+    col4.metric("Descritores", ultima['descritores'])
+    col5.metric("WAL (MB)", ultima['wal_mb'])
+    col6.metric("Disco mídia", f"{ultima['disco_midia_pct']}%" if ultima['disco_midia_pct'] is not None else "-")
+
+    linhas = [(descricao, chave) for chave, (_, descricao) in metricas.METRICAS.items()]
+    for etapa in metricas.ETAPAS:
+        linhas.append((f"Fila {etapa}: pendentes", f"fila_{etapa}_pendente"))
+        linhas.append((f"Fila {etapa}: executando", f"fila_{etapa}_executando"))
+        linhas.append((f"Concluídos {etapa} (últimos {metricas.JANELA_VAZAO}s)", f"vazao_{etapa}"))
+    tabela = []
+    for descricao, chave in linhas:
+        valores = [v for v in metricas.serie(chave, lista) if v is not None]
+        tabela.append({
+            'métrica': descricao,
+            'atual': valores[-1] if valores else None,
+            'mín': min(valores) if valores else None,
+            'máx': max(valores) if valores else None,
+            'histórico': valores,
+        })
+    st.dataframe(
+        pd.DataFrame(tabela), hide_index=True, use_container_width=True,
+        column_config={'histórico': st.column_config.LineChartColumn("histórico", width="large")}
+    )
+    minutos = round((ultima['quando'] - lista[0]['quando']) / 60, 1)
+    st.caption(
+        f"{len(lista)} amostras a cada {metricas.INTERVALO} s ({minutos} min; capacidade {metricas.CAPACIDADE}). "
+        + (f"Formato Prometheus em http://<servidor>:{metricas.PORTA}/metrics" if metricas.PORTA
+           else "Endpoint Prometheus desativado (defina METRICAS_PORTA)")
+    )
+
+def exibir_metricas():
+    """Painel de métricas com atualização automática opcional"""
+    metricas.agendar_metricas()  # Idempotente; o main.py já agenda ao iniciar o processo
+    automatico = st.toggle("Atualização automática", value=True, key="metricas_automatico")
+    st.fragment(acompanhar_metricas, run_every=metricas.INTERVALO if automatico else None)()
+    if st.checkbox("Ver formato Prometheus", key="metricas_prometheus"):
+        st.code(metricas.texto_prometheus(), language='text')
 
 def show_diagnostics():
     """Página de diagnóstico do sistema"""
@@ -35,9 +91,14 @@ def show_diagnostics():
             
         with col2:
             st.subheader("Recursos")
-            st.write(f"CPU Usage: {psutil.cpu_percent()}%")
-            st.write(f"Memory Usage: {psutil.Process().memory_info().rss / 1024 / 1024:.2f} MB")
-            st.write(f"Disk Usage: {psutil.disk_usage('/').percent}%")
+            amostra = metricas.ultima_amostra() or metricas.coletar()
+            st.write(f"CPU Usage: {amostra['cpu_sistema_pct']}% (processo: {amostra['cpu_processo_pct']}%)")
+            st.write(f"Memory Usage: {amostra['rss_mb']:.2f} MB")
+            st.write(f"Disk Usage (dados): {amostra['disco_dados_pct']}%")
+    
+    # Recursos e vazão ao longo do tempo (coletor do metricas.py)
+    with st.expander("Métricas ao Vivo", expanded=True):
+        exibir_metricas()
     
     # Warnings e Logs
     with st.expander("Warnings e Logs", expanded=True):
@@ -67,6 +128,131 @@ def show_diagnostics():
             warnings.warn("Este é um warning de teste")
             st.rerun()
     
+    # Cache de Dados
+    with st.expander("Cache de Dados", expanded=False):
+        estatisticas = estatisticas_cache()
+        if estatisticas:
+            st.dataframe(pd.DataFrame(estatisticas), hide_index=True, use_container_width=True)
+        else:
+            st.info("Nenhuma consulta em cache executada ainda")
+    
+    # Tarefas Agendadas
+    with st.expander("Tarefas Agendadas", expanded=False):
+        tarefas = listar_tarefas()
+        if tarefas:
+            st.dataframe(pd.DataFrame(tarefas), hide_index=True, use_container_width=True)
+        else:
+            st.info("Nenhuma tarefa agendada neste processo")
+    
+    # Chamadas à API de LLM (gateway compartilhado pelas sessões do processo)
+    with st.expander("Gateway LLM", expanded=False):
+        resumo = llm_gateway.estatisticas_llm()
+        col1, col2, col3, col4 = st.columns(4)
+        col1.metric("Chamadas", resumo['chamadas'])
+        col2.metric("Erros", resumo['erros'])
+        col3.metric("Retentativas", resumo['retentativas'])
+        col4.metric("Latência p50 / p95 (ms)", f"{resumo['latencia_p50_ms']} / {resumo['latencia_p95_ms']}")
+        st.caption(
+            f"Tokens: {resumo['tokens_prompt']} de prompt, {resumo['tokens_resposta']} de resposta. "
+            f"Saldo nos limites por minuto: {resumo['saldo_requisicoes']} requisições, {resumo['saldo_tokens']} tokens"
+        )
+        chamadas = llm_gateway.ultimas_chamadas()
+        if chamadas:
+            st.dataframe(pd.DataFrame(chamadas), hide_index=True, use_container_width=True)
+        else:
+            st.info("Nenhuma chamada ao LLM neste processo")
+    
+    # Spans dos caminhos quentes (reruns, páginas, banco, HTTP, LLM, FFmpeg)
+    with st.expander("Rastreamento", expanded=False):
+        if not rastreamento.ATIVO:
+            st.info("Rastreamento desativado (RASTREAMENTO=0)")
+        spans = rastreamento.spans_recentes()
+        exportacao = [
+            f"JSON lines em {rastreamento.ARQUIVO_JSONL}" if rastreamento.ARQUIVO_JSONL else None,
+            "OpenTelemetry" if os.getenv('RASTREAMENTO_OTEL') == '1' else None,
+        ]
+        st.caption(
+            f"{len(spans)} spans em memória (capacidade {rastreamento.CAPACIDADE}). "
+            f"Exportação: {', '.join(e for e in exportacao if e) or 'desativada'}"
+        )
+        if spans:
+            st.subheader("Por operação")
+            st.dataframe(pd.DataFrame(rastreamento.resumo_por_nome()), hide_index=True, use_container_width=True)
+
+            st.subheader("Rodadas recentes")
+            st.caption("Tempo de cada rerun ou tarefa e quanto dele foi gasto em banco, HTTP, LLM, FFmpeg e mídia")
+            rodadas = rastreamento.rodadas_recentes()
+            st.dataframe(pd.DataFrame(rodadas), hide_index=True, use_container_width=True)
+
+            rodada = st.selectbox(
+                "Detalhar rodada:",
+                options=[r['rodada'] for r in rodadas],
+                format_func=lambda i: next(f"{r['quando']} - {r['nome']} {r['pagina'] or ''} ({r['duracao_ms']} ms)"
+                                           for r in rodadas if r['rodada'] == i),
+                key="rastreamento_rodada"
+            )
+            detalhe = rastreamento.spans_da_rodada(rodada)
+            if detalhe:
+                total = max(detalhe[0]['duracao_ms'], 0.001)
+                st.dataframe(
+                    pd.DataFrame([{
+                        'span': "\u00a0\u00a0" * s['nivel'] + s['nome'],
+                        'categoria': s['categoria'],
+                        'inicio_ms': round((s['inicio'] - detalhe[0]['inicio']) * 1000, 1),
+                        'duracao_ms': s['duracao_ms'],
+                        'parcela': min(s['duracao_ms'] / total, 1.0),
+                        'erro': s['erro'],
+                        'atributos': ", ".join(f"{k}={v}" for k, v in s['atributos'].items()),
+                    } for s in detalhe]),
+                    hide_index=True, use_container_width=True,
+                    column_config={'parcela': st.column_config.ProgressColumn("parcela", min_value=0, max_value=1)}
+                )
+            if st.button("Limpar Spans"):
+                rastreamento.limpar()
+                st.rerun()
+        else:
+            st.info("Nenhum span registrado neste processo")
+
+    # Tempo de importação (medido desde o início do processo pelo main.py)
+    with st.expander("Tempo de Importação", expanded=False):
+        if not perfil_importacao.ATIVO:
+            st.info("Medição desativada (PERFIL_IMPORTACAO=0)")
+        st.subheader("Primeira carga das páginas")
+        paginas = perfil_importacao.tempos_paginas()
+        if paginas:
+            st.dataframe(pd.DataFrame(paginas), hide_index=True, use_container_width=True)
+        else:
+            st.info("Nenhuma página carregada ainda neste processo")
+        st.subheader("Módulos mais lentos")
+        somente_projeto = st.checkbox("Somente módulos do projeto", key="perfil_somente_projeto")
+        modulos = perfil_importacao.tempos_modulos()
+        if somente_projeto:
+            raiz = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+            modulos = [
+                m for m in modulos
+                if (getattr(sys.modules.get(m['modulo']), '__file__', None) or '').startswith(raiz)
+            ]
+        if modulos:
+            st.caption("ms inclui os submódulos importados pela primeira vez; ms próprio desconta esses submódulos")
+            st.dataframe(pd.DataFrame(modulos[:100]), hide_index=True, use_container_width=True)
+        else:
+            st.info("Nenhuma importação medida")
+    
+    # Retenção do log de acessos
+    with st.expander("Arquivo de Logs", expanded=False):
+        st.caption(
+            f"Retenção: {retencao_logs.RETENCAO_MESES} meses na tabela log_acessos; "
+            f"meses anteriores em {retencao_logs.DIR_ARQUIVO}"
+        )
+        arquivos = retencao_logs.listar_arquivos()
+        if arquivos:
+            st.dataframe(pd.DataFrame(arquivos), hide_index=True, use_container_width=True)
+        else:
+            st.info("Nenhum mês arquivado")
+        if st.button("Executar Retenção Agora"):
+            with st.spinner("Arquivando e otimizando o banco..."):
+                st.json(retencao_logs.executar_retencao())
+    
     # Variáveis de Ambiente
     with st.expander("Variáveis de Ambiente", expanded=True):
         st.subheader("Variáveis de Ambiente")
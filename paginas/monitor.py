@@ -9,81 +9,78 @@ import sqlite3
 import pandas as pd
 import plotly.express as px
 from datetime import date, datetime, timedelta
-import io
-import tempfile
-import matplotlib.pyplot as plt
+from pathlib import Path
 import traceback
-from config import DB_PATH
+from cache_dados import cache_consulta, invalidar
+from config import FUSO_HORARIO, agora_local
+import analise_acessos
+import relatorio_uso
+import llm_gateway
 import os
-
-try:
-    import reportlab
-    from reportlab.lib import colors
-    from reportlab.lib.pagesizes import A4, landscape
-    from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-    from reportlab.platypus import (
-        SimpleDocTemplate,
-        Paragraph,
-        Spacer,
-        Table,
-        TableStyle,
-        Image,
-        KeepTogether
-    )
-except ImportError as e:
-    print(f"Erro ao importar ReportLab: {e}")
-
-def criar_conexao():
-    """Cria conexão com o banco de dados"""
-    conn = sqlite3.connect(DB_PATH)
-    criar_tabelas(conn)
-    return conn
+# Registro de acessos e agregados diários (reexportados para quem importa daqui)
+from registro_acessos import (
+    atualizar_rollups, criar_conexao, criar_tabelas, reconstruir_rollups, registrar_acesso
+)
 
 def get_timezone_adjusted_datetime():
     """
-    Retorna a data e hora atual ajustada com base no ambiente
+    Retorna a data e hora atual no fuso de São Paulo, independente do fuso do servidor
     """
-    current = datetime.now()
-    # Se estiver no Render, ajusta 3 horas para trás
-    if os.getenv('RENDER'):
-        current = current - timedelta(hours=3)
-    return current
+    return agora_local()
 
+def atualizar_agregados():
+    """
+    Agrega o que ainda não foi processado (ex.: registros inseridos por outros processos).
+    Fica fora do cache: a falha é avisada a cada execução e nunca fica guardada junto com os dados.
+    """
+    conn = criar_conexao()
+    try:
+        if atualizar_rollups(conn):
+            invalidar('log_acessos')
+    except sqlite3.Error as e:
+        st.warning(f"Erro ao atualizar agregados de acessos: {str(e)}")
+    finally:
+        conn.close()
+
+@cache_consulta('log_acessos', ttl=60, por_usuario=False)
 def carregar_dados_acessos():
-    """Carrega dados de acessos do banco de dados"""
+    """
+    Carrega dados de acessos a partir dos agregados diários (log_acessos_diario).
+    Erros de consulta são propagados (nada vai para o cache) e tratados por quem chama.
+    """
     conn = criar_conexao()
     
-    # Ajusta a query baseada no ambiente
-    timezone_adjust = "'+3 hours'" if os.getenv('RENDER') else "'0 hours'"
-    
     # Query para acessos por empresa
     query_empresas = """
-    SELECT u.empresa, COUNT(*) as quantidade_acessos 
-    FROM log_acessos la
-    JOIN usuarios_tab u ON la.user_id = u.user_id
+    SELECT 
+        u.empresa, 
+        SUM(d.total) as quantidade_acessos,
+        COUNT(DISTINCT d.user_id) as usuarios_unicos
+    FROM log_acessos_diario d
+    JOIN usuarios_tab u ON d.user_id = u.user_id
     WHERE u.empresa IS NOT NULL
-    AND la.data_acesso >= date('now', '-30 days')
+    AND d.data_acesso >= date('now', '-30 days')
     GROUP BY u.empresa
     ORDER BY quantidade_acessos DESC
     LIMIT 10
     """
     
     # Query para acessos por usuário
-    query_usuarios = f"""
+    query_usuarios = """
     SELECT 
         u.nome, 
         u.empresa, 
-        COUNT(*) as quantidade_acessos,
-        MAX(la.data_acesso || ' ' || COALESCE(la.hora_acesso, '00:00:00')) as ultimo_acesso
-    FROM log_acessos la
-    JOIN usuarios_tab u ON la.user_id = u.user_id
-    WHERE date(la.data_acesso) >= date('now', '-30 days')
+        SUM(d.total) as quantidade_acessos,
+        MAX(d.ultimo_acesso) as ultimo_acesso
+    FROM log_acessos_diario d
+    JOIN usuarios_tab u ON d.user_id = u.user_id
+    WHERE d.data_acesso >= date('now', '-30 days')
     GROUP BY u.user_id, u.nome, u.empresa
     ORDER BY quantidade_acessos DESC
     LIMIT 10
     """
     
-    # Query para frequência de acessos diários
+    # Query para frequência de acessos diários (uma linha por usuário/dia no agregado)
     query_frequencia = """
     WITH RECURSIVE dates(date) AS (
         SELECT date('now', '-30 days')
@@ -94,67 +91,21 @@ def carregar_dados_acessos():
     )
     SELECT 
         dates.date as data_acesso,
-        COUNT(DISTINCT la.user_id) as usuarios_unicos,
-        COUNT(la.id) as total_acessos,
-        GROUP_CONCAT(DISTINCT COALESCE(la.hora_acesso, '00:00:00')) as horarios_acesso
+        COUNT(d.user_id) as usuarios_unicos,
+        COALESCE(SUM(d.total), 0) as total_acessos
     FROM dates
-    LEFT JOIN log_acessos la ON date(la.data_acesso) = dates.date
+    LEFT JOIN log_acessos_diario d ON d.data_acesso = dates.date
     GROUP BY dates.date
     ORDER BY dates.date
     """
     
     try:
         df_empresas = pd.read_sql_query(query_empresas, conn)
-    except Exception as e:
-        st.warning(f"Erro ao carregar dados de empresas: {str(e)}")
-        df_empresas = pd.DataFrame(columns=['empresa', 'quantidade_acessos'])
-    
-    try:
         df_usuarios = pd.read_sql_query(query_usuarios, conn)
-    except Exception as e:
-        st.warning(f"Erro ao carregar dados de usuários: {str(e)}")
-        df_usuarios = pd.DataFrame(columns=['nome', 'empresa', 'quantidade_acessos', 'ultimo_acesso'])
-    
-    try:
         df_frequencia = pd.read_sql_query(query_frequencia, conn)
-    except Exception as e:
-        st.warning(f"Erro ao carregar dados de frequência: {str(e)}")
-        df_frequencia = pd.DataFrame(columns=['data_acesso', 'usuarios_unicos', 'total_acessos', 'horarios_acesso'])
-    
-    conn.close()
-    return df_empresas, df_usuarios, df_frequencia
-
-def registrar_acesso(user_id, programa, acao):
-    """
-    Registra o acesso do usuário no banco de dados com ajuste de timezone
-    """
-    try:
-        conn = criar_conexao()
-        cursor = conn.cursor()
-        
-        # Obtém data e hora ajustadas
-        dt_adjusted = get_timezone_adjusted_datetime()
-        data_acesso = dt_adjusted.strftime('%Y-%m-%d')
-        hora_acesso = dt_adjusted.strftime('%H:%M:%S')
-        
-        cursor.execute("""
-        INSERT INTO log_acessos (
-            user_id,
-            data_acesso,
-            hora_acesso,
-            programa,
-            acao
-        )
-        VALUES (?, ?, ?, ?, ?)
-        """, (user_id, data_acesso, hora_acesso, programa, acao))
-        
-        conn.commit()
+    finally:
         conn.close()
-        
-    except Exception as e:
-        st.error(f"Erro ao registrar acesso: {str(e)}")
-        if 'conn' in locals():
-            conn.close()
+    return df_empresas, df_usuarios, df_frequencia
 
 def subtitulo():
     """
@@ -187,37 +138,6 @@ def verificar_dados():
     
     return count_log > 0 and count_usuarios > 0
 
-def criar_tabelas(conn):
-    """Cria as tabelas necessárias se não existirem"""
-    cursor = conn.cursor()
-    
-    # Criar tabela de usuários
-    cursor.execute("""
-    CREATE TABLE IF NOT EXISTS usuarios_tab (
-        id INTEGER PRIMARY KEY,
-        user_id INTEGER NOT NULL,
-        nome TEXT NOT NULL,
-        email TEXT NOT NULL,
-        senha TEXT NOT NULL,
-        perfil TEXT NOT NULL,
-        empresa TEXT
-    )
-    """)
-    
-    # Criar tabela de log de acessos
-    cursor.execute("""
-    CREATE TABLE IF NOT EXISTS log_acessos (
-        id INTEGER PRIMARY KEY,
-        user_id INTEGER NOT NULL,
-        data_acesso DATE NOT NULL,
-        programa TEXT NOT NULL,
-        acao TEXT NOT NULL,
-        hora_acesso TIME
-    )
-    """)
-    
-    conn.commit()
-
 def main():
     subtitulo()
     
@@ -228,70 +148,315 @@ def main():
             if st.button("Adicionar Dados de Exemplo"):
                 adicionar_dados_exemplo()
         
-        df_empresas, df_usuarios, df_frequencia = carregar_dados_acessos()
+        aba_geral, aba_analise, aba_llm, aba_relatorio = st.tabs(
+            ["Visão Geral", "Análise de Acessos", "Uso de LLM", "Relatório PDF"]
+        )
+        
+        with aba_geral:
+            atualizar_agregados()
+            try:
+                df_empresas, df_usuarios, df_frequencia = carregar_dados_acessos()
+            except (sqlite3.Error, pd.errors.DatabaseError) as e:
+                st.warning(f"Erro ao carregar dados de acessos: {str(e)}")
+                df_empresas = pd.DataFrame(columns=['empresa', 'quantidade_acessos', 'usuarios_unicos'])
+                df_usuarios = pd.DataFrame(columns=['nome', 'empresa', 'quantidade_acessos', 'ultimo_acesso'])
+                df_frequencia = pd.DataFrame(columns=['data_acesso', 'usuarios_unicos', 'total_acessos'])
         
-        # Container para reduzir largura
-        col1, col2, col3 = st.columns([1, 8, 1])  # 80% da largura
-        with col2:
-            # Gráfico de acessos por empresa
-            st.subheader("Top 10 Empresas por Quantidade de Acessos")
-            fig_empresas = px.bar(df_empresas, 
-                                x='empresa', 
-                                y='quantidade_acessos',
-                                title="Acessos por Empresa")
-            st.plotly_chart(fig_empresas, use_container_width=True)
+            # Container para reduzir largura
+            col1, col2, col3 = st.columns([1, 8, 1])  # 80% da largura
+            with col2:
+                # Gráfico de acessos por empresa
+                st.subheader("Top 10 Empresas por Quantidade de Acessos")
+                fig_empresas = px.bar(df_empresas, 
+                                    x='empresa', 
+                                    y='quantidade_acessos',
+                                    title="Acessos por Empresa")
+                st.plotly_chart(fig_empresas, use_container_width=True)
             
-            # 1 linha de espaço
-            st.markdown("<br>", unsafe_allow_html=True)
+                # 1 linha de espaço
+                st.markdown("<br>", unsafe_allow_html=True)
             
-            # Tabela de empresas logo abaixo do seu gráfico
-            st.dataframe(df_empresas, use_container_width=True)
+                # Tabela de empresas logo abaixo do seu gráfico
+                st.dataframe(df_empresas, use_container_width=True)
             
-            # 3 linhas de espaço entre grupos
-            st.markdown("<br><br><br>", unsafe_allow_html=True)
-            st.markdown("---")
-            st.markdown("<br><br><br>", unsafe_allow_html=True)
+                # 3 linhas de espaço entre grupos
+                st.markdown("<br><br><br>", unsafe_allow_html=True)
+                st.markdown("---")
+                st.markdown("<br><br><br>", unsafe_allow_html=True)
             
-            # Gráfico de acessos por usuário
-            st.subheader("Top 10 Usuários por Quantidade de Acessos")
-            fig_usuarios = px.bar(df_usuarios, 
-                                x='nome', 
-                                y='quantidade_acessos',
-                                title="Acessos por Usuário",
-                                hover_data=['empresa'])
-            st.plotly_chart(fig_usuarios, use_container_width=True)
+                # Gráfico de acessos por usuário
+                st.subheader("Top 10 Usuários por Quantidade de Acessos")
+                fig_usuarios = px.bar(df_usuarios, 
+                                    x='nome', 
+                                    y='quantidade_acessos',
+                                    title="Acessos por Usuário",
+                                    hover_data=['empresa'])
+                st.plotly_chart(fig_usuarios, use_container_width=True)
             
-            # 1 linha de espaço
-            st.markdown("<br>", unsafe_allow_html=True)
+                # 1 linha de espaço
+                st.markdown("<br>", unsafe_allow_html=True)
             
-            # Tabela de usuários logo abaixo do seu gráfico
-            st.dataframe(
-                df_usuarios.rename(columns={
-                    'ultimo_acesso': 'Último Acesso',
-                    'nome': 'Nome',
-                    'empresa': 'Empresa',
-                    'quantidade_acessos': 'Quantidade de Acessos'
-                }),
-                use_container_width=True
-            )
+                # Tabela de usuários logo abaixo do seu gráfico
+                st.dataframe(
+                    df_usuarios.rename(columns={
+                        'ultimo_acesso': 'Último Acesso',
+                        'nome': 'Nome',
+                        'empresa': 'Empresa',
+                        'quantidade_acessos': 'Quantidade de Acessos'
+                    }),
+                    use_container_width=True
+                )
             
-            # 3 linhas de espaço entre grupos
-            st.markdown("<br><br><br>", unsafe_allow_html=True)
-            st.markdown("---")
-            st.markdown("<br><br><br>", unsafe_allow_html=True)
+                # 3 linhas de espaço entre grupos
+                st.markdown("<br><br><br>", unsafe_allow_html=True)
+                st.markdown("---")
+                st.markdown("<br><br><br>", unsafe_allow_html=True)
             
-            # Gráfico de linha do tempo
-            st.subheader("Evolução de Usuários Únicos nos Últimos 30 dias")
-            fig_timeline = px.line(df_frequencia, 
-                                 x='data_acesso', 
-                                 y='usuarios_unicos',
-                                 title="Evolução do Uso ao Longo do Tempo")
-            st.plotly_chart(fig_timeline, use_container_width=True)
+                # Gráfico de linha do tempo
+                st.subheader("Evolução de Usuários Únicos nos Últimos 30 dias")
+                fig_timeline = px.line(df_frequencia, 
+                                     x='data_acesso', 
+                                     y='usuarios_unicos',
+                                     title="Evolução do Uso ao Longo do Tempo")
+                st.plotly_chart(fig_timeline, use_container_width=True)
+        
+        
+        with aba_analise:
+            exibir_analise_acessos()
+        
+        with aba_llm:
+            exibir_uso_llm()
+        
+        with aba_relatorio:
+            exibir_relatorio_pdf()
         
     except Exception as e:
         st.error(f"Erro ao carregar os dados: {str(e)}")
         st.error(traceback.format_exc())
 
+def exibir_analise_acessos():
+    """Aba de análise: janelas configuráveis sobre o extrato de acessos do último ano"""
+    extrato = analise_acessos.carregar_extrato_acessos()
+    if extrato.empty:
+        st.info("Nenhum acesso registrado no último ano.")
+        return
+    
+    hoje = agora_local().date()
+    primeira_data = extrato['timestamp'].iloc[0].date()
+    
+    # Filtros: todo recorte é feito em memória sobre o extrato em cache
+    col1, col2, col3 = st.columns([2, 1, 1])
+    with col1:
+        periodo = st.date_input(
+            "Período",
+            value=(max(primeira_data, hoje - timedelta(days=89)), hoje),
+            min_value=primeira_data,
+            max_value=hoje,
+            format="DD/MM/YYYY",
+            key="analise_periodo"
+        )
+    with col2:
+        granularidade = st.radio(
+            "Agrupar por", ["Dia", "Semana", "Mês"],
+            horizontal=True, key="analise_granularidade"
+        )
+    with col3:
+        coorte_freq = st.radio(
+            "Coortes por", ["Semana", "Mês"],
+            index=1, horizontal=True, key="analise_coortes"
+        )
+    
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        empresas = st.multiselect("Empresas", sorted(extrato['empresa'].cat.categories), key="analise_empresas")
+    with col2:
+        programas = st.multiselect("Programas", sorted(extrato['programa'].cat.categories), key="analise_programas")
+    with col3:
+        acoes = st.multiselect("Ações", sorted(extrato['acao'].cat.categories), key="analise_acoes")
+    
+    if not isinstance(periodo, (tuple, list)) or len(periodo) != 2:
+        st.info("Selecione a data inicial e a data final.")
+        return
+    inicio, fim = periodo
+    
+    df = analise_acessos.filtrar_extrato(extrato, inicio, fim, empresas, programas, acoes)
+    if df.empty:
+        st.warning("Nenhum acesso no recorte selecionado.")
+        return
+    
+    frequencia = {"Dia": "D", "Semana": "W", "Mês": "M"}[granularidade]
+    
+    col1, col2, col3 = st.columns(3)
+    col1.metric("Acessos", f"{len(df):,}".replace(",", "."))
+    col2.metric("Usuários únicos", df['user_id'].nunique())
+    col3.metric("Empresas", df['empresa'].nunique())
+    
+    # Série temporal
+    serie = analise_acessos.serie_temporal(df, frequencia, inicio, fim)
+    fig_serie = px.line(
+        serie, x='periodo', y=['acessos', 'usuarios_unicos'],
+        title=f"Acessos e Usuários Únicos por {granularidade}",
+        labels={'periodo': granularidade, 'value': 'Quantidade', 'variable': ''}
+    )
+    st.plotly_chart(fig_serie, use_container_width=True)
+    
+    # Mapa de calor por dia da semana e hora
+    mapa = analise_acessos.mapa_calor_horario(df)
+    fig_mapa = px.imshow(
+        mapa, aspect='auto', color_continuous_scale='Blues',
+        labels={'x': 'Hora', 'y': 'Dia da semana', 'color': 'Acessos'},
+        title="Acessos por Dia da Semana e Hora"
+    )
+    st.plotly_chart(fig_mapa, use_container_width=True)
+    
+    # Distribuição por programa e por ação
+    col1, col2 = st.columns(2)
+    with col1:
+        por_programa = analise_acessos.distribuicao(df, 'programa', limite=15)
+        st.plotly_chart(
+            px.bar(por_programa, x='programa', y='acessos', hover_data=['usuarios_unicos'], title="Acessos por Programa"),
+            use_container_width=True
+        )
+    with col2:
+        por_acao = analise_acessos.distribuicao(df, 'acao', limite=15)
+        st.plotly_chart(
+            px.bar(por_acao, x='acao', y='acessos', hover_data=['usuarios_unicos'], title="Acessos por Ação"),
+            use_container_width=True
+        )
+    
+    # Coortes de retenção
+    st.subheader("Retenção por Coorte (% de usuários que retornaram)")
+    coortes = analise_acessos.coortes_retencao(df, {"Semana": "W", "Mês": "M"}[coorte_freq])
+    st.dataframe(
+        coortes,
+        use_container_width=True,
+        column_config={
+            c: st.column_config.NumberColumn(c, format="%.1f%%")
+            for c in coortes.columns if c != 'usuarios'
+        }
+    )
+
+@cache_consulta('llm_usage', ttl=60, por_usuario=False)
+def carregar_uso_llm(dias):
+    """Chamadas ao LLM dos últimos `dias` dias, com título do vídeo e nome do usuário"""
+    conn = criar_conexao()
+    llm_gateway.criar_tabela_uso(conn)
+    df = pd.read_sql_query("""
+    SELECT l.data_hora, l.funcionalidade, l.modelo, l.user_id, u.nome, l.you_id, y.titulo,
+           l.tokens_prompt, l.tokens_resposta, l.tokens_cache, l.cache_hit,
+           l.latencia_ms, l.tentativas, l.status, l.custo_usd
+    FROM llm_usage l
+    LEFT JOIN usuarios_tab u ON u.user_id = l.user_id
+    LEFT JOIN youtube_tab y ON y.you_id = l.you_id
+    WHERE l.ts >= CAST(strftime('%s', 'now') AS INTEGER) - ? * 86400
+    ORDER BY l.ts
+    """, conn, params=(dias,))
+    conn.close()
+    df['data_hora'] = pd.to_datetime(df['data_hora'])
+    return df
+
+def resumo_uso_llm(df, chave):
+    """Chamadas, erros, tokens, custo e latência p50/p95 (só chamadas com sucesso) por `chave`"""
+    ok = df[df['status'] == 'ok']
+    resumo = df.groupby(chave, dropna=False).agg(
+        chamadas=('status', 'size'),
+        erros=('status', lambda s: int((s != 'ok').sum())),
+        tokens_prompt=('tokens_prompt', 'sum'),
+        tokens_resposta=('tokens_resposta', 'sum'),
+        cache_hit_pct=('cache_hit', lambda s: round(s.mean() * 100, 1)),
+        custo_usd=('custo_usd', 'sum'),
+    )
+    latencias = ok.groupby(chave, dropna=False)['latencia_ms'].quantile([0.5, 0.95]).unstack()
+    resumo['latencia_p50_ms'] = latencias.get(0.5)
+    resumo['latencia_p95_ms'] = latencias.get(0.95)
+    return resumo.sort_values('custo_usd', ascending=False).reset_index()
+
+def exibir_uso_llm():
+    """Aba de uso do LLM: custo, tokens e latência por funcionalidade, vídeo e usuário (tabela llm_usage)"""
+    dias = st.radio("Período", [7, 30, 90], index=1, horizontal=True,
+                    format_func=lambda d: f"Últimos {d} dias", key="llm_dias")
+    df = carregar_uso_llm(dias)
+    if df.empty:
+        st.info("Nenhuma chamada ao LLM registrada no período.")
+        return
+    
+    ok = df[df['status'] == 'ok']
+    col1, col2, col3, col4 = st.columns(4)
+    col1.metric("Custo estimado (USD)", f"{df['custo_usd'].sum():.2f}")
+    col2.metric("Chamadas", f"{len(df)} ({int((df['status'] != 'ok').sum())} erro(s))")
+    col3.metric("Tokens", f"{int(df['tokens_prompt'].sum() + df['tokens_resposta'].sum()):,}".replace(",", "."))
+    col4.metric("Latência p50 / p95 (ms)",
+                f"{ok['latencia_ms'].quantile(0.5):.0f} / {ok['latencia_ms'].quantile(0.95):.0f}" if len(ok) else "-")
+    
+    # Custo diário por funcionalidade
+    diario = (df.assign(dia=df['data_hora'].dt.date)
+                .groupby(['dia', 'funcionalidade'], dropna=False)['custo_usd'].sum().reset_index())
+    fig_custo = px.bar(diario, x='dia', y='custo_usd', color='funcionalidade',
+                       title="Custo Diário por Funcionalidade (USD)",
+                       labels={'dia': 'Dia', 'custo_usd': 'USD', 'funcionalidade': 'Funcionalidade'})
+    st.plotly_chart(fig_custo, use_container_width=True)
+    
+    st.subheader("Por funcionalidade")
+    st.dataframe(resumo_uso_llm(df, 'funcionalidade'), hide_index=True, use_container_width=True)
+    
+    col1, col2 = st.columns(2)
+    with col1:
+        st.subheader("Vídeos com maior custo")
+        st.dataframe(resumo_uso_llm(df, ['you_id', 'titulo']).head(20), hide_index=True, use_container_width=True)
+    with col2:
+        st.subheader("Usuários com maior custo")
+        st.dataframe(resumo_uso_llm(df, ['user_id', 'nome']).head(20), hide_index=True, use_container_width=True)
+
+@st.fragment(run_every=2)
+def acompanhar_relatorio(inicio, fim):
+    """Consulta o processo de geração a cada 2 segundos e recarrega a página quando terminar"""
+    situacao, _ = relatorio_uso.situacao_relatorio(inicio, fim)
+    if situacao == 'gerando':
+        st.info("Gerando relatório em segundo plano... a página será atualizada ao terminar.")
+    else:
+        st.rerun()
+
+def exibir_relatorio_pdf():
+    """Aba de relatório: geração em processo separado e download do PDF em cache"""
+    hoje = agora_local().date()
+    periodo = st.date_input(
+        "Período do relatório",
+        value=(hoje - timedelta(days=29), hoje),
+        max_value=hoje,
+        format="DD/MM/YYYY",
+        key="relatorio_periodo"
+    )
+    if not isinstance(periodo, (tuple, list)) or len(periodo) != 2:
+        st.info("Selecione a data inicial e a data final.")
+        return
+    inicio, fim = (d.isoformat() for d in periodo)
+    
+    col1, col2, _ = st.columns([1, 1, 3])
+    with col1:
+        if st.button("Gerar Relatório", type="primary"):
+            relatorio_uso.solicitar_relatorio(inicio, fim)
+    with col2:
+        if st.button("Gerar Novamente", help="Ignora o PDF em cache e gera com os dados atuais"):
+            relatorio_uso.solicitar_relatorio(inicio, fim, forcar=True)
+    
+    situacao, resultado = relatorio_uso.situacao_relatorio(inicio, fim)
+    if situacao == 'gerando':
+        acompanhar_relatorio(inicio, fim)
+    elif situacao == 'erro':
+        st.error(f"Erro ao gerar o relatório: {resultado}")
+    elif situacao == 'pronto':
+        caminho = Path(resultado)
+        gerado_em = datetime.fromtimestamp(caminho.stat().st_mtime, FUSO_HORARIO).strftime('%d/%m/%Y %H:%M')
+        st.download_button(
+            "Baixar Relatório (PDF)",
+            data=caminho.read_bytes(),
+            file_name=caminho.name,
+            mime="application/pdf"
+        )
+        st.caption(f"Gerado em {gerado_em}")
+    else:
+        st.info("Nenhum relatório gerado para este período.")
+
 def clear_log_flags():
     """Limpa as flags de registro de log quando o usuário faz logout"""
     for key in list(st.session_state.keys()):
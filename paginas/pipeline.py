@@ -0,0 +1,172 @@
+# Arquivo: pipeline.py
+# Data: 19/10/2026
+# Descrição: Painel de acompanhamento do pipeline de vídeos (captura, transcrição e análise) a partir da tabela pipeline_state
+
+import json
+
+import pandas as pd
+import streamlit as st
+
+import orquestrador
+import pipeline_estado
+
+ROTULOS_ETAPAS = {'captura': 'Captura', 'transcricao': 'Transcrição', 'analise': 'Análise'}
+
+def quadro_resumo(resumo):
+    """Tabela etapa x status com a quantidade de vídeos em cada situação"""
+    df = pd.DataFrame(resumo, columns=['etapa', 'status', 'quantidade'])
+    quadro = df.pivot_table(index='etapa', columns='status', values='quantidade', aggfunc='sum', fill_value=0)
+    quadro = quadro.reindex(index=list(pipeline_estado.ETAPAS), columns=list(pipeline_estado.STATUS), fill_value=0)
+    quadro.index = [ROTULOS_ETAPAS[e] for e in quadro.index]
+    return quadro
+
+def acompanhar_orquestrador():
+    """Andamento do orquestrador: contagem por etapa e tarefas em execução, com barra de progresso"""
+    situacao = orquestrador.situacao()
+    if situacao is None:
+        st.caption("O orquestrador ainda não foi executado neste servidor.")
+        return
+
+    if situacao['rodando']:
+        st.info(f"Em execução desde {situacao['iniciado_em']}" + (" (encerrando...)" if situacao['parando'] else ""))
+    else:
+        st.caption(f"Última execução: {situacao['iniciado_em']} a {situacao['finalizado_em']}")
+    if situacao['erro']:
+        st.error(f"Erro no orquestrador: {situacao['erro']}")
+
+    colunas = st.columns(len(pipeline_estado.ETAPAS))
+    for coluna, etapa in zip(colunas, pipeline_estado.ETAPAS):
+        contagem = situacao['contagem'][etapa]
+        em_execucao = sum(1 for t in situacao['ativas'] if t['etapa'] == etapa)
+        coluna.metric(
+            f"{ROTULOS_ETAPAS[etapa]} ({em_execucao}/{situacao['limites'][etapa]})",
+            contagem['concluido'],
+            delta=f"{contagem['erro']} com erro", delta_color="inverse" if contagem['erro'] else "off"
+        )
+
+    campos = ['etapa', 'titulo', 'progresso', 'mensagem', 'duracao_s']
+    if situacao['ativas']:
+        df = pd.DataFrame(situacao['ativas'])[campos]
+        df['etapa'] = df['etapa'].map(ROTULOS_ETAPAS)
+        st.dataframe(
+            df, hide_index=True, use_container_width=True,
+            column_config={'progresso': st.column_config.ProgressColumn("progresso", min_value=0, max_value=1)}
+        )
+    if situacao['historico']:
+        with st.expander(f"Finalizadas ({len(situacao['historico'])})"):
+            df = pd.DataFrame(situacao['historico'])[['finalizado_em', 'etapa', 'titulo', 'resultado', 'duracao_s', 'erro']]
+            df['etapa'] = df['etapa'].map(ROTULOS_ETAPAS)
+            st.dataframe(df, hide_index=True, use_container_width=True)
+
+    # Terminou enquanto a página acompanhava: recarrega tudo para atualizar o quadro e parar a consulta
+    if not situacao['rodando'] and st.session_state.get("pipeline_orquestrador_rodando"):
+        st.session_state["pipeline_orquestrador_rodando"] = False
+        st.rerun()
+
+def exibir_orquestrador(filtro_usuario):
+    """Controles do orquestrador (processamento automático das três etapas em paralelo)"""
+    st.subheader("Processamento automático")
+    situacao = orquestrador.situacao()
+    rodando = bool(situacao and situacao['rodando'])
+
+    col1, col2 = st.columns(2)
+    with col1:
+        if st.button("Iniciar processamento", disabled=rodando, key="pipeline_iniciar"):
+            if orquestrador.iniciar(filtro_usuario):
+                rodando = True
+            else:
+                st.warning("O orquestrador já está em execução.")
+    with col2:
+        if st.button("Parar", disabled=not rodando, key="pipeline_parar"):
+            orquestrador.parar()
+    st.caption(
+        "Baixa, transcreve e analisa os vídeos pendentes "
+        + ("de todos os usuários" if filtro_usuario is None else "do usuário")
+        + ", cada etapa com seu limite de execuções simultâneas: "
+        + ", ".join(f"{ROTULOS_ETAPAS[e]} {n}" for e, n in orquestrador.limites_configurados().items())
+        + "."
+    )
+
+    st.session_state["pipeline_orquestrador_rodando"] = rodando
+    st.fragment(acompanhar_orquestrador, run_every=2 if rodando else None)()
+
+def show_pipeline():
+    """Painel do pipeline: resumo por etapa, lista filtrada e reprocessamento de falhas"""
+    st.title("Pipeline de Processamento")
+
+    user_id = st.session_state.get("user_id")
+    if not user_id:
+        st.warning("Você precisa estar logado para usar esta funcionalidade.")
+        return
+
+    administrador = (st.session_state.get("user_profile") or "").lower() in ["adm", "master"]
+    todos = administrador and st.checkbox("Todos os usuários", key="pipeline_todos")
+    filtro_usuario = None if todos else user_id
+
+    try:
+        resumo = pipeline_estado.resumo_pipeline(filtro_usuario)
+    except Exception as e:
+        st.error(f"Erro ao consultar o pipeline: {str(e)}")
+        return
+    if not resumo:
+        st.info("Nenhum vídeo cadastrado.")
+        return
+
+    quadro = quadro_resumo(resumo)
+    colunas = st.columns(len(pipeline_estado.ETAPAS))
+    for coluna, (rotulo, linha) in zip(colunas, quadro.iterrows()):
+        coluna.metric(f"{rotulo} pendente", int(linha['pendente']),
+                      delta=f"{int(linha['executando'])} em execução", delta_color="off")
+    st.dataframe(quadro, use_container_width=True)
+
+    exibir_orquestrador(filtro_usuario)
+
+    # Filtros da lista
+    col1, col2 = st.columns(2)
+    with col1:
+        etapa = st.selectbox("Etapa", [None, *pipeline_estado.ETAPAS],
+                             format_func=lambda e: "Todas" if e is None else ROTULOS_ETAPAS[e], key="pipeline_etapa")
+    with col2:
+        status = st.selectbox("Status", [None, *pipeline_estado.STATUS],
+                              format_func=lambda s: "Todos" if s is None else s, key="pipeline_status")
+
+    linhas = pipeline_estado.listar_estado(filtro_usuario, etapa, status)
+    if not linhas:
+        st.info("Nenhum vídeo no filtro selecionado.")
+        return
+
+    df = pd.DataFrame(linhas)
+    df['etapa'] = df['etapa'].map(ROTULOS_ETAPAS)
+    df['artefatos'] = df['artefatos'].map(lambda a: ", ".join(f"{k}: {v}" for k, v in json.loads(a).items()) if a else None)
+    st.dataframe(df, hide_index=True, use_container_width=True)
+
+    # Reprocessamento das etapas que pararam em erro
+    com_erro = [l for l in linhas if l['status'] == 'erro']
+    if com_erro:
+        st.subheader("Reprocessar falhas")
+        selecionados = st.multiselect(
+            "Etapas com erro",
+            range(len(com_erro)),
+            format_func=lambda i: f"{com_erro[i]['titulo']} - {ROTULOS_ETAPAS[com_erro[i]['etapa']]}",
+            key="pipeline_reprocessar"
+        )
+        if st.button("Voltar para pendente", disabled=not selecionados):
+            for i in selecionados:
+                pipeline_estado.reabrir(com_erro[i]['you_id'], com_erro[i]['etapa'])
+            st.success(f"{len(selecionados)} etapa(s) devolvida(s) para a fila.")
+            st.rerun()
+
+    if administrador:
+        with st.expander("Execuções abandonadas"):
+            st.caption(
+                f"Etapas em execução há mais de {pipeline_estado.TEMPO_MAXIMO_EXECUCAO // 3600} horas "
+                "(processo encerrado no meio) voltam para a fila."
+            )
+            if st.button("Liberar execuções abandonadas"):
+                st.info(f"{pipeline_estado.liberar_travados()} execução(ões) liberada(s).")
+
+def main():
+    show_pipeline()
+
+if __name__ == "__main__":
+    main()
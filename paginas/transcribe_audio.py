@@ -7,42 +7,40 @@ import requests
 import time
 import os
 import streamlit as st
-import sqlite3
-from dotenv import load_dotenv
-
-# Carregar variáveis de ambiente
-load_dotenv()
-
-# Chave de API fornecida
-API_KEY = os.getenv('ASSEMBLYAI_API_KEY')
-
-if not API_KEY:
-    st.error("Chave da API AssemblyAI não encontrada. Verifique o arquivo .env")
-    raise ValueError("ASSEMBLYAI_API_KEY não está definida no arquivo .env")
+from config import ASSEMBLYAI_BASE_URL, YOUTUBE_DIR, carregar_ambiente
+from cache_dados import cache_consulta
+import pipeline_estado
+import rastreamento
 
 # Definir diretório de trabalho
-WORK_DIR = "z:/youtube"
-# Caminho do banco de dados
-DB_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "you_ana.db")
+WORK_DIR = YOUTUBE_DIR
 
 # Diretório para salvar a transcrição
 OUTPUT_DIR = os.path.join(WORK_DIR, 'transcricoes')
-os.makedirs(OUTPUT_DIR, exist_ok=True)
 
 # URL base da API da AssemblyAI
-UPLOAD_URL = "https://api.assemblyai.com/v2/upload"
-TRANSCRIPT_URL = "https://api.assemblyai.com/v2/transcript"
+UPLOAD_URL = f"{ASSEMBLYAI_BASE_URL}/upload"
+TRANSCRIPT_URL = f"{ASSEMBLYAI_BASE_URL}/transcript"
+INTERVALO_CONSULTA = 5  # Segundos entre consultas à situação da transcrição
 
-# Headers para autenticação
-HEADERS = {
-    "authorization": API_KEY,
-}
+@st.cache_resource
+def obter_headers():
+    """
+    Headers de autenticação da AssemblyAI, montados no primeiro uso (carrega o .env).
+    Sem a chave levanta ValueError; o erro não fica em cache e a página avisa o usuário.
+    """
+    carregar_ambiente()
+    api_key = os.getenv('ASSEMBLYAI_API_KEY')
+    if not api_key:
+        raise ValueError("ASSEMBLYAI_API_KEY não está definida no arquivo .env")
+    return {"authorization": api_key}
 
 # Upload do arquivo de áudio
 def upload_file(file_path):
     with open(file_path, "rb") as f:
         print("Fazendo upload do arquivo...")
-        response = requests.post(UPLOAD_URL, headers=HEADERS, files={"file": f})
+        with rastreamento.span('assemblyai.upload', 'http', bytes=os.path.getsize(file_path)):
+            response = requests.post(UPLOAD_URL, headers=obter_headers(), files={"file": f})
         if response.status_code == 200:
             print("Upload concluído!")
             return response.json()["upload_url"]
@@ -61,7 +59,8 @@ def request_transcription(audio_url):
         "speakers_expected": 2      # Indica que esperamos 2 falantes
     }
     print("Solicitando transcrição...")
-    response = requests.post(TRANSCRIPT_URL, json=payload, headers=HEADERS)
+    with rastreamento.span('assemblyai.pedido', 'http'):
+        response = requests.post(TRANSCRIPT_URL, json=payload, headers=obter_headers())
     if response.status_code == 200:
         return response.json()["id"]
     else:
@@ -71,7 +70,8 @@ def request_transcription(audio_url):
 # Aguardar a conclusão da transcrição
 def wait_for_transcription(transcript_id):
     while True:
-        response = requests.get(f"{TRANSCRIPT_URL}/{transcript_id}", headers=HEADERS)
+        with rastreamento.span('assemblyai.consulta', 'http'):
+            response = requests.get(f"{TRANSCRIPT_URL}/{transcript_id}", headers=obter_headers())
         if response.status_code == 200:
             status = response.json()["status"]
             if status == "completed":
@@ -81,7 +81,7 @@ def wait_for_transcription(transcript_id):
                 return None
             else:
                 print("Transcrição em andamento, aguardando...")
-                time.sleep(5)
+                time.sleep(INTERVALO_CONSULTA)
         else:
             print("Erro ao verificar status:", response.json())
             return None
@@ -89,6 +89,7 @@ def wait_for_transcription(transcript_id):
 # Salvar transcrição em formatos txt e vtt
 def save_transcription(result, filename):
     base_filename = os.path.splitext(filename)[0]
+    os.makedirs(OUTPUT_DIR, exist_ok=True)
     
     # Salvar em formato TXT
     txt_path = os.path.join(OUTPUT_DIR, f"{base_filename}.txt")
@@ -197,118 +198,113 @@ def get_user_id():
         st.error("Usuário não autenticado. Por favor, faça login primeiro.")
         return None
 
+@cache_consulta('youtube_tab')
+def carregar_videos_para_transcrever(user_id):
+    """Consulta os vídeos do usuário com a transcrição pendente no pipeline (resultado em cache)"""
+    return pipeline_estado.videos_na_etapa('transcricao', user_id)
+
 def get_videos_to_transcribe(user_id):
-    """Obtém vídeos que precisam ser transcritos (word_key = 'mp4_mp3_frames')"""
+    """Obtém vídeos que precisam ser transcritos (captura concluída, transcrição pendente)"""
     try:
-        conn = sqlite3.connect(DB_PATH)
-        cursor = conn.cursor()
-        
-        # Buscar vídeos com word_key = 'mp4_mp3_frames' para o usuário específico
-        cursor.execute(
-            "SELECT you_id, titulo, url, autor, sumario FROM youtube_tab WHERE user_id = ? AND word_key = 'mp4_mp3_frames'",
-            (user_id,)
-        )
-        videos = cursor.fetchall()
-        conn.close()
-        
-        return videos
+        return carregar_videos_para_transcrever(user_id)
     except Exception as e:
         st.error(f"Erro ao buscar vídeos para transcrição: {str(e)}")
         return []
 
-def mark_as_transcribed(video_id):
-    """Marca o vídeo como transcrito no banco de dados"""
+def executar_transcricao(video_id, video_title, status, progress, mp3_path=None):
+    """
+    Núcleo da transcrição, sem interface própria (usado pela página e pelo orquestrador): upload,
+    solicitação, acompanhamento, gravação dos arquivos e conclusão da etapa no pipeline.
+    `status` precisa de text()/error() e `progress` de progress(). Sem `mp3_path` usa WORK_DIR/<título>.mp3.
+    Retorna (resultado, txt_path, vtt_path) ou (None, mensagem de falha).
+    """
+    def falha(mensagem):
+        if video_id:
+            pipeline_estado.falhar(video_id, 'transcricao', mensagem)
+        return None, mensagem
+    
+    # Verificar se o arquivo MP3 existe
+    mp3_path = mp3_path or os.path.join(WORK_DIR, f"{video_title}.mp3")
+    if not os.path.exists(mp3_path):
+        return falha(f"Arquivo MP3 não encontrado: {os.path.basename(mp3_path)}")
+    
     try:
-        conn = sqlite3.connect(DB_PATH)
-        cursor = conn.cursor()
+        # 1. Upload do arquivo
+        status.text("Fazendo upload do arquivo...")
+        progress.progress(0.1)
+        audio_url = upload_file(mp3_path)
         
-        # Atualiza a coluna word_key para o vídeo específico
-        cursor.execute(
-            "UPDATE youtube_tab SET word_key = 'transcrito' WHERE you_id = ?", 
-            (video_id,)
-        )
-        conn.commit()
-        conn.close()
+        if not audio_url:
+            return falha("Falha no upload do arquivo de áudio.")
         
-        return True
-    except Exception as e:
-        st.error(f"Erro ao marcar vídeo como transcrito: {str(e)}")
-        return False
+        # 2. Solicitar transcrição
+        status.text("Solicitando transcrição...")
+        progress.progress(0.3)
+        transcript_id = request_transcription(audio_url)
+        
+        if not transcript_id:
+            return falha("Falha ao solicitar transcrição.")
+        
+        # 3. Aguardar resultado
+        status.text("Transcrição em andamento, aguardando...")
+        
+        # Iniciar com 40% de progresso e ir aumentando gradualmente
+        progress_value = 0.4
+        while True:
+            with rastreamento.span('assemblyai.consulta', 'http'):
+                response = requests.get(f"{TRANSCRIPT_URL}/{transcript_id}", headers=obter_headers())
+            if response.status_code == 200:
+                status_resp = response.json()["status"]
+                if status_resp == "completed":
+                    result = response.json()
+                    break
+                elif status_resp == "failed":
+                    return falha("Erro na transcrição: " + response.json()["error"])
+                else:
+                    status.text(f"Transcrição em andamento, aguardando... ({status_resp})")
+                    # Aumentar progresso gradualmente até 90%
+                    progress_value = min(0.9, progress_value + 0.05)
+                    progress.progress(progress_value)
+                    time.sleep(INTERVALO_CONSULTA)
+            else:
+                return falha("Erro ao verificar status: " + str(response.status_code))
+        
+        # 4. Salvar transcrição
+        status.text("Salvando transcrição...")
+        progress.progress(0.95)
+        txt_path, vtt_path = save_transcription(result, video_title)
+    except (requests.RequestException, OSError, ValueError) as e:
+        return falha(f"Erro na transcrição: {str(e)}")
+    
+    # 5. Marcar como transcrito (apenas se video_id não for None)
+    if video_id:
+        try:
+            pipeline_estado.concluir(video_id, 'transcricao', {'txt': txt_path, 'vtt': vtt_path})
+        except Exception as e:
+            return None, f"Transcrição salva, mas houve erro ao atualizar o banco de dados: {str(e)}"
+    status.text("Transcrição concluída com sucesso!")
+    progress.progress(1.0)
+    return result, txt_path, vtt_path
 
-def process_audio_transcription(video_id, video_title):
+def process_audio_transcription(video_id, video_title, automatico=False):
     """Processa a transcrição de um arquivo de áudio"""
     st.subheader(f"Transcrevendo: {video_title}")
     
+    # Reivindica a etapa no pipeline (só quando o áudio está ligado a um vídeo cadastrado)
+    if video_id and not pipeline_estado.reivindicar_video(
+            video_id, 'transcricao', trabalhador=f"usuario:{get_user_id()}", somente_pendente=automatico):
+        st.warning(f"O áudio '{video_title}' já está sendo transcrito ou não está mais pendente.")
+        return False
+    
     # Criar placeholders para status e progresso
     status = st.empty()
     progress = st.progress(0)
     
-    # Verificar se o arquivo MP3 existe
-    mp3_filename = f"{video_title}.mp3"
-    mp3_path = os.path.join(WORK_DIR, mp3_filename)
-    
-    if not os.path.exists(mp3_path):
-        st.error(f"Arquivo MP3 não encontrado: {mp3_filename}")
-        return False
-    
-    # 1. Upload do arquivo
-    status.text("Fazendo upload do arquivo...")
-    progress.progress(0.1)
-    audio_url = upload_file(mp3_path)
-    
-    if not audio_url:
-        st.error("Falha no upload do arquivo de áudio.")
+    saida = executar_transcricao(video_id, video_title, status, progress)
+    if saida[0] is None:
+        st.error(saida[1])
         return False
-    
-    # 2. Solicitar transcrição
-    status.text("Solicitando transcrição...")
-    progress.progress(0.3)
-    transcript_id = request_transcription(audio_url)
-    
-    if not transcript_id:
-        st.error("Falha ao solicitar transcrição.")
-        return False
-    
-    # 3. Aguardar resultado
-    status.text("Transcrição em andamento, aguardando...")
-    
-    # Iniciar com 40% de progresso e ir aumentando gradualmente
-    progress_value = 0.4
-    while True:
-        response = requests.get(f"{TRANSCRIPT_URL}/{transcript_id}", headers=HEADERS)
-        if response.status_code == 200:
-            status_resp = response.json()["status"]
-            if status_resp == "completed":
-                result = response.json()
-                break
-            elif status_resp == "failed":
-                st.error("Erro na transcrição: " + response.json()["error"])
-                return False
-            else:
-                status.text(f"Transcrição em andamento, aguardando... ({status_resp})")
-                # Aumentar progresso gradualmente até 90%
-                progress_value = min(0.9, progress_value + 0.05)
-                progress.progress(progress_value)
-                time.sleep(5)
-        else:
-            st.error("Erro ao verificar status: " + str(response.status_code))
-            return False
-    
-    # 4. Salvar transcrição
-    status.text("Salvando transcrição...")
-    progress.progress(0.95)
-    
-    output_filename = f"{video_title}"
-    txt_path, vtt_path = save_transcription(result, output_filename)
-    
-    # 5. Marcar como transcrito (apenas se video_id não for None)
-    if video_id:
-        if mark_as_transcribed(video_id):
-            status.text("Transcrição concluída com sucesso!")
-            progress.progress(1.0)
-    else:
-        status.text("Transcrição concluída com sucesso!")
-        progress.progress(1.0)
+    result, txt_path, vtt_path = saida
     
     # Criar abas para mostrar os diferentes formatos
     txt_tab, vtt_tab = st.tabs(["Texto", "VTT"])
@@ -333,6 +329,13 @@ def show_transcribe_audio():
         st.warning("Você precisa estar logado para usar esta funcionalidade.")
         return
     
+    # Verificar se a chave da API está configurada
+    try:
+        obter_headers()
+    except ValueError:
+        st.error("Chave da API AssemblyAI não encontrada. Verifique o arquivo .env")
+        return
+    
     # Verificar se o diretório de trabalho existe
     if not os.path.exists(WORK_DIR):
         st.error(f"Diretório {WORK_DIR} não encontrado!")
@@ -396,7 +399,7 @@ def show_transcribe_audio():
                 video_id, video_title, video_url, _, _ = video
                 
                 # Processar cada áudio
-                if process_audio_transcription(video_id, video_title):
+                if process_audio_transcription(video_id, video_title, automatico=True):
                     success_count += 1
                 
                 # Pequena pausa entre processamentos
@@ -2,12 +2,10 @@
 # Este script é responsável por coletar metadados de vídeos do YouTube e armazená-los em um banco de dados SQLite.
 # Versão 1.0.2 - 06/03/2025 - 18h00
 
-import sqlite3
+import logging
 import re
+import sqlite3
 from urllib.parse import urlparse, parse_qs
-import tkinter as tk
-from tkinter import ttk, messagebox
-from pytube import YouTube
 import pandas as pd
 import streamlit as st
 from pathlib import Path
@@ -15,7 +13,270 @@ import time
 from urllib.request import urlopen
 import json
 import requests
-from bs4 import BeautifulSoup
+import codecs
+import html
+import os
+from datetime import datetime, timedelta
+from cache_dados import cache_consulta, invalidar
+from exportacao import painel_exportacao
+import rastreamento
+
+logger = logging.getLogger(__name__)
+
+# Configurações da coleta de metadados
+HTTP_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
+    'Accept-Language': 'pt-BR,pt;q=0.9,en;q=0.8'
+}
+HTTP_TIMEOUT = 10                     # Segundos por requisição
+OEMBED_URL = "https://www.youtube.com/oembed"
+TAMANHO_BLOCO = 16 * 1024             # Bytes lidos por vez da página do vídeo
+LIMITE_BYTES_PAGINA = 2 * 1024 * 1024  # Nunca lê mais que isso da página
+LIMITE_CABECALHO = 64 * 1024          # Trecho inicial guardado para o fallback do <title>
+
+# Sessão HTTP reaproveitada entre coletas (mantém a conexão com o YouTube aberta)
+SESSAO_HTTP = requests.Session()
+SESSAO_HTTP.headers.update(HTTP_HEADERS)
+rastreamento.instrumentar_sessao(SESSAO_HTTP)
+
+# Expressões pré-compiladas usadas na leitura da página
+RE_TAG_META = re.compile(r'<(html|meta|link)\b([^>]*)>', re.IGNORECASE)
+RE_ATRIBUTO = re.compile(r'([\w:-]+)\s*=\s*"([^"]*)"')
+RE_TITLE = re.compile(r'<title[^>]*>(.*?)</title>', re.IGNORECASE | re.DOTALL)
+RE_DURACAO_ISO = re.compile(r'P(?:\d+D)?T?(?:(\d+)H)?(?:(\d+)M)?(?:(\d+)S)?')
+
+# Mapeia (tag, atributo, valor) para o campo de metadados correspondente.
+# O autor vem do <link itemprop="name"> do bloco "author"; o <meta itemprop="name"> é o título.
+CAMPOS_META = {
+    ('meta', 'property', 'og:title'): 'titulo',
+    ('meta', 'itemprop', 'description'): 'sumario',
+    ('link', 'itemprop', 'name'): 'autor',
+    ('meta', 'itemprop', 'duration'): 'duration',
+    ('meta', 'itemprop', 'inlanguage'): 'language',
+}
+
+CAMPOS_METADADOS = ('titulo', 'autor', 'sumario', 'duration', 'language')
+
+# Normalizador de URLs do YouTube: watch, youtu.be, embed, shorts e /v/
+RE_VIDEO_ID = re.compile(
+    r'^https?://(?:(?:www|m)\.)?'
+    r'(?:youtube\.com/(?:watch\?(?:[^#]*&)?v=|v/|embed/|shorts/)|youtu\.be/)'
+    r'([\w-]+)'
+)
+
+# Tempo de validade do cache de metadados antes de revalidar com o YouTube
+METADADOS_TTL = timedelta(hours=int(os.getenv('METADADOS_TTL_HORAS', '168')))
+
+
+def extrair_video_id(url):
+    """Retorna o ID canônico do vídeo do YouTube, ou None se a URL não for reconhecida"""
+    if not url:
+        return None
+    match = RE_VIDEO_ID.match(url.strip())
+    return match.group(1) if match else None
+
+
+def criar_tabela_video_metadata(conn):
+    """Cria a tabela de cache de metadados compartilhada entre os usuários"""
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS video_metadata (
+            video_id TEXT PRIMARY KEY,
+            titulo TEXT,
+            autor TEXT,
+            sumario TEXT,
+            duration REAL,
+            language TEXT,
+            etag TEXT,
+            fetched_at TEXT NOT NULL
+        )
+    """)
+    conn.commit()
+
+
+def buscar_metadados_cache(conn, video_id):
+    """Busca os metadados em cache do vídeo; retorna None se não houver registro"""
+    row = conn.execute("""
+        SELECT titulo, autor, sumario, duration, language, etag, fetched_at
+        FROM video_metadata WHERE video_id = ?
+    """, (video_id,)).fetchone()
+    if not row:
+        return None
+    titulo, autor, sumario, duration, language, etag, fetched_at = row
+    return {
+        'titulo': titulo,
+        'autor': autor,
+        'sumario': sumario,
+        'duration': duration,
+        'language': language,
+        'etag': etag,
+        'fetched_at': datetime.fromisoformat(fetched_at)
+    }
+
+
+def salvar_metadados_cache(conn, video_id, metadados):
+    """Grava (ou substitui) os metadados do vídeo no cache"""
+    conn.execute("""
+        INSERT OR REPLACE INTO video_metadata (
+            video_id, titulo, autor, sumario, duration, language, etag, fetched_at
+        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+    """, (
+        video_id,
+        metadados['titulo'],
+        metadados['autor'],
+        metadados['sumario'],
+        metadados['duration'],
+        metadados['language'],
+        metadados.get('etag'),
+        datetime.now().isoformat(timespec='seconds')
+    ))
+    conn.commit()
+
+
+def renovar_metadados_cache(conn, video_id):
+    """Marca os metadados em cache como recém-validados"""
+    conn.execute(
+        "UPDATE video_metadata SET fetched_at = ? WHERE video_id = ?",
+        (datetime.now().isoformat(timespec='seconds'), video_id)
+    )
+    conn.commit()
+
+
+def pagina_nao_modificada(url, etag):
+    """Requisição condicional (If-None-Match): True se o YouTube responder 304"""
+    try:
+        with SESSAO_HTTP.get(url, headers={'If-None-Match': etag}, timeout=HTTP_TIMEOUT, stream=True) as response:
+            return response.status_code == 304
+    except requests.RequestException:
+        return False
+
+
+def converter_duracao_iso(duration_str):
+    """Converte duração ISO 8601 (PT#H#M#S) para minutos"""
+    if not duration_str:
+        return None
+    match = RE_DURACAO_ISO.match(duration_str)
+    if not match:
+        return None
+    hours, minutes, seconds = (int(g) if g else 0 for g in match.groups())
+    return round(hours * 60 + minutes + seconds / 60, 2)
+
+
+def buscar_oembed(url):
+    """Busca título e autor pelo endpoint oEmbed do YouTube (resposta JSON de poucos bytes)"""
+    try:
+        response = SESSAO_HTTP.get(
+            OEMBED_URL,
+            params={'url': url, 'format': 'json'},
+            timeout=HTTP_TIMEOUT
+        )
+        if response.status_code != 200:
+            return {}
+        dados = response.json()
+    except (requests.RequestException, ValueError):
+        return {}
+
+    resultado = {}
+    if dados.get('title'):
+        resultado['titulo'] = dados['title']
+    if dados.get('author_name'):
+        resultado['autor'] = dados['author_name']
+    return resultado
+
+
+def extrair_campos_tags(texto, campos, encontrados):
+    """Procura as meta tags no trecho de HTML e preenche os campos ainda não encontrados"""
+    for match in RE_TAG_META.finditer(texto):
+        tag = match.group(1).lower()
+        atributos = {k.lower(): v for k, v in RE_ATRIBUTO.findall(match.group(2))}
+
+        if tag == 'html':
+            # Idioma da página, usado apenas se não houver inLanguage
+            if atributos.get('lang') and '_lang_html' not in encontrados:
+                encontrados['_lang_html'] = atributos['lang'].split('-')[0]
+            continue
+
+        # Tipo da página: só páginas de vídeo (og:type video.*) usam o <title> como título
+        if tag == 'meta' and atributos.get('property', '').lower() == 'og:type' and '_tipo_og' not in encontrados:
+            encontrados['_tipo_og'] = atributos.get('content', '')
+
+        for atributo in ('property', 'itemprop'):
+            campo = CAMPOS_META.get((tag, atributo, atributos.get(atributo, '').lower()))
+            if campo and campo in campos and campo not in encontrados and 'content' in atributos:
+                encontrados[campo] = html.unescape(atributos['content'])
+
+
+def ler_metadados_pagina(url, campos):
+    """Lê a página do vídeo em blocos e para assim que todos os campos pedidos forem encontrados"""
+    encontrados = {}
+    decodificador = codecs.getincrementaldecoder('utf-8')(errors='replace')
+    pendente = ''
+    cabecalho = ''
+    bytes_lidos = 0
+
+    with SESSAO_HTTP.get(url, timeout=HTTP_TIMEOUT, stream=True) as response:
+        response.raise_for_status()
+        if response.headers.get('ETag'):
+            encontrados['etag'] = response.headers['ETag']
+
+        for bloco in response.iter_content(chunk_size=TAMANHO_BLOCO):
+            bytes_lidos += len(bloco)
+            texto = pendente + decodificador.decode(bloco)
+
+            # Uma tag pode ficar dividida entre dois blocos: guarda o trecho incompleto
+            corte = texto.rfind('<')
+            if corte != -1 and texto.find('>', corte) == -1:
+                texto, pendente = texto[:corte], texto[corte:]
+            else:
+                pendente = ''
+
+            if len(cabecalho) < LIMITE_CABECALHO:
+                cabecalho += texto[:LIMITE_CABECALHO - len(cabecalho)]
+
+            extrair_campos_tags(texto, campos, encontrados)
+
+            if all(campo in encontrados for campo in campos) or bytes_lidos >= LIMITE_BYTES_PAGINA:
+                break
+
+    # Fallback do título pela tag <title>. Páginas sem og:type de vídeo (ex.: consentimento de cookies)
+    # ficam sem título para que a coleta recorra ao yt-dlp.
+    tipo_og = encontrados.pop('_tipo_og', '')
+    if 'titulo' in campos and 'titulo' not in encontrados and tipo_og.startswith('video'):
+        match = RE_TITLE.search(cabecalho)
+        if match:
+            titulo = html.unescape(match.group(1)).replace(' - YouTube', '').strip()
+            if titulo:
+                encontrados['titulo'] = titulo
+
+    # Fallback do idioma pelo atributo lang da tag <html>
+    lang_html = encontrados.pop('_lang_html', None)
+    if 'language' in campos and 'language' not in encontrados and lang_html:
+        encontrados['language'] = lang_html
+
+    if 'duration' in encontrados:
+        encontrados['duration'] = converter_duracao_iso(encontrados['duration'])
+
+    return encontrados
+
+
+def buscar_metadados_yt_dlp(url):
+    """Último recurso: extrai os metadados pelo yt-dlp, sem baixar o vídeo"""
+    import yt_dlp  # Importação pesada, feita apenas quando necessária
+
+    opcoes = {'quiet': True, 'no_warnings': True, 'skip_download': True}
+    with yt_dlp.YoutubeDL(opcoes) as ydl, rastreamento.span('yt_dlp.metadados', 'http'):
+        info = ydl.extract_info(url, download=False)
+
+    resultado = {
+        'titulo': info.get('title'),
+        'autor': info.get('uploader') or info.get('channel'),
+        'sumario': info.get('description'),
+        'language': (info.get('language') or '').split('-')[0] or None,
+    }
+    if info.get('duration'):
+        resultado['duration'] = round(info['duration'] / 60, 2)
+    return {campo: valor for campo, valor in resultado.items() if valor}
+
+
 
 class YouTubeMetadados:
     def __init__(self, user_id):
@@ -27,7 +288,7 @@ class YouTubeMetadados:
                 st.error("Banco de dados não encontrado em: data/you_ana.db")
                 raise FileNotFoundError("Banco de dados não encontrado")
                 
-            self.conn = sqlite3.connect(db_path)
+            self.conn = rastreamento.conectar(db_path)
             self.cursor = self.conn.cursor()
             self.user_id = user_id
             
@@ -40,123 +301,45 @@ class YouTubeMetadados:
                 st.error("Tabela 'youtube_tab' não encontrada no banco de dados")
                 raise ValueError("Tabela não encontrada")
             
+            criar_tabela_video_metadata(self.conn)
+            preparar_youtube_tab(str(db_path))
+            
         except Exception as e:
             st.error(f"Erro ao conectar ao banco de dados: {str(e)}")
             raise
 
     def validar_url_youtube(self, url):
         """Valida se a URL é do YouTube"""
-        try:
-            # Padrões de URL do YouTube mais comuns
-            patterns = [
-                r'^https?://(?:www\.)?youtube\.com/watch\?v=[\w-]+',
-                r'^https?://(?:www\.)?youtube\.com/v/[\w-]+',
-                r'^https?://youtu\.be/[\w-]+',
-                r'^https?://(?:www\.)?youtube\.com/embed/[\w-]+',
-                r'^https?://(?:www\.)?youtube\.com/shorts/[\w-]+'
-            ]
-            
-            # Verifica se a URL corresponde a algum dos padrões
-            is_valid = any(re.match(pattern, url.strip()) for pattern in patterns)
-            
-            if is_valid:
-                st.write("URL válida:", url)
-                return True
-            
-            st.write("URL não corresponde aos padrões:", url)
-            return False
-            
-        except Exception as e:
-            st.error(f"Erro ao validar URL: {str(e)}")
-            return False
+        return extrair_video_id(url) is not None
     
     def coletar_metadados(self, url):
-        """Coleta título, autor, descrição, duração e idioma do vídeo usando requests e BeautifulSoup"""
+        """Coleta título, autor, descrição, duração e idioma do vídeo (oEmbed + leitura parcial da página)"""
         try:
-            # Faz a requisição HTTP
-            headers = {
-                'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-            }
-            response = requests.get(url, headers=headers)
-            response.raise_for_status()
-            
-            # Parse do HTML
-            soup = BeautifulSoup(response.text, 'html.parser')
-            
-            # Tenta encontrar o título
-            titulo = None
-            meta_title = soup.find('meta', property='og:title')
-            if meta_title:
-                titulo = meta_title['content']
-            else:
-                titulo = soup.find('title').text.replace(' - YouTube', '')
-            
-            # Tenta encontrar a descrição
-            descricao = None
-            meta_desc = soup.find('meta', {'itemprop': 'description'})
-            if meta_desc:
-                descricao = meta_desc.get('content')
-            
-            # Tenta encontrar o autor
-            autor = None
-            meta_author = soup.find('span', {'itemprop': 'author'})
-            if meta_author:
-                author_name = meta_author.find('link', {'itemprop': 'name'})
-                if author_name:
-                    autor = author_name.get('content')
-            
-            if not autor:
-                author_link = soup.find('link', {'itemprop': 'name'})
-                if author_link:
-                    autor = author_link.get('content')
-            
-            if not autor:
-                autor = 'Autor não disponível'
-            
-            # Tenta encontrar a duração do vídeo
-            duracao_minutos = None
-            meta_duration = soup.find('meta', {'itemprop': 'duration'})
-            if meta_duration:
-                # Formato esperado: PT#M#S ou PT#H#M#S
-                duration_str = meta_duration.get('content', '')
-                if duration_str:
-                    # Converte ISO 8601 para minutos
-                    hours = re.search(r'(\d+)H', duration_str)
-                    minutes = re.search(r'(\d+)M', duration_str)
-                    seconds = re.search(r'(\d+)S', duration_str)
-                    
-                    total_minutes = 0
-                    if hours:
-                        total_minutes += int(hours.group(1)) * 60
-                    if minutes:
-                        total_minutes += int(minutes.group(1))
-                    if seconds:
-                        total_minutes += int(seconds.group(1)) / 60
-                    
-                    duracao_minutos = round(total_minutes, 2)
-            
-            # Tenta encontrar o idioma do vídeo
-            language = None
-            meta_language = soup.find('meta', {'itemprop': 'inLanguage'})
-            if meta_language:
-                language = meta_language.get('content')
-            
-            if not language:
-                # Tenta encontrar na tag html
-                html_tag = soup.find('html')
-                if html_tag and html_tag.get('lang'):
-                    language = html_tag.get('lang').split('-')[0]  # Pega apenas a parte principal do código de idioma
-            
-            if not language:
-                language = 'und'  # 'und' é usado para indefinido/desconhecido
-            
+            # 1. oEmbed: título e autor em uma resposta JSON pequena
+            encontrados = buscar_oembed(url)
+
+            # 2. Página do vídeo lida em blocos apenas até encontrar os campos restantes
+            faltantes = [campo for campo in CAMPOS_METADADOS if campo not in encontrados]
+            try:
+                pagina = ler_metadados_pagina(url, faltantes)
+                for campo, valor in pagina.items():
+                    encontrados.setdefault(campo, valor)
+            except requests.RequestException as e:
+                logger.warning("Leitura da página de %s falhou: %s", url, e)
+
+            # 3. yt-dlp apenas se a página não trouxe o essencial (ex.: página de consentimento)
+            if 'titulo' not in encontrados:
+                for campo, valor in buscar_metadados_yt_dlp(url).items():
+                    encontrados.setdefault(campo, valor)
+
             metadados = {
-                'titulo': titulo if titulo else 'Título não disponível',
-                'autor': autor,
+                'titulo': encontrados.get('titulo') or 'Título não disponível',
+                'autor': encontrados.get('autor') or 'Autor não disponível',
                 'url': url,
-                'sumario': descricao if descricao else '',
-                'duration': duracao_minutos,
-                'language': language
+                'sumario': encontrados.get('sumario') or '',
+                'duration': encontrados.get('duration'),
+                'language': encontrados.get('language') or 'und',  # 'und' é usado para indefinido/desconhecido
+                'etag': encontrados.get('etag')
             }
             
             return metadados
@@ -165,18 +348,38 @@ class YouTubeMetadados:
             st.error(f"Erro ao coletar metadados: {str(e)}")
             return None
 
+    def obter_metadados(self, url):
+        """Retorna os metadados do vídeo usando o cache compartilhado; só consulta o YouTube após o TTL"""
+        video_id = extrair_video_id(url)
+        cache = buscar_metadados_cache(self.conn, video_id)
+
+        if cache:
+            expirado = datetime.now() - cache['fetched_at'] > METADADOS_TTL
+            if not expirado or (cache['etag'] and pagina_nao_modificada(url, cache['etag'])):
+                if expirado:
+                    renovar_metadados_cache(self.conn, video_id)
+                metadados = {campo: cache[campo] for campo in CAMPOS_METADADOS}
+                metadados['url'] = url
+                return metadados
+
+        metadados = self.coletar_metadados(url)
+        if metadados and metadados['titulo'] != 'Título não disponível':
+            salvar_metadados_cache(self.conn, video_id, metadados)
+        return metadados
+
     def adicionar_video(self, url, user_id):
         """Adiciona novo vídeo ao banco de dados"""
         if not self.validar_url_youtube(url):
             raise ValueError("URL inválida. Por favor, insira uma URL do YouTube válida.")
         
-        # Verifica se o vídeo já existe
-        self.cursor.execute("SELECT you_id FROM youtube_tab WHERE url = ? AND user_id = ?", (url, user_id))
+        # Verifica se o vídeo já existe pelo ID canônico (youtu.be/ID, watch?v=ID&t=..., shorts/ID são o mesmo)
+        video_id = extrair_video_id(url)
+        self.cursor.execute("SELECT you_id FROM youtube_tab WHERE video_id = ? AND user_id = ?", (video_id, user_id))
         if self.cursor.fetchone():
             raise ValueError("Este vídeo já está registrado no banco de dados.")
         
         try:
-            metadados = self.coletar_metadados(url)
+            metadados = self.obter_metadados(url)
             if not metadados:
                 raise ValueError("Não foi possível coletar os metadados do vídeo.")
             
@@ -184,29 +387,37 @@ class YouTubeMetadados:
             titulo_filtrado = self.filtrar_caracteres_proibidos(metadados['titulo'])
             
             # Insere com o campo duration
-            self.cursor.execute('''
-                INSERT INTO youtube_tab (
-                    titulo, url, autor, user_id, 
-                    sumario, insights, contraintuitivo, word_key, tools, duration, language
-                ) VALUES (?, ?, ?, ?, ?, '', '', '', '', ?, ?)
-            ''', (
-                titulo_filtrado,
-                url,
-                metadados['autor'],
-                user_id,
-                metadados['sumario'],
-                metadados['duration'],
-                metadados['language']
-            ))
+            try:
+                self.cursor.execute('''
+                    INSERT INTO youtube_tab (
+                        titulo, url, video_id, autor, user_id,
+                        sumario, insights, contraintuitivo, word_key, tools, duration, language
+                    ) VALUES (?, ?, ?, ?, ?, ?, '', '', '', '', ?, ?)
+                ''', (
+                    titulo_filtrado,
+                    url,
+                    video_id,
+                    metadados['autor'],
+                    user_id,
+                    metadados['sumario'],
+                    metadados['duration'],
+                    metadados['language']
+                ))
+            except sqlite3.IntegrityError:
+                # Mesmo vídeo incluído por outra sessão enquanto os metadados eram coletados
+                self.conn.rollback()
+                raise ValueError("Este vídeo já está registrado no banco de dados.")
             
             self.conn.commit()
+            invalidar('youtube_tab', user_id)
             return metadados
             
         except Exception as e:
             st.error(f"Erro ao adicionar vídeo: {str(e)}")
             raise
             
-    def filtrar_caracteres_proibidos(self, texto):
+    @staticmethod
+    def filtrar_caracteres_proibidos(texto):
         """Remove caracteres proibidos em nomes de arquivo e emojis"""
         if not texto:
             return ""
@@ -221,6 +432,196 @@ class YouTubeMetadados:
         
         return texto_filtrado
 
+# Colunas exibidas e editáveis no editor de vídeos (a descrição é carregada sob demanda)
+COLUNAS_EDITOR = ['titulo', 'autor', 'url', 'duration', 'language', 'word_key']
+
+# Paginação do grid de vídeos
+TAMANHOS_PAGINA = [25, 50, 100]
+
+# Colunas da exportação da biblioteca (inclui os textos longos que o grid não carrega)
+COLUNAS_EXPORTACAO = ['you_id', 'titulo', 'autor', 'url', 'duration', 'language', 'word_key',
+                      'sumario', 'resumo', 'insights', 'contraintuitivo', 'tools', 'assunto']
+TIPOS_EXPORTACAO = {'you_id': 'INTEGER', 'duration': 'REAL'}
+ORDENACOES_GRID = {
+    "Título (A-Z)": ("COALESCE(titulo, '')", "ASC"),
+    "Título (Z-A)": ("COALESCE(titulo, '')", "DESC"),
+    "Autor (A-Z)": ("COALESCE(autor, '')", "ASC"),
+    "Mais recentes": (None, "DESC"),  # Apenas you_id
+}
+
+def garantir_indices_youtube(conn):
+    """Cria os índices usados pela paginação e ordenação do grid"""
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_youtube_user ON youtube_tab(user_id)")
+    # A ordenação usa COALESCE(titulo, ''): um título NULL no cursor anularia a comparação do keyset
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_youtube_user_titulo ON youtube_tab(user_id, COALESCE(titulo, ''), you_id)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_youtube_user_autor ON youtube_tab(user_id, COALESCE(autor, ''), you_id)")
+    conn.commit()
+
+def garantir_coluna_video_id(conn):
+    """
+    Coluna video_id (ID canônico extraído da URL, o mesmo da chave do cache video_metadata) com índice
+    único por usuário: o mesmo vídeo colado como youtu.be/ID, watch?v=ID&t=... ou shorts/ID não é incluído
+    duas vezes. Linhas sem video_id (incluídas por fora, ex.: crude) são preenchidas aqui.
+    """
+    if 'video_id' not in {c[1] for c in conn.execute("PRAGMA table_info(youtube_tab)")}:
+        conn.execute("ALTER TABLE youtube_tab ADD COLUMN video_id TEXT")
+    conn.create_function('extrair_video_id', 1, extrair_video_id, deterministic=True)
+    # OR IGNORE: uma linha que repetiria um vídeo já cadastrado pelo usuário fica sem video_id
+    conn.execute("UPDATE OR IGNORE youtube_tab SET video_id = extrair_video_id(url) WHERE video_id IS NULL")
+    try:
+        conn.execute("CREATE UNIQUE INDEX IF NOT EXISTS idx_youtube_user_video ON youtube_tab(user_id, video_id)")
+    except sqlite3.IntegrityError:
+        # Banco com vídeos repetidos de antes da coluna: a verificação em adicionar_video continua valendo
+        logger.warning("youtube_tab tem vídeos repetidos por usuário; índice único de video_id não criado")
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_youtube_user_video_id ON youtube_tab(user_id, video_id)")
+    conn.commit()
+
+@st.cache_resource(show_spinner=False)
+def preparar_youtube_tab(db_path):
+    """Coluna video_id e índices do grid, uma vez por processo: o DDL e o commit não rodam a cada rerun"""
+    conn = rastreamento.conectar(db_path)
+    try:
+        garantir_coluna_video_id(conn)
+        garantir_indices_youtube(conn)
+    finally:
+        conn.close()
+    return True
+
+def montar_filtros_videos(user_id, filtro_titulo, filtro_autor):
+    """Monta a cláusula WHERE e os parâmetros dos filtros do grid"""
+    where = "user_id = ?"
+    params = [user_id]
+    if filtro_titulo:
+        where += " AND titulo LIKE ?"
+        params.append(f"%{filtro_titulo}%")
+    if filtro_autor:
+        where += " AND autor LIKE ?"
+        params.append(f"%{filtro_autor}%")
+    return where, params
+
+@cache_consulta('youtube_tab')
+def contar_videos(user_id, filtro_titulo, filtro_autor):
+    """Conta os vídeos do usuário para os filtros aplicados (resultado em cache)"""
+    where, params = montar_filtros_videos(user_id, filtro_titulo, filtro_autor)
+    conn = rastreamento.conectar(Path('data/you_ana.db').resolve())
+    try:
+        return conn.execute(f"SELECT COUNT(*) FROM youtube_tab WHERE {where}", params).fetchone()[0]
+    finally:
+        conn.close()
+
+def carregar_pagina_videos(conn, user_id, filtro_titulo, filtro_autor, ordenacao, cursor_pagina, tamanho):
+    """Carrega uma página do grid por keyset (sem OFFSET); traz uma linha extra para saber se há próxima"""
+    coluna, direcao = ORDENACOES_GRID[ordenacao]
+    comparador = '>' if direcao == 'ASC' else '<'
+    where, params = montar_filtros_videos(user_id, filtro_titulo, filtro_autor)
+
+    if coluna:
+        chave = f"{coluna} AS chave_ordem"
+        ordem = f"{coluna} {direcao}, you_id {direcao}"
+        if cursor_pagina:
+            where += f" AND ({coluna}, you_id) {comparador} (?, ?)"
+            params.extend(cursor_pagina)
+    else:
+        chave = "you_id AS chave_ordem"
+        ordem = f"you_id {direcao}"
+        if cursor_pagina:
+            where += f" AND you_id {comparador} ?"
+            params.append(cursor_pagina[-1])
+
+    query = f"""
+        SELECT you_id, user_id, titulo, autor, url, duration, language, word_key, {chave}
+        FROM youtube_tab
+        WHERE {where}
+        ORDER BY {ordem}
+        LIMIT ?
+    """
+    params.append(tamanho + 1)
+    return pd.read_sql_query(query, conn, params=params)
+
+def carregar_sumario(conn, you_id, user_id):
+    """Carrega a descrição (texto longo) de um único vídeo"""
+    row = conn.execute(
+        "SELECT sumario FROM youtube_tab WHERE you_id = ? AND user_id = ?",
+        (you_id, user_id)
+    ).fetchone()
+    return row[0] if row and row[0] else ''
+
+def converter_valor_editor(coluna, valor):
+    """Converte o valor vindo do data_editor para o tipo da coluna na youtube_tab"""
+    if valor is None or (isinstance(valor, float) and pd.isna(valor)):
+        return None
+    if coluna == 'duration':
+        return float(valor)
+    return str(valor)
+
+def salvar_alteracoes_editor(conn, df_original, alteracoes, user_id):
+    """Persiste apenas as linhas editadas, incluídas e excluídas no editor, em uma única transação"""
+    # Agrupa as linhas editadas pelo conjunto de colunas alteradas: um UPDATE por grupo
+    updates = {}
+    for posicao, mudancas in alteracoes.get('edited_rows', {}).items():
+        colunas = tuple(sorted(col for col in mudancas if col in COLUNAS_EDITOR))
+        if not colunas:
+            continue
+        you_id = int(df_original.iloc[int(posicao)]['you_id'])
+        valores = [converter_valor_editor(col, mudancas[col]) for col in colunas]
+        if 'url' in colunas:
+            colunas += ('video_id',)
+            valores.append(extrair_video_id(valores[colunas.index('url')]))
+        updates.setdefault(colunas, []).append((*valores, you_id, user_id))
+
+    exclusoes = [
+        (int(df_original.iloc[int(posicao)]['you_id']), user_id)
+        for posicao in alteracoes.get('deleted_rows', [])
+    ]
+
+    inclusoes = []
+    for linha in alteracoes.get('added_rows', []):
+        url = converter_valor_editor('url', linha.get('url'))
+        titulo = converter_valor_editor('titulo', linha.get('titulo'))
+        if not titulo or not extrair_video_id(url):
+            raise ValueError(f"Linha incluída inválida: informe título e uma URL do YouTube válida ({url}).")
+        inclusoes.append((
+            titulo,
+            url,
+            extrair_video_id(url),
+            converter_valor_editor('autor', linha.get('autor')),
+            user_id,
+            converter_valor_editor('sumario', linha.get('sumario')) or '',
+            converter_valor_editor('word_key', linha.get('word_key')) or '',
+            converter_valor_editor('duration', linha.get('duration')),
+            converter_valor_editor('language', linha.get('language')) or 'und'
+        ))
+
+    # Transação única: tudo é aplicado ou nada é aplicado
+    try:
+        with conn:
+            for colunas, parametros in updates.items():
+                conn.executemany(
+                    f"UPDATE youtube_tab SET {', '.join(f'{col} = ?' for col in colunas)} "
+                    "WHERE you_id = ? AND user_id = ?",
+                    parametros
+                )
+            if exclusoes:
+                conn.executemany("DELETE FROM youtube_tab WHERE you_id = ? AND user_id = ?", exclusoes)
+            if inclusoes:
+                conn.executemany('''
+                    INSERT INTO youtube_tab (
+                        titulo, url, video_id, autor, user_id,
+                        sumario, insights, contraintuitivo, word_key, tools, duration, language
+                    ) VALUES (?, ?, ?, ?, ?, ?, '', '', ?, '', ?, ?)
+                ''', inclusoes)
+
+    except sqlite3.IntegrityError:
+        # Índice único (user_id, video_id): a URL incluída ou editada é de um vídeo que já está na lista
+        raise ValueError("Este vídeo já está registrado no banco de dados.") from None
+
+    invalidar('youtube_tab', user_id)
+    return {
+        'atualizados': sum(len(parametros) for parametros in updates.values()),
+        'incluidos': len(inclusoes),
+        'excluidos': len(exclusoes)
+    }
+
 def show_url_metadados():
     # Verificar se usuário está logado
     if "user_id" not in st.session_state:
@@ -237,7 +638,7 @@ def show_url_metadados():
         return
     
     # Criar uma única conexão para toda a função
-    conn = sqlite3.connect(db_path)
+    conn = rastreamento.conectar(db_path)
     cursor = conn.cursor()
     
     try:
@@ -249,6 +650,7 @@ def show_url_metadados():
         if cursor.fetchone()[0] == 0:
             st.error("Tabela 'youtube_tab' não encontrada no banco de dados")
             return
+        preparar_youtube_tab(str(db_path))
 
         # Interface principal
         st.title("Gerenciador de Vídeos YouTube")
@@ -277,30 +679,32 @@ def show_url_metadados():
                 except Exception as e:
                     st.error(f"Erro ao adicionar vídeo: {str(e)}")
 
-        # Filtros
-        col1, col2 = st.columns(2)
+
+        # Filtros e ordenação (aplicados no banco de dados)
+        col1, col2, col3, col4 = st.columns([3, 3, 2, 1])
         with col1:
             filtro_titulo = st.text_input("Filtrar por Título:")
         with col2:
             filtro_autor = st.text_input("Filtrar por Autor:")
+        with col3:
+            ordenacao = st.selectbox("Ordenar por:", list(ORDENACOES_GRID.keys()))
+        with col4:
+            tamanho = st.selectbox("Por página:", TAMANHOS_PAGINA)
 
-        # Construir query com filtros
-        query = """
-            SELECT you_id, user_id, titulo, autor, url, sumario, duration, language, word_key
-            FROM youtube_tab 
-            WHERE user_id = ?
-        """
-        params = [user_id]
-
-        if filtro_titulo:
-            query += " AND titulo LIKE ?"
-            params.append(f"%{filtro_titulo}%")
-        if filtro_autor:
-            query += " AND autor LIKE ?"
-            params.append(f"%{filtro_autor}%")
-
-        # Carregar dados usando a mesma conexão
-        df = pd.read_sql_query(query, conn, params=params)
+        # Volta para a primeira página sempre que filtros ou ordenação mudarem
+        assinatura = (filtro_titulo, filtro_autor, ordenacao, tamanho)
+        if st.session_state.get('grid_assinatura') != assinatura:
+            st.session_state.grid_assinatura = assinatura
+            st.session_state.grid_cursores = []
+        cursores = st.session_state.grid_cursores
+
+        total = contar_videos(user_id, filtro_titulo, filtro_autor)
+        df = carregar_pagina_videos(
+            conn, user_id, filtro_titulo, filtro_autor, ordenacao,
+            cursores[-1] if cursores else None, tamanho
+        )
+        tem_proxima = len(df) > tamanho
+        df = df.head(tamanho)
         
         if not df.empty:
             # Ajustar a exibição das colunas e formatar duration
@@ -308,13 +712,16 @@ def show_url_metadados():
             
             # Define as colunas a serem exibidas na tabela
             # Importante: incluir user_id para referência
-            df_display = df[['titulo', 'autor', 'url', 'sumario', 'duration', 'language', 'word_key', 'you_id', 'user_id']]
+            df_display = df[COLUNAS_EDITOR + ['you_id', 'user_id']]
+            
+            # Cada página tem seu próprio estado de edição
+            editor_key = f"youtube_editor_{hash(assinatura)}_{len(cursores)}"
             
             # Criar editor de dados com configurações de coluna
             edited_df = st.data_editor(
                 # Remove as colunas you_id e user_id da visualização, mas mantém no DataFrame
-                df_display[['titulo', 'autor', 'url', 'sumario', 'duration', 'language', 'word_key']],
-                key="youtube_editor",
+                df_display[COLUNAS_EDITOR],
+                key=editor_key,
                 column_config={
                     "titulo": st.column_config.TextColumn(
                         "Título do Vídeo",  # Cabeçalho personalizado
@@ -329,10 +736,6 @@ def show_url_metadados():
                     "url": st.column_config.LinkColumn(
                         "Link do Vídeo"  # Cabeçalho personalizado
                     ),
-                    "sumario": st.column_config.TextColumn(
-                        "Descrição",  # Cabeçalho personalizado
-                        width="medium"
-                    ),
                     "duration": st.column_config.NumberColumn(
                         "Duração (min)",
                         min_value=0,
@@ -353,55 +756,83 @@ def show_url_metadados():
                 num_rows="dynamic"
             )
 
+            # Navegação entre páginas
+            pagina_atual = len(cursores) + 1
+            total_paginas = max(1, -(-total // tamanho))
+            nav1, nav2, nav3 = st.columns([1, 3, 1])
+            with nav1:
+                if st.button("◀ Anterior", disabled=not cursores):
+                    cursores.pop()
+                    st.rerun()
+            with nav2:
+                st.write(f"Página {pagina_atual} de {total_paginas} — {total} vídeo(s)")
+            with nav3:
+                if st.button("Próxima ▶", disabled=not tem_proxima):
+                    ultima = df.iloc[-1]
+                    coluna, _ = ORDENACOES_GRID[ordenacao]
+                    cursores.append((ultima['chave_ordem'], int(ultima['you_id'])) if coluna else (int(ultima['you_id']),))
+                    st.rerun()
+
             # Botão para salvar alterações
             if st.button("Salvar Alterações"):
                 try:
-                    for index, row in edited_df.iterrows():
-                        original_row = df_display.iloc[index]
-                        you_id = int(original_row['you_id'])
-                        current_user_id = int(original_row['user_id'])
-                        
-                        # Primeiro verifica se o registro existe
-                        cursor.execute("""
-                            SELECT * FROM youtube_tab 
-                            WHERE you_id = ? AND user_id = ?
-                        """, (you_id, current_user_id))
-                        
-                        existing = cursor.fetchone()
-                        
-                        if existing:
-                            # Tenta o UPDATE com valores explicitamente convertidos
-                            cursor.execute("""
-                                UPDATE youtube_tab 
-                                SET language = ?,
-                                    titulo = ?,
-                                    autor = ?,
-                                    sumario = ?,
-                                    duration = ?,
-                                    word_key = ?
-                                WHERE you_id = ? AND user_id = ?
-                            """, (
-                                str(row['language']) if row['language'] is not None else None,
-                                str(row['titulo']),
-                                str(row['autor']),
-                                str(row['sumario']),
-                                float(row['duration']),
-                                str(row['word_key']),
-                                you_id,
-                                current_user_id
-                            ))
-                        
-                        conn.commit()  # Commit após cada atualização
-                        
-                    st.success("Alterações salvas com sucesso!")
-                    time.sleep(0.5)
-                    st.rerun()
+                    resultado = salvar_alteracoes_editor(
+                        conn, df_display, st.session_state[editor_key], user_id
+                    )
+                    if not any(resultado.values()):
+                        st.info("Nenhuma alteração para salvar.")
+                    else:
+                        st.success(
+                            f"Alterações salvas com sucesso! "
+                            f"{resultado['atualizados']} atualizado(s), "
+                            f"{resultado['incluidos']} incluído(s), "
+                            f"{resultado['excluidos']} excluído(s)."
+                        )
+                        time.sleep(0.5)
+                        st.rerun()
                     
                 except Exception as e:
                     st.error(f"Erro ao salvar alterações: {str(e)}")
-                    conn.rollback()
+
+            # Descrição: texto longo carregado apenas para o vídeo escolhido
+            with st.expander("Descrição do Vídeo"):
+                opcoes = dict(zip(df['you_id'], df['titulo']))
+                you_id_desc = st.selectbox(
+                    "Selecione um vídeo desta página:",
+                    options=list(opcoes.keys()),
+                    format_func=lambda v: opcoes[v],
+                    index=None,
+                    key="grid_video_descricao"
+                )
+                if you_id_desc is not None:
+                    sumario = st.text_area(
+                        "Descrição",
+                        value=carregar_sumario(conn, int(you_id_desc), user_id),
+                        height=200,
+                        key=f"grid_sumario_{you_id_desc}"
+                    )
+                    if st.button("Salvar Descrição"):
+                        with conn:
+                            conn.execute(
+                                "UPDATE youtube_tab SET sumario = ? WHERE you_id = ? AND user_id = ?",
+                                (sumario, int(you_id_desc), user_id)
+                            )
+                        invalidar('youtube_tab', user_id)
+                        st.success("Descrição salva com sucesso!")
         else:
             st.info("Nenhum vídeo encontrado para os filtros aplicados.")
+        
+        # Exportação da biblioteca (todos os vídeos do filtro atual, não só a página)
+        if total:
+            with st.expander("Exportar Biblioteca"):
+                where, params = montar_filtros_videos(user_id, filtro_titulo, filtro_autor)
+                painel_exportacao(
+                    "biblioteca_exportacao",
+                    "biblioteca_videos",
+                    f"SELECT {', '.join(COLUNAS_EXPORTACAO)} FROM youtube_tab WHERE {where} ORDER BY titulo, you_id",
+                    params,
+                    {c: TIPOS_EXPORTACAO.get(c, 'TEXT') for c in COLUNAS_EXPORTACAO}
+                )
 
     except Exception as e:
         st.error(f"Erro ao carregar dados: {str(e)}")
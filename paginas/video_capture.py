@@ -4,18 +4,19 @@
 
 import streamlit as st
 import os
-import cv2
-import yt_dlp
 import subprocess
 import re
-import sqlite3
 import time
 from datetime import datetime
+from cache_dados import cache_consulta
+import config
+import pipeline_estado
+import rastreamento
 
-# Diretório fixo para downloads
-YOUTUBE_DIR = r"Z:\youtube"
-# Caminho do banco de dados - Corrigindo o caminho
-DB_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "you_ana.db")
+# Diretório para downloads (config.YOUTUBE_DIR, sobrescrevível por variável de ambiente)
+YOUTUBE_DIR = config.YOUTUBE_DIR
+# Caminho do banco de dados
+DB_PATH = str(config.DB_PATH)
 
 def ensure_dir(directory):
     """Garante que o diretório existe"""
@@ -32,7 +33,7 @@ def sanitize_filename(filename):
 def extract_audio_ffmpeg(input_path, output_path, status_placeholder, progress_bar):
     """Extrai áudio usando FFmpeg com mais feedback"""
     try:
-        ffmpeg_path = r"C:\ffmpeg\bin\ffmpeg.exe"
+        ffmpeg_path = config.FFMPEG_PATH
         
         # Comando simplificado para extração
         command = [
@@ -58,7 +59,8 @@ def extract_audio_ffmpeg(input_path, output_path, status_placeholder, progress_b
         
         # Aguardar com timeout
         try:
-            stdout, stderr = process.communicate(timeout=300)  # 5 minutos de timeout
+            with rastreamento.span('ffmpeg.extrair_audio', 'ffmpeg'):
+                stdout, stderr = process.communicate(timeout=300)  # 5 minutos de timeout
             
             if process.returncode == 0:
                 if os.path.exists(output_path):
@@ -66,30 +68,32 @@ def extract_audio_ffmpeg(input_path, output_path, status_placeholder, progress_b
                     progress_bar.progress(1.0)
                     return True
                 else:
-                    st.error("Arquivo de saída não foi criado")
+                    status_placeholder.error("Arquivo de saída não foi criado")
                     return False
             else:
-                st.error(f"Erro FFmpeg: {stderr}")
+                status_placeholder.error(f"Erro FFmpeg: {stderr}")
                 return False
                 
         except subprocess.TimeoutExpired:
             process.kill()
-            st.error("Tempo limite excedido na extração do áudio")
+            status_placeholder.error("Tempo limite excedido na extração do áudio")
             return False
             
     except Exception as e:
-        st.error(f"Erro ao extrair áudio: {str(e)}")
+        status_placeholder.error(f"Erro ao extrair áudio: {str(e)}")
         return False
 
+@rastreamento.rastrear('opencv.extrair_frames', 'midia')
 def extract_frames(video_path, output_dir, status_placeholder, progress_bar, frames_per_minute=2):
     """Extrai frames do vídeo na frequência especificada"""
+    import cv2  # Importado só quando há vídeo a processar (pacote pesado)
     try:
         ensure_dir(output_dir)
         
         # Abrir o vídeo
         cap = cv2.VideoCapture(video_path)
         if not cap.isOpened():
-            st.error("Não foi possível abrir o vídeo")
+            status_placeholder.error("Não foi possível abrir o vídeo")
             return False
             
         # Obter informações do vídeo
@@ -131,7 +135,7 @@ def extract_frames(video_path, output_dir, status_placeholder, progress_bar, fra
         return True
         
     except Exception as e:
-        st.error(f"Erro ao extrair frames: {str(e)}")
+        status_placeholder.error(f"Erro ao extrair frames: {str(e)}")
         return False
 
 def get_video_path(video_title):
@@ -141,6 +145,7 @@ def get_video_path(video_title):
 
 def download_video(url, video_title, status_placeholder, progress_bar):
     """Download do vídeo em MP4"""
+    import yt_dlp  # Importado só no download (pacote pesado)
     try:
         ensure_dir(YOUTUBE_DIR)
         sanitized_title = sanitize_filename(video_title)
@@ -165,20 +170,21 @@ def download_video(url, video_title, status_placeholder, progress_bar):
             'outtmpl': output_template,
             'progress_hooks': [progress_hook],
             'restrictfilenames': True,
-            'ffmpeg_location': r"C:\ffmpeg\bin",
+            'ffmpeg_location': os.path.dirname(config.FFMPEG_PATH),
         }
         
         with yt_dlp.YoutubeDL(ydl_opts) as ydl:
             status_placeholder.text("Iniciando download...")
             progress_bar.progress(0)
-            ydl.extract_info(url, download=True)
+            with rastreamento.span('yt_dlp.download', 'http'):
+                ydl.extract_info(url, download=True)
             
             if os.path.exists(output_template):
                 return output_template
             return None
             
     except Exception as e:
-        st.error(f"Erro no download: {str(e)}")
+        status_placeholder.error(f"Erro no download: {str(e)}")
         return None
 
 def select_mp4_file():
@@ -201,21 +207,29 @@ def get_user_id():
         st.error("Usuário não autenticado. Por favor, faça login primeiro.")
         return None
 
-def get_pending_videos(user_id):
-    """Obtém vídeos pendentes de processamento para o usuário"""
+@cache_consulta('youtube_tab')
+def carregar_videos_pendentes(user_id):
+    """Consulta os vídeos do usuário com a captura pendente no pipeline (resultado em cache)"""
+    return pipeline_estado.videos_na_etapa('captura', user_id)
+
+@cache_consulta('youtube_tab')
+def carregar_todos_videos(user_id):
+    """Consulta todos os vídeos do usuário (resultado em cache)"""
+    conn = rastreamento.conectar(DB_PATH)
     try:
-        conn = sqlite3.connect(DB_PATH)
         cursor = conn.cursor()
-        
-        # Buscar vídeos com word_key vazia para o usuário específico
         cursor.execute(
-            "SELECT you_id, titulo, url, autor, sumario FROM youtube_tab WHERE user_id = ? AND (word_key IS NULL OR word_key = '')",
+            "SELECT you_id, titulo, url, autor, sumario FROM youtube_tab WHERE user_id = ?",
             (user_id,)
         )
-        videos = cursor.fetchall()
+        return cursor.fetchall()
+    finally:
         conn.close()
-        
-        return videos
+
+def get_pending_videos(user_id):
+    """Obtém vídeos pendentes de processamento para o usuário"""
+    try:
+        return carregar_videos_pendentes(user_id)
     except Exception as e:
         st.error(f"Erro ao buscar vídeos pendentes: {str(e)}")
         return []
@@ -223,56 +237,27 @@ def get_pending_videos(user_id):
 def get_all_videos(user_id):
     """Obtém todos os vídeos do usuário para seleção manual"""
     try:
-        conn = sqlite3.connect(DB_PATH)
-        cursor = conn.cursor()
-        
-        # Buscar todos os vídeos do usuário
-        cursor.execute(
-            "SELECT you_id, titulo, url, autor, sumario FROM youtube_tab WHERE user_id = ?",
-            (user_id,)
-        )
-        videos = cursor.fetchall()
-        conn.close()
-        
-        return videos
+        return carregar_todos_videos(user_id)
     except Exception as e:
         st.error(f"Erro ao buscar vídeos: {str(e)}")
         return []
 
-def mark_as_processed(video_id):
-    """Marca o vídeo como processado no banco de dados"""
-    try:
-        conn = sqlite3.connect(DB_PATH)
-        cursor = conn.cursor()
-        
-        # Atualiza a coluna word_key para o vídeo específico
-        cursor.execute(
-            "UPDATE youtube_tab SET word_key = 'mp4_mp3_frames' WHERE you_id = ?", 
-            (video_id,)
-        )
-        conn.commit()
-        conn.close()
-        
-        return True
-    except Exception as e:
-        st.error(f"Erro ao marcar vídeo como processado: {str(e)}")
-        return False
-
-def process_video(video_id, video_title, video_url):
-    """Processa um vídeo: download, extração de áudio e frames"""
-    st.subheader(f"Processando: {video_title}")
-    
-    # Criar placeholders para status e progresso
-    status = st.empty()
-    progress = st.progress(0)
+def executar_captura(video_id, video_title, video_url, status, progress):
+    """
+    Núcleo da captura, sem interface própria (usado pela página e pelo orquestrador): download, áudio,
+    frames e conclusão da etapa no pipeline. `status` precisa de text()/error() e `progress` de progress().
+    Retorna None em caso de sucesso ou a mensagem de falha (já registrada no pipeline).
+    """
+    def falha(mensagem):
+        pipeline_estado.falhar(video_id, 'captura', mensagem)
+        return mensagem
     
     # 1. Download do vídeo
     status.text("Iniciando download do vídeo...")
     video_path = download_video(video_url, video_title, status, progress)
     
     if not video_path:
-        st.error("Falha no download do vídeo.")
-        return False
+        return falha("Falha no download do vídeo.")
     
     # 2. Extrair áudio MP3
     status.text("Preparando para extrair áudio...")
@@ -282,8 +267,7 @@ def process_video(video_id, video_title, video_url):
     audio_success = extract_audio_ffmpeg(video_path, mp3_path, status, progress)
     
     if not audio_success:
-        st.error("Falha na extração do áudio.")
-        return False
+        return falha("Falha na extração do áudio.")
     
     # 3. Extrair frames
     status.text("Preparando para extrair frames...")
@@ -293,17 +277,36 @@ def process_video(video_id, video_title, video_url):
     frames_success = extract_frames(video_path, frames_dir, status, progress, frames_per_minute=2)
     
     if not frames_success:
-        st.error("Falha na extração dos frames.")
-        return False
+        return falha("Falha na extração dos frames.")
     
     # 4. Marcar como processado
-    if mark_as_processed(video_id):
-        status.text("Vídeo processado com sucesso!")
-        st.success(f"Vídeo '{video_title}' processado com sucesso!")
-        return True
-    else:
-        st.warning("Vídeo processado, mas houve erro ao atualizar o banco de dados.")
+    try:
+        pipeline_estado.concluir(video_id, 'captura', {'mp4': video_path, 'mp3': mp3_path, 'frames': frames_dir})
+    except Exception as e:
+        return f"Vídeo processado, mas houve erro ao atualizar o banco de dados: {str(e)}"
+    status.text("Vídeo processado com sucesso!")
+    return None
+
+def process_video(video_id, video_title, video_url, automatico=False):
+    """Processa um vídeo: download, extração de áudio e frames"""
+    st.subheader(f"Processando: {video_title}")
+    
+    # Reivindica a etapa no pipeline: outra sessão processando o mesmo vídeo impede a duplicação
+    if not pipeline_estado.reivindicar_video(video_id, 'captura', trabalhador=f"usuario:{get_user_id()}",
+                                             somente_pendente=automatico):
+        st.warning(f"O vídeo '{video_title}' já está sendo processado ou não está mais pendente.")
+        return False
+    
+    # Criar placeholders para status e progresso
+    status = st.empty()
+    progress = st.progress(0)
+    
+    erro = executar_captura(video_id, video_title, video_url, status, progress)
+    if erro:
+        st.error(erro)
         return False
+    st.success(f"Vídeo '{video_title}' processado com sucesso!")
+    return True
 
 def show_video_capture():
     """Interface principal do programa"""
@@ -372,7 +375,7 @@ def show_video_capture():
                 video_id, video_title, video_url, _, _ = video
                 
                 # Processar cada vídeo
-                if process_video(video_id, video_title, video_url):
+                if process_video(video_id, video_title, video_url, automatico=True):
                     success_count += 1
                 
                 # Pequena pausa entre processamentos
@@ -0,0 +1,95 @@
+# Arquivo: perfil_importacao.py
+# Data: 19/10/2026
+# Descrição: Medidor do tempo de importação por módulo (ms total e ms próprio, sem os submódulos),
+# instalado pelo main.py antes das demais importações e exibido em paginas/diagnostico
+
+import builtins
+import importlib.util
+import os
+import sys
+import threading
+import time
+from datetime import datetime
+
+ATIVO = os.getenv('PERFIL_IMPORTACAO', '1') != '0'
+
+_import_original = builtins.__import__
+_registros = {}                 # modulo -> tempos da primeira importação
+_paginas = {}                   # página -> tempos da carga pelo registro de páginas do main.py
+_lock = threading.Lock()
+_estado = threading.local()     # Pilha de tempo dos submódulos (por thread)
+
+def _nome_absoluto(nome, globais, nivel):
+    """Resolve importações relativas (from . import x) para o nome completo do módulo"""
+    if nivel == 0:
+        return nome
+    pacote = (globais or {}).get('__package__') or ''
+    try:
+        return importlib.util.resolve_name('.' * nivel + nome, pacote)
+    except (ImportError, ValueError):
+        return nome
+
+def _import_medido(nome, globals=None, locals=None, fromlist=(), level=0):
+    """Substituto de __import__: mede só a primeira importação de cada módulo"""
+    absoluto = _nome_absoluto(nome, globals, level)
+    novos = [] if absoluto in sys.modules else [absoluto]
+    if fromlist and absoluto in sys.modules:
+        # from pacote import submodulo: o módulo novo é o submódulo
+        novos = [f"{absoluto}.{f}" for f in fromlist
+                 if f != '*' and f"{absoluto}.{f}" not in sys.modules]
+    if not novos:
+        return _import_original(nome, globals, locals, fromlist, level)
+
+    pilha = getattr(_estado, 'pilha', None)
+    if pilha is None:
+        pilha = _estado.pilha = []
+    pilha.append(0.0)
+    inicio = time.perf_counter()
+    try:
+        return _import_original(nome, globals, locals, fromlist, level)
+    finally:
+        duracao = time.perf_counter() - inicio
+        filhos = pilha.pop()
+        if pilha:
+            pilha[-1] += duracao
+        modulo = next((n for n in novos if n in sys.modules), None)
+        if modulo:
+            with _lock:
+                _registros.setdefault(modulo, {
+                    'modulo': modulo,
+                    'ms': round(duracao * 1000, 1),
+                    'proprio_ms': round((duracao - filhos) * 1000, 1),
+                    'importado_por': (globals or {}).get('__name__'),
+                    'quando': datetime.now().strftime('%d/%m/%Y %H:%M:%S'),
+                })
+
+def instalar():
+    """Ativa a medição (idempotente: o Streamlit reexecuta o main.py a cada interação)"""
+    if ATIVO and builtins.__import__ is not _import_medido:
+        builtins.__import__ = _import_medido
+
+def importar_pagina(pagina, modulo):
+    """Importa o módulo de uma página registrando o tempo da carga. Retorna o módulo"""
+    primeira = modulo not in sys.modules
+    inicio = time.perf_counter()
+    __import__(modulo)
+    if primeira:
+        with _lock:
+            _paginas[pagina] = {
+                'pagina': pagina,
+                'modulo': modulo,
+                'ms': round((time.perf_counter() - inicio) * 1000, 1),
+                'quando': datetime.now().strftime('%d/%m/%Y %H:%M:%S'),
+            }
+    return sys.modules[modulo]
+
+def tempos_modulos(limite=None):
+    """Módulos importados desde a instalação, do mais lento para o mais rápido"""
+    with _lock:
+        registros = sorted(_registros.values(), key=lambda r: r['ms'], reverse=True)
+    return registros[:limite] if limite else registros
+
+def tempos_paginas():
+    """Primeira carga de cada página neste processo"""
+    with _lock:
+        return sorted(_paginas.values(), key=lambda r: r['ms'], reverse=True)
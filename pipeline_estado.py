@@ -0,0 +1,337 @@
+# Arquivo: pipeline_estado.py
+# Data: 19/10/2026
+# Descrição: Máquina de estados do pipeline de vídeos (captura -> transcrição -> análise) na tabela
+# pipeline_state, com busca indexada da próxima tarefa de cada etapa e reivindicação atômica para
+# trabalhadores concorrentes. Substitui o uso de youtube_tab.word_key como marcador de situação.
+
+import json
+import threading
+from datetime import timedelta
+
+from config import DB_PATH, agora_local
+from cache_dados import invalidar, invalidar_video
+import rastreamento
+
+ETAPAS = ('captura', 'transcricao', 'analise')
+PROXIMA_ETAPA = {'captura': 'transcricao', 'transcricao': 'analise'}
+
+# aguardando: etapa anterior não concluída | pendente: pronta para ser reivindicada
+STATUS = ('aguardando', 'pendente', 'executando', 'concluido', 'erro')
+
+MAX_TENTATIVAS = 3                       # Falhas automáticas antes de parar em 'erro'
+TEMPO_MAXIMO_EXECUCAO = 3 * 3600         # Segundos em 'executando' até ser considerada abandonada
+
+# Valores que o pipeline antigo gravava em word_key (migrados e removidos da coluna)
+MARCADORES_WORD_KEY = ('mp4_mp3_frames', 'transcrito')
+
+_bancos_prontos = set()
+_lock = threading.Lock()
+
+def agora_texto():
+    """Data e hora de São Paulo no formato gravado na tabela (ordenável como texto)"""
+    return agora_local().strftime('%Y-%m-%d %H:%M:%S')
+
+def criar_tabela(conn):
+    """
+    Cria pipeline_state, o índice da fila (etapa, status, you_id) e os triggers que incluem as
+    etapas de cada vídeo cadastrado em youtube_tab e as removem quando o vídeo é excluído
+    """
+    conn.execute("""
+    CREATE TABLE IF NOT EXISTS pipeline_state (
+        you_id INTEGER NOT NULL,
+        etapa TEXT NOT NULL,
+        status TEXT NOT NULL DEFAULT 'aguardando',
+        tentativas INTEGER NOT NULL DEFAULT 0,
+        iniciado_em TEXT,
+        finalizado_em TEXT,
+        erro TEXT,
+        artefatos TEXT,
+        trabalhador TEXT,
+        PRIMARY KEY (you_id, etapa)
+    ) WITHOUT ROWID
+    """)
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_pipeline_state_fila ON pipeline_state (etapa, status, you_id)")
+    conn.execute("""
+    CREATE TRIGGER IF NOT EXISTS trg_youtube_tab_pipeline_inclusao AFTER INSERT ON youtube_tab
+    BEGIN
+        INSERT OR IGNORE INTO pipeline_state (you_id, etapa, status)
+        VALUES (NEW.you_id, 'captura', 'pendente'), (NEW.you_id, 'transcricao', 'aguardando'),
+               (NEW.you_id, 'analise', 'aguardando');
+    END
+    """)
+    conn.execute("""
+    CREATE TRIGGER IF NOT EXISTS trg_youtube_tab_pipeline_exclusao AFTER DELETE ON youtube_tab
+    BEGIN
+        DELETE FROM pipeline_state WHERE you_id = OLD.you_id;
+    END
+    """)
+
+def migrar_word_key(conn):
+    """
+    Converte os marcadores antigos de word_key (e resumo preenchido) em linhas de pipeline_state
+    e devolve a coluna word_key às palavras-chave do usuário. Executa dentro da transação de quem chama.
+    """
+    conn.execute("""
+    INSERT OR IGNORE INTO pipeline_state (you_id, etapa, status, finalizado_em)
+    SELECT you_id, 'captura',
+           CASE WHEN word_key IN ('mp4_mp3_frames', 'transcrito') THEN 'concluido' ELSE 'pendente' END,
+           CASE WHEN word_key IN ('mp4_mp3_frames', 'transcrito') THEN :agora END
+    FROM youtube_tab
+    """, {'agora': agora_texto()})
+    conn.execute("""
+    INSERT OR IGNORE INTO pipeline_state (you_id, etapa, status, finalizado_em)
+    SELECT you_id, 'transcricao',
+           CASE word_key WHEN 'transcrito' THEN 'concluido' WHEN 'mp4_mp3_frames' THEN 'pendente' ELSE 'aguardando' END,
+           CASE WHEN word_key = 'transcrito' THEN :agora END
+    FROM youtube_tab
+    """, {'agora': agora_texto()})
+    conn.execute("""
+    INSERT OR IGNORE INTO pipeline_state (you_id, etapa, status, finalizado_em)
+    SELECT you_id, 'analise',
+           CASE WHEN COALESCE(resumo, '') <> '' THEN 'concluido'
+                WHEN word_key = 'transcrito' THEN 'pendente' ELSE 'aguardando' END,
+           CASE WHEN COALESCE(resumo, '') <> '' THEN :agora END
+    FROM youtube_tab
+    """, {'agora': agora_texto()})
+    return conn.execute(
+        f"UPDATE youtube_tab SET word_key = '' WHERE word_key IN ({', '.join('?' * len(MARCADORES_WORD_KEY))})",
+        MARCADORES_WORD_KEY
+    ).rowcount
+
+def sincronizar(conn):
+    """
+    Cria as linhas dos vídeos novos (captura pendente) e remove as de vídeos excluídos.
+    Acerta o que foi gravado antes dos triggers existirem; depois deles, a tabela já acompanha youtube_tab.
+    """
+    # Verificação barata (contagens e maior you_id) antes de abrir a transação de escrita
+    videos, maior_video = conn.execute("SELECT COUNT(*), MAX(you_id) FROM youtube_tab").fetchone()
+    linhas, maior_linha = conn.execute("SELECT COUNT(*), MAX(you_id) FROM pipeline_state").fetchone()
+    if linhas == videos * len(ETAPAS) and maior_linha == maior_video:
+        return 0, 0
+    with conn:
+        inseridos = conn.execute("""
+        INSERT INTO pipeline_state (you_id, etapa, status)
+        SELECT y.you_id, e.etapa, CASE e.etapa WHEN 'captura' THEN 'pendente' ELSE 'aguardando' END
+        FROM youtube_tab y
+        CROSS JOIN (SELECT 'captura' AS etapa UNION ALL SELECT 'transcricao' UNION ALL SELECT 'analise') e
+        WHERE NOT EXISTS (SELECT 1 FROM pipeline_state p WHERE p.you_id = y.you_id AND p.etapa = e.etapa)
+        """).rowcount
+        removidos = conn.execute("""
+        DELETE FROM pipeline_state
+        WHERE NOT EXISTS (SELECT 1 FROM youtube_tab y WHERE y.you_id = pipeline_state.you_id)
+        """).rowcount
+    return inseridos, removidos
+
+def conectar(db_path=None):
+    """
+    Conexão com pipeline_state pronta: na primeira vez no processo cria a tabela e os triggers,
+    migra word_key e sincroniza com youtube_tab (as contagens de sincronizar não se repetem a cada conexão).
+    """
+    db_path = str(db_path or DB_PATH)
+    conn = rastreamento.conectar(db_path, timeout=30)
+    try:
+        with _lock:
+            if db_path not in _bancos_prontos:
+                conn.execute("BEGIN IMMEDIATE")
+                existia = conn.execute(
+                    "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'pipeline_state'"
+                ).fetchone()
+                criar_tabela(conn)
+                if not existia:
+                    migrar_word_key(conn)
+                conn.commit()
+                sincronizar(conn)
+                _bancos_prontos.add(db_path)
+    except Exception:
+        conn.close()
+        raise
+    return conn
+
+def _invalidar(conn, you_id):
+    invalidar('pipeline_state')
+    invalidar_video(conn, you_id)
+
+def reivindicar(etapa, limite=1, user_id=None, trabalhador=None, db_path=None):
+    """
+    Reivindica atomicamente até `limite` vídeos pendentes da etapa (opcionalmente só de um usuário),
+    passando-os para 'executando'. Dois trabalhadores nunca recebem o mesmo vídeo. Retorna os you_id.
+    """
+    conn = conectar(db_path)
+    try:
+        filtro_usuario = "AND you_id IN (SELECT you_id FROM youtube_tab WHERE user_id = :user_id)" if user_id is not None else ""
+        with conn:
+            ids = [r[0] for r in conn.execute(f"""
+            UPDATE pipeline_state
+            SET status = 'executando', tentativas = tentativas + 1, iniciado_em = :agora,
+                finalizado_em = NULL, erro = NULL, trabalhador = :trabalhador
+            WHERE etapa = :etapa AND status = 'pendente' AND you_id IN (
+                SELECT you_id FROM pipeline_state
+                WHERE etapa = :etapa AND status = 'pendente' {filtro_usuario}
+                ORDER BY you_id
+                LIMIT :limite
+            )
+            RETURNING you_id
+            """, {'etapa': etapa, 'limite': limite, 'user_id': user_id,
+                  'agora': agora_texto(), 'trabalhador': trabalhador}).fetchall()]
+        for you_id in ids:
+            _invalidar(conn, you_id)
+        return sorted(ids)
+    finally:
+        conn.close()
+
+def reivindicar_video(you_id, etapa, trabalhador=None, somente_pendente=False, db_path=None):
+    """
+    Reivindica um vídeo específico. No modo manual permite reprocessar etapas concluídas ou com erro;
+    com somente_pendente=True (lotes automáticos) só reivindica se a etapa ainda estiver pendente.
+    Retorna False se o vídeo estiver em execução por outro trabalhador (ou não estiver pendente).
+    """
+    permitidos = ('pendente',) if somente_pendente else ('aguardando', 'pendente', 'concluido', 'erro')
+    conn = conectar(db_path)
+    try:
+        with conn:
+            ok = conn.execute(f"""
+            UPDATE pipeline_state
+            SET status = 'executando', tentativas = tentativas + 1, iniciado_em = ?,
+                finalizado_em = NULL, erro = NULL, trabalhador = ?
+            WHERE you_id = ? AND etapa = ? AND status IN ({', '.join('?' * len(permitidos))})
+            """, (agora_texto(), trabalhador, you_id, etapa, *permitidos)).rowcount == 1
+        if ok:
+            _invalidar(conn, you_id)
+        return ok
+    finally:
+        conn.close()
+
+def concluir(you_id, etapa, artefatos=None, db_path=None):
+    """Conclui a etapa (com as referências dos arquivos gerados) e libera a próxima etapa do vídeo"""
+    conn = conectar(db_path)
+    try:
+        with conn:
+            conn.execute("""
+            UPDATE pipeline_state
+            SET status = 'concluido', finalizado_em = ?, erro = NULL, artefatos = ?
+            WHERE you_id = ? AND etapa = ?
+            """, (agora_texto(), json.dumps(artefatos, ensure_ascii=False) if artefatos else None, you_id, etapa))
+            if etapa in PROXIMA_ETAPA:
+                conn.execute("""
+                UPDATE pipeline_state SET status = 'pendente'
+                WHERE you_id = ? AND etapa = ? AND status = 'aguardando'
+                """, (you_id, PROXIMA_ETAPA[etapa]))
+        _invalidar(conn, you_id)
+    finally:
+        conn.close()
+
+def falhar(you_id, etapa, erro, db_path=None, max_tentativas=MAX_TENTATIVAS):
+    """Registra a falha: volta para 'pendente' enquanto houver tentativas, senão fica em 'erro'. Retorna o status"""
+    conn = conectar(db_path)
+    try:
+        with conn:
+            row = conn.execute("""
+            UPDATE pipeline_state
+            SET status = CASE WHEN tentativas >= ? THEN 'erro' ELSE 'pendente' END,
+                finalizado_em = ?, erro = ?
+            WHERE you_id = ? AND etapa = ?
+            RETURNING status
+            """, (max_tentativas, agora_texto(), str(erro)[:2000], you_id, etapa)).fetchone()
+        _invalidar(conn, you_id)
+        return row[0] if row else None
+    finally:
+        conn.close()
+
+def reabrir(you_id, etapa, db_path=None):
+    """Volta a etapa para 'pendente' com as tentativas zeradas (reprocessamento pelo painel)"""
+    conn = conectar(db_path)
+    try:
+        with conn:
+            conn.execute("""
+            UPDATE pipeline_state SET status = 'pendente', tentativas = 0, erro = NULL, trabalhador = NULL
+            WHERE you_id = ? AND etapa = ? AND status <> 'executando'
+            """, (you_id, etapa))
+        _invalidar(conn, you_id)
+    finally:
+        conn.close()
+
+def liberar_travados(limite_segundos=TEMPO_MAXIMO_EXECUCAO, db_path=None):
+    """Devolve para 'pendente' as execuções abandonadas (processo encerrado no meio). Retorna a quantidade"""
+    corte = (agora_local() - timedelta(seconds=limite_segundos)).strftime('%Y-%m-%d %H:%M:%S')
+    conn = conectar(db_path)
+    try:
+        with conn:
+            liberados = conn.execute("""
+            UPDATE pipeline_state SET status = 'pendente', erro = 'Execução abandonada', trabalhador = NULL
+            WHERE status = 'executando' AND iniciado_em < ?
+            """, (corte,)).rowcount
+        if liberados:
+            invalidar('pipeline_state')
+            invalidar('youtube_tab')
+        return liberados
+    finally:
+        conn.close()
+
+def videos_na_etapa(etapa, user_id, status='pendente', db_path=None):
+    """Vídeos do usuário com a etapa no status informado: [(you_id, titulo, url, autor, sumario)]"""
+    conn = conectar(db_path)
+    try:
+        return conn.execute("""
+        SELECT y.you_id, y.titulo, y.url, y.autor, y.sumario
+        FROM pipeline_state p
+        JOIN youtube_tab y ON y.you_id = p.you_id
+        WHERE p.etapa = ? AND p.status = ? AND y.user_id = ?
+        ORDER BY y.you_id
+        """, (etapa, status, user_id)).fetchall()
+    finally:
+        conn.close()
+
+def detalhes_video(you_id, db_path=None):
+    """Título, URL, dono e artefatos (por etapa) de um vídeo; None se não estiver cadastrado"""
+    conn = conectar(db_path)
+    try:
+        row = conn.execute(
+            "SELECT titulo, url, user_id FROM youtube_tab WHERE you_id = ?", (you_id,)
+        ).fetchone()
+        if not row:
+            return None
+        artefatos = {
+            etapa: json.loads(valor) if valor else {}
+            for etapa, valor in conn.execute(
+                "SELECT etapa, artefatos FROM pipeline_state WHERE you_id = ?", (you_id,)
+            )
+        }
+        return {'you_id': you_id, 'titulo': row[0], 'url': row[1], 'user_id': row[2], 'artefatos': artefatos}
+    finally:
+        conn.close()
+
+def resumo_pipeline(user_id=None, db_path=None):
+    """Quantidade de vídeos por etapa e status: [(etapa, status, quantidade)]"""
+    conn = conectar(db_path)
+    try:
+        filtro = "WHERE p.you_id IN (SELECT you_id FROM youtube_tab WHERE user_id = ?)" if user_id is not None else ""
+        return conn.execute(f"""
+        SELECT p.etapa, p.status, COUNT(*) FROM pipeline_state p {filtro}
+        GROUP BY p.etapa, p.status
+        """, (user_id,) if user_id is not None else ()).fetchall()
+    finally:
+        conn.close()
+
+def listar_estado(user_id=None, etapa=None, status=None, limite=500, db_path=None):
+    """Linhas de pipeline_state com título e dono do vídeo, para o painel de acompanhamento"""
+    condicoes, params = [], []
+    for coluna, valor in (('y.user_id', user_id), ('p.etapa', etapa), ('p.status', status)):
+        if valor is not None:
+            condicoes.append(f"{coluna} = ?")
+            params.append(valor)
+    where = f"WHERE {' AND '.join(condicoes)}" if condicoes else ""
+    conn = conectar(db_path)
+    try:
+        cursor = conn.execute(f"""
+        SELECT p.you_id, y.titulo, y.user_id, p.etapa, p.status, p.tentativas,
+               p.iniciado_em, p.finalizado_em, p.erro, p.artefatos, p.trabalhador
+        FROM pipeline_state p
+        JOIN youtube_tab y ON y.you_id = p.you_id
+        {where}
+        ORDER BY COALESCE(p.iniciado_em, p.finalizado_em, '') DESC, p.you_id
+        LIMIT ?
+        """, (*params, limite))
+        colunas = [c[0] for c in cursor.description]
+        return [dict(zip(colunas, row)) for row in cursor.fetchall()]
+    finally:
+        conn.close()
@@ -0,0 +1,278 @@
+# Arquivo: rastreamento.py
+# Data: 19/10/2026
+# Descrição: Rastreamento leve dos caminhos quentes: spans (gerenciador de contexto ou decorador) com pai e rodada
+# herdados via contextvars, buffer circular em memória exibido em paginas/diagnostico e exportação opcional em
+# JSON lines (RASTREAMENTO_JSONL=<arquivo>) ou OpenTelemetry (RASTREAMENTO_OTEL=1, se o pacote estiver instalado).
+# Desative com RASTREAMENTO=0. Threads novas (pools, agendador) começam rodadas próprias.
+
+import contextvars
+import itertools
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import defaultdict, deque
+from datetime import datetime
+from functools import wraps
+from urllib.parse import urlparse
+
+logger = logging.getLogger(__name__)
+
+ATIVO = os.getenv('RASTREAMENTO', '1') != '0'
+CAPACIDADE = int(os.getenv('RASTREAMENTO_CAPACIDADE', '5000'))   # Spans mantidos em memória
+ARQUIVO_JSONL = os.getenv('RASTREAMENTO_JSONL')
+CATEGORIAS = ('render', 'tarefa', 'cache', 'db', 'http', 'llm', 'ffmpeg', 'midia')
+# Colunas de tempo por rodada: render/tarefa são as raízes e 'cache' envolve as leituras em cache
+# (num acerto não há consulta; numa falha as consultas aparecem como spans 'db' dentro dele)
+CATEGORIAS_RECURSO = CATEGORIAS[3:]
+MAX_SQL = 200   # Caracteres do SQL guardados no span
+
+# Exceções de controle de fluxo do Streamlit (st.rerun, st.stop): não são erros da rodada
+EXCECOES_CONTROLE = {'RerunException', 'StopException'}
+
+_spans = deque(maxlen=CAPACIDADE)
+_lock = threading.Lock()
+_ids = itertools.count(1)
+_atual = contextvars.ContextVar('rastreamento_span', default=None)
+_arquivo = None
+_otel = {'tracer': None, 'tentado': False}
+
+def _tracer_otel():
+    """Tracer do OpenTelemetry (configurado pelo SDK/variáveis OTEL_*), ou None"""
+    if not _otel['tentado']:
+        _otel['tentado'] = True
+        if os.getenv('RASTREAMENTO_OTEL') == '1':
+            try:
+                from opentelemetry import trace
+                _otel['tracer'] = trace.get_tracer('capitalhumano')
+            except ImportError:
+                logger.warning("RASTREAMENTO_OTEL=1, mas o pacote opentelemetry não está instalado")
+    return _otel['tracer']
+
+def _exportar_jsonl(registro):
+    global _arquivo
+    try:
+        if _arquivo is None:
+            _arquivo = open(ARQUIVO_JSONL, 'a', encoding='utf-8', buffering=1)
+        _arquivo.write(json.dumps(registro, ensure_ascii=False, default=str) + "\n")
+    except OSError as e:
+        logger.warning("Falha ao exportar span para %s: %s", ARQUIVO_JSONL, e)
+
+def _guardar(registro):
+    with _lock:
+        _spans.append(registro)
+        if ARQUIVO_JSONL:
+            _exportar_jsonl(registro)
+
+class Span:
+    """Trecho medido. Use `with span(...) as s:` e, se quiser, s.atributos['x'] = valor durante a execução"""
+    __slots__ = ('id', 'pai', 'rodada', 'nivel', 'nome', 'categoria', 'atributos', 'inicio',
+                 '_t0', 'duracao_ms', 'erro', '_token', '_otel')
+
+    def __init__(self, nome, categoria, atributos):
+        self.nome = nome
+        self.categoria = categoria
+        self.atributos = atributos
+        self.erro = None
+        self._otel = None
+
+    def __enter__(self):
+        if not ATIVO:
+            return self
+        pai = _atual.get()
+        self.id = next(_ids)
+        self.pai = pai.id if pai else None
+        self.rodada = pai.rodada if pai else self.id
+        self.nivel = pai.nivel + 1 if pai else 0
+        self.inicio = time.time()
+        self._t0 = time.perf_counter()
+        self._token = _atual.set(self)
+        tracer = _tracer_otel()
+        if tracer is not None:
+            from opentelemetry import trace
+            contexto = trace.set_span_in_context(pai._otel) if pai and pai._otel else None
+            self._otel = tracer.start_span(self.nome, context=contexto)
+        return self
+
+    def __exit__(self, tipo, valor, tb):
+        if not ATIVO:
+            return False
+        self.duracao_ms = round((time.perf_counter() - self._t0) * 1000, 3)
+        _atual.reset(self._token)
+        if tipo is not None and tipo.__name__ not in EXCECOES_CONTROLE:
+            self.erro = f"{tipo.__name__}: {valor}"[:300]
+        _guardar(self.como_dict())
+        if self._otel is not None:
+            self._otel.set_attribute('categoria', self.categoria)
+            for chave, valor_atributo in self.atributos.items():
+                if isinstance(valor_atributo, (str, bool, int, float)):
+                    self._otel.set_attribute(chave, valor_atributo)
+            if self.erro:
+                from opentelemetry.trace import Status, StatusCode
+                self._otel.set_status(Status(StatusCode.ERROR, self.erro))
+            self._otel.end()
+        return False
+
+    def como_dict(self):
+        return {
+            'id': self.id, 'pai': self.pai, 'rodada': self.rodada, 'nivel': self.nivel,
+            'nome': self.nome, 'categoria': self.categoria, 'inicio': self.inicio,
+            'duracao_ms': self.duracao_ms, 'erro': self.erro, 'thread': threading.current_thread().name,
+            'atributos': dict(self.atributos),
+        }
+
+def span(nome, categoria='render', **atributos):
+    """Gerenciador de contexto que mede o trecho e o registra como filho do span corrente"""
+    return Span(nome, categoria, atributos)
+
+def registrar(nome, categoria, duracao_ms, erro=None, **atributos):
+    """Registra um trecho já medido por outro meio (ex.: response.elapsed do requests) como filho do span corrente"""
+    if not ATIVO:
+        return
+    pai = _atual.get()
+    identificador = next(_ids)
+    fim = time.time()
+    inicio = fim - duracao_ms / 1000
+    _guardar({
+        'id': identificador, 'pai': pai.id if pai else None, 'rodada': pai.rodada if pai else identificador,
+        'nivel': pai.nivel + 1 if pai else 0, 'nome': nome, 'categoria': categoria,
+        'inicio': inicio, 'duracao_ms': round(duracao_ms, 3), 'erro': erro,
+        'thread': threading.current_thread().name, 'atributos': atributos,
+    })
+    tracer = _tracer_otel()
+    if tracer is not None:
+        from opentelemetry import trace
+        contexto = trace.set_span_in_context(pai._otel) if pai and pai._otel else None
+        otel = tracer.start_span(nome, context=contexto, start_time=int(inicio * 1e9),
+                                 attributes={'categoria': categoria, **atributos})
+        otel.end(end_time=int(fim * 1e9))
+
+def instrumentar_sessao(sessao):
+    """Registra cada resposta de uma requests.Session como span 'http' (tempo até receber os cabeçalhos)"""
+    def ao_responder(resposta, *args, **kwargs):
+        registrar(f"{resposta.request.method} {urlparse(resposta.url).netloc}", 'http',
+                  resposta.elapsed.total_seconds() * 1000,
+                  erro=f"HTTP {resposta.status_code}" if resposta.status_code >= 400 else None,
+                  status=resposta.status_code)
+    sessao.hooks['response'].append(ao_responder)
+    return sessao
+
+def anotar(**atributos):
+    """Acrescenta atributos ao span corrente (ex.: a página escolhida no rerun já iniciado)"""
+    atual = _atual.get()
+    if atual is not None:
+        atual.atributos.update(atributos)
+
+def rastrear(nome=None, categoria='render'):
+    """Decorador: cada chamada da função vira um span (nome padrão: modulo.funcao)"""
+    def decorador(func):
+        nome_span = nome or f"{func.__module__}.{func.__qualname__}"
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            with Span(nome_span, categoria, {}):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorador
+
+class CursorRastreado(sqlite3.Cursor):
+    """Cursor que registra cada execute/executemany como span 'db'"""
+    def execute(self, sql, parametros=()):
+        with Span('sql', 'db', {'sql': " ".join(sql.split())[:MAX_SQL]}):
+            return super().execute(sql, parametros)
+
+    def executemany(self, sql, parametros):
+        with Span('sql.lote', 'db', {'sql': " ".join(sql.split())[:MAX_SQL]}):
+            return super().executemany(sql, parametros)
+
+class ConexaoRastreada(sqlite3.Connection):
+    """Fábrica para sqlite3.connect(..., factory=ConexaoRastreada): consultas e commits viram spans 'db'"""
+    def cursor(self, factory=CursorRastreado):
+        return super().cursor(factory)
+
+    def execute(self, sql, parametros=()):
+        return self.cursor().execute(sql, parametros)
+
+    def executemany(self, sql, parametros):
+        return self.cursor().executemany(sql, parametros)
+
+    def commit(self):
+        with Span('commit', 'db', {}):
+            return super().commit()
+
+def conectar(db_path, **opcoes):
+    """sqlite3.connect com a ConexaoRastreada: o caminho comum das páginas e tarefas para abrir o banco"""
+    return sqlite3.connect(db_path, factory=ConexaoRastreada, **opcoes)
+
+def spans_recentes(limite=None, categoria=None):
+    """Spans finalizados (mais novo primeiro), opcionalmente de uma categoria"""
+    with _lock:
+        spans = list(_spans)
+    spans.reverse()
+    if categoria:
+        spans = [s for s in spans if s['categoria'] == categoria]
+    return spans[:limite] if limite else spans
+
+def _percentil(valores, p):
+    valores = sorted(valores)
+    posicao = (len(valores) - 1) * p / 100
+    inferior = int(posicao)
+    superior = min(inferior + 1, len(valores) - 1)
+    return round(valores[inferior] + (valores[superior] - valores[inferior]) * (posicao - inferior), 1)
+
+def resumo_por_nome():
+    """Chamadas, erros, tempo total e p50/p95/máximo por nome de span (maior tempo total primeiro)"""
+    grupos = defaultdict(list)
+    erros = defaultdict(int)
+    for s in spans_recentes():
+        grupos[(s['nome'], s['categoria'])].append(s['duracao_ms'])
+        erros[(s['nome'], s['categoria'])] += bool(s['erro'])
+    resumo = [
+        {
+            'nome': nome, 'categoria': categoria, 'chamadas': len(duracoes), 'erros': erros[(nome, categoria)],
+            'total_ms': round(sum(duracoes), 1), 'p50_ms': _percentil(duracoes, 50),
+            'p95_ms': _percentil(duracoes, 95), 'max_ms': round(max(duracoes), 1),
+        }
+        for (nome, categoria), duracoes in grupos.items()
+    ]
+    return sorted(resumo, key=lambda r: r['total_ms'], reverse=True)
+
+def rodadas_recentes(limite=50):
+    """
+    Spans raiz (uma rodada = um rerun do Streamlit, uma tarefa de thread...) com o tempo gasto em cada
+    categoria. Só conta o span mais externo de cada categoria, para não somar duas vezes trechos aninhados.
+    """
+    spans = spans_recentes()
+    por_id = {s['id']: s for s in spans}
+    raizes = [s for s in spans if s['pai'] is None][:limite]
+    tempos = defaultdict(lambda: defaultdict(float))
+    for s in spans:
+        if s['pai'] is None:
+            continue
+        pai = por_id.get(s['pai'])
+        if pai is None or pai['categoria'] != s['categoria']:
+            tempos[s['rodada']][s['categoria']] += s['duracao_ms']
+    linhas = []
+    for raiz in raizes:
+        linha = {
+            'rodada': raiz['id'],
+            'quando': datetime.fromtimestamp(raiz['inicio']).strftime('%d/%m/%Y %H:%M:%S'),
+            'nome': raiz['nome'],
+            'pagina': raiz['atributos'].get('pagina'),
+            'duracao_ms': round(raiz['duracao_ms'], 1),
+            'erro': raiz['erro'],
+        }
+        for categoria in CATEGORIAS_RECURSO:
+            linha[f"{categoria}_ms"] = round(tempos[raiz['id']].get(categoria, 0.0), 1)
+        linhas.append(linha)
+    return linhas
+
+def spans_da_rodada(rodada):
+    """Spans de uma rodada em ordem de início, com o nível de aninhamento para exibição em árvore"""
+    return sorted((s for s in spans_recentes() if s['rodada'] == rodada), key=lambda s: (s['inicio'], s['id']))
+
+def limpar():
+    with _lock:
+        _spans.clear()
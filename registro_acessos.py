@@ -0,0 +1,179 @@
+# Arquivo: registro_acessos.py
+# Data: 19/10/2026
+# Descrição: Registro de acessos (log_acessos) e manutenção dos agregados diários.
+# Módulo leve (só sqlite3/streamlit) para o main.py não importar o dashboard de monitoramento no login
+
+import streamlit as st
+
+from config import DB_PATH, agora_local
+from cache_dados import invalidar
+import rastreamento
+import retencao_logs
+
+def criar_conexao():
+    """Cria conexão com o banco de dados"""
+    conn = rastreamento.conectar(DB_PATH)
+    criar_tabelas(conn)
+    return conn
+
+def atualizar_rollups(conn):
+    """
+    Agrega em log_acessos_diario os registros de log_acessos ainda não processados
+    (id acima da marca d'água em rollup_controle). Retorna o número de registros agregados.
+    """
+    iniciou_transacao = not conn.in_transaction
+    if iniciou_transacao:
+        # Trava de escrita antes de ler a marca d'água para não agregar o mesmo intervalo duas vezes
+        conn.execute("BEGIN IMMEDIATE")
+    try:
+        row = conn.execute(
+            "SELECT ultimo_id FROM rollup_controle WHERE nome = 'log_acessos_diario'"
+        ).fetchone()
+        ultimo_id = marca_gravada = row[0] if row else 0
+        max_id = conn.execute("SELECT COALESCE(MAX(id), 0) FROM log_acessos").fetchone()[0]
+        if max_id < ultimo_id:
+            # Tabela esvaziada pelo arquivamento: o SQLite volta a numerar os ids a partir do maior existente
+            ultimo_id = 0
+        
+        if max_id > ultimo_id:
+            conn.execute("""
+            INSERT INTO log_acessos_diario (data_acesso, user_id, total, ultimo_acesso)
+            SELECT 
+                COALESCE(date(data_acesso), data_acesso),
+                user_id,
+                COUNT(*),
+                MAX(COALESCE(date(data_acesso), data_acesso) || ' ' || COALESCE(hora_acesso, '00:00:00'))
+            FROM log_acessos
+            WHERE id > ? AND id <= ?
+            GROUP BY 1, 2
+            ON CONFLICT (data_acesso, user_id) DO UPDATE SET
+                total = total + excluded.total,
+                ultimo_acesso = MAX(ultimo_acesso, excluded.ultimo_acesso)
+            """, (ultimo_id, max_id))
+        if max_id != marca_gravada:
+            # Também com a tabela vazia: a marca volta a 0 antes que os novos ids passem da antiga
+            conn.execute("""
+            INSERT INTO rollup_controle (nome, ultimo_id) VALUES ('log_acessos_diario', ?)
+            ON CONFLICT (nome) DO UPDATE SET ultimo_id = excluded.ultimo_id
+            """, (max_id,))
+        
+        if iniciou_transacao:
+            conn.commit()
+        return max(max_id - ultimo_id, 0)
+    except Exception:
+        if iniciou_transacao:
+            conn.rollback()
+        raise
+
+def reconstruir_rollups(conn):
+    """
+    Reconstrói log_acessos_diario a partir de log_acessos (usar após alterar ou excluir registros).
+    Dias anteriores ao registro mais antigo da tabela (meses já arquivados) são preservados.
+    """
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        conn.execute("""
+        DELETE FROM log_acessos_diario
+        WHERE data_acesso >= COALESCE((SELECT MIN(date(data_acesso)) FROM log_acessos), '9999-12-31')
+        """)
+        conn.execute("DELETE FROM rollup_controle WHERE nome = 'log_acessos_diario'")
+        atualizar_rollups(conn)
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    invalidar('log_acessos')
+
+def registrar_acesso(user_id, programa, acao):
+    """
+    Registra o acesso do usuário no banco de dados com ajuste de timezone
+    """
+    try:
+        conn = criar_conexao()
+        cursor = conn.cursor()
+        
+        # Obtém data e hora ajustadas
+        dt_adjusted = agora_local()
+        data_acesso = dt_adjusted.strftime('%Y-%m-%d')
+        hora_acesso = dt_adjusted.strftime('%H:%M:%S')
+        
+        cursor.execute("""
+        INSERT INTO log_acessos (
+            user_id,
+            data_acesso,
+            hora_acesso,
+            programa,
+            acao,
+            ts_acesso
+        )
+        VALUES (?, ?, ?, ?, ?, ?)
+        """, (user_id, data_acesso, hora_acesso, programa, acao, int(dt_adjusted.timestamp())))
+        
+        # Mantém os agregados diários na mesma transação do insert
+        atualizar_rollups(conn)
+        
+        conn.commit()
+        conn.close()
+        invalidar('log_acessos')
+        
+    except Exception as e:
+        st.error(f"Erro ao registrar acesso: {str(e)}")
+        if 'conn' in locals():
+            conn.close()
+
+def criar_tabelas(conn):
+    """Cria as tabelas necessárias se não existirem"""
+    cursor = conn.cursor()
+    
+    # Criar tabela de usuários
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS usuarios_tab (
+        id INTEGER PRIMARY KEY,
+        user_id INTEGER NOT NULL,
+        nome TEXT NOT NULL,
+        email TEXT NOT NULL,
+        senha TEXT NOT NULL,
+        perfil TEXT NOT NULL,
+        empresa TEXT
+    )
+    """)
+    
+    # Criar tabela de log de acessos
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS log_acessos (
+        id INTEGER PRIMARY KEY,
+        user_id INTEGER NOT NULL,
+        data_acesso DATE NOT NULL,
+        programa TEXT NOT NULL,
+        acao TEXT NOT NULL,
+        hora_acesso TIME,
+        ts_acesso INTEGER
+    )
+    """)
+    
+    # Bancos anteriores: adiciona e preenche ts_acesso (epoch) com seu índice
+    retencao_logs.garantir_coluna_ts(conn)
+    
+    # Índice para os recortes por data do extrato de análise
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_log_acessos_data ON log_acessos (data_acesso)")
+    
+    # Agregado diário por usuário, mantido incrementalmente por atualizar_rollups
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS log_acessos_diario (
+        data_acesso TEXT NOT NULL,
+        user_id INTEGER NOT NULL,
+        total INTEGER NOT NULL DEFAULT 0,
+        ultimo_acesso TEXT,
+        PRIMARY KEY (data_acesso, user_id)
+    ) WITHOUT ROWID
+    """)
+    
+    # Marca d'água (último id de log_acessos já agregado)
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS rollup_controle (
+        nome TEXT PRIMARY KEY,
+        ultimo_id INTEGER NOT NULL DEFAULT 0
+    )
+    """)
+    
+    conn.commit()
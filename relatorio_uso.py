@@ -0,0 +1,346 @@
+# Arquivo: relatorio_uso.py
+# Data: 19/10/2026
+# Descrição: Relatório de uso em PDF (tabelas ReportLab + gráficos matplotlib) gerado em processo separado
+# As bibliotecas pesadas são importadas apenas dentro do processo de trabalho; os PDFs ficam em cache por período
+
+import argparse
+import os
+import sqlite3
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from datetime import date, datetime, timedelta
+
+from config import DATA_DIR, DB_PATH, agora_local
+
+DIR_RELATORIOS = DATA_DIR / 'relatorios'
+
+RELATORIO_TTL = 3600                    # Segundos; vale só para períodos que incluem o dia de hoje
+RETENCAO_RELATORIOS_DIAS = 30           # PDFs mais antigos que isso são removidos pela tarefa agendada
+INTERVALO_AGENDAMENTO = 6 * 3600        # Segundos entre execuções da geração agendada
+TIMEOUT_GERACAO = 300                   # Segundos
+
+# Uma geração por vez; a thread apenas aguarda o processo de trabalho
+_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='relatorio_uso')
+_pendentes = {}
+_erros = {}     # (inicio, fim) -> mensagem da última geração que falhou
+_lock = threading.Lock()
+
+def hoje_local():
+    """Data atual no fuso de São Paulo"""
+    return agora_local().date()
+
+def caminho_relatorio(inicio, fim):
+    """Arquivo do relatório em cache para o período (datas no formato YYYY-MM-DD)"""
+    return DIR_RELATORIOS / f"relatorio_uso_{inicio}_{fim}.pdf"
+
+def relatorio_em_cache(inicio, fim):
+    """
+    Retorna o caminho do PDF em cache se ainda for válido.
+    Períodos encerrados não mudam; períodos que incluem hoje expiram após RELATORIO_TTL.
+    """
+    caminho = caminho_relatorio(inicio, fim)
+    if not caminho.exists():
+        return None
+    if date.fromisoformat(fim) < hoje_local():
+        return caminho
+    if time.time() - caminho.stat().st_mtime < RELATORIO_TTL:
+        return caminho
+    return None
+
+def executar_em_processo(inicio, fim, destino):
+    """
+    Gera o relatório em um processo Python novo (python relatorio_uso.py ...).
+    Um processo limpo não reexecuta o script do Streamlit nem carrega as páginas; só este módulo.
+    """
+    resultado = subprocess.run(
+        [sys.executable, os.path.abspath(__file__),
+         '--db', str(DB_PATH), '--inicio', inicio, '--fim', fim, '--destino', destino],
+        capture_output=True, text=True, timeout=TIMEOUT_GERACAO
+    )
+    if resultado.returncode != 0:
+        linhas = (resultado.stderr or resultado.stdout).strip().splitlines()
+        raise RuntimeError(linhas[-1] if linhas else f"código de saída {resultado.returncode}")
+    return destino
+
+def _finalizar(chave, futuro):
+    """Remove o pedido da lista de pendentes, guardando o erro se a geração falhou"""
+    with _lock:
+        if _pendentes.get(chave) is futuro:
+            _pendentes.pop(chave)
+            if futuro.exception() is not None:
+                _erros[chave] = str(futuro.exception())
+
+def solicitar_relatorio(inicio, fim, forcar=False):
+    """
+    Pede a geração do relatório do período e retorna um Future com o caminho do PDF.
+    Usa o cache quando válido e reaproveita um pedido já em andamento para o mesmo período.
+    """
+    chave = (inicio, fim)
+    with _lock:
+        if chave in _pendentes:
+            return _pendentes[chave]
+        _erros.pop(chave, None)
+        caminho = None if forcar else relatorio_em_cache(inicio, fim)
+        if caminho:
+            futuro = Future()
+            futuro.set_result(caminho)
+            return futuro
+        futuro = _executor.submit(executar_em_processo, inicio, fim, str(caminho_relatorio(inicio, fim)))
+        _pendentes[chave] = futuro
+    futuro.add_done_callback(lambda f: _finalizar(chave, f))
+    return futuro
+
+def situacao_relatorio(inicio, fim):
+    """Retorna ('pronto', caminho), ('gerando', None), ('erro', mensagem) ou ('ausente', None)"""
+    with _lock:
+        futuro = _pendentes.get((inicio, fim))
+        erro = _erros.get((inicio, fim))
+    if futuro is not None:
+        if not futuro.done():
+            return 'gerando', None
+        if futuro.exception():
+            return 'erro', str(futuro.exception())
+        return 'pronto', futuro.result()
+    if erro is not None:
+        return 'erro', erro
+    caminho = relatorio_em_cache(inicio, fim)
+    return ('pronto', caminho) if caminho else ('ausente', None)
+
+def periodos_agendados():
+    """Períodos gerados automaticamente: últimos 30 dias e mês anterior"""
+    hoje = hoje_local()
+    primeiro_dia_mes = hoje.replace(day=1)
+    fim_mes_anterior = primeiro_dia_mes - timedelta(days=1)
+    return [
+        ((hoje - timedelta(days=29)).isoformat(), hoje.isoformat()),
+        (fim_mes_anterior.replace(day=1).isoformat(), fim_mes_anterior.isoformat()),
+    ]
+
+def gerar_relatorios_agendados():
+    """Tarefa periódica: gera os relatórios padrão e remove PDFs antigos do cache"""
+    for inicio, fim in periodos_agendados():
+        solicitar_relatorio(inicio, fim).result()
+
+    limite = time.time() - RETENCAO_RELATORIOS_DIAS * 86400
+    for arquivo in DIR_RELATORIOS.glob('relatorio_uso_*.pdf'):
+        if arquivo.stat().st_mtime < limite:
+            arquivo.unlink(missing_ok=True)
+
+def agendar_relatorios():
+    """Registra a geração periódica no agendador (idempotente)"""
+    from agendador import agendar
+    agendar('relatorio_uso', INTERVALO_AGENDAMENTO, gerar_relatorios_agendados, atraso_inicial=120)
+
+# ---------------------------------------------------------------------------
+# Funções executadas no processo de trabalho
+# ---------------------------------------------------------------------------
+
+def coletar_dados_relatorio(db_path, inicio, fim):
+    """Lê os agregados do período (log_acessos_diario) e a distribuição por programa"""
+    conn = sqlite3.connect(db_path)
+    try:
+        diario = conn.execute("""
+            SELECT data_acesso, SUM(total), COUNT(*)
+            FROM log_acessos_diario
+            WHERE data_acesso BETWEEN ? AND ?
+            GROUP BY data_acesso
+            ORDER BY data_acesso
+        """, (inicio, fim)).fetchall()
+
+        empresas = conn.execute("""
+            SELECT COALESCE(u.empresa, 'Sem empresa'), SUM(d.total), COUNT(DISTINCT d.user_id)
+            FROM log_acessos_diario d
+            LEFT JOIN (SELECT user_id, MAX(empresa) as empresa FROM usuarios_tab GROUP BY user_id) u
+                ON d.user_id = u.user_id
+            WHERE d.data_acesso BETWEEN ? AND ?
+            GROUP BY 1
+            ORDER BY 2 DESC
+        """, (inicio, fim)).fetchall()
+
+        usuarios = conn.execute("""
+            SELECT COALESCE(u.nome, 'user_id ' || d.user_id), COALESCE(u.empresa, ''),
+                   SUM(d.total), MAX(d.ultimo_acesso)
+            FROM log_acessos_diario d
+            LEFT JOIN (SELECT user_id, MAX(nome) as nome, MAX(empresa) as empresa FROM usuarios_tab GROUP BY user_id) u
+                ON d.user_id = u.user_id
+            WHERE d.data_acesso BETWEEN ? AND ?
+            GROUP BY d.user_id
+            ORDER BY 3 DESC
+            LIMIT 20
+        """, (inicio, fim)).fetchall()
+
+        unicos = conn.execute("""
+            SELECT COUNT(DISTINCT user_id) FROM log_acessos_diario WHERE data_acesso BETWEEN ? AND ?
+        """, (inicio, fim)).fetchone()[0]
+
+        programas = conn.execute("""
+            SELECT programa, acao, COUNT(*)
+            FROM log_acessos
+            WHERE data_acesso >= ? AND data_acesso < date(?, '+1 day')
+            GROUP BY programa, acao
+            ORDER BY 3 DESC
+            LIMIT 20
+        """, (inicio, fim)).fetchall()
+    finally:
+        conn.close()
+
+    return {
+        'diario': diario,
+        'empresas': empresas,
+        'usuarios': usuarios,
+        'usuarios_unicos': unicos,
+        'programas': programas,
+    }
+
+def _grafico_png(desenhar, largura=10, altura=3.6):
+    """Desenha uma figura matplotlib e retorna o PNG em memória"""
+    import io
+    import matplotlib
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+
+    fig, ax = plt.subplots(figsize=(largura, altura), dpi=110)
+    desenhar(ax)
+    fig.tight_layout()
+    buffer = io.BytesIO()
+    fig.savefig(buffer, format='png')
+    plt.close(fig)
+    buffer.seek(0)
+    return buffer
+
+def gerar_relatorio_pdf(db_path, inicio, fim, destino):
+    """Gera o PDF do período em `destino` (gravação atômica) e retorna o caminho"""
+    from reportlab.lib import colors
+    from reportlab.lib.pagesizes import A4, landscape
+    from reportlab.lib.styles import getSampleStyleSheet
+    from reportlab.lib.units import cm
+    from reportlab.platypus import (
+        SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle, Image, KeepTogether
+    )
+
+    dados = coletar_dados_relatorio(db_path, inicio, fim)
+    estilos = getSampleStyleSheet()
+
+    def formatar_data(valor):
+        return datetime.strptime(valor, '%Y-%m-%d').strftime('%d/%m/%Y')
+
+    def formatar_numero(valor):
+        return f"{int(valor or 0):,}".replace(',', '.')
+
+    def tabela(cabecalho, linhas, larguras):
+        t = Table([cabecalho] + [list(map(str, linha)) for linha in linhas], colWidths=larguras, repeatRows=1)
+        t.setStyle(TableStyle([
+            ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#1f4e79')),
+            ('TEXTCOLOR', (0, 0), (-1, 0), colors.white),
+            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+            ('FONTSIZE', (0, 0), (-1, -1), 9),
+            ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.HexColor('#eef3f8')]),
+            ('GRID', (0, 0), (-1, -1), 0.25, colors.HexColor('#b0b7c0')),
+            ('ALIGN', (1, 1), (-1, -1), 'RIGHT'),
+        ]))
+        return t
+
+    # Série diária completa (dias sem acesso com zero)
+    por_dia = {d: (total, unicos) for d, total, unicos in dados['diario']}
+    dias = []
+    dia = date.fromisoformat(inicio)
+    while dia <= date.fromisoformat(fim):
+        dias.append(dia)
+        dia += timedelta(days=1)
+    acessos_dia = [por_dia.get(d.isoformat(), (0, 0))[0] for d in dias]
+    unicos_dia = [por_dia.get(d.isoformat(), (0, 0))[1] for d in dias]
+    total_acessos = sum(acessos_dia)
+
+    def desenhar_serie(ax):
+        ax.plot(dias, acessos_dia, label='Acessos', color='#1f4e79')
+        ax.plot(dias, unicos_dia, label='Usuários únicos', color='#e07b00')
+        ax.set_title('Acessos por dia')
+        ax.legend(loc='upper left')
+        ax.grid(alpha=0.3)
+        ax.figure.autofmt_xdate()
+
+    def desenhar_empresas(ax):
+        top = dados['empresas'][:10]
+        ax.bar([e[0] for e in top], [e[1] for e in top], color='#1f4e79')
+        ax.set_title('Acessos por empresa (top 10)')
+        ax.tick_params(axis='x', rotation=30)
+        ax.grid(axis='y', alpha=0.3)
+
+    elementos = [
+        Paragraph("Relatório de Uso - Youtube Analyzer", estilos['Title']),
+        Paragraph(
+            f"Período: {formatar_data(inicio)} a {formatar_data(fim)} &nbsp;&nbsp;|&nbsp;&nbsp; "
+            f"Gerado em {agora_local().strftime('%d/%m/%Y %H:%M')}",
+            estilos['Normal']
+        ),
+        Spacer(1, 0.4 * cm),
+        tabela(
+            ['Total de acessos', 'Usuários únicos', 'Empresas ativas', 'Média diária'],
+            [[
+                formatar_numero(total_acessos),
+                formatar_numero(dados['usuarios_unicos']),
+                formatar_numero(len(dados['empresas'])),
+                f"{total_acessos / max(len(dias), 1):.1f}".replace('.', ','),
+            ]],
+            [6 * cm] * 4
+        ),
+        Spacer(1, 0.5 * cm),
+        Image(_grafico_png(desenhar_serie), width=25 * cm, height=9 * cm),
+    ]
+
+    if dados['empresas']:
+        elementos += [
+            Spacer(1, 0.5 * cm),
+            Image(_grafico_png(desenhar_empresas), width=25 * cm, height=9 * cm),
+            KeepTogether([
+                Paragraph("Acessos por Empresa", estilos['Heading2']),
+                tabela(
+                    ['Empresa', 'Acessos', 'Usuários únicos'],
+                    [[e, formatar_numero(a), formatar_numero(u)] for e, a, u in dados['empresas']],
+                    [12 * cm, 5 * cm, 5 * cm]
+                ),
+            ]),
+        ]
+
+    if dados['usuarios']:
+        elementos += [
+            Paragraph("Top 20 Usuários", estilos['Heading2']),
+            tabela(
+                ['Nome', 'Empresa', 'Acessos', 'Último acesso'],
+                [[n, e, formatar_numero(a), u or ''] for n, e, a, u in dados['usuarios']],
+                [8 * cm, 7 * cm, 4 * cm, 5 * cm]
+            ),
+        ]
+
+    if dados['programas']:
+        elementos += [
+            Paragraph("Acessos por Programa e Ação", estilos['Heading2']),
+            tabela(
+                ['Programa', 'Ação', 'Acessos'],
+                [[p, a, formatar_numero(q)] for p, a, q in dados['programas']],
+                [10 * cm, 8 * cm, 5 * cm]
+            ),
+        ]
+
+    os.makedirs(os.path.dirname(destino), exist_ok=True)
+    temporario = f"{destino}.{os.getpid()}.tmp"
+    doc = SimpleDocTemplate(
+        temporario, pagesize=landscape(A4),
+        leftMargin=1.5 * cm, rightMargin=1.5 * cm, topMargin=1.5 * cm, bottomMargin=1.5 * cm,
+        title=f"Relatório de Uso {inicio} a {fim}"
+    )
+    doc.build(elementos)
+    os.replace(temporario, destino)
+    return destino
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Gera o relatório de uso em PDF")
+    parser.add_argument('--db', default=str(DB_PATH))
+    parser.add_argument('--inicio', required=True, help="Data inicial (YYYY-MM-DD)")
+    parser.add_argument('--fim', required=True, help="Data final (YYYY-MM-DD)")
+    parser.add_argument('--destino', help="Arquivo PDF de saída (padrão: cache de relatórios)")
+    args = parser.parse_args()
+    print(gerar_relatorio_pdf(args.db, args.inicio, args.fim, args.destino or str(caminho_relatorio(args.inicio, args.fim))))
@@ -0,0 +1,147 @@
+# Arquivo: retencao_logs.py
+# Data: 19/10/2026
+# Descrição: Política de retenção do log_acessos: coluna de timestamp (epoch) indexada,
+# arquivamento mensal em Parquet (zstd) dos meses antigos e manutenção periódica (ANALYZE/VACUUM)
+
+import os
+from datetime import datetime
+
+from config import DATA_DIR, DB_PATH, FUSO_HORARIO, agora_local
+import rastreamento
+
+DIR_ARQUIVO = DATA_DIR / 'arquivo_logs'
+RETENCAO_MESES = int(os.getenv('LOG_RETENCAO_MESES', '12'))  # Meses completos mantidos na tabela
+LIMIAR_VACUUM = 0.2                 # Fração de páginas livres a partir da qual o VACUUM compensa
+INTERVALO_MANUTENCAO = 24 * 3600    # Segundos
+
+# data_acesso/hora_acesso são gravadas no horário de São Paulo. Sem horário de verão desde 2019,
+# o deslocamento é fixo em -03:00 para todo o período coberto pelo log.
+SQL_TS_ACESSO = """
+    CAST(strftime('%s', date(data_acesso) || ' ' || COALESCE(hora_acesso, '00:00:00')) AS INTEGER) + 10800
+"""
+
+def garantir_coluna_ts(conn):
+    """Cria a coluna ts_acesso (epoch em segundos) e seu índice, preenchendo os registros existentes"""
+    colunas = [c[1] for c in conn.execute("PRAGMA table_info(log_acessos)")]
+    if 'ts_acesso' not in colunas:
+        with conn:
+            conn.execute("ALTER TABLE log_acessos ADD COLUMN ts_acesso INTEGER")
+            conn.execute(f"UPDATE log_acessos SET ts_acesso = {SQL_TS_ACESSO}")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_log_acessos_ts ON log_acessos (ts_acesso)")
+
+def preencher_ts_pendentes(conn):
+    """Preenche ts_acesso de registros gravados sem ela (ex.: importações). Retorna a quantidade"""
+    with conn:
+        return conn.execute(f"UPDATE log_acessos SET ts_acesso = {SQL_TS_ACESSO} WHERE ts_acesso IS NULL").rowcount
+
+def inicio_mes_epoch(ano, mes):
+    """Epoch do primeiro instante do mês no horário de São Paulo"""
+    return int(datetime(ano, mes, 1, tzinfo=FUSO_HORARIO).timestamp())
+
+def limite_retencao(meses=RETENCAO_MESES, agora=None):
+    """(ano, mes) do mês mais antigo que permanece na tabela"""
+    agora = agora or agora_local()
+    total = agora.year * 12 + (agora.month - 1) - meses
+    return total // 12, total % 12 + 1
+
+def meses_para_arquivar(conn, meses=RETENCAO_MESES):
+    """Meses (ano, mes) com registros anteriores ao limite de retenção"""
+    ano, mes = limite_retencao(meses)
+    rows = conn.execute("""
+        SELECT DISTINCT strftime('%Y-%m', ts_acesso - 10800, 'unixepoch')
+        FROM log_acessos
+        WHERE ts_acesso < ?
+    """, (inicio_mes_epoch(ano, mes),)).fetchall()
+    return sorted(tuple(int(p) for p in r[0].split('-')) for r in rows if r[0])
+
+def caminho_arquivo(ano, mes):
+    """Arquivo Parquet do mês"""
+    return DIR_ARQUIVO / f"log_acessos_{ano:04d}-{mes:02d}.parquet"
+
+def arquivar_mes(conn, ano, mes):
+    """
+    Exporta os registros do mês para Parquet (zstd) e os remove da tabela.
+    Se o arquivo do mês já existir (registros tardios), os dados são mesclados por id.
+    A exclusão só acontece depois de conferida a quantidade de linhas gravadas.
+    """
+    import pandas as pd
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.parquet as pq
+
+    inicio = inicio_mes_epoch(ano, mes)
+    fim = inicio_mes_epoch(ano + mes // 12, mes % 12 + 1)
+    df = pd.read_sql_query(
+        "SELECT * FROM log_acessos WHERE ts_acesso >= ? AND ts_acesso < ? ORDER BY id",
+        conn, params=(inicio, fim)
+    )
+    if df.empty:
+        return 0
+
+    tabela = pa.Table.from_pandas(df, preserve_index=False)
+    destino = caminho_arquivo(ano, mes)
+    if destino.exists():
+        existente = pq.read_table(destino)
+        existente = existente.filter(pc.invert(pc.is_in(existente['id'], value_set=tabela['id'])))
+        tabela = pa.concat_tables([existente, tabela], promote_options='permissive').sort_by('id')
+
+    os.makedirs(DIR_ARQUIVO, exist_ok=True)
+    temporario = destino.with_suffix('.parquet.tmp')
+    pq.write_table(tabela, temporario, compression='zstd')
+    if pq.read_metadata(temporario).num_rows != tabela.num_rows:
+        temporario.unlink(missing_ok=True)
+        raise RuntimeError(f"Falha ao conferir o arquivo de {ano:04d}-{mes:02d}")
+    os.replace(temporario, destino)
+
+    with conn:
+        conn.execute("DELETE FROM log_acessos WHERE ts_acesso >= ? AND ts_acesso < ?", (inicio, fim))
+    return len(df)
+
+def arquivar_meses_antigos(conn, meses=RETENCAO_MESES):
+    """Arquiva todos os meses fora da retenção. Retorna {'AAAA-MM': registros}"""
+    return {
+        f"{ano:04d}-{mes:02d}": arquivar_mes(conn, ano, mes)
+        for ano, mes in meses_para_arquivar(conn, meses)
+    }
+
+def manutencao_banco(conn, limiar_vacuum=LIMIAR_VACUUM):
+    """Atualiza as estatísticas do otimizador e faz VACUUM quando há muitas páginas livres"""
+    conn.execute("ANALYZE")
+    paginas = conn.execute("PRAGMA page_count").fetchone()[0]
+    livres = conn.execute("PRAGMA freelist_count").fetchone()[0]
+    vacuum = bool(paginas) and livres / paginas >= limiar_vacuum
+    if vacuum:
+        conn.execute("VACUUM")
+    return {'paginas': paginas, 'paginas_livres': livres, 'vacuum': vacuum}
+
+def listar_arquivos():
+    """Arquivos mensais já gerados, com quantidade de registros e tamanho"""
+    import pyarrow.parquet as pq
+    return [
+        {
+            'mes': arquivo.stem.replace('log_acessos_', ''),
+            'registros': pq.read_metadata(arquivo).num_rows,
+            'tamanho_kb': round(arquivo.stat().st_size / 1024, 1),
+        }
+        for arquivo in sorted(DIR_ARQUIVO.glob('log_acessos_*.parquet'))
+    ]
+
+def executar_retencao(db_path=None):
+    """Tarefa completa: garante a coluna, preenche pendentes, arquiva meses antigos e faz a manutenção"""
+    conn = rastreamento.conectar(db_path or DB_PATH, timeout=30)
+    try:
+        garantir_coluna_ts(conn)
+        preenchidos = preencher_ts_pendentes(conn)
+        # Registros ainda não agregados entram no log_acessos_diario antes de sair da tabela
+        from registro_acessos import atualizar_rollups
+        atualizar_rollups(conn)
+        arquivados = arquivar_meses_antigos(conn)
+        manutencao = manutencao_banco(conn)
+    finally:
+        conn.close()
+    return {'ts_preenchidos': preenchidos, 'arquivados': arquivados, **manutencao}
+
+def agendar_retencao():
+    """Registra a retenção diária no agendador (idempotente)"""
+    from agendador import agendar
+    agendar('retencao_logs', INTERVALO_MANUTENCAO, executar_retencao, atraso_inicial=300)
@@ -0,0 +1,57 @@
+# Arquivo: conftest.py
+# Data: 19/10/2026
+# Descrição: Configuração comum dos testes: raiz do projeto no sys.path e servidor HTTP local
+# que serve páginas gravadas em tests/fixtures no lugar do YouTube
+
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import pytest
+
+RAIZ = Path(__file__).resolve().parent.parent
+FIXTURES = Path(__file__).resolve().parent / 'fixtures'
+
+if str(RAIZ) not in sys.path:
+    sys.path.insert(0, str(RAIZ))
+
+def ler_fixture(nome):
+    return (FIXTURES / nome).read_bytes()
+
+class _Manipulador(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        caminho = self.path.split('?')[0]
+        self.server.pedidos.append(caminho)
+        codigo, tipo, corpo = self.server.rotas.get(caminho, (404, 'text/plain', b'not found'))
+        self.send_response(codigo)
+        self.send_header('Content-Type', tipo)
+        self.send_header('Content-Length', str(len(corpo)))
+        self.send_header('ETag', '"fixture"')
+        self.end_headers()
+        self.wfile.write(corpo)
+
+class _Servidor(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def handle_error(self, request, client_address):
+        # O cliente fecha a conexão ao parar de ler a página no meio: esperado nos testes
+        if not isinstance(sys.exc_info()[1], (ConnectionResetError, BrokenPipeError)):
+            super().handle_error(request, client_address)
+
+@pytest.fixture
+def servidor_local():
+    """Servidor em porta livre; preencha servidor.rotas[caminho] = (status, content-type, corpo)"""
+    servidor = _Servidor(('127.0.0.1', 0), _Manipulador)
+    servidor.rotas = {}
+    servidor.pedidos = []
+    servidor.url = f"http://127.0.0.1:{servidor.server_port}"
+    threading.Thread(target=servidor.serve_forever, daemon=True).start()
+    yield servidor
+    servidor.shutdown()
+    servidor.server_close()
@@ -0,0 +1,77 @@
+# Arquivo: test_crude.py
+# Data: 19/10/2026
+# Descrição: Navegador de tabelas do CRUD em tabelas com rowid e WITHOUT ROWID
+
+import sqlite3
+
+import pandas as pd
+import pytest
+
+from paginas import crude
+
+@pytest.fixture
+def banco(tmp_path, monkeypatch):
+    db_path = tmp_path / 'crud.db'
+    conn = sqlite3.connect(db_path)
+    conn.executescript("""
+        CREATE TABLE diario (data_acesso TEXT NOT NULL, user_id INTEGER NOT NULL, total INTEGER NOT NULL,
+                             PRIMARY KEY (data_acesso, user_id)) WITHOUT ROWID;
+        CREATE TABLE itens (id INTEGER PRIMARY KEY, nome TEXT);
+        CREATE TABLE codigos (codigo TEXT PRIMARY KEY, nome TEXT);
+        INSERT INTO diario VALUES ('2026-10-02', 1, 5), ('2026-10-01', 2, 3), ('2026-10-01', 1, 7);
+        INSERT INTO itens (nome) VALUES ('a'), ('b');
+        INSERT INTO codigos VALUES ('x', 'a');
+    """)
+    conn.commit()
+    monkeypatch.setattr(crude, 'DB_PATH', db_path)
+    crude.chave_tabela.clear()
+    crude.obter_esquema.clear()
+    yield conn
+    conn.close()
+
+def test_chave_tabela(banco):
+    assert crude.chave_tabela('diario') == ('data_acesso', 'user_id')
+    assert crude.chave_tabela('itens') is None
+    assert crude.chave_tabela('codigos') is None
+
+def test_pagina_e_exportacao_sem_rowid(banco):
+    esquema, chave = crude.obter_esquema('diario'), crude.chave_tabela('diario')
+
+    df = crude.carregar_pagina(banco, 'diario', esquema, '', '', (None, 'ASC'), 1, 2, chave=chave)
+    assert df[['data_acesso', 'user_id']].values.tolist() == [['2026-10-01', 1], ['2026-10-01', 2]]
+
+    query, params = crude.montar_consulta('diario', esquema, '', '', ('total', 'DESC'), com_rowid=False, chave=chave)
+    assert pd.read_sql_query(query, banco, params=params)['total'].tolist() == [7, 5, 3]
+
+def test_alteracoes_sem_rowid(banco):
+    esquema, chave = crude.obter_esquema('diario'), crude.chave_tabela('diario')
+    df = crude.carregar_pagina(banco, 'diario', esquema, '', '', (None, 'ASC'), 1, 50, chave=chave)
+
+    resultado = crude.aplicar_alteracoes(banco, 'diario', esquema, df, {
+        'edited_rows': {0: {'total': 70}, 2: {'user_id': 9}},
+        'deleted_rows': [1],
+        'added_rows': [{'data_acesso': '2026-10-03', 'user_id': 1, 'total': 1}],
+    }, chave=chave)
+
+    assert resultado == {'atualizados': 2, 'incluidos': 1, 'excluidos': 1}
+    assert banco.execute("SELECT * FROM diario ORDER BY data_acesso, user_id").fetchall() == [
+        ('2026-10-01', 1, 70), ('2026-10-02', 9, 5), ('2026-10-03', 1, 1)
+    ]
+
+def test_conflito_sem_rowid_nao_grava(banco):
+    esquema, chave = crude.obter_esquema('diario'), crude.chave_tabela('diario')
+    df = crude.carregar_pagina(banco, 'diario', esquema, '', '', (None, 'ASC'), 1, 50, chave=chave)
+    banco.execute("UPDATE diario SET total = 8 WHERE data_acesso = '2026-10-01' AND user_id = 1")
+    banco.commit()
+
+    with pytest.raises(ValueError, match="Conflito"):
+        crude.aplicar_alteracoes(banco, 'diario', esquema, df, {'edited_rows': {0: {'total': 70}}}, chave=chave)
+    assert banco.execute("SELECT total FROM diario WHERE user_id = 1 AND data_acesso = '2026-10-01'").fetchone() == (8,)
+
+def test_alteracoes_com_rowid(banco):
+    esquema = crude.obter_esquema('itens')
+    df = crude.carregar_pagina(banco, 'itens', esquema, '', '', (None, 'ASC'), 1, 50)
+    assert df.index.tolist() == [1, 2]
+
+    crude.aplicar_alteracoes(banco, 'itens', esquema, df, {'edited_rows': {1: {'nome': 'B'}}, 'deleted_rows': [0]})
+    assert banco.execute("SELECT id, nome FROM itens").fetchall() == [(2, 'B')]
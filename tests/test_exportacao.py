@@ -0,0 +1,131 @@
+# Arquivo: test_exportacao.py
+# Data: 19/10/2026
+# Descrição: Exportação em lotes lida de volta em cada formato
+
+import io
+import json
+import sqlite3
+
+import pytest
+
+import exportacao
+
+def test_jsonl_em_varios_lotes_tem_um_registro_por_linha(tmp_path):
+    db_path = tmp_path / 'exportacao.db'
+    conn = sqlite3.connect(db_path)
+    conn.execute("CREATE TABLE itens (id INTEGER PRIMARY KEY, nome TEXT, valor REAL)")
+    conn.executemany("INSERT INTO itens (nome, valor) VALUES (?, ?)",
+                     [(f"item ção {i}", i / 4 if i % 3 else None) for i in range(10)])
+    conn.commit()
+    conn.close()
+
+    arquivo, linhas = exportacao.exportar_consulta(
+        "SELECT * FROM itens ORDER BY id", [], {'id': 'INTEGER', 'nome': 'TEXT', 'valor': 'REAL'},
+        'jsonl', db_path=db_path, tamanho_lote=3
+    )
+    conteudo = arquivo.read().decode('utf-8')
+    arquivo.close()
+
+    assert linhas == 10
+    assert conteudo.endswith('\n') and not conteudo.endswith('\n\n')
+    registros = [json.loads(linha) for linha in conteudo.split('\n')[:-1]]
+    assert [r['id'] for r in registros] == list(range(1, 11))
+    assert registros[1] == {'id': 2, 'nome': 'item ção 1', 'valor': 0.25}
+    assert registros[0]['valor'] is None
+
+def test_jsonl_sem_resultados_gera_arquivo_vazio(tmp_path):
+    db_path = tmp_path / 'vazio.db'
+    conn = sqlite3.connect(db_path)
+    conn.execute("CREATE TABLE itens (id INTEGER PRIMARY KEY, nome TEXT)")
+    conn.close()
+
+    arquivo, linhas = exportacao.exportar_consulta(
+        "SELECT * FROM itens", [], {'id': 'INTEGER', 'nome': 'TEXT'}, 'jsonl', db_path=db_path
+    )
+    assert (linhas, arquivo.read()) == (0, b'')
+    arquivo.close()
+
+def criar_banco_misto(tmp_path):
+    """Coluna sem tipo com NULL/real/texto e coluna REAL com texto só no segundo lote"""
+    db_path = tmp_path / 'misto.db'
+    conn = sqlite3.connect(db_path)
+    conn.execute("CREATE TABLE medidas (id INTEGER PRIMARY KEY, nome TEXT, v, valor REAL, quantidade INTEGER)")
+    conn.executemany("INSERT INTO medidas (nome, v, valor, quantidade) VALUES (?, ?, ?, ?)", [
+        ("média", None, 1.5, 10),
+        ("ação", 1.5, 2.25, None),
+        ("x", 'x', 'n/d', 3),
+    ])
+    conn.commit()
+    conn.close()
+    return db_path
+
+TIPOS_MISTO = {'id': 'INTEGER', 'nome': 'TEXT', 'v': '', 'valor': 'REAL', 'quantidade': 'INTEGER'}
+
+def exportar_misto(tmp_path, formato):
+    arquivo, linhas = exportacao.exportar_consulta(
+        "SELECT * FROM medidas ORDER BY id", [], TIPOS_MISTO, formato,
+        db_path=criar_banco_misto(tmp_path), tamanho_lote=2
+    )
+    conteudo = arquivo.read()
+    arquivo.close()
+    assert linhas == 3
+    return conteudo
+
+def test_parquet_com_tipos_mistos_usa_um_esquema_para_todos_os_lotes(tmp_path):
+    pq = pytest.importorskip('pyarrow.parquet')
+    tabela = pq.read_table(io.BytesIO(exportar_misto(tmp_path, 'parquet')))
+
+    assert {campo.name: str(campo.type) for campo in tabela.schema} == {
+        'id': 'int64', 'nome': 'string', 'v': 'string', 'valor': 'string', 'quantidade': 'int64',
+    }
+    assert tabela.to_pylist() == [
+        {'id': 1, 'nome': 'média', 'v': None, 'valor': '1.5', 'quantidade': 10},
+        {'id': 2, 'nome': 'ação', 'v': '1.5', 'valor': '2.25', 'quantidade': None},
+        {'id': 3, 'nome': 'x', 'v': 'x', 'valor': 'n/d', 'quantidade': 3},
+    ]
+
+def test_parquet_mantem_tipos_numericos_declarados(tmp_path):
+    pq = pytest.importorskip('pyarrow.parquet')
+    arquivo, _ = exportacao.exportar_consulta(
+        "SELECT id, valor, quantidade FROM medidas WHERE id < 3 ORDER BY id", [], TIPOS_MISTO, 'parquet',
+        db_path=criar_banco_misto(tmp_path), tamanho_lote=1
+    )
+    tabela = pq.read_table(arquivo)
+    arquivo.close()
+
+    assert [str(campo.type) for campo in tabela.schema] == ['int64', 'double', 'int64']
+    assert tabela.column('valor').to_pylist() == [1.5, 2.25]
+
+def test_csv_com_tipos_mistos(tmp_path):
+    conteudo = exportar_misto(tmp_path, 'csv').decode('utf-8')
+
+    assert conteudo.splitlines() == [
+        'id,nome,v,valor,quantidade',
+        '1,média,,1.5,10',
+        '2,ação,1.5,2.25,',
+        '3,x,x,n/d,3',
+    ]
+
+def test_tsv_br_com_virgula_decimal_em_cp1252(tmp_path):
+    conteudo = exportar_misto(tmp_path, 'tsv_br').decode('cp1252')
+
+    assert conteudo.splitlines() == [
+        'id\tnome\tv\tvalor\tquantidade',
+        '1\tmédia\t\t1,5\t10',
+        '2\tação\t1.5\t2,25\t',
+        '3\tx\tx\tn/d\t3',
+    ]
+
+def test_tsv_br_recusa_caractere_fora_do_cp1252(tmp_path):
+    db_path = tmp_path / 'emoji.db'
+    conn = sqlite3.connect(db_path)
+    conn.execute("CREATE TABLE videos (titulo TEXT)")
+    conn.executemany("INSERT INTO videos VALUES (?)", [("Aula de gestão",), ("Resumo 🚀",)])
+    conn.commit()
+    conn.close()
+
+    with pytest.raises(ValueError, match="CSV"):
+        exportacao.exportar_consulta("SELECT titulo FROM videos", [], {'titulo': 'TEXT'}, 'tsv_br', db_path=db_path)
+    arquivo, _ = exportacao.exportar_consulta("SELECT titulo FROM videos", [], {'titulo': 'TEXT'}, 'csv', db_path=db_path)
+    assert "Resumo 🚀" in arquivo.read().decode('utf-8')
+    arquivo.close()
@@ -0,0 +1,140 @@
+# Arquivo: test_importador.py
+# Data: 19/10/2026
+# Descrição: Motor de importação com um arquivo de elementos gravado em cp1252 (tests/fixtures/forms_elementos.txt)
+
+import shutil
+import sqlite3
+import tempfile
+
+import pandas as pd
+import pytest
+
+import importador
+from conftest import FIXTURES
+
+ARQUIVO = FIXTURES / 'forms_elementos.txt'
+
+def linhas(db_path, tabela):
+    conn = sqlite3.connect(db_path)
+    try:
+        return conn.execute(
+            f"SELECT name_element, user_id, value_element FROM {tabela} ORDER BY name_element"
+        ).fetchall()
+    finally:
+        conn.close()
+
+def test_cli_com_jobs_importa_duas_tabelas_em_paralelo(tmp_path, capsys):
+    for tabela in ('forms_insumos', 'forms_resultados'):
+        shutil.copy(ARQUIVO, tmp_path / importador.ESPECIFICACOES_TABELAS[tabela]['arquivo'])
+    db_path = tmp_path / 'importacao.db'
+
+    codigo = importador.main(['--table', 'forms_insumos', '--table', 'forms_resultados',
+                              '--dir', str(tmp_path), '--jobs', '2', '--db', str(db_path)])
+
+    saida = capsys.readouterr().out
+    assert codigo == 0, saida
+    assert saida.count('[OK]') == 2
+    esperado = [('cor', 7, 0.0), ('renda', None, 1234.56), ('taxa', 7, 0.0)]
+    assert linhas(db_path, 'forms_insumos') == esperado
+    assert linhas(db_path, 'forms_resultados') == esperado
+
+def copiar_fixture(tmp_path):
+    """Cópia do arquivo: o relatório de erros é gravado ao lado dele"""
+    return shutil.copy(ARQUIVO, tmp_path / ARQUIVO.name)
+
+def test_linha_descartada_nao_gera_aviso_de_valor(tmp_path):
+    arquivo = copiar_fixture(tmp_path)
+    resumo = importador.importar_arquivo('forms_insumos', arquivo, dry_run=True, progresso=lambda msg: None)
+
+    assert (resumo['lidas'], resumo['validas'], resumo['descartadas']) == (5, 3, 2)
+    # Linha 4 (invalido): user_id não numérico e value_element inválido; só o descarte entra no relatório
+    erros = pd.read_csv(resumo['relatorio_erros'])
+    assert erros.loc[erros['linha'] == 4, 'erro'].tolist() == ["user_id não numérico"]
+    assert resumo['avisos'] == 1
+
+def elementos(db_path, tabela='forms_insumos'):
+    conn = sqlite3.connect(db_path)
+    try:
+        return conn.execute(f"""
+            SELECT name_element, type_element, math_element, msg_element, value_element,
+                   select_element, str_element, user_id
+            FROM {tabela} ORDER BY name_element
+        """).fetchall()
+    finally:
+        conn.close()
+
+def test_replace_aplica_regras_e_grava_relatorio_de_erros(tmp_path):
+    arquivo = copiar_fixture(tmp_path)
+    db_path = tmp_path / 'banco.db'
+    conn = sqlite3.connect(db_path)
+    conn.execute(importador.sql_criar_tabela('forms_insumos', importador.obter_especificacao('forms_insumos')))
+    conn.execute("CREATE INDEX idx_insumos_nome ON forms_insumos (name_element)")
+    conn.execute("INSERT INTO forms_insumos (name_element, type_element, user_id) VALUES ('antigo', 'number', 1)")
+    conn.commit()
+    conn.close()
+
+    resumo = importador.importar_arquivo('forms_insumos', arquivo, db_path=db_path, progresso=lambda msg: None)
+
+    assert (resumo['incluidas'], resumo['atualizadas'], resumo['descartadas'], resumo['avisos']) == (3, 0, 2, 1)
+    assert elementos(db_path) == [
+        # Selectbox: math '0,0', valor 0.0 (o 99 do arquivo é ignorado) e opções sem espaços/aspas
+        ('cor', 'selectbox', '0,0', 'Escolha', 0.0, 'Azul|Verde', 'Azul', 7),
+        # Decimal brasileiro com milhar; user_id vazio vira NULL
+        ('renda', 'number', '', 'Renda média', 1234.56, '', '', None),
+        # Texto cp1252 decodificado; valor inválido gravado como 0 (com aviso)
+        ('taxa', 'number', '', 'Ação', 0.0, '', '', 7),
+    ]
+    conn = sqlite3.connect(db_path)
+    objetos = {nome for (nome,) in conn.execute("SELECT name FROM sqlite_master WHERE name LIKE '%forms_insumos%' OR name LIKE 'idx_%'")}
+    conn.close()
+    # A sombra virou a tabela e o índice da tabela antiga foi recriado
+    assert objetos == {'forms_insumos', 'idx_insumos_nome'}
+
+    erros = pd.read_csv(resumo['relatorio_erros'])
+    assert erros[['linha', 'coluna', 'descartada']].values.tolist() == [
+        [4, 'user_id', True], [5, 'value_element', False], [6, 'name_element', True]]
+
+def test_upsert_atualiza_pela_chave_e_append_acrescenta(tmp_path):
+    arquivo = copiar_fixture(tmp_path)
+    db_path = tmp_path / 'banco.db'
+    importador.importar_arquivo('forms_insumos', arquivo, db_path=db_path, progresso=lambda msg: None)
+    conn = sqlite3.connect(db_path)
+    conn.execute("UPDATE forms_insumos SET value_element = 1")
+    conn.execute("INSERT INTO forms_insumos (name_element, type_element, user_id) VALUES ('extra', 'number', 7)")
+    conn.commit()
+    conn.close()
+
+    resumo = importador.importar_arquivo('forms_insumos', arquivo, modo='upsert', db_path=db_path, progresso=lambda msg: None)
+
+    # A chave (name_element, user_id) casa também com user_id NULL ('renda')
+    assert (resumo['atualizadas'], resumo['incluidas']) == (3, 0)
+    assert linhas(db_path, 'forms_insumos') == [
+        ('cor', 7, 0.0), ('extra', 7, None), ('renda', None, 1234.56), ('taxa', 7, 0.0)]
+
+    resumo = importador.importar_arquivo('forms_insumos', arquivo, modo='append', db_path=db_path, progresso=lambda msg: None)
+    assert (resumo['atualizadas'], resumo['incluidas']) == (0, 3)
+    assert len(linhas(db_path, 'forms_insumos')) == 7
+
+def test_replace_com_conferencia_divergente_mantem_tabela_antiga(tmp_path, monkeypatch):
+    arquivo = copiar_fixture(tmp_path)
+    db_path = tmp_path / 'banco.db'
+    conn = sqlite3.connect(db_path)
+    conn.execute(importador.sql_criar_tabela('forms_insumos', importador.obter_especificacao('forms_insumos')))
+    conn.execute("INSERT INTO forms_insumos (name_element, type_element, value_element, user_id) VALUES ('antigo', 'number', 5, 1)")
+    conn.commit()
+    conn.close()
+    dir_spool = tmp_path / 'spool'
+    dir_spool.mkdir()
+    monkeypatch.setattr(tempfile, 'tempdir', str(dir_spool))
+    # Estatísticas da preparação diferentes do que a sombra recebe
+    soma_original = importador.soma_conferencia
+    monkeypatch.setattr(importador, 'soma_conferencia', lambda valores: soma_original(valores) + 1)
+
+    with pytest.raises(RuntimeError, match="Conferência de forms_insumos__sombra falhou"):
+        importador.importar_arquivo('forms_insumos', arquivo, db_path=db_path, progresso=lambda msg: None)
+
+    assert linhas(db_path, 'forms_insumos') == [('antigo', 1, 5.0)]
+    conn = sqlite3.connect(db_path)
+    assert conn.execute("SELECT name FROM sqlite_master WHERE name LIKE '%sombra%'").fetchall() == []
+    conn.close()
+    assert list(dir_spool.iterdir()) == []
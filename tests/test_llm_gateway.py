@@ -0,0 +1,40 @@
+# Arquivo: test_llm_gateway.py
+# Data: 19/10/2026
+# Descrição: Registro em llm_usage das chamadas recusadas pelo limite de tokens
+
+import sqlite3
+
+import pytest
+
+import llm_gateway
+
+class BaldeEsgotado:
+    """Limite de tokens sem vaga: reservar() desiste como o BaldeTokens após LIMITE_ESPERA_VAGA"""
+    def __init__(self):
+        self.ajustes = []
+
+    def reservar(self, quantidade):
+        raise TimeoutError("Limite de uso da API de LLM: tempo de espera esgotado")
+
+    def ajustar(self, diferenca):
+        self.ajustes.append(diferenca)
+
+def test_chamada_recusada_pelo_limite_de_tokens_fica_no_ledger(tmp_path, monkeypatch):
+    db_path = tmp_path / 'llm.db'
+    balde = BaldeEsgotado()
+    monkeypatch.setattr(llm_gateway, 'DB_PATH', db_path)
+    monkeypatch.setattr(llm_gateway, '_tabela_criada', False)
+    monkeypatch.setattr(llm_gateway, '_estado', {'tokens': balde, 'cliente': None, 'pausa_ate': 0.0})
+
+    with pytest.raises(TimeoutError):
+        llm_gateway.completar([{'role': 'user', 'content': 'oi'}], 'gpt-4o-mini', origem='teste', user_id=7)
+
+    # Nada foi reservado, então nada é devolvido ao balde
+    assert balde.ajustes == []
+    conn = sqlite3.connect(db_path)
+    try:
+        linhas = conn.execute("SELECT funcionalidade, user_id, tentativas, status FROM llm_usage").fetchall()
+    finally:
+        conn.close()
+    assert linhas == [('teste', 7, 0, 'TimeoutError')]
+    assert llm_gateway.ultimas_chamadas(1)[0]['status'] == 'TimeoutError'
@@ -0,0 +1,69 @@
+# Arquivo: test_pipeline_estado.py
+# Data: 19/10/2026
+# Descrição: Reivindicação atômica e sincronização da pipeline_state com a youtube_tab
+
+import sqlite3
+import threading
+
+import pytest
+
+import pipeline_estado
+
+@pytest.fixture
+def db_path(tmp_path):
+    """Banco com dois vídeos cadastrados antes da pipeline_state existir"""
+    caminho = tmp_path / 'banco.db'
+    conn = sqlite3.connect(caminho)
+    conn.execute("""
+        CREATE TABLE youtube_tab (you_id INTEGER PRIMARY KEY AUTOINCREMENT, titulo TEXT, url TEXT, autor TEXT,
+                                  user_id INTEGER, word_key TEXT, resumo TEXT, sumario TEXT)
+    """)
+    conn.executemany("INSERT INTO youtube_tab (titulo, user_id, word_key) VALUES (?, 1, ?)",
+                     [('Capturado', 'mp4_mp3_frames'), ('Novo', '')])
+    conn.commit()
+    conn.close()
+    return str(caminho)
+
+def status(db_path, you_id):
+    conn = sqlite3.connect(db_path)
+    try:
+        return dict(conn.execute("SELECT etapa, status FROM pipeline_state WHERE you_id = ?", (you_id,)).fetchall())
+    finally:
+        conn.close()
+
+def test_mesmo_video_so_e_reivindicado_uma_vez(db_path):
+    assert pipeline_estado.reivindicar_video(1, 'transcricao', trabalhador='a', somente_pendente=True, db_path=db_path)
+    assert not pipeline_estado.reivindicar_video(1, 'transcricao', trabalhador='b', somente_pendente=True, db_path=db_path)
+
+    # Dois trabalhadores disputando a mesma fila ao mesmo tempo: o vídeo pendente vai para um só
+    largada = threading.Barrier(2)
+    recebidos = {}
+
+    def trabalhador(nome):
+        largada.wait()
+        recebidos[nome] = pipeline_estado.reivindicar('captura', limite=1, trabalhador=nome, db_path=db_path)
+    threads = [threading.Thread(target=trabalhador, args=(nome,)) for nome in ('a', 'b')]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert sorted(recebidos.values()) == [[], [2]]
+    assert status(db_path, 2)['captura'] == 'executando'
+
+def test_videos_novos_entram_na_fila_sem_sincronizar_a_cada_conexao(db_path, monkeypatch):
+    chamadas = []
+    sincronizar_original = pipeline_estado.sincronizar
+    monkeypatch.setattr(pipeline_estado, 'sincronizar', lambda conn: chamadas.append(1) or sincronizar_original(conn))
+
+    assert pipeline_estado.reivindicar('captura', limite=5, db_path=db_path) == [2]
+    conn = sqlite3.connect(db_path)
+    conn.execute("INSERT INTO youtube_tab (titulo, user_id, word_key) VALUES ('Cadastrado depois', 1, '')")
+    conn.execute("DELETE FROM youtube_tab WHERE you_id = 1")
+    conn.commit()
+    conn.close()
+
+    assert pipeline_estado.reivindicar('captura', limite=5, db_path=db_path) == [3]
+    assert status(db_path, 3) == {'captura': 'executando', 'transcricao': 'aguardando', 'analise': 'aguardando'}
+    assert status(db_path, 1) == {}
+    assert len(chamadas) == 1
@@ -0,0 +1,39 @@
+# Arquivo: test_rastreamento.py
+# Data: 19/10/2026
+# Descrição: Spans das conexões abertas por rastreamento.conectar e tempo por categoria das rodadas
+
+import pytest
+
+import rastreamento
+
+@pytest.fixture(autouse=True)
+def buffer_limpo(monkeypatch):
+    monkeypatch.setattr(rastreamento, 'ATIVO', True)
+    rastreamento.limpar()
+    yield
+    rastreamento.limpar()
+
+def test_conexao_compartilhada_registra_consultas_e_commit(tmp_path):
+    conn = rastreamento.conectar(tmp_path / 'rastreado.db')
+    with rastreamento.span('rerun'):
+        conn.execute("CREATE TABLE t (x INTEGER)")
+        conn.executemany("INSERT INTO t VALUES (?)", [(1,), (2,)])
+        conn.commit()
+        assert conn.execute("SELECT SUM(x) FROM t").fetchone() == (3,)
+    conn.close()
+
+    nomes = [s['nome'] for s in rastreamento.spans_recentes(categoria='db')]
+    assert sorted(nomes) == ['commit', 'sql', 'sql', 'sql.lote']
+    assert rastreamento.spans_recentes()[0]['nome'] == 'rerun'
+
+def test_acerto_de_cache_nao_conta_como_tempo_de_banco():
+    with rastreamento.span('rerun'):
+        with rastreamento.span('leitura', 'cache'):
+            pass
+        rastreamento.registrar('leitura', 'cache', 40.0)
+        with rastreamento.span('leitura', 'cache'):
+            rastreamento.registrar('sql', 'db', 5.0)
+
+    rodada = rastreamento.rodadas_recentes()[0]
+    assert rodada['db_ms'] == 5.0
+    assert 'cache_ms' not in rodada
@@ -0,0 +1,48 @@
+# Arquivo: test_registro_acessos.py
+# Data: 19/10/2026
+# Descrição: Agregado diário incremental (marca d'água de rollup_controle) do log_acessos
+
+import sqlite3
+
+import registro_acessos
+
+def registrar(conn, dia, quantidade, user_id=1):
+    conn.executemany(
+        "INSERT INTO log_acessos (user_id, data_acesso, hora_acesso, programa, acao) VALUES (?, ?, '10:00:00', 'teste', 'abrir')",
+        [(user_id, dia)] * quantidade
+    )
+    conn.commit()
+
+def totais(conn):
+    return conn.execute("SELECT data_acesso, user_id, total FROM log_acessos_diario ORDER BY 1, 2").fetchall()
+
+def marca_dagua(conn):
+    return conn.execute("SELECT ultimo_id FROM rollup_controle WHERE nome = 'log_acessos_diario'").fetchone()[0]
+
+def test_marca_dagua_volta_a_zero_quando_log_acessos_e_esvaziado(tmp_path):
+    conn = sqlite3.connect(tmp_path / 'banco.db')
+    registro_acessos.criar_tabelas(conn)
+    registrar(conn, '2026-10-01', 3)
+    assert registro_acessos.atualizar_rollups(conn) == 3
+    assert marca_dagua(conn) == 3
+
+    # Tabela esvaziada (arquivamento): os ids recomeçam do 1
+    conn.execute("DELETE FROM log_acessos")
+    conn.commit()
+    assert registro_acessos.atualizar_rollups(conn) == 0
+    assert marca_dagua(conn) == 0
+
+    # Mais registros do que a marca antiga antes da próxima agregação: nenhum pode ficar de fora
+    registrar(conn, '2026-10-02', 5)
+    assert registro_acessos.atualizar_rollups(conn) == 5
+
+    # Esvaziada de novo sem agregação no meio: o maior id (2) fica abaixo da marca (5)
+    conn.execute("DELETE FROM log_acessos")
+    conn.commit()
+    registrar(conn, '2026-10-03', 2)
+    assert registro_acessos.atualizar_rollups(conn) == 2
+
+    # Os agregados dos dias já esvaziados são preservados
+    assert totais(conn) == [('2026-10-01', 1, 3), ('2026-10-02', 1, 5), ('2026-10-03', 1, 2)]
+    assert registro_acessos.atualizar_rollups(conn) == 0
+    conn.close()
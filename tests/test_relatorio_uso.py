@@ -0,0 +1,42 @@
+# Arquivo: test_relatorio_uso.py
+# Data: 19/10/2026
+# Descrição: Situação do relatório em PDF quando a geração em segundo plano falha
+
+import time
+
+import pytest
+
+import relatorio_uso
+
+def aguardar(inicio, fim, limite=5):
+    fim_espera = time.time() + limite
+    while time.time() < fim_espera:
+        situacao = relatorio_uso.situacao_relatorio(inicio, fim)
+        if situacao[0] != 'gerando':
+            return situacao
+        time.sleep(0.02)
+    pytest.fail("a geração não terminou")
+
+def test_falha_na_geracao_fica_como_erro_ate_novo_pedido(tmp_path, monkeypatch):
+    monkeypatch.setattr(relatorio_uso, 'DIR_RELATORIOS', tmp_path)
+
+    def falhar(inicio, fim, destino):
+        raise RuntimeError("reportlab não instalado")
+    monkeypatch.setattr(relatorio_uso, 'executar_em_processo', falhar)
+
+    futuro = relatorio_uso.solicitar_relatorio('2020-01-01', '2020-01-31')
+    with pytest.raises(RuntimeError):
+        futuro.result(timeout=5)
+    assert aguardar('2020-01-01', '2020-01-31') == ('erro', "reportlab não instalado")
+    # O erro continua visível depois que o pedido sai da lista de pendentes
+    time.sleep(0.05)
+    assert relatorio_uso.situacao_relatorio('2020-01-01', '2020-01-31') == ('erro', "reportlab não instalado")
+
+    # Um novo pedido limpa o erro anterior
+    def gerar(inicio, fim, destino):
+        open(destino, 'wb').close()
+        return destino
+    monkeypatch.setattr(relatorio_uso, 'executar_em_processo', gerar)
+    relatorio_uso.solicitar_relatorio('2020-01-01', '2020-01-31').result(timeout=5)
+    situacao, caminho = aguardar('2020-01-01', '2020-01-31')
+    assert situacao == 'pronto' and str(caminho).endswith('relatorio_uso_2020-01-01_2020-01-31.pdf')
@@ -0,0 +1,162 @@
+# Arquivo: test_url_metadados.py
+# Data: 19/10/2026
+# Descrição: Coleta de metadados (oEmbed + leitura parcial da página) contra páginas gravadas em tests/fixtures
+
+import sqlite3
+
+import pytest
+import requests
+
+from conftest import ler_fixture
+from paginas import url_metadados
+
+CAMPOS_PAGINA = ['sumario', 'duration', 'language']
+
+@pytest.fixture
+def bytes_lidos(monkeypatch):
+    """Sessão sem cabeçalhos extras que conta os bytes efetivamente consumidos da resposta"""
+    contagem = {'bytes': 0}
+    sessao = requests.Session()
+
+    def contar(resposta, *args, **kwargs):
+        iter_original = resposta.iter_content
+
+        def iter_contando(*a, **k):
+            for bloco in iter_original(*a, **k):
+                contagem['bytes'] += len(bloco)
+                yield bloco
+        resposta.iter_content = iter_contando
+    sessao.hooks['response'].append(contar)
+    monkeypatch.setattr(url_metadados, 'SESSAO_HTTP', sessao)
+    return contagem
+
+def test_pagina_com_todos_os_campos_no_head_para_de_ler(servidor_local, bytes_lidos):
+    corpo = ler_fixture('watch_completo.html') + b'<div>' + b'x' * 1_000_000 + b'</div></body></html>'
+    servidor_local.rotas['/watch'] = (200, 'text/html; charset=utf-8', corpo)
+
+    resultado = url_metadados.ler_metadados_pagina(f"{servidor_local.url}/watch?v=abcdefghijk",
+                                                   ['titulo', 'autor'] + CAMPOS_PAGINA)
+
+    assert resultado == {
+        'etag': '"fixture"',
+        'titulo': 'Gestão de Pessoas na Prática',
+        'autor': 'Canal Capital Humano',
+        'sumario': 'Como montar equipes & dar feedback.',
+        'duration': 62.5,
+        'language': 'pt',
+    }
+    assert bytes_lidos['bytes'] <= url_metadados.TAMANHO_BLOCO
+
+def test_buscar_oembed(servidor_local, monkeypatch):
+    servidor_local.rotas['/oembed'] = (200, 'application/json', ler_fixture('oembed.json'))
+    monkeypatch.setattr(url_metadados, 'OEMBED_URL', f"{servidor_local.url}/oembed")
+
+    assert url_metadados.buscar_oembed("https://www.youtube.com/watch?v=abcdefghijk") == {
+        'titulo': 'Gestão de Pessoas na Prática',
+        'autor': 'Canal Capital Humano',
+    }
+
+def test_buscar_oembed_indisponivel(servidor_local, monkeypatch):
+    monkeypatch.setattr(url_metadados, 'OEMBED_URL', f"{servidor_local.url}/oembed")
+    assert url_metadados.buscar_oembed("https://www.youtube.com/watch?v=abcdefghijk") == {}
+
+def test_pagina_de_consentimento_usa_yt_dlp(servidor_local, monkeypatch):
+    servidor_local.rotas['/watch'] = (200, 'text/html; charset=utf-8', ler_fixture('consentimento.html'))
+    monkeypatch.setattr(url_metadados, 'OEMBED_URL', f"{servidor_local.url}/oembed")  # 404
+    chamadas = []
+
+    def yt_dlp_gravado(url):
+        chamadas.append(url)
+        return {'titulo': 'Título pelo yt-dlp', 'autor': 'Autor pelo yt-dlp', 'duration': 12.0}
+    monkeypatch.setattr(url_metadados, 'buscar_metadados_yt_dlp', yt_dlp_gravado)
+
+    coletor = url_metadados.YouTubeMetadados.__new__(url_metadados.YouTubeMetadados)
+    url = f"{servidor_local.url}/watch?v=abcdefghijk"
+    metadados = coletor.coletar_metadados(url)
+
+    assert chamadas == [url]
+    assert metadados['titulo'] == 'Título pelo yt-dlp'
+    assert metadados['autor'] == 'Autor pelo yt-dlp'
+    assert metadados['duration'] == 12.0
+
+def test_leitura_limitada_a_2_mb(servidor_local, bytes_lidos):
+    corpo = b'<html><head><title>Sem metadados</title></head><body>' + b'<p>texto</p>' * 500_000 + b'</body></html>'
+    assert len(corpo) > 2 * url_metadados.LIMITE_BYTES_PAGINA
+    servidor_local.rotas['/watch'] = (200, 'text/html; charset=utf-8', corpo)
+
+    resultado = url_metadados.ler_metadados_pagina(f"{servidor_local.url}/watch?v=abcdefghijk", CAMPOS_PAGINA)
+
+    assert 'sumario' not in resultado
+    assert url_metadados.LIMITE_BYTES_PAGINA <= bytes_lidos['bytes'] < (
+        url_metadados.LIMITE_BYTES_PAGINA + url_metadados.TAMANHO_BLOCO)
+
+@pytest.mark.parametrize('ordenacao', list(url_metadados.ORDENACOES_GRID))
+def test_paginacao_keyset_percorre_titulos_nulos(ordenacao):
+    conn = sqlite3.connect(':memory:')
+    conn.execute("""
+        CREATE TABLE youtube_tab (you_id INTEGER PRIMARY KEY AUTOINCREMENT, titulo TEXT, url TEXT, autor TEXT,
+                                  user_id INTEGER, word_key TEXT, duration REAL, language TEXT)
+    """)
+    titulos = ['B', None, 'A', None, 'C', 'A', None]
+    conn.executemany("INSERT INTO youtube_tab (titulo, url, autor, user_id) VALUES (?, '', ?, 1)",
+                     [(t, None if i % 2 else f"autor {i}") for i, t in enumerate(titulos)])
+    url_metadados.garantir_indices_youtube(conn)
+    coluna = url_metadados.ORDENACOES_GRID[ordenacao][0]
+
+    vistos, cursor = [], None
+    while True:
+        df = url_metadados.carregar_pagina_videos(conn, 1, '', '', ordenacao, cursor, 2)
+        pagina = df.head(2)
+        vistos.extend(int(v) for v in pagina['you_id'])
+        if len(df) <= 2:
+            break
+        ultima = pagina.iloc[-1]
+        cursor = (ultima['chave_ordem'], int(ultima['you_id'])) if coluna else (int(ultima['you_id']),)
+
+    assert sorted(vistos) == list(range(1, len(titulos) + 1))
+    assert len(vistos) == len(titulos)
+
+def banco_videos():
+    """youtube_tab em memória com um vídeo já cadastrado (sem video_id, como antes da coluna)"""
+    conn = sqlite3.connect(':memory:')
+    conn.execute("""
+        CREATE TABLE youtube_tab (you_id INTEGER PRIMARY KEY AUTOINCREMENT, titulo TEXT NOT NULL, url TEXT NOT NULL,
+                                  autor TEXT, user_id INTEGER, resumo TEXT, insights TEXT, contraintuitivo TEXT,
+                                  word_key TEXT, tools TEXT, sumario TEXT, assunto TEXT, duration REAL, language TEXT)
+    """)
+    conn.execute("INSERT INTO youtube_tab (titulo, url, user_id) VALUES ('Aula', 'https://www.youtube.com/watch?v=abcdefghijk', 1)")
+    url_metadados.garantir_coluna_video_id(conn)
+    return conn
+
+@pytest.mark.parametrize('url', [
+    'https://youtu.be/abcdefghijk',
+    'https://www.youtube.com/watch?v=abcdefghijk&t=42s',
+    'https://m.youtube.com/watch?feature=share&v=abcdefghijk',
+    'https://www.youtube.com/shorts/abcdefghijk',
+])
+def test_mesmo_video_por_outra_url_e_repetido(url, monkeypatch):
+    conn = banco_videos()
+    assert conn.execute("SELECT video_id FROM youtube_tab").fetchone() == ('abcdefghijk',)
+    coletor = url_metadados.YouTubeMetadados.__new__(url_metadados.YouTubeMetadados)
+    coletor.conn, coletor.cursor = conn, conn.cursor()
+    monkeypatch.setattr(coletor, 'obter_metadados', lambda u: pytest.fail("não deveria consultar o YouTube"))
+
+    with pytest.raises(ValueError, match="já está registrado"):
+        coletor.adicionar_video(url, 1)
+
+    # Outro usuário pode cadastrar o mesmo vídeo
+    monkeypatch.setattr(coletor, 'obter_metadados', lambda u: {
+        'titulo': 'Aula', 'autor': 'Canal', 'sumario': '', 'duration': 60.0, 'language': 'pt'})
+    monkeypatch.setattr(url_metadados, 'invalidar', lambda *args: None)
+    coletor.adicionar_video(url, 2)
+    assert conn.execute("SELECT user_id, video_id FROM youtube_tab ORDER BY you_id").fetchall() == [
+        (1, 'abcdefghijk'), (2, 'abcdefghijk')]
+
+def test_editor_recusa_url_de_video_ja_cadastrado(monkeypatch):
+    conn = banco_videos()
+    monkeypatch.setattr(url_metadados, 'invalidar', lambda *args: None)
+    alteracoes = {'added_rows': [{'titulo': 'De novo', 'url': 'https://youtu.be/abcdefghijk?si=x'}]}
+
+    with pytest.raises(ValueError, match="já está registrado"):
+        url_metadados.salvar_alteracoes_editor(conn, None, alteracoes, 1)
+    assert conn.execute("SELECT COUNT(*) FROM youtube_tab").fetchone() == (1,)